@@ -1,3 +1,6 @@
 # API package
 from .client import APIClient
-from .endpoints import Endpoints 
\ No newline at end of file
+from .endpoints import Endpoints 
+from .user_cache import UserInfoCache
+from .transport import RequestsTransport, RecordingTransport, ReplayTransport, CaptureExhausted
+from .records import UserRecord, MobRecord, MobState, ExploreRecord, AttackRecord, decode_user, decode_explore, decode_attack
@@ -2,7 +2,6 @@
 API client for Ruby King game
 """
 
-import time
 import logging
 from typing import Dict, Any, Optional
 import requests
@@ -10,17 +9,43 @@ import requests
 from Found_bot.config.settings import Settings
 from Found_bot.config.token import GAME_TOKEN
 from Found_bot.api.endpoints import Endpoints
+from Found_bot.api.transport import RequestsTransport, RecordingTransport, ReplayTransport
+from Found_bot.api.user_cache import UserInfoCache
+from Found_bot.utils.clock import clock
 
 logger = logging.getLogger(__name__)
 
 class APIClient:
     """HTTP client for making requests to Ruby King API"""
     
-    def __init__(self):
+    def __init__(self, transport=None):
+        """
+        Args:
+            transport: Request transport (defaults to live HTTP, recorded to
+                Settings.API_RECORD_PATH or replayed from Settings.API_REPLAY_PATH)
+        """
         self.session = requests.Session()
         self.session.headers.update(Settings.DEFAULT_HEADERS)
         self.token = GAME_TOKEN
         self._last_request_time = 0  # Throttle: время последнего запроса
+        self.transport = transport or self._default_transport()
+        self.user_cache = UserInfoCache()
+
+    def _default_transport(self):
+        """Live, recording or replay transport by settings"""
+        if Settings.API_REPLAY_PATH:
+            if Settings.VIRTUAL_CLOCK is not False and not clock.virtual:
+                clock.use_virtual()  # Запись проигрывается без реальных ожиданий
+            return ReplayTransport(Settings.API_REPLAY_PATH)
+        transport = RequestsTransport(self.session)
+        if Settings.API_RECORD_PATH:
+            return RecordingTransport(transport, Settings.API_RECORD_PATH)
+        return transport
+
+    @property
+    def offline(self) -> bool:
+        """True when responses come from a replay capture (no throttle needed)"""
+        return isinstance(self.transport, ReplayTransport)
         
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, 
                      retries: int = None, headers: Optional[dict] = None) -> Dict[str, Any]:
@@ -45,32 +70,20 @@ class APIClient:
         url = Endpoints.get_url_with_token(endpoint, self.token)
         
         # --- THROTTLE: ограничение частоты запросов ---
-        now = time.time()
+        now = clock.time()
         elapsed = now - self._last_request_time
-        if elapsed < 1:
-            time.sleep(1 - elapsed)
-        self._last_request_time = time.time()
+        if elapsed < 1 and not self.offline:
+            clock.sleep(1 - elapsed)
+        self._last_request_time = clock.time()
         # --- конец throttle ---
         
         for attempt in range(retries + 1):
             try:
                 logger.debug(f"Making {method} request to {endpoint} (attempt {attempt + 1})")
                 
-                if method.upper() == "POST":
-                    response = self.session.post(
-                        url,
-                        json=data,
-                        timeout=Settings.REQUEST_TIMEOUT,
-                        headers=headers
-                    )
-                else:
-                    response = self.session.get(
-                        url, 
-                        timeout=Settings.REQUEST_TIMEOUT
-                    )
-                
-                response.raise_for_status()
-                result = response.json()
+                response = self.transport.send(method, endpoint, url, data, headers,
+                                               Settings.REQUEST_TIMEOUT)
+                result = response.body
                 
                 # DEBUG: Log the response structure
                 logger.debug(f"API Response type: {type(result)}")
@@ -88,6 +101,7 @@ class APIClient:
                     logger.warning(f"Unexpected response type: {type(result)}")
                     result = {}
                 
+                self.user_cache.observe(endpoint, result)
                 logger.debug(f"Request successful: {endpoint}")
                 return result
                 
@@ -101,7 +115,8 @@ class APIClient:
                 # Exponential backoff
                 delay = Settings.RETRY_DELAY * (2 ** attempt)
                 logger.info(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
+                if not self.offline:
+                    clock.sleep(delay)
     
     def explore_territory(self, loco: str = "loco_0", direction: str = "north") -> Dict[str, Any]:
         """
@@ -228,25 +243,37 @@ class APIClient:
         result = self._make_request("POST", Endpoints.USE_SKILL, data, headers=headers)
         return result
 
-    def get_user_info(self) -> Dict[str, Any]:
+    def get_user_info(self, fresh: bool = False) -> Dict[str, Any]:
         """
-        Get user information
+        Get user information (cached for Settings.USER_INFO_CACHE_TTL)
         
+        Args:
+            fresh: Skip user info cache
+            
         Returns:
             Response data with user information
         """
         logger.info("Getting user info...")
+        cached = None if fresh else self.user_cache.get(Endpoints.USER_INFO)
+        if cached is not None:
+            return cached
         result = self._make_request("GET", Endpoints.USER_INFO)
         return result
     
-    def get_user_city_info(self) -> Dict[str, Any]:
+    def get_user_city_info(self, fresh: bool = False) -> Dict[str, Any]:
         """
         Get user information from city (for initialization)
         
+        Args:
+            fresh: Skip user info cache
+            
         Returns:
             Response data with user information from city
         """
         logger.info("Getting user city info...")
+        cached = None if fresh else self.user_cache.get(Endpoints.USER_CITY)
+        if cached is not None:
+            return cached
         result = self._make_request("GET", Endpoints.USER_CITY)
         return result
     
@@ -300,11 +327,13 @@ class APIClient:
         """
         data = {"position": position}
         token = self.token
+        endpoint = Endpoints.CHANGE_MAIN_GEO
         url = f"https://ruby-king.ru/api/farm/change-main-geo?name={token}"
         headers = self.get_custom_headers(token)
         logger.info(f"[API] change_main_geo: {url} data={data}")
-        resp = self.session.post(url, json=data, headers=headers)
-        return resp.json()
+        self.user_cache.invalidate()  # Позиция меняется - geo и квадраты в кэше устаревают
+        resp = self.transport.send("POST", endpoint, url, data, headers, check_status=False)
+        return resp.body
 
     def change_geo(self, loco: str, direction: str, type_action: str = "change") -> dict:
         """
@@ -312,11 +341,13 @@ class APIClient:
         """
         data = {"loco": loco, "direction": direction, "typeAction": type_action}
         token = self.token
+        endpoint = Endpoints.CHANGE_GEO
         url = f"https://ruby-king.ru/api/farm/change-geo?name={token}"
         headers = self.get_custom_headers(token)
         logger.info(f"[API] change_geo: {url} data={data}")
-        resp = self.session.post(url, json=data, headers=headers)
-        return resp.json()
+        self.user_cache.invalidate()  # Позиция меняется - geo и квадраты в кэше устаревают
+        resp = self.transport.send("POST", endpoint, url, data, headers, check_status=False)
+        return resp.body
 
     def reset_geo(self) -> dict:
         """
@@ -324,11 +355,13 @@ class APIClient:
         """
         data = {"loco": "", "direction": "", "typeAction": "reset"}
         token = self.token
+        endpoint = Endpoints.CHANGE_GEO
         url = f"https://ruby-king.ru/api/farm/change-geo?name={token}"
         headers = self.get_custom_headers(token)
         logger.info(f"[API] reset_geo: {url} data={data}")
-        resp = self.session.post(url, json=data, headers=headers)
-        return resp.json()
+        self.user_cache.invalidate()  # Позиция меняется - geo и квадраты в кэше устаревают
+        resp = self.transport.send("POST", endpoint, url, data, headers, check_status=False)
+        return resp.body
 
     def complete_bats_event(self) -> Dict[str, Any]:
         """
@@ -345,8 +378,10 @@ class APIClient:
         """
         data = {"square": square}
         token = self.token
+        endpoint = Endpoints.CHANGE_SQUARE
         url = f"https://ruby-king.ru/api/farm/change-square?name={token}"
         headers = self.get_custom_headers(token)
         logger.info(f"[API] change_square: {url} data={data}")
-        resp = self.session.post(url, json=data, headers=headers)
-        return resp.json() 
\ No newline at end of file
+        self.user_cache.invalidate()  # Позиция меняется - geo и квадраты в кэше устаревают
+        resp = self.transport.send("POST", endpoint, url, data, headers, check_status=False)
+        return resp.body 
\ No newline at end of file
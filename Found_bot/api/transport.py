@@ -0,0 +1,204 @@
+"""
+API transports - live HTTP, capture recording and offline replay
+
+Формат записи (JSONL, .gz - со сжатием), одна строка на запрос:
+    {"t": 12.345, "dt": 0.210, "method": "POST", "endpoint": "/user/vesna/...",
+     "data": {...}, "status": 200, "date": "...", "body": {...}}
+Неудавшийся запрос пишется с "error" вместо "status"/"body".
+Токен (в URL, query-строке и заголовках) в запись не попадает.
+"""
+
+import gzip
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Deque, Tuple
+import requests
+
+from Found_bot.utils.clock import clock
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PARAM = re.compile(r'name=[^&\s\'"]+')
+
+
+class CaptureExhausted(RuntimeError):
+    """Replay capture has no recorded response for the request"""
+
+
+class TransportResponse:
+    """Decoded response of one request"""
+
+    def __init__(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+def capture_endpoint(endpoint: str) -> str:
+    """Endpoint as stored in capture (query string with token is dropped)"""
+    return endpoint.split('?', 1)[0]
+
+
+def open_capture(path: str, mode: str):
+    """Open capture file as text, gzip-compressed if path ends with .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def read_capture(path: str):
+    """Iterate over capture records"""
+    with open_capture(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class RequestsTransport:
+    """Live HTTP transport over requests.Session"""
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+
+    def send(self, method: str, endpoint: str, url: str, data: Optional[Dict] = None,
+             headers: Optional[dict] = None, timeout: Optional[float] = None,
+             check_status: bool = True) -> TransportResponse:
+        """
+        Send request
+
+        Args:
+            check_status: Raise on HTTP error status
+
+        Raises:
+            requests.RequestException: On network or HTTP error
+        """
+        if method.upper() == "POST":
+            response = self.session.post(url, json=data, timeout=timeout, headers=headers)
+        else:
+            response = self.session.get(url, timeout=timeout)
+        if check_status:
+            response.raise_for_status()
+        return TransportResponse(response.status_code, response.json(), dict(response.headers))
+
+
+class RecordingTransport:
+    """Wraps a transport and writes every request/response pair to a capture"""
+
+    def __init__(self, inner, capture_path: str):
+        """
+        Args:
+            inner: Transport that performs requests
+            capture_path: JSONL capture path (.gz for compression)
+        """
+        self.inner = inner
+        self.capture_path = capture_path
+        self._file = open_capture(capture_path, 'a')
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.records = 0
+
+    def send(self, method: str, endpoint: str, url: str, data: Optional[Dict] = None,
+             headers: Optional[dict] = None, timeout: Optional[float] = None,
+             check_status: bool = True) -> TransportResponse:
+        started = time.monotonic()
+        record = {
+            't': round(started - self._started, 4),
+            'method': method.upper(),
+            'endpoint': capture_endpoint(endpoint),
+            'data': data,
+        }
+        try:
+            response = self.inner.send(method, endpoint, url, data, headers, timeout, check_status)
+        except Exception as e:
+            record['dt'] = round(time.monotonic() - started, 4)
+            # В тексте ошибки бывает полный URL с токеном
+            record['error'] = _TOKEN_PARAM.sub('name=***', f"{type(e).__name__}: {e}")
+            self._write(record)
+            raise
+        record['dt'] = round(time.monotonic() - started, 4)
+        record['status'] = response.status
+        record['date'] = response.headers.get('Date')
+        record['body'] = response.body
+        self._write(record)
+        return response
+
+    def _write(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ReplayTransport:
+    """Serves recorded responses without network, deterministically"""
+
+    def __init__(self, capture_path: str, realtime: bool = False, strict: bool = False):
+        """
+        Args:
+            capture_path: Capture written by RecordingTransport
+            realtime: Sleep recorded request duration before answering
+            strict: Require requests in exactly the recorded order. Otherwise the
+                next recorded response of the same method and endpoint is used.
+        """
+        self.capture_path = capture_path
+        self.realtime = realtime
+        self.strict = strict
+        self._records = list(read_capture(capture_path))
+        self._position = 0
+        self._by_request: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = {}
+        for record in self._records:
+            self._by_request.setdefault((record['method'], record['endpoint']), deque()).append(record)
+        self._lock = threading.Lock()
+        self.served = 0
+        logger.info(f"Replay capture loaded: {len(self._records)} records from {capture_path}")
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _next_record(self, method: str, endpoint: str) -> Dict[str, Any]:
+        with self._lock:
+            if self.strict:
+                if self._position >= len(self._records):
+                    raise CaptureExhausted(f"Capture ended before {method} {endpoint}")
+                record = self._records[self._position]
+                if (record['method'], record['endpoint']) != (method, endpoint):
+                    raise CaptureExhausted(
+                        f"Request #{self._position} is {method} {endpoint}, "
+                        f"capture has {record['method']} {record['endpoint']}"
+                    )
+                self._position += 1
+            else:
+                queue = self._by_request.get((method, endpoint))
+                if not queue:
+                    raise CaptureExhausted(f"No recorded responses left for {method} {endpoint}")
+                record = queue.popleft()
+            self.served += 1
+            return record
+
+    def send(self, method: str, endpoint: str, url: str, data: Optional[Dict] = None,
+             headers: Optional[dict] = None, timeout: Optional[float] = None,
+             check_status: bool = True) -> TransportResponse:
+        """
+        Answer with next recorded response
+
+        Raises:
+            CaptureExhausted: No recorded response for request
+            requests.ConnectionError: Request failed when it was recorded
+        """
+        record = self._next_record(method.upper(), capture_endpoint(endpoint))
+        if self.realtime and record.get('dt'):
+            clock.sleep(record['dt'])
+        if 'error' in record:
+            raise requests.ConnectionError(f"Replayed failure: {record['error']}")
+        headers = {'Date': record['date']} if record.get('date') else {}
+        return TransportResponse(record.get('status', 200), record.get('body'), headers)
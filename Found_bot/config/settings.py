@@ -12,6 +12,10 @@ class Settings:
     REQUEST_TIMEOUT = 30
     MAX_RETRIES = 3
     RETRY_DELAY = 2  # Base delay for exponential backoff
+    API_RECORD_PATH = None  # write request/response capture here (.jsonl or .jsonl.gz)
+    API_REPLAY_PATH = None  # serve responses from this capture instead of the server
+    VIRTUAL_CLOCK = None  # True/False to force; None - virtual clock only when replaying
+    USER_INFO_CACHE_TTL = 10.0  # seconds a user info response is reused (mutating calls reset it)
     
     # Game Mechanics
     ATTACK_COOLDOWN = 5.1  # seconds between attacks
@@ -29,8 +33,63 @@ class Settings:
     FORCE_END_COMBAT = True  # Force end combat if stuck
     COMBAT_RETRY_LIMIT = 10  # Maximum retries in combat
     
+    # City Trip Configuration
+    CITY_TRIP_POTION_TARGET = 300  # potions of each kind to have after a city trip
+    CITY_TRIP_HISTORY = 20  # trip reports kept for timing
+    CITY_TRIP_REQUEST_INTERVAL = 2.0  # min seconds before travel requests of a trip (client does not throttle travel)
+    
+    # Potion Forecast Configuration
+    POTION_FORECAST_MIN_KILLS = 20  # kills before consumption rates are trusted (square rates, else overall)
+    POTION_FORECAST_MIN_STOCK = 3  # refill when either potion kind drops to this count
+    POTION_FORECAST_SAFETY_KILLS = 15  # refill when stock lasts fewer kills than this
+    POTION_FORECAST_ALIGN_KILLS = 150  # refill early at a rest if stock lasts fewer kills than this
+    POTION_FORECAST_MIN_RATE = 0.01  # potions per kill assumed for an unused kind
+    POTION_STOCK_CAP = 1000  # max potions of each kind after a trip
+    POTION_GOLD_RESERVE = 500  # gold left unspent by potion purchases
+    
+    # Inventory Policy Configuration
+    INVENTORY_ITEMS_DB_PATH = "world_map_viewer/data/items-database.json"  # item prices and weights
+    INVENTORY_FORECAST_MIN_KILLS = 20  # kills before drop weight per kill is trusted
+    INVENTORY_SAFETY_KILLS = 10  # go selling when backpack fills in fewer kills than this
+    INVENTORY_ALIGN_KILLS = 100  # sell early with another trip if backpack fills in fewer kills than this
+    INVENTORY_SELL_HORIZON_KILLS = 500  # max kills of drop to free backpack room for
+    INVENTORY_EQUIPMENT_WEIGHT = 5  # weight of equipment unknown to inventory data and items database
+    INVENTORY_KEEP_PREFIXES = ("recipe_", "res_w_")  # recipes and crafting pieces are never sold (with recipe ingredients)
+    
+    # Route Configuration
+    ROUTE_LEVEL_WINDOW = 9  # farm squares with mobs up to N levels below player
+    ROUTE_MOB_LEVEL_CAP = 20  # squares with higher min mob level are never farmed (None - no cap)
+    ROUTE_COST_MAIN_GEO = 2.0  # seconds to leave a location for another (change_main_geo round trip)
+    ROUTE_COST_GEO = 3.0  # seconds of change_geo to another side (1 s request throttle + 2 s pause after it)
+    ROUTE_COST_SQUARE = 2.0  # seconds of change_square (1 s request throttle + 1 s pause after it)
+    ROUTE_KILL_SECONDS = 20.0  # farming seconds per kill assumed when sizing squares
+    ROUTE_TRAVEL_SHARE = 0.05  # max share of farming time spent moving to the next point
+    ROUTE_MIN_KILLS_PER_SQUARE = 10
+    ROUTE_MAX_KILLS_PER_SQUARE = 100
+    
+    # Square Bandit Configuration
+    SQUARE_BANDIT_PATH = "logs/square_stats_{name}.json"  # per-character square yield stats (None - keep in memory)
+    SQUARE_BANDIT_GOLD_WEIGHT = 0.5  # exp worth of one gold in square reward
+    SQUARE_BANDIT_POTION_GOLD = 10  # gold cost of one potion in square reward
+    SQUARE_BANDIT_DECAY = 0.8  # weight kept by older visits of a square on each new visit
+    SQUARE_BANDIT_EXPLORATION = 1.0  # UCB width in reward standard deviations
+    
+    # Leveling Planner Configuration
+    LEVELING_PLAN_PATH = "logs/leveling_plan.json"  # farm squares per level from the planner (route table without it)
+    PLANNER_MAX_LEVELS_ABOVE = 0  # squares with min mob level above player level + N are not planned
+    PLANNER_GRAY_LEVELS = 10  # mobs more than N levels below player give reduced exp
+    PLANNER_GRAY_FACTOR = 0.33  # exp share of such mobs
+    PLANNER_EXP_PER_MOB_LEVEL = 8.0  # exp per kill per mob level until stats are recorded
+    PLANNER_SECONDS_POWER = 0.5  # seconds per kill ~ (mob level / player level) ** N until fitted
+    PLANNER_PRIOR_KILLS = 20  # kills before square's own seconds per kill outweigh the model
+    PLANNER_ROUTE_SIZE = 12  # max points of a planned route
+    PLANNER_MIN_ROUTE_SIZE = 4  # planned route keeps at least N sides for the square bandit
+    PLANNER_RATE_TOLERANCE = 0.8  # route keeps sides yielding at least this share of the best one
+    
     # UI Configuration
     UI_REFRESH_RATE = 1  # seconds between UI updates
+    REST_UI_REFRESH_RATE = 5  # seconds between UI updates while resting
+    LOOP_IDLE_SLEEP = 0.1  # seconds to idle when no action was possible
     PROGRESS_BAR_WIDTH = 50
     
     # Logging Configuration
@@ -5,13 +5,15 @@ Mob data management
 import logging
 from typing import Dict, Any, Optional, List
 
+from api.records import MobRecord, MobState, AttackRecord
+
 logger = logging.getLogger(__name__)
 
 class MobGroup:
     """Group of mobs in a single battle"""
     
-    def __init__(self, mobs_data: List[Dict[str, Any]]):
-        self.mobs = [Mob(mob_data) for mob_data in mobs_data]
+    def __init__(self, mob_records: List[MobRecord]):
+        self.mobs = [Mob(record) for record in mob_records]
         self.current_target_index = 0
     
     def get_current_target(self) -> Optional['Mob']:
@@ -75,38 +77,21 @@ class MobGroup:
             })
         return mobs_data
     
-    def update_from_combat_response(self, response_data: Dict[str, Any]):
-        """Update all mobs from combat response"""
-        # Обновляем всех мобов в группе, но mobTargetHP применяется только к текущему мобу
+    def update_from_attack(self, record: AttackRecord):
+        """Update all mobs from decoded attack response"""
+        # mobTargetHP применяется только к текущему мобу, остальные - по массиву mobs
         current_target = self.get_current_target()
         
         for mob in self.mobs:
-            if mob == current_target:
-                # Для текущего моба используем полную логику обновления
-                mob.update_from_combat_response(response_data)
+            if mob is current_target:
+                mob.update_from_attack(record)
             else:
-                # Для остальных мобов используем только данные из массива mobs
-                mobs_array = response_data.get('mobs', [])
-                if isinstance(mobs_array, list):
-                    for mob_info in mobs_array:
-                        if mob_info.get('farmId') == mob.farm_id:
-                            old_hp = mob.hp
-                            if 'stats' in mob_info and 'userCurrentHP' in mob_info['stats']:
-                                hp_data = mob_info['stats']['userCurrentHP']
-                                if isinstance(hp_data, list) and len(hp_data) > 0:
-                                    mob.hp = hp_data[0]
-                                else:
-                                    mob.hp = hp_data if isinstance(hp_data, (int, float)) else mob.hp
-                            elif 'hp' in mob_info:
-                                mob.hp = mob_info.get('hp', mob.hp)
-                            
-                            if mob.hp <= 0:
-                                mob.is_alive = False
-                            else:
-                                mob.is_alive = True
-                            
-                            logger.debug(f"Other mob HP updated: {mob.name} HP {old_hp} -> {mob.hp}/{mob.max_hp}")
-                            break
+                state = record.mobs.get(mob.farm_id)
+                if state is not None and state.hp is not None:
+                    old_hp = mob.hp
+                    mob.hp = state.hp
+                    mob.is_alive = mob.hp > 0
+                    logger.debug(f"Other mob HP updated: {mob.name} HP {old_hp} -> {mob.hp}/{mob.max_hp}")
     
     def get_display_data(self) -> List[Dict[str, Any]]:
         """Get display data for all mobs"""
@@ -115,7 +100,7 @@ class MobGroup:
 class Mob:
     """Mob enemy data and management"""
     
-    def __init__(self, mob_data: Optional[Dict[str, Any]] = None):
+    def __init__(self, record: Optional[MobRecord] = None):
         self.id = ""
         self.farm_id = ""  # farmId для атаки
         self.name = "Unknown"
@@ -124,119 +109,51 @@ class Mob:
         self.level = 1
         self.is_alive = True
         
-        if mob_data:
-            self.update_from_data(mob_data)
+        if record:
+            self.update_from_data(record)
     
-    def update_from_data(self, mob_data: Dict[str, Any]):
+    def update_from_data(self, record: MobRecord):
         """
-        Update mob data from API response
+        Update mob data from decoded explore response
         
         Args:
-            mob_data: Mob data from API response
+            record: Mob record
         """
-        self.id = mob_data.get('id', self.id)
-        self.farm_id = mob_data.get('farmId', self.farm_id)  # farmId для атаки
-        self.name = mob_data.get('name', self.name)
-        
-        # Пытаемся извлечь HP из различных возможных мест
-        # В ответе исследования территории HP находится в stats.userCurrentHP
-        
-        # Проверяем, есть ли HP в stats.userCurrentHP
-        stats = mob_data.get('stats', {})
-        if 'userCurrentHP' in stats:
-            hp_data = stats.get('userCurrentHP', [100, 0])
-            # HP приходит в формате [текущее_HP, 0], берем первый элемент
-            if isinstance(hp_data, list) and len(hp_data) > 0:
-                self.hp = hp_data[0]
-                self.max_hp = hp_data[0]  # max_hp обычно равен текущему HP при инициализации
-            else:
-                self.hp = hp_data if isinstance(hp_data, (int, float)) else 100
-                self.max_hp = self.hp
-            logger.debug(f"Mob HP from stats.userCurrentHP: {self.name} HP {self.hp}/{self.max_hp}")
-        elif 'hp' in mob_data:
-            # Fallback: HP в корне объекта
-            self.hp = mob_data.get('hp', 100)
-            self.max_hp = mob_data.get('maxHp', mob_data.get('hp', 100))
-        else:
-            # Устанавливаем разумные значения по умолчанию
-            # Уровень моба влияет на его HP
-            level = mob_data.get('lvl', mob_data.get('level', 1))
-            base_hp = 50 + (level * 25)  # Базовая формула HP
-            self.hp = base_hp
-            self.max_hp = base_hp
-            logger.debug(f"Mob HP set to default: {self.name} HP {self.hp}/{self.max_hp}")
-        
-        self.level = mob_data.get('lvl', mob_data.get('level', self.level))
-        
-        # Update alive status
+        self.id = record.id
+        self.farm_id = record.farm_id
+        self.name = record.name
+        self.hp = record.hp
+        self.max_hp = record.max_hp
+        self.level = record.level
         self.is_alive = self.hp > 0
         
         logger.debug(f"Mob updated: {self.name} HP {self.hp}/{self.max_hp} farmId: {self.farm_id}")
     
-    def update_from_combat_response(self, response_data: Dict[str, Any]):
+    def update_from_attack(self, record: AttackRecord):
         """
-        Update mob data from combat response
+        Update mob data from decoded attack response
         
         Args:
-            response_data: Combat API response
+            record: Attack record
         """
-        logger.debug(f"Updating mob {self.name} from combat response")
-        logger.debug(f"Response keys: {list(response_data.keys())}")
-        
-        # Try to get mob data from different sources in attack response
-        mob_data = None
-        
-        # First try: mobTargetHP (direct HP info)
-        mob_target_hp = response_data.get('mobTargetHP', {})
-        if mob_target_hp and isinstance(mob_target_hp, dict):
-            mob_id = mob_target_hp.get('id', '')
-            mob_hp = mob_target_hp.get('hp', 0)
-            if mob_id and mob_hp is not None:
-                # Update HP directly from mobTargetHP
-                old_hp = self.hp
-                self.hp = mob_hp
-                logger.debug(f"Mob HP updated from mobTargetHP: {self.name} HP {old_hp} -> {self.hp}/{self.max_hp}")
-                # Check if mob died
-                if self.hp <= 0:
-                    logger.info(f"Mob {self.name} defeated!")
-                    self.is_alive = False
+        old_hp = self.hp
+        if record.target_hp is not None:
+            # mobTargetHP - HP текущей цели
+            self.hp = record.target_hp
+        else:
+            state: Optional[MobState] = record.mobs.get(self.farm_id) or record.mob
+            if state is None:
+                logger.debug(f"No mob data found in response for {self.name}")
                 return
+            if state.hp is not None:
+                self.hp = state.hp
+            if state.max_hp is not None:
+                self.max_hp = state.max_hp
         
-        # Second try: mobs array
-        mobs_array = response_data.get('mobs', [])
-        if isinstance(mobs_array, list) and len(mobs_array) > 0:
-            logger.debug(f"Found {len(mobs_array)} mobs in response")
-            # Find mob with matching farm_id
-            for mob_info in mobs_array:
-                if mob_info.get('farmId') == self.farm_id:
-                    mob_data = mob_info
-                    logger.debug(f"Found matching mob: {mob_info.get('name', 'Unknown')}")
-                    break
-        
-        # Third try: direct mob data
-        if not mob_data:
-            mob_data = response_data.get('mob', {})
-            if mob_data:
-                logger.debug(f"Found direct mob data")
-        
-        if mob_data:
-            # Update only HP and max_hp, don't call update_from_data
-            old_hp = self.hp
-            if 'hp' in mob_data:
-                self.hp = mob_data.get('hp', self.hp)
-            if 'maxHp' in mob_data:
-                self.max_hp = mob_data.get('maxHp', self.max_hp)
-            
-            logger.debug(f"Mob HP updated from mob data: {self.name} HP {old_hp} -> {self.hp}/{self.max_hp}")
-            
-            # Check if mob died
-            if self.hp <= 0:
-                logger.info(f"Mob {self.name} defeated!")
-                self.is_alive = False
-            else:
-                self.is_alive = True
-        else:
-            logger.debug(f"No mob data found in response for {self.name}")
+        logger.debug(f"Mob HP updated: {self.name} HP {old_hp} -> {self.hp}/{self.max_hp}")
+        self.is_alive = self.hp > 0
+        if not self.is_alive:
+            logger.info(f"Mob {self.name} defeated!")
     
     def get_hp_percentage(self) -> float:
         """Get current HP as percentage"""
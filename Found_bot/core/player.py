@@ -6,6 +6,8 @@ import logging
 from typing import Dict, Any, List
 from dataclasses import dataclass
 
+from api.records import UserRecord, decode_user
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -21,6 +23,7 @@ class Player:
     """Player character data and management"""
     
     def __init__(self):
+        self.name = None  # Имя персонажа из информации о пользователе
         self.hp = 100
         self.max_hp = 100
         self.mp = 100
@@ -67,119 +70,51 @@ class Player:
         Args:
             response_data: API response data
         """
-        # Extract HP from user.stats if available (attack response)
-        user_data = response_data.get('user', {})
-        if user_data:
-            stats = user_data.get('stats', {})
-            if stats:
-                current_hp_list = stats.get('userCurrentHP', [0, 0])
-                max_hp_list = stats.get('userMaxHP', [0, 0])
-                current_mp_list = stats.get('userCurrentMP', [0, 0])
-                max_mp_list = stats.get('userMaxMP', [0, 0])
-                stamina_val = stats.get('userStamina', [self.stamina, 0])
-                max_stamina_val = stats.get('userMaxStamina', [self.max_stamina, 0])
-                # HP
-                if isinstance(current_hp_list, list) and len(current_hp_list) > 0:
-                    self.hp = current_hp_list[0]
-                else:
-                    self.hp = user_data.get('hp', self.hp)
-                if isinstance(max_hp_list, list) and len(max_hp_list) > 0:
-                    self.max_hp = max_hp_list[0]
-                else:
-                    self.max_hp = user_data.get('maxHp', self.max_hp)
-                # MP
-                if isinstance(current_mp_list, list) and len(current_mp_list) > 0:
-                    self.mp = current_mp_list[0]
-                else:
-                    self.mp = user_data.get('mp', self.mp)
-                if isinstance(max_mp_list, list) and len(max_mp_list) > 0:
-                    self.max_mp = max_mp_list[0]
-                else:
-                    self.max_mp = user_data.get('maxMp', self.max_mp)
-                # Stamina
-                if isinstance(stamina_val, list) and len(stamina_val) > 0:
-                    self.stamina = stamina_val[0]
-                else:
-                    self.stamina = user_data.get('stamina', self.stamina)
-                if isinstance(max_stamina_val, list) and len(max_stamina_val) > 0:
-                    self.max_stamina = max_stamina_val[0]
-                else:
-                    self.max_stamina = user_data.get('maxStamina', self.max_stamina)
-            else:
-                # Fallback to direct user data
-                self.hp = user_data.get('hp', self.hp)
-                self.max_hp = user_data.get('maxHp', self.max_hp)
-                self.mp = user_data.get('mp', self.mp)
-                self.max_mp = user_data.get('maxMp', self.max_mp)
-                self.stamina = user_data.get('stamina', self.stamina)
-                self.max_stamina = user_data.get('maxStamina', self.max_stamina)
-            # Gold
-            self.stats.gold = user_data.get('gold', self.stats.gold)
-            # Level and XP
-            self.stats.level = user_data.get('lvl', self.stats.level)
-            self.stats.experience = user_data.get('userCurrentXP', self.stats.experience)
-            self.stats.experience_to_next = user_data.get('userNextXP', self.stats.experience_to_next)
-            # Morale (возможно, это стамина)
-            self.morale = user_data.get('morale', getattr(self, 'morale', 0))
-            # Inventory weight - inventoryWeight это максимальный вес
-            self.max_inventory_weight = user_data.get('inventoryWeight', 0)
-            # Текущий вес пока не найден, устанавливаем 0
-            self.inventory_weight = 0  # TODO: найти поле с текущим весом
-            # Inventory
-            if 'inventory' in user_data:
-                self.inventory = user_data['inventory']
-        else:
-            player_data = response_data.get('player', {})
-            stats = response_data.get('stats', {})
-            if stats:
-                current_hp_list = stats.get('userCurrentHP', [0, 0])
-                max_hp_list = stats.get('userMaxHP', [0, 0])
-                current_mp_list = stats.get('userCurrentMP', [0, 0])
-                max_mp_list = stats.get('userMaxMP', [0, 0])
-                stamina_val = stats.get('userStamina', [self.stamina, 0])
-                max_stamina_val = stats.get('userMaxStamina', [self.max_stamina, 0])
-                if isinstance(current_hp_list, list) and len(current_hp_list) > 0:
-                    self.hp = current_hp_list[0]
-                else:
-                    self.hp = player_data.get('hp', self.hp)
-                if isinstance(max_hp_list, list) and len(max_hp_list) > 0:
-                    self.max_hp = max_hp_list[0]
-                else:
-                    self.max_hp = player_data.get('maxHp', self.max_hp)
-                if isinstance(current_mp_list, list) and len(current_mp_list) > 0:
-                    self.mp = current_mp_list[0]
-                else:
-                    self.mp = player_data.get('mp', self.mp)
-                if isinstance(max_mp_list, list) and len(max_mp_list) > 0:
-                    self.max_mp = max_mp_list[0]
-                else:
-                    self.max_mp = player_data.get('maxMp', self.max_mp)
-                if isinstance(stamina_val, list) and len(stamina_val) > 0:
-                    self.stamina = stamina_val[0]
-                else:
-                    self.stamina = player_data.get('stamina', self.stamina)
-                if isinstance(max_stamina_val, list) and len(max_stamina_val) > 0:
-                    self.max_stamina = max_stamina_val[0]
-                else:
-                    self.max_stamina = player_data.get('maxStamina', self.max_stamina)
-            else:
-                self.hp = player_data.get('hp', self.hp)
-                self.max_hp = player_data.get('maxHp', self.max_hp)
-                self.mp = player_data.get('mp', self.mp)
-                self.max_mp = player_data.get('maxMp', self.max_mp)
-                self.stamina = player_data.get('stamina', self.stamina)
-                self.max_stamina = player_data.get('maxStamina', self.max_stamina)
-            self.stats.gold = player_data.get('gold', self.stats.gold)
-            self.stats.level = player_data.get('lvl', self.stats.level)
-            self.stats.experience = player_data.get('userCurrentXP', self.stats.experience)
-            self.stats.experience_to_next = player_data.get('userNextXP', self.stats.experience_to_next)
-            self.morale = player_data.get('morale', getattr(self, 'morale', 0))
-            # Inventory weight - inventoryWeight это максимальный вес
-            self.max_inventory_weight = player_data.get('inventoryWeight', 0)
-            # Текущий вес пока не найден, устанавливаем 0
-            self.inventory_weight = 0  # TODO: найти поле с текущим весом
-            if 'inventory' in player_data:
-                self.inventory = player_data['inventory']
+        record = decode_user(response_data)
+        if record is not None:
+            self.apply_user(record)
+    
+    def apply_user(self, record: UserRecord):
+        """
+        Update player data from decoded user record
+        
+        Args:
+            record: Character state decoded from response (None fields keep current values)
+        """
+        if record.name:
+            self.name = record.name
+        if record.hp is not None:
+            self.hp = record.hp
+        if record.max_hp is not None:
+            self.max_hp = record.max_hp
+        if record.mp is not None:
+            self.mp = record.mp
+        if record.max_mp is not None:
+            self.max_mp = record.max_mp
+        if record.stamina is not None:
+            self.stamina = record.stamina
+        if record.max_stamina is not None:
+            self.max_stamina = record.max_stamina
+        if record.gold is not None:
+            self.stats.gold = record.gold
+        if record.level is not None:
+            self.stats.level = record.level
+        if record.experience is not None:
+            self.stats.experience = record.experience
+        if record.experience_to_next is not None:
+            self.stats.experience_to_next = record.experience_to_next
+        if record.morale is not None:
+            self.morale = record.morale
+        # Inventory weight - inventoryWeight это максимальный вес
+        if record.max_inventory_weight is not None:
+            self.max_inventory_weight = record.max_inventory_weight
+        if record.inventory is not None:
+            self.inventory = record.inventory
+            # Текущий вес API не отдает - складываем веса предметов инвентаря
+            self.inventory_weight = sum(
+                (item.get('weight') or 0) * item.get('count', 1)
+                for item in record.inventory.values() if isinstance(item, dict)
+            )
         
         logger.debug(f"Player updated: HP {self.hp}/{self.max_hp}, MP {self.mp}/{self.max_mp}, Stamina {self.stamina}/{self.max_stamina}")
     
@@ -227,29 +162,41 @@ class Player:
         from config.settings import Settings
         return self.stamina <= Settings.STAMINA_THRESHOLD
     
+    def attack_ready_at(self) -> float:
+        """Get time when attack becomes available (end of global cooldown)"""
+        return max(self.last_attack_time, self.last_skill_time) + self.GLOBAL_COOLDOWN
+    
+    def skill_ready_at(self) -> float:
+        """Get time when skill becomes available (personal and global cooldowns)"""
+        return max(self.last_skill_time + self.SKILL_COOLDOWN, self.attack_ready_at())
+    
+    def heal_ready_at(self) -> float:
+        """Get time when healing potion becomes available"""
+        return self.last_heal_time + self.HEAL_COOLDOWN
+    
+    def mana_ready_at(self) -> float:
+        """Get time when mana potion becomes available"""
+        return self.last_mana_time + self.MANA_COOLDOWN
+    
     def can_attack(self, current_time: float) -> bool:
         """Check if player can attack (respects global cooldown only)"""
         # Атака не имеет собственного КД, только ГКД между боевыми навыками
-        last_combat_time = max(self.last_attack_time, self.last_skill_time)
-        return current_time - last_combat_time >= self.GLOBAL_COOLDOWN
+        return current_time >= self.attack_ready_at()
     
     def can_use_skill(self, current_time: float) -> bool:
         """Check if player can use skill (respects both personal and global cooldowns)"""
         # Скилл имеет собственный КД + ГКД между боевыми навыками
-        skill_cd_ready = current_time - self.last_skill_time >= self.SKILL_COOLDOWN
-        last_combat_time = max(self.last_attack_time, self.last_skill_time)
-        global_cd_ready = current_time - last_combat_time >= self.GLOBAL_COOLDOWN
-        return skill_cd_ready and global_cd_ready
+        return current_time >= self.skill_ready_at()
     
     def can_use_heal_potion(self, current_time: float) -> bool:
         """Check if player can use healing potion (only personal cooldown)"""
         # Зелья не зависят от ГКД, только от собственного КД
-        return current_time - self.last_heal_time >= self.HEAL_COOLDOWN
+        return current_time >= self.heal_ready_at()
     
     def can_use_mana_potion(self, current_time: float) -> bool:
         """Check if player can use mana potion (only personal cooldown)"""
         # Зелья не зависят от ГКД, только от собственного КД
-        return current_time - self.last_mana_time >= self.MANA_COOLDOWN
+        return current_time >= self.mana_ready_at()
     
     def record_attack(self, current_time: float):
         """Record attack time"""
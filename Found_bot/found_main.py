@@ -12,6 +12,8 @@ from rich.console import Console
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from logic.game_engine import GameEngine
+from Found_bot.config.settings import Settings
+from Found_bot.utils.clock import clock
 
 console = Console()
 
@@ -35,6 +37,9 @@ def main():
     # Setup logging first
     setup_logging()
     
+    if Settings.VIRTUAL_CLOCK:
+        clock.use_virtual()
+    
     # Create and run game engine
     engine = GameEngine()
     engine.initialize()
@@ -4,6 +4,7 @@ import time
 from copy import deepcopy
 from Found_bot.api.client import APIClient
 from Found_bot.config.token import GAME_TOKEN
+from Found_bot.utils.world_map_index import get_world_map_index
 
 WORLD_MAP_PATH = "world_map_viewer/data/complete_world_map.json"
 SIDE_KEYS = ["north", "south", "east", "west"]
@@ -21,9 +22,8 @@ def save_world_map(data):
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 def get_all_locations():
-    # Берём все loco_id из текущей карты (можно расширить при необходимости)
-    wm = load_world_map().get("world_map", {})
-    return list(wm.keys())
+    # Берём все loco_id из скомпилированного индекса карты (можно расширить при необходимости)
+    return get_world_map_index(WORLD_MAP_PATH).locations()
 
 def collect_all_squares():
     api = APIClient()
@@ -0,0 +1,325 @@
+"""
+City Trip - one-visit city trip planner
+
+План поездки в город строится по одному снимку информации о пользователе:
+что продать, сколько зелий докупить и куда вернуться. Шаги, которые ничего
+не меняют, в план не попадают: нечего продавать - нет продажи, зелий
+хватает - нет покупки, а если в городе делать нечего, персонаж сразу
+возвращается на точку фарма. Сколько зелий докупить, решает прогноз
+расхода (potion_forecast), без него - фиксированный запас; что продать -
+политика инвентаря (inventory_policy), без нее - вся снятая экипировка.
+Каждая поездка измеряется: время от начала восстановления до возвращения
+на точку и число запросов.
+"""
+
+import logging
+from typing import Dict, Any, Optional, List, Tuple, Callable
+
+from Found_bot.config.settings import Settings
+from Found_bot.utils.clock import clock
+from logic.potion_forecast import PotionForecaster
+from logic.inventory_policy import InventoryPolicy
+
+logger = logging.getLogger(__name__)
+
+SELL_TYPES = ('weapons', 'armors', 'jewelry')  # Продаются только снятые вещи этих типов
+HEAL_POTION_ID = 'm_1'
+MANA_POTION_ID = 'm_3'
+GOLD_ID = 'm_0_1'
+
+
+def user_gold(user: Dict[str, Any]) -> int:
+    """Gold of user block ('gold' field or gold item of inventory)"""
+    gold = user.get('gold')
+    if isinstance(gold, (int, float)):
+        return int(gold)
+    return ((user.get('inventory') or {}).get(GOLD_ID) or {}).get('count', 0)
+
+
+class ReturnPoint:
+    """Farm point to return to (square None - choose after arrival)"""
+
+    __slots__ = ('location', 'direction', 'square')
+
+    def __init__(self, location: str, direction: str, square: Optional[str] = None):
+        self.location = location
+        self.direction = direction
+        self.square = square
+
+    @classmethod
+    def from_route_point(cls, route_point) -> 'ReturnPoint':
+        """Return point from RoutePoint of a route"""
+        return cls(route_point.location, route_point.direction, route_point.square)
+
+    def __repr__(self) -> str:
+        return f"{self.location}/{self.direction}/{self.square or '?'}"
+
+
+class CityTripPlan:
+    """Steps of one city trip"""
+
+    __slots__ = ('sell', 'buy', 'to_city', 'to_farm', 'change_geo', 'change_square', 'return_point', 'gold')
+
+    def __init__(self, sell: List[Dict[str, Any]], buy: List[Tuple[str, int]], to_city: bool,
+                 to_farm: bool, change_geo: bool, change_square: bool, return_point: ReturnPoint,
+                 gold: int = 0):
+        self.sell = sell  # [{"id": uniqueId, "count": 1}]
+        self.buy = buy  # [(elemId, count)]
+        self.to_city = to_city
+        self.to_farm = to_farm
+        self.change_geo = change_geo
+        self.change_square = change_square
+        self.return_point = return_point
+        self.gold = gold  # Золото по снимку до поездки
+
+    @property
+    def visits_city(self) -> bool:
+        return bool(self.sell or self.buy)
+
+    @property
+    def planned_calls(self) -> int:
+        """Requests the plan makes (square choice may add one info request)"""
+        return (self.to_city + bool(self.sell) + len(self.buy) + self.to_farm +
+                self.change_geo + self.change_square)
+
+    def describe(self) -> str:
+        """Short human-readable plan"""
+        parts = []
+        if self.to_city:
+            parts.append("город")
+        if self.sell:
+            parts.append(f"продажа {len(self.sell)}")
+        for elem_id, count in self.buy:
+            parts.append(f"покупка {elem_id} x{count}")
+        if self.to_farm:
+            parts.append("фарм")
+        parts.append(f"точка {self.return_point}")
+        return " → ".join(parts)
+
+
+class CityTripReport:
+    """Result and timing of executed trip"""
+
+    __slots__ = ('plan', 'started', 'finished', 'calls', 'items_sold', 'gold_earned',
+                 'potions_bought', 'square', 'user', 'ok')
+
+    def __init__(self, plan: CityTripPlan, started: float):
+        self.plan = plan
+        self.started = started
+        self.finished = started
+        self.calls = 0
+        self.items_sold = 0
+        self.gold_earned = 0
+        self.potions_bought = 0
+        self.square: Optional[str] = None
+        self.user: Optional[Dict[str, Any]] = None  # Последний блок user из ответов поездки
+        self.ok = False
+
+    @property
+    def duration(self) -> float:
+        """Seconds from trip start to arrival at return square"""
+        return self.finished - self.started
+
+
+class CityTripPlanner:
+    """Plans and executes city trips with the fewest requests"""
+
+    def __init__(self, api_client, potion_target: Optional[int] = None,
+                 request_interval: float = 0.0, forecaster: Optional[PotionForecaster] = None,
+                 inventory_policy: Optional[InventoryPolicy] = None):
+        """
+        Args:
+            api_client: API client
+            potion_target: Potions of each kind to have after the trip
+                (defaults to Settings.CITY_TRIP_POTION_TARGET)
+            request_interval: Minimum seconds before each travel request of the
+                trip kept by the planner itself (0 - spacing is left to the API pacer)
+            forecaster: Potion consumption forecaster sizing purchases
+                (fixed potion_target without it)
+            inventory_policy: Policy choosing items to sell
+                (all unequipped equipment without it)
+        """
+        self.api_client = api_client
+        self.potion_target = Settings.CITY_TRIP_POTION_TARGET if potion_target is None else potion_target
+        self.request_interval = request_interval
+        self.forecaster = forecaster
+        self.inventory_policy = inventory_policy
+        self._last_request: Optional[float] = None
+
+    @staticmethod
+    def default_return_point(level: int) -> ReturnPoint:
+        """Farm point by character level (loco_0 below 10, loco_3 from 10)"""
+        return ReturnPoint("loco_0" if level < 10 else "loco_3", "south")
+
+    def plan(self, user_info: Dict[str, Any], return_point: ReturnPoint) -> CityTripPlan:
+        """
+        Build trip plan from one user info snapshot
+
+        Args:
+            user_info: /user/info response
+            return_point: Farm point to return to
+
+        Returns:
+            Trip plan
+        """
+        user = user_info.get('user') or {}
+        inventory = user.get('inventory') or {}
+
+        have = {elem_id: (inventory.get(elem_id) or {}).get('count', 0)
+                for elem_id in (HEAL_POTION_ID, MANA_POTION_ID)}
+        gold = user_gold(user)
+        if self.forecaster is not None:
+            targets = self.forecaster.purchase_targets(have[HEAL_POTION_ID], have[MANA_POTION_ID], gold)
+        else:
+            targets = dict.fromkeys(have, self.potion_target)
+        buy = [(elem_id, targets[elem_id] - count) for elem_id, count in have.items()
+               if count < targets[elem_id]]
+
+        if self.inventory_policy is not None:
+            # Места в рюкзаке нужно до следующей поездки - пока не кончатся купленные зелья
+            forecast = self.forecaster.forecast(targets[HEAL_POTION_ID], targets[MANA_POTION_ID]) \
+                if self.forecaster is not None else None
+            sell = self.inventory_policy.sell_list(inventory, user.get('inventoryWeight', 0),
+                                                   forecast.kills_left if forecast else None)
+        else:
+            sell = []
+            for item_data in inventory.values():
+                if item_data.get('typeElement') in SELL_TYPES and item_data.get('position') == 'inventory':
+                    unique_id = item_data.get('uniqueId')
+                    if unique_id:
+                        sell.append({"id": unique_id, "count": 1})
+
+        in_city = user_info.get('geo') == 'city'
+        visits_city = bool(sell or buy)
+        to_farm = visits_city or in_city
+        # Из города всегда заново выбираем локацию; на фарме - только если она другая
+        change_geo = to_farm or (user_info.get('loco'), user_info.get('direction')) != \
+            (return_point.location, return_point.direction)
+        change_square = change_geo or return_point.square is None or \
+            user_info.get('square') != return_point.square
+        plan = CityTripPlan(sell, buy, visits_city and not in_city, to_farm, change_geo, change_square,
+                            return_point, gold)
+        logger.info(f"City trip plan: {plan.describe()}")
+        return plan
+
+    def _request(self, report: CityTripReport, func: Callable[..., Dict[str, Any]],
+                 *args, travel: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Trip request; travel requests are spaced from the previous one by request_interval
+
+        Вместо фиксированной паузы после каждого шага ждем только остаток
+        интервала: время ответа сервера уже идет в зачет.
+
+        Returns:
+            Response or None if the request failed
+        """
+        if travel and self._last_request is not None and self.request_interval > 0:
+            wait = self._last_request + self.request_interval - clock.time()
+            if wait > 0:
+                clock.sleep(wait)
+        result = func(*args)
+        self._last_request = clock.time()
+        report.calls += 1
+        if isinstance(result, dict) and result.get('status') == 'success':
+            if isinstance(result.get('user'), dict):
+                report.user = result['user']
+            return result
+        logger.error(f"City trip: {func.__name__}{args} failed: {result}")
+        return None
+
+    def execute(self, plan: CityTripPlan,
+                choose_square: Optional[Callable[[List[Dict[str, Any]]], Optional[str]]] = None
+                ) -> CityTripReport:
+        """
+        Execute trip plan
+
+        Args:
+            plan: Trip plan
+            choose_square: Picks square from squares list when return point has none
+
+        Returns:
+            Trip report (ok - character is back on a farm square)
+        """
+        report = CityTripReport(plan, clock.time())
+        try:
+            if plan.to_city and self._request(report, self.api_client.change_main_geo, "city", travel=True) is None:
+                return report
+
+            # Продажа до покупки: золото с продажи идет на зелья
+            gold = plan.gold
+            if plan.sell:
+                result = self._request(report, self.api_client.sell_items, plan.sell)
+                if result is not None:
+                    report.items_sold = sum(item['count'] for item in plan.sell)
+                    report.gold_earned = result.get('goldEarned', 0)
+                    gold = user_gold(report.user) if report.user else gold + report.gold_earned
+
+            for elem_id, count in plan.buy:
+                result = self._request(report, self.api_client.buy_items, elem_id, 'resources', count)
+                if result is not None:
+                    report.potions_bought += count
+                    if isinstance(result.get('user'), dict):
+                        # Цену зелий прогноз узнает по списанному золоту
+                        gold_after = user_gold(result['user'])
+                        if self.forecaster is not None:
+                            self.forecaster.observe_purchase(count, gold - gold_after)
+                        gold = gold_after
+
+            if plan.to_farm and self._request(report, self.api_client.change_main_geo, "farm", travel=True) is None:
+                return report
+
+            point = plan.return_point
+            squares = None
+            if plan.change_geo:
+                result = self._request(report, self.api_client.change_geo, point.location, point.direction,
+                                       travel=True)
+                if result is None:
+                    return report
+                squares = result.get('squares')
+
+            square = point.square
+            if not plan.change_square:
+                report.square = square  # Персонаж уже на нужном квадрате
+                report.ok = True
+                return report
+            if square is None and choose_square is not None:
+                if squares is None:
+                    # Ответ перехода без квадратов - берем их из информации о пользователе
+                    user_info = self._request(report, self.api_client.get_user_info)
+                    squares = user_info.get('squares') if user_info else None
+                square = choose_square(squares or [])
+            if square is None:
+                logger.warning("City trip: no square to return to")
+                return report
+            if self._request(report, self.api_client.change_square, square, travel=True) is None:
+                return report
+            report.square = square
+            report.ok = True
+            return report
+        finally:
+            report.finished = clock.time()
+            logger.info(f"City trip {'done' if report.ok else 'failed'} in {report.duration:.1f}s, "
+                        f"{report.calls} calls (planned {plan.planned_calls})")
+
+    def run(self, return_point: ReturnPoint,
+            choose_square: Optional[Callable[[List[Dict[str, Any]]], Optional[str]]] = None
+            ) -> Optional[CityTripReport]:
+        """
+        Snapshot user info, plan and execute the trip
+
+        Args:
+            return_point: Farm point to return to
+            choose_square: Picks square from squares list when return point has none
+
+        Returns:
+            Trip report or None if user info is unavailable
+        """
+        started = clock.time()
+        user_info = self.api_client.get_user_info()
+        if not user_info or 'user' not in user_info:
+            logger.error("City trip: no user info")
+            return None
+        report = self.execute(self.plan(user_info, return_point), choose_square)
+        report.started = started
+        report.calls += 1
+        return report
@@ -1,8 +1,8 @@
 """
 Модуль для расчёта и проверки кулдаунов
 """
-import time
 from core.player import Player
+from Found_bot.utils.clock import clock
 
 def get_attack_cooldown(player: Player, now: float) -> float:
     return max(0, player.GLOBAL_COOLDOWN - (now - player.last_attack_time))
@@ -17,7 +17,7 @@ def get_mana_cooldown(player: Player, now: float) -> float:
     return max(0, player.MANA_COOLDOWN - (now - player.last_mana_time))
 
 def reset_all_cooldowns(player: Player):
-    now = time.time()
+    now = clock.time()
     player.last_attack_time = now - player.GLOBAL_COOLDOWN
     player.last_skill_time = now - player.SKILL_COOLDOWN
     player.last_heal_time = now - player.HEAL_COOLDOWN
@@ -2,13 +2,13 @@
 Exploration Handler - Manages territory exploration
 """
 
-import time
 import logging
 from typing import Optional, Dict, Any
 from api.client import APIClient
 from ui.display import GameDisplay
 from Found_bot.config.settings import Settings
 from core.player import Player
+from Found_bot.utils.clock import clock
 
 logger = logging.getLogger(__name__)
 
@@ -52,7 +52,7 @@ class ExplorationHandler:
             
         except Exception as e:
             self.display.print_message(f"Network error: {e}. Waiting 60 seconds before retry...", "error")
-            time.sleep(60)
+            clock.sleep(60)
             return None
     
     def _log_api_response(self, response: Dict[str, Any], context: str = ""):
@@ -2,9 +2,8 @@
 Game Engine - Main game loop and state management
 """
 
-import time
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from rich.console import Console
 import subprocess
 import os
@@ -22,10 +21,12 @@ from logic.exploration_handler import ExplorationHandler
 from logic.rest_handler import RestHandler
 from logic.data_extractor import DataExtractor
 from logic.route_manager import RouteManager
+from logic.scheduler import EventScheduler
 from Found_bot.config.token import GAME_TOKEN
 from logic.mob_utils import get_mob_data, get_mob_group_data
 from logic.cooldown_utils import get_attack_cooldown, get_skill_cooldown, get_heal_cooldown, get_mana_cooldown, reset_all_cooldowns
 from Found_bot.helpful_scripts.pay_goblins import pay_goblins
+from Found_bot.utils.clock import clock
 
 logger = logging.getLogger(__name__)
 console = Console()
@@ -33,11 +34,18 @@ console = Console()
 class GameEngine:
     """Main game engine that manages the game loop and state transitions"""
     
-    def __init__(self):
-        """Initialize the game engine"""
-        self.api_client = APIClient()
+    def __init__(self, api_client: Optional[APIClient] = None, display: Optional[GameDisplay] = None):
+        """
+        Initialize the game engine
+        
+        Args:
+            api_client: API client of the character (defaults to client with GAME_TOKEN)
+            display: Display to render to (benchmarks pass a headless one)
+        """
+        self.api_client = api_client or APIClient()
+        self.running = False
         self.player = Player()
-        self.display = GameDisplay()
+        self.display = display or GameDisplay()
         self.state_manager = GameStateManager()
         self.combat_handler = CombatHandler(self.api_client, self.player, self.display)
         self.exploration_handler = ExplorationHandler(self.api_client, self.display)
@@ -46,19 +54,21 @@ class GameEngine:
         
         # Route management
         self.route_manager = None
+        self.square_potions_start = 0  # Зелий потрачено к началу блока на квадрате
         
         # Game state variables
         self.current_mob_group = None
         self.explore_done = False
         self.rest_end_time = None
         self.last_display_update = 0  # Track last display update time
+        self.scheduler = EventScheduler(idle_sleep=Settings.LOOP_IDLE_SLEEP)
         
         # Statistics
         self.session_stats = {
             'mobs_killed': 0,
             'total_exp': 0,
             'session_gold': 0,
-            'session_start': time.time()
+            'session_start': clock.time()
         }
     
     def initialize(self):
@@ -77,6 +87,8 @@ class GameEngine:
         self._initialize_route_manager()
         if self.route_manager:
             console.print(f"[green]Маршрут инициализирован: {len(self.route_manager.route)} клеток[/green]")
+        # Поездка в город возвращается на текущую точку маршрута
+        self.combat_handler.low_damage_handler.route_manager = self.route_manager
         
         # Настройка среды фарма
         console.print("[cyan]Настройка среды фарма...")
@@ -89,17 +101,22 @@ class GameEngine:
     
     def run(self):
         """Main game loop"""
+        # Цикл просыпается по таймер-куче: ровно к ближайшему дедлайну
+        # (КД атаки/зелий, конец отдыха, обновление дисплея)
+        self.running = True
         with self.display.get_live_display() as live:
-            while True:
+            while self.running:
                 try:
-                    current_time = time.time()
+                    current_time = clock.time()
                     current_state = self.state_manager.get_current_state()
                     
-                    # Update display once per second
-                    if current_time - self.last_display_update >= 1.0:
+                    # Update display once per refresh interval
+                    if current_time - self.last_display_update >= self._display_refresh_rate(current_state):
                         self._update_display(current_time, current_state)
                         self.last_display_update = current_time
                     
+                    progress_before = self._progress_signature()
+                    
                     # Handle current state
                     if current_state == GameState.CITY:
                         self._handle_city_state()
@@ -107,12 +124,16 @@ class GameEngine:
                         self._handle_combat_state(current_time)
                     elif current_state == GameState.RESTING:
                         self._handle_resting_state(current_time)
+                        # Отдых - простой: сворачиваем журнал мобов в базу
+                        self.data_extractor.compact_mob_database()
                     else:
                         logger.error(f"Unknown state: {current_state}")
                         break
                     
-                    # Small delay to prevent excessive CPU usage
-                    time.sleep(0.1)  # Small delay to prevent CPU overuse
+                    # Sleep until the next action becomes legal
+                    self._schedule_wakeups()
+                    stalled = self._progress_signature() == progress_before
+                    self.scheduler.sleep_until_next(stalled=stalled)
                     
                 except KeyboardInterrupt:
                     console.print("\n[yellow]Bot stopped by user[/yellow]")
@@ -120,7 +141,52 @@ class GameEngine:
                 except Exception as e:
                     logger.error(f"Critical error in game loop: {e}")
                     self.display.print_message(f"Critical error: {e}", "error")
-                    time.sleep(60)  # Wait before retry
+                    clock.sleep(60)  # Wait before retry
+        
+        # Записываем накопленный журнал мобов перед выходом
+        self.data_extractor.compact_mob_database(force=True)
+    
+    def stop(self):
+        """Ask the main loop to finish after the current iteration"""
+        self.running = False
+    
+    def _display_refresh_rate(self, current_state: GameState) -> float:
+        """Get display refresh interval for state (slower while resting)"""
+        if current_state == GameState.RESTING:
+            return Settings.REST_UI_REFRESH_RATE
+        return Settings.UI_REFRESH_RATE
+    
+    def _progress_signature(self) -> tuple:
+        """Snapshot of values that change when the loop performs an action"""
+        return (
+            self.state_manager.get_current_state(),
+            self.player.last_attack_time,
+            self.player.last_skill_time,
+            self.player.last_heal_time,
+            self.player.last_mana_time,
+            id(self.current_mob_group),
+            self.explore_done
+        )
+    
+    def _schedule_wakeups(self):
+        """Put the next deadlines of the current state into the scheduler"""
+        self.scheduler.clear()
+        current_state = self.state_manager.get_current_state()
+        self.scheduler.schedule('display', self.last_display_update + self._display_refresh_rate(current_state))
+        
+        if current_state == GameState.COMBAT:
+            self.scheduler.schedule('attack', self.player.attack_ready_at())
+            hp_percentage = (self.player.hp / self.player.max_hp * 100) if self.player.max_hp > 0 else 100
+            if hp_percentage < Settings.HEAL_THRESHOLD:
+                self.scheduler.schedule('heal', self.player.heal_ready_at())
+            mp_percentage = (self.player.mp / self.player.max_mp * 100) if self.player.max_mp > 0 else 100
+            if mp_percentage < Settings.MANA_THRESHOLD:
+                self.scheduler.schedule('mana', self.player.mana_ready_at())
+        elif current_state == GameState.RESTING and self.rest_end_time:
+            self.scheduler.schedule('rest_end', self.rest_end_time)
+        else:
+            # Исследование и переходы - сразу
+            self.scheduler.schedule('action', clock.time())
     
     def _update_display(self, current_time: float, current_state: GameState):
         """Update the display with current game state"""
@@ -155,7 +221,7 @@ class GameEngine:
             skill_cooldown=skill_cooldown,
             mana_cooldown=mana_cooldown,
             rest_time=rest_time,
-            player_name="Piulok",
+            player_name=self.player.name or "Player",
             last_attack_time=self.player.last_attack_time,
             last_skill_time=self.player.last_skill_time,
             route_data=self.route_manager.get_route_display_data() if self.route_manager else None
@@ -207,7 +273,7 @@ class GameEngine:
                 resp = pay_goblins()
                 msg = f"[pay_goblins] Status: {getattr(resp, 'status_code', '?')}, Response: {getattr(resp, 'text', resp)}"
                 self.display.print_message(msg, "info")
-                time.sleep(2)
+                clock.sleep(2)
                 result = self.api_client.explore_territory(loco=next_point.location, direction=next_point.direction)
                 goblin_retry_count += 1
                 self.display.print_message(f"[DEBUG] После повторной попытки explore_territory: {str(result)}", "info")
@@ -222,10 +288,10 @@ class GameEngine:
                     mob = None
                 if mob and "farmId" in mob:
                     mob_id = mob["farmId"]
-                    time.sleep(2)  # Пауза 2 секунды после farm-mob-one
+                    clock.sleep(2)  # Пауза 2 секунды после farm-mob-one
                     first_hit = True
                     while True:
-                        now = time.time()
+                        now = clock.time()
                         # Первый удар всегда скиллом, далее — скилл по кд, иначе обычный удар
                         if first_hit or self.player.can_use_skill(now):
                             attack_result = self.api_client.use_skill(mob_id)
@@ -236,7 +302,7 @@ class GameEngine:
                             self.player.record_attack(now)
                         else:
                             # Ждём ГКД
-                            time.sleep(0.5)
+                            clock.sleep(0.5)
                             continue
                         if attack_result.get("status") == "victory" or attack_result.get("result") == "victory":
                             self.display.print_message(f"Победа над мобом: {mob.get('name', mob_id)}", "success")
@@ -244,7 +310,7 @@ class GameEngine:
                         elif attack_result.get("status") == "fail":
                             self.display.print_message(f"Ошибка атаки: {attack_result.get('message', '')}", "error")
                             break
-                        time.sleep(0.5)
+                        clock.sleep(0.5)
             # 5. Обновить маршрут
             self.route_manager.move_to_next_square(display=self.display)
             self.explore_done = False  # Reset exploration for new square
@@ -261,7 +327,7 @@ class GameEngine:
                 resp = pay_goblins()
                 msg = f"[pay_goblins] Status: {getattr(resp, 'status_code', '?')}, Response: {getattr(resp, 'text', resp)}"
                 self.display.print_message(msg, "info")
-                time.sleep(2)
+                clock.sleep(2)
                 result = self.api_client.explore_territory(loco=next_point.location, direction=next_point.direction)
                 goblin_retry_count += 1
                 self.display.print_message(f"[DEBUG] После повторной попытки explore_territory: {str(result)}", "info")
@@ -274,10 +340,10 @@ class GameEngine:
                 return
             
             # --- ГАРАНТИРОВАННАЯ ЗАПИСЬ МОБА В БД ---
+            # Мобы разбираются один раз, в базу пишется исходный JSON первого моба
             mob_list = self.data_extractor.extract_mob_data(result)
-            mob_group_data = None  # Инициализация для избежания UnboundLocalError
-            if mob_list and isinstance(mob_list, list):
-                mob_dict = mob_list[0]
+            if mob_list:
+                mob_dict = mob_list[0].raw
                 loco_id = None
                 side_key = None
                 if self.route_manager:
@@ -291,16 +357,16 @@ class GameEngine:
                     logger.info(f"[MOB DB] Моб записан: {ok}, name={mob_dict.get('name')}, id={mob_dict.get('id')}")
                 else:
                     logger.error("[MOB DB] mob_dict is None after extract_mob_data")
-                # Получаем mob_group_data для дальнейшей логики
-                mob_group_data = self.data_extractor.extract_mob_group_data(result)
             else:
-                logger.error("[MOB DB] mob_list is empty or not a list")
+                logger.error("[MOB DB] mob_list is empty")
+            if self.route_manager:
+                self.route_manager.square_bandit.record_explore(found_mobs=bool(mob_list))
             
-            if mob_list and mob_group_data:
-                # Create MobGroup from raw data
+            if mob_list:
+                # Create MobGroup from decoded mobs
                 self.current_mob_group = MobGroup(mob_list)
                 # Сбросить только скилловый кулдаун при появлении нового моба
-                now = time.time()
+                now = clock.time()
                 # self.player.last_attack_time = now - self.player.GLOBAL_COOLDOWN  # Не сбрасываем ГКД!
                 self.player.last_skill_time = now - self.player.SKILL_COOLDOWN
                 # self.player.last_heal_time = now - self.player.HEAL_COOLDOWN  # Не сбрасываем
@@ -309,30 +375,14 @@ class GameEngine:
                 logger.info(f"[COOLDOWN CHECK] can_attack={self.player.can_attack(now)}, can_use_skill={self.player.can_use_skill(now)}, can_use_heal={self.player.can_use_heal_potion(now)}, can_use_mana={self.player.can_use_mana_potion(now)}")
                 current_target = self.current_mob_group.get_current_target()
                 
-                # Update display data from created group
-                if current_target:
-                    mob_data = {
-                        'name': current_target.name,
-                        'hp': current_target.hp,
-                        'max_hp': current_target.max_hp,
-                        'level': current_target.level
-                    }
-                    mob_group_data = self.current_mob_group.get_all_mobs_with_status()
+                mob_group_data = self.current_mob_group.get_all_mobs_with_status()
                 
                 # Message about found mobs
-                if mob_group_data and isinstance(mob_group_data, list):
-                    flat_mobs = []
-                    for mob in mob_group_data:
-                        if isinstance(mob, list):
-                            flat_mobs.extend(mob)
-                        else:
-                            flat_mobs.append(mob)
-                    mob_group_data = flat_mobs
-                mob_names = [mob['name'] for mob in mob_group_data if isinstance(mob, dict) and 'name' in mob]
+                mob_names = [mob['name'] for mob in mob_group_data]
                 self.display.print_message(f"Найдены враги: {', '.join(mob_names)}", "info")
                 
                 # Check and use skill immediately after exploration if conditions are met
-                current_time = time.time()
+                current_time = clock.time()
                 if current_target and self._should_use_skill_after_exploration(current_target, current_time):
                     self.display.print_message("⚡ Проверяем возможность использования усиленного удара...", "info")
                     skill_result = self.combat_handler._use_skill(current_target, current_time, self.current_mob_group)
@@ -357,23 +407,10 @@ class GameEngine:
                 if action_id:
                     if action_id == "SPEC_BATS":
                         self.display.print_message("[EVENT] Обнаружены летучие мыши, выполняю обход SPEC_BATS...", "warning")
-                        bats_url = f"https://ruby-king.ru/api/user/vesna?name={GAME_TOKEN}"
-                        referer = f"https://ruby-king.ru/city?name={GAME_TOKEN}"
-                        headers = {
-                            "Accept": "application/json, text/plain, */*",
-                            "Accept-Language": "ru,en;q=0.9,en-US;q=0.8,de;q=0.7",
-                            "Connection": "keep-alive",
-                            "Content-Type": "application/json",
-                            "Origin": "https://ruby-king.ru",
-                            "Referer": referer,
-                            "Sec-Fetch-Dest": "empty",
-                            "Sec-Fetch-Mode": "cors",
-                            "Sec-Fetch-Site": "same-origin",
-                            "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1"
-                        }
+                        # Через APIClient: запрос идет через транспорт (запись, симулятор) и throttle
                         try:
-                            resp = requests.post(bats_url, headers=headers, data="{}")
-                            self.display.print_message(f"[EVENT] Ответ SPEC_BATS: {resp.status_code} {resp.text}", "info")
+                            resp = self.api_client.complete_bats_event()
+                            self.display.print_message(f"[EVENT] Ответ SPEC_BATS: {resp}", "info")
                         except Exception as e:
                             self.display.print_message(f"[EVENT] Ошибка SPEC_BATS: {e}", "error")
                     else:
@@ -397,7 +434,7 @@ class GameEngine:
                             self.display.print_message(f"[EVENT] Ответ open-action: {resp.status_code} {resp.text}", "info")
                         except Exception as e:
                             self.display.print_message(f"[EVENT] Ошибка при отправке open-action: {e}", "error")
-                    time.sleep(2)
+                    clock.sleep(2)
                     # Повторяем исследование клетки
                     result = self.api_client.explore_territory(loco=next_point.location, direction=next_point.direction)
                     # Можно добавить повторную обработку action, если нужно
@@ -414,18 +451,19 @@ class GameEngine:
         
         if 'иссяк боевой дух' in message:
             self.display.print_message("😴 Morale depleted, starting rest...", "warning")
+            self._trip_before_rest()
             rest_result = self.rest_handler.start_rest()
             if rest_result:
                 self.state_manager.change_state(GameState.RESTING, "Starting rest due to low morale")
-                self.rest_end_time = time.time() + (20 * 60)  # 20 minutes
+                self.rest_end_time = clock.time() + (20 * 60)  # 20 minutes
         elif 'Очень быстро совершаете действия' in message:
             self.display.print_message("⏱️ Actions too fast, waiting 5 seconds...", "warning")
-            time.sleep(5)
+            clock.sleep(5)
             # Reset exploration flag to try again
             self.explore_done = False
         elif 'Неверное местонахождения' in message:
             self.display.print_message("📍 Location error, waiting 10 seconds...", "warning")
-            time.sleep(10)
+            clock.sleep(10)
         else:
             self.display.print_message(f"Exploration failed: {message}", "error")
     
@@ -462,7 +500,7 @@ class GameEngine:
             skill_cooldown=max(0, self.player.SKILL_COOLDOWN - (current_time - self.player.last_skill_time)),
             mana_cooldown=max(0, self.player.MANA_COOLDOWN - (current_time - self.player.last_mana_time)),
             rest_time=None,
-            player_name="Piulok",
+            player_name=self.player.name or "Player",
             last_attack_time=self.player.last_attack_time,
             last_skill_time=self.player.last_skill_time,
             route_data=self.route_manager.get_route_display_data() if self.route_manager else None
@@ -503,14 +541,37 @@ class GameEngine:
         """Handle combat victory"""
         if self.current_mob_group:
             current_target = self.current_mob_group.get_current_target()
+            # Расход зелий за бой относим к квадрату и уровню моба
+            if current_target:
+                route_point = self.route_manager.get_current_point() if self.route_manager else None
+                self.combat_handler.potion_forecaster.record_kill(
+                    route_point.square if route_point else None, current_target.level
+                )
+            # Доход квадрата - по итогам боя из ответа сервера
+            victory, self.combat_handler.last_victory = self.combat_handler.last_victory, None
+            if victory and self.route_manager:
+                killed, exp, gold = victory
+                self.route_manager.square_bandit.record_kill(max(killed, 1), exp, gold, level=self.player.level)
             # Update route manager
             if self.route_manager:
                 self.route_manager.increment_mob_kills()
+                # Новый уровень - маршрут из таблицы для этого уровня
+                if self.player.level != self.route_manager.player_level:
+                    self.route_manager.replan(self.player.level,
+                                              potions=self._potions_spent() - self.square_potions_start)
+                    if self.route_manager.mobs_killed_on_current_square == 0:
+                        self.square_potions_start = self._potions_spent()
+                        self.explore_done = False
                 # Check if should move to next square
                 if self.route_manager.should_move_to_next_square():
                     console.print(f"[yellow]Killed {self.route_manager.mobs_per_square} mobs on current square, moving to next[/yellow]")
                     logger.info(f"Killed {self.route_manager.mobs_per_square} mobs on current square, moving to next")
-                    self.route_manager.move_to_next_square()
+                    previous_point = self.route_manager.get_current_point()
+                    self.route_manager.move_to_next_square(potions=self._potions_spent() - self.square_potions_start)
+                    if self.route_manager.get_current_point() is not previous_point:
+                        # Бандит выбрал другой квадрат - переходим на него сразу
+                        self._move_to_route_point(from_point=previous_point)
+                    self.square_potions_start = self._potions_spent()
                     self.explore_done = False  # Reset exploration for new square
             # Перед очисткой группы мобов явно очищаем боевую панель
             self.display.update_display(
@@ -523,7 +584,7 @@ class GameEngine:
                 skill_cooldown=0,
                 mana_cooldown=0,
                 rest_time=None,
-                player_name="Piulok",
+                player_name=self.player.name or "Player",
                 last_attack_time=self.player.last_attack_time,
                 last_skill_time=self.player.last_skill_time,
                 route_data=self.route_manager.get_route_display_data() if self.route_manager else None
@@ -532,6 +593,42 @@ class GameEngine:
             self.current_mob_group = None
             self.explore_done = False
             self.state_manager.change_state(GameState.CITY, "Combat ended - victory")
+        if self.combat_handler.pending_recovery:
+            self._run_city_trip()
+    
+    def _run_city_trip(self):
+        """Поездка в город после боя с возвращением на точку маршрута"""
+        situation_type = self.combat_handler.pending_recovery
+        self.combat_handler.pending_recovery = None
+        self.combat_handler.low_damage_handler.handle_low_damage_situation(
+            None, None, clock.time(), situation_type
+        )
+        self.combat_handler.potion_forecaster.pause()
+        if self.route_manager:
+            self.route_manager.square_bandit.pause()
+    
+    def _potions_spent(self) -> int:
+        """Potions used over the session (attributed to kills)"""
+        total = self.combat_handler.potion_forecaster.total
+        return total.heal + total.mana
+    
+    def _trip_before_rest(self):
+        """Поездка в город перед отдыхом, если за зельями или с продажей все равно скоро ехать"""
+        forecaster = self.combat_handler.potion_forecaster
+        inventory_policy = self.combat_handler.inventory_policy
+        if forecaster.should_trip(self.player.get_heal_potions_count(), self.player.get_mana_potions_count(),
+                                  other_need=True):
+            self.display.print_message("🛒 Зелий хватит ненадолго - пополняем перед отдыхом", "info")
+            self.combat_handler.pending_recovery = "low_potions"
+            self._run_city_trip()
+        elif inventory_policy.should_trip(self.player.inventory or {}, self.player.max_inventory_weight,
+                                          other_need=True):
+            self.display.print_message("🎒 Рюкзак скоро заполнится - продаем перед отдыхом", "info")
+            self.combat_handler.pending_recovery = "full_inventory"
+            self._run_city_trip()
+        forecaster.pause()
+        if self.route_manager:
+            self.route_manager.square_bandit.pause()
     
     def _handle_combat_failure(self):
         """Handle combat failure"""
@@ -591,7 +688,7 @@ class GameEngine:
                 self.player.update_from_api_response(user_info)
             
             # Обновляем дисплей с актуальными данными
-            current_time = time.time()
+            current_time = clock.time()
             self._update_display(current_time, GameState.CITY)
             
             # 2. Проверяем текущую позицию
@@ -676,7 +773,7 @@ class GameEngine:
                     console.print(f"[red]Failed to buy healing potions: {heal_result}[/red]")
                     logger.error(f"Failed to buy healing potions: {heal_result}")
                 
-                time.sleep(2)  # Пауза 2 секунды
+                clock.sleep(2)  # Пауза 2 секунды
             
             # Покупаем зелья маны если меньше 300
             if mana_potions < 300:
@@ -693,7 +790,7 @@ class GameEngine:
                     console.print(f"[red]Failed to buy mana potions: {mana_result}[/red]")
                     logger.error(f"Failed to buy mana potions: {mana_result}")
                 
-                time.sleep(2)  # Пауза 2 секунды
+                clock.sleep(2)  # Пауза 2 секунды
             
             if potions_bought > 0:
                 console.print(f"[green]Total potions bought: {potions_bought}[/green]")
@@ -720,7 +817,7 @@ class GameEngine:
             if result.get("status") == "success":
                 console.print("[green]Successfully moved to farm zone[/green]")
                 logger.info("Successfully moved to farm zone")
-                time.sleep(2)  # Пауза 2 секунды
+                clock.sleep(2)  # Пауза 2 секунды
                 return True
             else:
                 console.print(f"[red]Failed to move to farm zone: {result.get('message', 'Unknown error')}[/red]")
@@ -756,7 +853,7 @@ class GameEngine:
             if result.get("status") == "success":
                 console.print(f"[green]Successfully moved to location[/green]")
                 logger.info("Successfully moved to location")
-                time.sleep(2)  # Пауза 2 секунды
+                clock.sleep(2)  # Пауза 2 секунды
                 return True
             else:
                 console.print(f"[red]Failed to move to location: {result.get('message', 'Unknown error')}[/red]")
@@ -768,8 +865,13 @@ class GameEngine:
             logger.error(f"Error moving to location: {e}")
             return False
     
-    def _move_to_route_point(self) -> bool:
-        """Move to current route point"""
+    def _move_to_route_point(self, from_point=None) -> bool:
+        """
+        Move to current route point
+
+        Args:
+            from_point: Route point the player stands on (same side - only change_square)
+        """
         try:
             if not self.route_manager or not self.route_manager.route:
                 logger.error("[ROUTE] Нет маршрута для возврата!")
@@ -781,14 +883,17 @@ class GameEngine:
             console.print(f"[blue]Moving to route point: {current_point.location_name}/{current_point.direction_name}/{current_point.square}[/blue]")
             logger.info(f"Moving to route point: {current_point.location_name}/{current_point.direction_name}/{current_point.square}")
             
-            # Move to location and direction
-            result = self.api_client.change_geo(current_point.location, current_point.direction)
-            if result.get("status") != "success":
-                console.print(f"[red]Failed to move to {current_point.location_name}/{current_point.direction_name}[/red]")
-                logger.error(f"Failed to move to {current_point.location_name}/{current_point.direction_name}")
-                return False
-            
-            time.sleep(2)  # Delay after location change
+            same_side = (from_point is not None and from_point.location == current_point.location and
+                         from_point.direction == current_point.direction)
+            if not same_side:
+                # Move to location and direction
+                result = self.api_client.change_geo(current_point.location, current_point.direction)
+                if result.get("status") != "success":
+                    console.print(f"[red]Failed to move to {current_point.location_name}/{current_point.direction_name}[/red]")
+                    logger.error(f"Failed to move to {current_point.location_name}/{current_point.direction_name}")
+                    return False
+                
+                clock.sleep(2)  # Delay after location change
             
             # Move to square
             result = self.api_client.change_square(current_point.square)
@@ -797,7 +902,7 @@ class GameEngine:
                 logger.error(f"Failed to move to square {current_point.square}")
                 return False
             
-            time.sleep(1)  # Delay after square change
+            clock.sleep(1)  # Delay after square change
             
             console.print(f"[green]Successfully moved to {current_point.location_name}/{current_point.direction_name}/{current_point.square}[/green]")
             logger.info(f"Successfully moved to {current_point.location_name}/{current_point.direction_name}/{current_point.square}")
@@ -0,0 +1,254 @@
+"""
+Inventory Policy - backpack weight forecast and sell policy
+
+Вес дропа за убийство копится по ответам боя, и по нему прогнозируется,
+через сколько убийств рюкзак переполнится. Возвращение в город
+назначается до переполнения (дроп в полный рюкзак пропадает), а если
+поездка уже запланирована по другой причине, продажа делается заодно.
+В городе экипировка продается целиком (бот ее не надевает), а ресурсы -
+только сколько нужно, чтобы хватило места до следующей поездки: первыми
+уходят самые дешевые на единицу веса. Рецепты, куски на крафт и
+ингредиенты рецептов из items-database.json не продаются никогда: бот
+фармит их ради крафта, и цена торговца не отражает их ценности.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from typing import Dict, Any, Optional, List, Tuple, Set
+
+from Found_bot.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+SELL_TYPES = ('weapons', 'armors', 'jewelry')  # Экипировка: продается при каждом визите
+KEEP_ITEMS = ('m_0_1', 'm_1', 'm_3')  # Золото и зелья не продаются никогда
+
+
+class ItemData:
+    """Prices, weights and crafting items from items database (read-only, shared)"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Items database (list of recipes with their craftItems)
+        """
+        self.values: Dict[str, Tuple[float, float]] = {}  # {item_id: (price, weight)}
+        self.craft_items: Set[str] = set()  # Рецепты и ингредиенты рецептов
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Items database {path} is not available: {e}")
+            return
+        for item in data:
+            if not isinstance(item, dict) or not item.get('id'):
+                continue
+            self.values[item['id']] = (item.get('price') or 0, item.get('weight') or 0)
+            if item.get('isRecipe'):
+                self.craft_items.add(item['id'])
+            for ingredient in item.get('craftItems') or []:
+                if isinstance(ingredient, dict) and ingredient.get('id'):
+                    self.craft_items.add(ingredient['id'])
+                    self.values.setdefault(ingredient['id'], (ingredient.get('price') or 0,
+                                                              ingredient.get('weight') or 0))
+
+
+_item_data: Dict[str, ItemData] = {}
+_item_data_lock = threading.Lock()
+
+
+def get_item_data(path: Optional[str] = None) -> ItemData:
+    """
+    Get item data shared by all characters of the process
+
+    Args:
+        path: Items database (defaults to Settings.INVENTORY_ITEMS_DB_PATH)
+
+    Returns:
+        ItemData loaded once per path
+    """
+    key = os.path.abspath(path or Settings.INVENTORY_ITEMS_DB_PATH)
+    with _item_data_lock:
+        data = _item_data.get(key)
+        if data is None:
+            data = _item_data[key] = ItemData(key)
+        return data
+
+
+class InventoryPolicy:
+    """Predicts backpack overflow and picks items to sell"""
+
+    def __init__(self, items_path: Optional[str] = None):
+        """
+        Args:
+            items_path: Items database with prices and weights
+                (defaults to Settings.INVENTORY_ITEMS_DB_PATH)
+        """
+        item_data = get_item_data(items_path)
+        self.items = item_data.values
+        self.craft_items = item_data.craft_items
+        self.kills = 0
+        self.drop_weight = 0.0  # Суммарный вес дропа за self.kills убийств
+
+    def is_kept(self, item_id: str, entry: Optional[Dict[str, Any]] = None) -> bool:
+        """True for items that are never sold: gold, potions, recipes and crafting items"""
+        entry = entry or {}
+        return (item_id in KEEP_ITEMS or bool(entry.get('isRecipe')) or item_id in self.craft_items or
+                item_id.startswith(Settings.INVENTORY_KEEP_PREFIXES))
+
+    def item_value(self, item_id: str, entry: Optional[Dict[str, Any]] = None) -> Tuple[float, float]:
+        """
+        Sell price and weight of one item
+
+        Вес из инвентаря (его прислал сервер) точнее базы; экипировки
+        в базе нет, для нее берется INVENTORY_EQUIPMENT_WEIGHT.
+
+        Args:
+            item_id: Item id
+            entry: Inventory entry of the item
+
+        Returns:
+            (price, weight); 0 - unknown
+        """
+        entry = entry or {}
+        price, weight = self.items.get(item_id, (0, 0))
+        if entry.get('price'):
+            price = entry['price']
+        if entry.get('weight'):
+            weight = entry['weight']
+        elif not weight and entry.get('typeElement') in SELL_TYPES:
+            weight = Settings.INVENTORY_EQUIPMENT_WEIGHT
+        return price, weight
+
+    def carried_weight(self, inventory: Dict[str, Any]) -> float:
+        """Total weight of inventory"""
+        total = 0.0
+        for entry in inventory.values():
+            if isinstance(entry, dict):
+                total += self.item_value(entry.get('id', ''), entry)[1] * entry.get('count', 1)
+        return total
+
+    def record_kill(self, drops: List[Dict[str, Any]]):
+        """
+        Add drop of a won fight to weight statistics
+
+        Args:
+            drops: dataWin.drop of attack response (items or lists of items)
+        """
+        weight = 0.0
+        for group in drops:
+            for drop in (group if isinstance(group, list) else [group]):
+                if isinstance(drop, dict) and drop.get('id'):
+                    weight += self.item_value(drop['id'], drop)[1] * drop.get('count', 1)
+        self.kills += 1
+        self.drop_weight += weight
+
+    @property
+    def weight_per_kill(self) -> Optional[float]:
+        """Average drop weight per kill (None while there are too few kills)"""
+        if self.kills < Settings.INVENTORY_FORECAST_MIN_KILLS:
+            return None
+        return self.drop_weight / self.kills
+
+    def kills_until_full(self, inventory: Dict[str, Any], max_weight: float) -> float:
+        """
+        Kills left before backpack overflows
+
+        Args:
+            inventory: User inventory
+            max_weight: Backpack capacity (inventoryWeight)
+
+        Returns:
+            Kills left; inf if capacity or drop weight is unknown
+        """
+        per_kill = self.weight_per_kill
+        if not max_weight or not per_kill:
+            return math.inf
+        return max(0.0, max_weight - self.carried_weight(inventory)) / per_kill
+
+    def should_trip(self, inventory: Dict[str, Any], max_weight: float,
+                    other_need: bool = False) -> Optional[str]:
+        """
+        Decide whether to go selling now
+
+        Args:
+            inventory: User inventory
+            max_weight: Backpack capacity
+            other_need: Trip is due for another reason soon - sell early
+
+        Returns:
+            Reason of the trip or None
+        """
+        kills_left = self.kills_until_full(inventory, max_weight)
+        limit = Settings.INVENTORY_ALIGN_KILLS if other_need else Settings.INVENTORY_SAFETY_KILLS
+        if kills_left > limit:
+            return None
+        if not self._candidates(inventory):
+            # Продавать нечего - поездка ничего не освободит
+            logger.warning(f"Backpack fills in {kills_left:.0f} kills but nothing can be sold")
+            return None
+        return "full" if kills_left <= Settings.INVENTORY_SAFETY_KILLS else "aligned"
+
+    def _candidates(self, inventory: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any], float, float]]:
+        """Sellable items: (sell id, entry, price, weight)"""
+        result = []
+        for key, entry in inventory.items():
+            if not isinstance(entry, dict) or entry.get('position', 'inventory') != 'inventory':
+                continue
+            item_id = entry.get('id', key)
+            if key in KEEP_ITEMS or self.is_kept(item_id, entry):
+                continue
+            price, weight = self.item_value(item_id, entry)
+            # Ресурс без известной цены не продаем: неизвестно, сколько он стоит
+            if entry.get('typeElement') in SELL_TYPES or price > 0:
+                result.append((entry.get('uniqueId') or key, entry, price, weight))
+        return result
+
+    def sell_list(self, inventory: Dict[str, Any], max_weight: float,
+                  horizon_kills: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Items to sell in the city
+
+        Args:
+            inventory: User inventory
+            max_weight: Backpack capacity (0 - unknown, only equipment is sold)
+            horizon_kills: Kills until the next planned visit
+                (defaults to Settings.INVENTORY_SELL_HORIZON_KILLS)
+
+        Returns:
+            Sell request items [{"id": uniqueId, "count": n}]
+        """
+        sell = []
+        resources = []
+        freed = 0.0
+        for sell_id, entry, price, weight in self._candidates(inventory):
+            if entry.get('typeElement') in SELL_TYPES:
+                sell.append({"id": sell_id, "count": entry.get('count', 1)})
+                freed += weight * entry.get('count', 1)
+            elif weight > 0:
+                resources.append((sell_id, entry, price, weight))
+
+        per_kill = self.weight_per_kill
+        if not max_weight or not per_kill or not resources:
+            return sell
+
+        # Дальше горизонта место не освобождаем: ресурсы дороже держать, чем лишний раз съездить
+        horizon_kills = min(Settings.INVENTORY_SELL_HORIZON_KILLS,
+                            horizon_kills if horizon_kills is not None else math.inf)
+        needed = horizon_kills * per_kill
+        free = max_weight - self.carried_weight(inventory) + freed
+
+        # Самые дешевые на единицу веса ресурсы освобождают место с наименьшей потерей
+        resources.sort(key=lambda item: item[2] / item[3])
+        for sell_id, entry, price, weight in resources:
+            if free >= needed:
+                break
+            count = min(entry.get('count', 1), math.ceil((needed - free) / weight))
+            sell.append({"id": sell_id, "count": count})
+            free += weight * count
+        logger.info(f"Sell {len(sell)} stacks, free weight {free:.0f} for {needed:.0f} "
+                    f"({horizon_kills:.0f} kills)")
+        return sell
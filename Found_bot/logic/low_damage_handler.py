@@ -3,23 +3,35 @@
 Low Damage Handler - обрабатывает ситуации с низким уроном
 """
 
-import time
 import logging
 from typing import Dict, Any, List, Optional
 from api.client import APIClient
+from api.records import decode_attack
+from Found_bot.config.settings import Settings
 from core.player import Player
 from ui.display import GameDisplay
+from Found_bot.utils.clock import clock
+from logic.city_trip import CityTripPlanner, CityTripReport, ReturnPoint
+from logic.potion_forecast import PotionForecaster
+from logic.inventory_policy import InventoryPolicy
 
 logger = logging.getLogger(__name__)
 
 class LowDamageHandler:
     """Обработчик ситуаций с низким уроном"""
     
-    def __init__(self, api_client: APIClient, player: Player, display: GameDisplay):
+    def __init__(self, api_client: APIClient, player: Player, display: GameDisplay,
+                 potion_forecaster: Optional[PotionForecaster] = None,
+                 inventory_policy: Optional[InventoryPolicy] = None):
         self.api_client = api_client
         self.player = player
         self.display = display
         self.is_handling_low_damage = False
+        # Переходы клиент не ограничивает по частоте - интервал держит планировщик;
+        # объем закупки - прогноз расхода, список продажи - политика инвентаря
+        self.trip_planner = CityTripPlanner(api_client, request_interval=Settings.CITY_TRIP_REQUEST_INTERVAL,
+                                            forecaster=potion_forecaster, inventory_policy=inventory_policy)
+        self.trip_reports: List[CityTripReport] = []  # Последние поездки (время, запросы)
         
     def handle_low_damage_situation(self, current_target, mob_group, current_time: float, situation_type: str = "low_damage") -> bool:
         """
@@ -29,7 +41,7 @@ class LowDamageHandler:
             current_target: Текущая цель
             mob_group: Группа мобов
             current_time: Текущее время
-            situation_type: Тип ситуации ("low_damage" или "low_potions")
+            situation_type: Тип ситуации ("low_damage", "low_potions" или "full_inventory")
         
         Returns:
             bool: True если обработка завершена, False если нужно продолжить
@@ -39,8 +51,11 @@ class LowDamageHandler:
             
         self.is_handling_low_damage = True
         
-        if situation_type == "low_potions":
-            self.display.print_message("🛒 Мало зелий — идём в город за покупкой!", "warning")
+        if situation_type in ("low_potions", "full_inventory"):
+            if situation_type == "low_potions":
+                self.display.print_message("🛒 Мало зелий — идём в город за покупкой!", "warning")
+            else:
+                self.display.print_message("🎒 Рюкзак почти полон — идём в город продавать!", "warning")
             # Сохраняем текущую точку маршрута
             route_point = None
             if hasattr(self, 'route_manager') and self.route_manager:
@@ -49,21 +64,16 @@ class LowDamageHandler:
                 route_point = self.player.route_manager.get_current_point()
             else:
                 route_point = None
-            # Уходим в город и покупаем зелья
-            self._return_to_city()
-            time.sleep(2)
-            self._buy_potions()
-            time.sleep(2)
-            self._go_to_farm_zone()
-            time.sleep(2)
-            # Возвращаемся на сохранённую точку маршрута
+            # Город, продажа, покупка и возвращение на точку маршрута - одним планом
             if route_point:
-                self.display.print_message(f"🚶‍♂️ Возвращаемся на маршрут: {route_point.location_name}/{route_point.direction_name}/{route_point.square}", "info")
-                self.api_client.change_geo(route_point.location, route_point.direction)
-                time.sleep(2)
-                self.api_client.change_square(route_point.square)
-                time.sleep(2)
-            self.display.print_message("✅ Купили зелья и вернулись на маршрут! Продолжаем обычную работу.", "success")
+                self.display.print_message(f"🚶‍♂️ Вернёмся на маршрут: {route_point.location_name}/{route_point.direction_name}/{route_point.square}", "info")
+                return_point = ReturnPoint.from_route_point(route_point)
+            else:
+                return_point = self.trip_planner.default_return_point(self.player.level)
+            self.is_handling_low_damage = False
+            if not self._run_city_trip(return_point):
+                return False
+            self.display.print_message("✅ Побывали в городе и вернулись на маршрут! Продолжаем обычную работу.", "success")
             # Выставляем флаг just_bought_potions в combat_handler, если есть
             if hasattr(self, 'combat_handler'):
                 self.combat_handler.just_bought_potions = True
@@ -92,7 +102,7 @@ class LowDamageHandler:
                     skill_cooldown=0,
                     mana_cooldown=0,
                     rest_time=None,
-                    player_name="Piulok",
+                    player_name=self.player.name or "Player",
                     last_attack_time=self.player.last_attack_time,
                     last_skill_time=self.player.last_skill_time
                 )
@@ -101,19 +111,13 @@ class LowDamageHandler:
                     break
                 if potions == 0:
                     self.display.print_message("❌ Зелья лечения закончились! Возвращаемся в город за покупкой.", "error")
-                    self._return_to_city()
-                    time.sleep(2)
-                    self._buy_potions()
-                    time.sleep(2)
-                    self._go_to_farm_zone()
-                    time.sleep(2)
-                    self._go_to_location()
-                    time.sleep(2)
+                    if not self._run_city_trip(self.trip_planner.default_return_point(self.player.level)):
+                        return False
                     self.display.print_message("✅ Купили зелья и вернулись на фарм! Продолжаем восстановление HP...", "success")
                     continue
-                if hp_percent < 80 and self.player.can_use_heal_potion(time.time()):
+                if hp_percent < 80 and self.player.can_use_heal_potion(clock.time()):
                     heal_result = self.api_client.use_healing_potion()
-                    self.player.record_heal(time.time())
+                    self.player.record_heal(clock.time())
                     if "user" in heal_result:
                         self.player.update_from_api_response(heal_result)
                     # Получаем актуальные HP и количество банок
@@ -122,7 +126,7 @@ class LowDamageHandler:
                     potions = self.player.get_heal_potions_count() if hasattr(self.player, 'get_heal_potions_count') else 'N/A'
                     hp_percent = (current_hp / max_hp * 100) if max_hp > 0 else 100
                     self.display.print_message(f"❤️ Использовал зелье лечения!   HP: {current_hp}/{max_hp} ({hp_percent:.1f}%), Банки: {potions}", "success")
-                time.sleep(1.1)
+                clock.sleep(1.1)
             return True
             
         except Exception as e:
@@ -132,6 +136,25 @@ class LowDamageHandler:
         finally:
             self.is_handling_low_damage = False
     
+    def _run_city_trip(self, return_point: ReturnPoint) -> bool:
+        """Поездка в город по плану из одного снимка инвентаря"""
+        report = self.trip_planner.run(return_point, self._find_best_square)
+        if report is None:
+            self.display.print_message("❌ Не удалось получить информацию о персонаже", "error")
+            return False
+        if report.user:
+            self.player.update_from_api_response({'user': report.user})
+        if report.plan.visits_city:
+            self.display.update_stats(city_visits=1, items_sold=report.items_sold,
+                                      gold_from_sales=report.gold_earned)
+        self.trip_reports.append(report)
+        del self.trip_reports[:-Settings.CITY_TRIP_HISTORY]
+        self.display.print_message(
+            f"🧭 Поездка: {report.plan.describe()} — {report.duration:.1f}с, {report.calls} запросов",
+            "info" if report.ok else "error"
+        )
+        return report.ok
+    
     def _finish_remaining_mobs(self, current_target, mob_group, current_time: float):
         """Добиваем оставшихся мобов"""
         self.display.print_message("⚔️ Добиваем оставшихся мобов...", "info")
@@ -153,7 +176,7 @@ class LowDamageHandler:
                     self.display.print_message(f"❤️ Использовал зелье лечения!   HP: {current_hp}/{max_hp} ({hp_percent:.1f}%), Банки: {potions}", "success")
                 except Exception as e:
                     self.display.print_message(f"❌ Ошибка лечения: {e}", "error")
-                time.sleep(1.1)
+                clock.sleep(1.1)
                 continue
                 
             # Атакуем мобов
@@ -163,187 +186,31 @@ class LowDamageHandler:
                         attack_result = self.api_client.attack_mob(mob.farm_id)
                         self.player.record_attack(current_time)
                         
-                        # Обновляем данные игрока
-                        if "user" in attack_result:
-                            self.player.update_from_api_response(attack_result)
-                        
                         if isinstance(attack_result, dict):
-                            if attack_result.get('status') == 'success':
+                            record = decode_attack(attack_result)
+                            # Обновляем данные игрока
+                            if record.user:
+                                self.player.apply_user(record.user)
+                            
+                            if record.status == 'success':
                                 # Обновляем данные моба
-                                if 'mob' in attack_result:
-                                    mob.update_from_api_response(attack_result['mob'])
+                                mob.update_from_attack(record)
                                 
                                 # Проверяем победу
-                                if attack_result.get('dataWin'):
+                                if record.is_win:
                                     self.display.print_message("🎉 Победа!", "success")
                                     break
-                            elif attack_result.get('status') == 'fail':
-                                self.display.print_message(f"❌ Атака провалена: {attack_result.get('message', '')}", "error")
+                            elif record.status == 'fail':
+                                self.display.print_message(f"❌ Атака провалена: {record.message}", "error")
                     except Exception as e:
                         self.display.print_message(f"❌ Ошибка атаки: {e}", "error")
-                    time.sleep(1.1)
+                    clock.sleep(1.1)
             
             # Обновляем время
-            current_time = time.time()
+            current_time = clock.time()
         
         self.display.print_message("✅ Все мобы добиты!", "success")
     
-    def _move_to_g4(self):
-        """Переходим на квадрат G4"""
-        self.display.print_message("📍 Переходим на квадрат G4...", "info")
-        
-        try:
-            result = self.api_client.change_square("G4")
-            
-            if result.get("status") == "success":
-                self.display.print_message("✅ Переход на G4 успешен", "success")
-            else:
-                self.display.print_message(f"❌ Ошибка перехода на G4: {result.get('message', 'Неизвестная ошибка')}", "error")
-                
-        except Exception as e:
-            logger.error(f"Ошибка перехода на G4: {e}")
-            self.display.print_message(f"❌ Ошибка перехода на G4: {e}", "error")
-    
-    def _return_to_city(self):
-        """Возвращаемся в город"""
-        self.display.print_message("🏙️ Возвращаемся в город...", "info")
-        
-        try:
-            result = self.api_client.change_main_geo("city")
-            
-            if result.get("status") == "success":
-                self.display.print_message("✅ Возврат в город успешен", "success")
-                self.display.update_stats(city_visits=1)
-            else:
-                self.display.print_message(f"❌ Ошибка возврата в город: {result.get('message', 'Неизвестная ошибка')}", "error")
-                
-        except Exception as e:
-            logger.error(f"Ошибка возврата в город: {e}")
-            self.display.print_message(f"❌ Ошибка возврата в город: {e}", "error")
-    
-    def _sell_equipment(self, player: Player) -> bool:
-        """Продать все оружие, броню и бижутерию из инвентаря (не надетые)"""
-        try:
-            user_info = self.api_client.get_user_info()
-            if not user_info or 'user' not in user_info or 'inventory' not in user_info['user']:
-                logger.error("Не удалось получить информацию о предметах")
-                return False
-            inventory = user_info['user']['inventory']
-            logger.info(f"Получен инвентарь: {len(inventory)} предметов")
-            items_to_sell = []
-            for item_id, item_data in inventory.items():
-                item_type = item_data.get('typeElement', '')
-                item_position = item_data.get('position', '')
-                # Продаем только вещи из инвентаря, не надетые
-                if (item_type in ['weapons', 'armors', 'jewelry'] and 
-                    item_position == 'inventory'):
-                    unique_id = item_data.get('uniqueId')
-                    if unique_id:
-                        items_to_sell.append({"id": unique_id, "count": 1})
-                        logger.info(f"Добавлен к продаже: {unique_id} ({item_type}) - из инвентаря")
-                elif item_type in ['weapons', 'armors', 'jewelry'] and item_position == 'onBody':
-                    logger.info(f"Пропускаем надетый предмет: {item_data.get('uniqueId')} ({item_type}) - надет")
-            if not items_to_sell:
-                logger.info("Нет предметов для продажи в инвентаре")
-                return True
-            logger.info(f"Продаём {len(items_to_sell)} предметов из инвентаря: {items_to_sell}")
-            sell_result = self.api_client.sell_items(items_to_sell)
-            logger.info(f"Результат продажи: {sell_result}")
-            if sell_result and sell_result.get('status') == 'success':
-                gold_earned = sell_result.get('goldEarned', 0)
-                self.display.update_stats(gold_earned=gold_earned)
-                logger.info(f"Продано {len(items_to_sell)} предметов, заработано {gold_earned} золота")
-                return True
-            else:
-                logger.error(f"Ошибка продажи: {sell_result}")
-                return False
-        except Exception as e:
-            logger.error(f"Ошибка при продаже предметов: {e}")
-            return False
-    
-    def _buy_potions(self):
-        """Купить зелья лечения и маны до лимита 300"""
-        try:
-            user_info = self.api_client.get_user_info()
-            if not user_info or 'user' not in user_info or 'inventory' not in user_info['user']:
-                logger.error("Не удалось получить информацию о зельях")
-                return False
-            inventory = user_info['user']['inventory']
-            logger.info(f"Получен инвентарь для покупки зелий: {len(inventory)} предметов")
-            heal_potions = 0
-            mana_potions = 0
-            for item_id, item_data in inventory.items():
-                item_count = item_data.get('count', 0)
-                if item_id == 'm_1':
-                    heal_potions = item_count
-                    logger.info(f"Найдено зелий лечения: {heal_potions}")
-                elif item_id == 'm_3':
-                    mana_potions = item_count
-                    logger.info(f"Найдено зелий маны: {mana_potions}")
-            potions_bought = 0
-            if heal_potions < 300:
-                to_buy = 300 - heal_potions
-                logger.info(f"Покупаем {to_buy} зелий лечения")
-                heal_result = self.api_client.buy_items('m_1', 'resources', to_buy)
-                logger.info(f"Результат покупки зелий лечения: {heal_result}")
-                if heal_result and heal_result.get('status') == 'success':
-                    potions_bought += to_buy
-                    self.display.update_stats(potions_used=to_buy)
-                    logger.info(f"Куплено {to_buy} зелий лечения")
-                else:
-                    logger.error(f"Ошибка покупки зелий лечения: {heal_result}")
-            if mana_potions < 300:
-                to_buy = 300 - mana_potions
-                logger.info(f"Покупаем {to_buy} зелий маны")
-                mana_result = self.api_client.buy_items('m_3', 'resources', to_buy)
-                logger.info(f"Результат покупки зелий маны: {mana_result}")
-                if mana_result and mana_result.get('status') == 'success':
-                    potions_bought += to_buy
-                    self.display.update_stats(potions_used=to_buy)
-                    logger.info(f"Куплено {to_buy} зелий маны")
-                else:
-                    logger.error(f"Ошибка покупки зелий маны: {mana_result}")
-            if potions_bought > 0:
-                logger.info(f"Всего куплено зелий: {potions_bought}")
-                return True
-            else:
-                logger.info("Зелья не покупались (достаточно в инвентаре)")
-                return True
-        except Exception as e:
-            logger.error(f"Ошибка при покупке зелий: {e}")
-            return False
-    
-    def _go_to_best_square(self):
-        """Переходим на подходящий квадрат"""
-        self.display.print_message("🎯 Ищем подходящий квадрат...", "info")
-        
-        try:
-            # Получаем информацию о квадратах
-            user_info = self.api_client.get_user_info()
-            squares = user_info.get("squares", [])
-            
-            if squares:
-                best_square = self._find_best_square(squares)
-                
-                if best_square:
-                    self.display.print_message(f"🎯 Найден лучший квадрат: {best_square}", "info")
-                    
-                    # Переходим на лучший квадрат
-                    result = self.api_client.change_square(best_square)
-                    
-                    if result.get("status") == "success":
-                        self.display.print_message(f"✅ Переход на квадрат {best_square} успешен", "success")
-                    else:
-                        self.display.print_message(f"❌ Ошибка перехода на квадрат {best_square}: {result.get('message', 'Неизвестная ошибка')}", "error")
-                else:
-                    self.display.print_message("❌ Не найден подходящий квадрат", "error")
-            else:
-                self.display.print_message("❌ Нет информации о квадратах", "error")
-                
-        except Exception as e:
-            logger.error(f"Ошибка перехода на квадрат: {e}")
-            self.display.print_message(f"❌ Ошибка перехода на квадрат: {e}", "error")
-    
     def _find_best_square(self, squares: List[Dict[str, Any]]) -> Optional[str]:
         """Находит лучший квадрат для текущего уровня"""
         player_level = self.player.level
@@ -359,7 +226,8 @@ class LowDamageHandler:
             
             if lvl_mobs and "mobLvl" in lvl_mobs:
                 try:
-                    mob_level = int(lvl_mobs["mobLvl"])
+                    # Уровень бывает диапазоном "20-22" - берем нижнюю границу
+                    mob_level = int(str(lvl_mobs["mobLvl"]).split("-")[0])
                     level_diff = abs(mob_level - target_level)
                     
                     # Если мобы на 9 уровней ниже или выше - это идеально
@@ -388,7 +256,7 @@ class LowDamageHandler:
     def _force_display_update(self):
         """Принудительное обновление дисплея"""
         try:
-            current_time = time.time()
+            current_time = clock.time()
             player_data = self.player.get_stats_summary()
             
             # Обновляем дисплей с текущими данными
@@ -402,7 +270,7 @@ class LowDamageHandler:
                 skill_cooldown=0,
                 mana_cooldown=0,
                 rest_time=None,
-                player_name="Piulok",
+                player_name=self.player.name or "Player",
                 last_attack_time=self.player.last_attack_time,
                 last_skill_time=self.player.last_skill_time
             )
@@ -414,60 +282,3 @@ class LowDamageHandler:
             )
         except Exception as e:
             logger.warning(f"Ошибка принудительного обновления дисплея: {e}")
-    
-    def _reset_location(self):
-        """Сбрасываем локацию перед переходом в город"""
-        self.display.print_message("🔄 Сбрасываем локацию...", "info")
-        
-        try:
-            result = self.api_client.change_geo("", "", "reset")
-            
-            if result.get("status") == "success":
-                self.display.print_message("✅ Сброс локации успешен", "success")
-            else:
-                self.display.print_message(f"❌ Ошибка сброса локации: {result.get('message', 'Неизвестная ошибка')}", "error")
-                
-        except Exception as e:
-            logger.error(f"Ошибка сброса локации: {e}")
-            self.display.print_message(f"❌ Ошибка сброса локации: {e}", "error")
-    
-    def _go_to_farm_zone(self):
-        """Переходим в фарм зону"""
-        self.display.print_message("🌾 Переходим в фарм зону...", "info")
-        
-        try:
-            result = self.api_client.change_main_geo("farm")
-            
-            if result.get("status") == "success":
-                self.display.print_message("✅ Переход в фарм зону успешен", "success")
-            else:
-                self.display.print_message(f"❌ Ошибка перехода в фарм зону: {result.get('message', 'Неизвестная ошибка')}", "error")
-                
-        except Exception as e:
-            logger.error(f"Ошибка перехода в фарм зону: {e}")
-            self.display.print_message(f"❌ Ошибка перехода в фарм зону: {e}", "error")
-    
-    def _go_to_location(self):
-        """Переходим на локацию"""
-        self.display.print_message("📍 Переходим на локацию...", "info")
-        
-        try:
-            # Выбираем локацию в зависимости от уровня персонажа
-            player_level = self.player.level
-            if player_level < 10:
-                # Для персонажей ниже 10 уровня используем loco_0
-                self.display.print_message(f"📍 Переходим в loco_0 (уровень {player_level} < 10)...", "info")
-                result = self.api_client.change_geo("loco_0", "south")
-            else:
-                # Для персонажей 10+ уровня используем loco_3
-                self.display.print_message(f"📍 Переходим в loco_3 (уровень {player_level} >= 10)...", "info")
-                result = self.api_client.change_geo("loco_3", "south")
-            
-            if result.get("status") == "success":
-                self.display.print_message("✅ Переход на локацию успешен", "success")
-            else:
-                self.display.print_message(f"❌ Ошибка перехода на локацию: {result.get('message', 'Неизвестная ошибка')}", "error")
-                
-        except Exception as e:
-            logger.error(f"Ошибка перехода на локацию: {e}")
-            self.display.print_message(f"❌ Ошибка перехода на локацию: {e}", "error") 
\ No newline at end of file
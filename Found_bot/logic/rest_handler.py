@@ -2,11 +2,11 @@
 Rest Handler - Manages rest actions at campfire
 """
 
-import time
 import logging
 from typing import Optional, Dict, Any
 from api.client import APIClient
 from ui.display import GameDisplay
+from Found_bot.utils.clock import clock
 
 logger = logging.getLogger(__name__)
 
@@ -25,8 +25,8 @@ class RestHandler:
             API response data or None if rest failed
         """
         try:
-            rest_result = self.api_client.rest_at_fire()
-            self._log_api_response(rest_result, "rest_at_fire")
+            rest_result = self.api_client.start_rest()
+            self._log_api_response(rest_result, "start_rest")
             
             self.display.print_message("🔥 Отдыхаем у костра...", "info")
             
@@ -34,7 +34,7 @@ class RestHandler:
             
         except Exception as e:
             self.display.print_message(f"Network error: {e}. Waiting 60 seconds before retry...", "error")
-            time.sleep(60)
+            clock.sleep(60)
             return None
     
     def _log_api_response(self, response: Dict[str, Any], context: str = ""):
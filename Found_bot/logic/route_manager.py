@@ -2,13 +2,18 @@
 Route Manager - Manages farming routes based on world_map_data.json
 """
 
-import json
 import logging
 import re
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime
 
+from Found_bot.config.settings import Settings
+from utils.world_map_index import get_world_map_index, WORLD_MAP_PATH
+from logic.route_optimizer import RouteOptimizer
+from logic.square_bandit import SquareBandit
+from logic.leveling_planner import LevelingPlan
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -21,6 +26,7 @@ class RoutePoint:
     square: str
     mob_level: int
     mob_name: str = "unknown"
+    target_kills: int = 10
 
 class RouteManager:
     """Manages farming routes based on world map data"""
@@ -28,93 +34,98 @@ class RouteManager:
     def __init__(self, player_level: int, map_path: str = None):
         self.player_level = player_level
         # Игнорируем map_path, всегда используем нужный файл
-        self.map_path = "world_map_viewer/data/complete_world_map.json"
+        self.map_path = WORLD_MAP_PATH
         self.route: List[RoutePoint] = []
         self.current_route_index = 0
         self.mobs_killed_on_current_square = 0
-        self.mobs_per_square = 10
+        self.optimizer = RouteOptimizer()
+        self.plan = LevelingPlan.load()  # План прокачки; без него - таблица маршрутов по уровням
+        # Доход квадратов: куда идти после блока убийств и оставаться ли
+        self.square_bandit = SquareBandit(
+            Settings.SQUARE_BANDIT_PATH.format(name="main") if Settings.SQUARE_BANDIT_PATH else None
+        )
         
         # Build route
         self._build_route()
+        if self.route:
+            self.square_bandit.start_visit(self.route[self.current_route_index])
+    
+    @property
+    def mobs_per_square(self) -> int:
+        """Kills on current square before moving on (set by route optimizer)"""
+        point = self.get_current_point() if self.route else None
+        return point.target_kills if point else 10
     
     def _build_route(self):
         """Build route from world map data (только по одному наиболее подходящему квадрату на сторону)"""
         try:
-            logger.info(f"Starting to build route from {self.map_path}")
-            with open(self.map_path, 'r', encoding='utf-8') as f:
-                world_map_data = json.load(f)
-            logger.info(f"Successfully loaded world map data")
-            world_map = world_map_data.get("world_map", {})
-            min_level = max(1, self.player_level - 9)
-            filtered_route = []
-            for location, location_data in world_map.items():
-                # Исключаем 'Окрестности поселения'
-                # if location == 'loco_0':
-                #     continue
-                location_name = location_data.get("name", location)
-                directions = location_data.get("directions", {})
-                for direction, direction_data in directions.items():
-                    direction_name = direction_data.get("name", direction)
-                    squares = direction_data.get("squares", {})
-                    # Собираем кандидатов в диапазоне [min_level, player_level] и mob_lvl <= 20
-                    candidates = []
-                    lower_candidates = []
-                    for square, square_data in squares.items():
-                        mob_level = square_data.get("mob_level")
-                        # Пропускать внутренние локации
-                        if isinstance(mob_level, dict) and (mob_level.get("locoId") or mob_level.get("locoName")):
-                            continue
-                        # Новый формат: mob_level может быть dict с mobLvl
-                        if mob_level is None:
-                            continue
-                        if isinstance(mob_level, dict):
-                            mob_lvl = mob_level.get("mobLvl")
-                        else:
-                            mob_lvl = mob_level
-                        if mob_lvl is None:
-                            continue
-                        # --- Новый парсинг диапазона ---
-                        if isinstance(mob_lvl, str) and '-' in mob_lvl:
-                            try:
-                                mob_lvl = int(mob_lvl.split('-')[0])
-                            except Exception:
-                                continue
-                        try:
-                            mob_lvl = int(mob_lvl)
-                        except (ValueError, TypeError):
-                            continue
-                        if mob_lvl > 20:
-                            continue  # Исключаем квадраты с мобами выше 20 уровня
-                        if min_level <= mob_lvl <= self.player_level:
-                            candidates.append((square, mob_lvl))
-                        elif mob_lvl < min_level:
-                            lower_candidates.append((square, mob_lvl))
-                    best_square = None
-                    best_mob_lvl = None
-                    if candidates:
-                        # Берём минимальный mob_level из диапазона
-                        best_square, best_mob_lvl = min(candidates, key=lambda x: x[1])
-                    elif lower_candidates:
-                        # Если нет кандидатов — берём максимальный из нижних
-                        best_square, best_mob_lvl = max(lower_candidates, key=lambda x: x[1])
-                    # Если ничего не найдено — best_square останется None
-                    if best_square:
-                        route_point = RoutePoint(
-                            location=location,
-                            location_name=location_name,
-                            direction=direction,
-                            direction_name=direction_name,
-                            square=best_square,
-                            mob_level=best_mob_lvl if best_mob_lvl is not None else 0
-                        )
-                        filtered_route.append(route_point)
-            self.route = filtered_route
+            self.route = self._route_for_level(self.player_level)
             self.current_route_index = 0  # Сброс на начало маршрута при старте
             logger.info(f"Route built successfully with {len(self.route)} squares")
         except Exception as e:
             logger.error(f"Failed to build route: {e}")
             self.route = []
     
+    def _route_for_level(self, player_level: int) -> List[RoutePoint]:
+        """Route of player level from leveling plan or precomputed route table"""
+        # Карта компилируется один раз на процесс (см. WorldMapIndex), таблица маршрутов по уровням - тоже
+        world_map = get_world_map_index(self.map_path)
+        planned = [point for point in self.plan.points(player_level)
+                   if world_map.square(point.location, point.direction, point.square)] if self.plan else []
+        if planned:
+            squares = [(point.location, point.direction, point.square, point.mob_level,
+                        point.target_mob or "unknown") for point in planned]
+        else:
+            table = world_map.route_table(Settings.ROUTE_LEVEL_WINDOW, Settings.ROUTE_MOB_LEVEL_CAP)
+            squares = [(info.location, info.direction, info.square, info.level_min, "unknown")
+                       for info in table[min(max(player_level, 1), len(table) - 1)]]
+        filtered_route = [
+            RoutePoint(
+                location=location,
+                location_name=world_map.location_name(location),
+                direction=direction,
+                direction_name=direction,
+                square=square,
+                mob_level=level,
+                mob_name=mob_name
+            )
+            for location, direction, square, level, mob_name in squares
+        ]
+        # Порядок точек и число убийств на квадрате - по стоимости переходов
+        return self.optimizer.optimize(filtered_route)
+    
+    def replan(self, player_level: int, potions: int = 0):
+        """
+        Swap route for new player level
+
+        Текущий квадрат остается текущей точкой, если он есть в новом маршруте,
+        иначе текущей становится ближайшая по стоимости перехода точка.
+
+        Args:
+            player_level: New player level
+            potions: Potions used on current square (if it is left)
+        """
+        route = self._route_for_level(player_level)
+        self.player_level = player_level
+        if not route:
+            return
+        current = self.get_current_point()
+        self.route = route
+        self.current_route_index = 0
+        if current is None:
+            return
+        for index, point in enumerate(route):
+            if (point.location, point.direction, point.square) == (current.location, current.direction, current.square):
+                self.current_route_index = index
+                logger.info(f"Route replanned for level {player_level}, staying on {point.square}")
+                return
+        self.square_bandit.end_visit(potions)
+        cost_model = self.optimizer.cost_model
+        self.current_route_index = min(range(len(route)), key=lambda i: cost_model.cost(current, route[i]))
+        self.mobs_killed_on_current_square = 0
+        self.square_bandit.start_visit(route[self.current_route_index])
+        logger.info(f"Route replanned for level {player_level}, moving to {route[self.current_route_index].square}")
+    
     def get_current_point(self):
         if not self.route:
             logger.warning("[ROUTE] get_current_point: маршрут пуст!")
@@ -133,13 +144,24 @@ class RouteManager:
         next_index = (self.current_route_index + 1) % len(self.route)
         return self.route[next_index]
     
-    def move_to_next_square(self, display=None):
-        """Move to next square in route and optionally print message"""
+    def move_to_next_square(self, display=None, potions: int = 0):
+        """
+        Move to next square chosen by square yield and optionally print message
+
+        Args:
+            display: Display to print the move to
+            potions: Potions used on the finished square
+        """
         if not self.route:
             return
+        self.square_bandit.end_visit(potions)
         prev_index = self.current_route_index
-        self.current_route_index = (self.current_route_index + 1) % len(self.route)
+        self.current_route_index = self.square_bandit.choose(self.route, prev_index, self.optimizer.cost_model)
         self.mobs_killed_on_current_square = 0
+        self.square_bandit.start_visit(self.route[self.current_route_index])
+        if self.current_route_index == prev_index:
+            logger.info(f"Staying on square {self.current_route_index + 1}/{len(self.route)}: best yield")
+            return
         logger.info(f"Moved to square {self.current_route_index + 1}/{len(self.route)}")
         if display:
             point = self.route[self.current_route_index]
@@ -200,6 +222,7 @@ class RouteManager:
                 idx = int(f.read().strip())
                 if 0 <= idx < len(self.route):
                     self.current_route_index = idx
+                    self.square_bandit.start_visit(self.route[idx])
         except Exception:
             pass  # Если файла нет или ошибка, ничего не делаем 
 
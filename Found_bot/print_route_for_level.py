@@ -7,7 +7,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'Found_bot'))
 from logic.route_manager import RouteManager
 
 if __name__ == "__main__":
-    level = 22
+    # Уровень персонажа - первым аргументом (по умолчанию 22)
+    level = int(sys.argv[1]) if len(sys.argv) > 1 else 22
     route_manager = RouteManager(player_level=level)
     print(f"Маршрут для уровня {level} (всего {len(route_manager.route)} точек):\n")
     for i, point in enumerate(route_manager.route, 1):
@@ -4,6 +4,7 @@ Provides beautiful console interface with real-time status updates
 """
 
 import time
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 from rich.console import Console
@@ -20,23 +21,32 @@ import logging
 
 # Import item database
 from utils.item_database import format_item_display_with_emoji, get_item_emoji, get_item_name
+from Found_bot.utils.clock import clock
 
 class GameDisplay:
     """Beautiful console UI for Ruby King Bot"""
     
-    def __init__(self):
-        """Initialize the display"""
-        self.console = Console()
+    def __init__(self, headless: bool = False):
+        """
+        Initialize the display
+        
+        Args:
+            headless: Track stats and messages without rendering (benchmarks)
+        """
+        self.headless = headless
+        self.console = Console(quiet=headless)
         self.layout = Layout()
         
         # Initialize tracking data
         self.stats = {
             'total_exp': 0,
             'session_gold': 0,
-            'session_start': time.time(),
+            'session_start': clock.time(),
             'events_found': 0,
             'total_damage_dealt': 0,
             'total_attacks': 0,
+            'total_crits': 0,
+            'total_misses': 0,
             'city_visits': 0,
             'items_sold': 0,
             'gold_from_sales': 0,
@@ -100,6 +110,8 @@ class GameDisplay:
         Returns:
             Live display context manager
         """
+        if self.headless:
+            return nullcontext()
         return Live(self.layout, refresh_per_second=refresh_per_second, screen=screen)
     
     def auto_refresh_display(self):
@@ -148,7 +160,7 @@ class GameDisplay:
                 xp_bar = f"{'█' * xp_filled}{'░' * (10 - xp_filled)}"
                 level_xp_text = f"Lv.{level} XP:{xp_bar} {xp}/{xp_next}"
         
-        session_time = self.format_time(int(time.time() - self.stats['session_start']))
+        session_time = self.format_time(int(clock.time() - self.stats['session_start']))
         title = f"[bold blue]{level_xp_text}[/bold blue] - [bold green]{player_name}[/bold green] - [bold cyan]⏱️ {session_time}[/bold cyan]"
         status_text = f"Состояние: [bold yellow]{current_state.upper()}[/bold yellow]"
         
@@ -320,7 +332,7 @@ MR:   {stamina_bar} {stamina_value}/{max_stamina_value} ({stamina_percent:.1f}%)
         
         # Rest timer
         if rest_time:
-            remaining = max(0, rest_time - time.time())
+            remaining = max(0, rest_time - clock.time())
             if remaining > 0:
                 content += f"Rest: [yellow]{self.format_time(int(remaining))}[/yellow]\n"
             else:
@@ -379,6 +391,8 @@ MR:   {stamina_bar} {stamina_value}/{max_stamina_value} ({stamina_percent:.1f}%)
         # Update cooldown tracking times
         self.last_attack_time = last_attack_time
         self.last_skill_time = last_skill_time
+        if self.headless:
+            return
         
         # Update layout components
         self.layout["top"].update(self.create_header(current_state, player_name, player_data))
@@ -573,11 +587,13 @@ MR:   {stamina_bar} {stamina_value}/{max_stamina_value} ({stamina_percent:.1f}%)
         
         return Panel(table, title="⏱️ КД", border_style="blue", height=9)
     
-    def update_damage_stats(self, damage_dealt: int):
-        """Update damage statistics"""
+    def update_damage_stats(self, damage_dealt: int, crits: int = 0, misses: int = 0):
+        """Update damage statistics (crits and misses come from the combat log)"""
         if damage_dealt > 0:
             self.stats['total_damage_dealt'] += damage_dealt
             self.stats['total_attacks'] += 1
+        self.stats['total_crits'] += crits
+        self.stats['total_misses'] += misses
     
     def get_average_damage(self) -> float:
         """Get average damage per attack"""
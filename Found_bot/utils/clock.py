@@ -0,0 +1,160 @@
+"""
+Clock - time source for engine, handlers and API pacing
+
+Весь бот берет время и спит через общий объект clock:
+    from Found_bot.utils.clock import clock
+    now = clock.time()
+    clock.sleep(5)
+
+По умолчанию это системные часы. В виртуальном режиме (симулятор,
+воспроизведение записи) sleep не ждет, а мгновенно сдвигает время,
+так что 20 минут отдыха или сутки фарма проходят за секунды.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SystemClock:
+    """Wall clock: real time and real sleeps"""
+
+    virtual = False
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    async def sleep_async(self, seconds: float):
+        await asyncio.sleep(max(0.0, seconds))
+
+
+class VirtualClock:
+    """Simulated clock: sleeps advance time instantly"""
+
+    virtual = True
+
+    def __init__(self, start: Optional[float] = None):
+        """
+        Args:
+            start: Initial epoch time (current wall time by default)
+        """
+        self._now = time.time() if start is None else float(start)
+        # Движок и поток event loop API-клиента двигают одно и то же время
+        self._lock = threading.Lock()
+        self._alarms: List[Tuple[float, int, Callable[[], None]]] = []
+        self._alarm_ids = itertools.count()
+        self.slept = 0.0
+
+    def time(self) -> float:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def call_at(self, when: float, callback: Callable[[], None]):
+        """
+        Call callback once virtual time reaches when
+
+        Будильник срабатывает в потоке, который сдвинул время, - так
+        сессию можно остановить ровно на заданном виртуальном времени.
+        """
+        with self._lock:
+            heapq.heappush(self._alarms, (when, next(self._alarm_ids), callback))
+
+    def advance(self, seconds: float):
+        """Move time forward and fire due alarms"""
+        if seconds <= 0:
+            return
+        due = []
+        with self._lock:
+            self._now += seconds
+            self.slept += seconds
+            while self._alarms and self._alarms[0][0] <= self._now:
+                due.append(heapq.heappop(self._alarms)[2])
+        for callback in due:
+            callback()
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+    async def sleep_async(self, seconds: float):
+        self.advance(seconds)
+        await asyncio.sleep(0)  # Отдаем управление другим задачам цикла
+
+
+class Clock:
+    """Switchable process-wide clock (system by default)"""
+
+    def __init__(self):
+        self._backend = SystemClock()
+
+    @property
+    def backend(self):
+        return self._backend
+
+    @property
+    def virtual(self) -> bool:
+        return self._backend.virtual
+
+    def use_system(self):
+        """Switch to wall clock"""
+        self._backend = SystemClock()
+
+    def use_virtual(self, start: Optional[float] = None) -> VirtualClock:
+        """
+        Switch to virtual clock
+
+        Args:
+            start: Initial epoch time (current wall time by default)
+
+        Returns:
+            Installed virtual clock
+        """
+        self._backend = VirtualClock(start)
+        logger.info("Virtual clock enabled")
+        return self._backend
+
+    def use(self, backend):
+        """
+        Install existing clock backend
+
+        Нужно, чтобы копии этого модуля в двух ботах шли по одним часам.
+        """
+        self._backend = backend
+
+    def time(self) -> float:
+        """Current epoch time"""
+        return self._backend.time()
+
+    def monotonic(self) -> float:
+        """Monotonic time for measuring intervals"""
+        return self._backend.monotonic()
+
+    def sleep(self, seconds: float):
+        """Block for given seconds (instant in virtual mode)"""
+        self._backend.sleep(seconds)
+
+    async def sleep_async(self, seconds: float):
+        """Await given seconds (instant in virtual mode)"""
+        await self._backend.sleep_async(seconds)
+
+    def advance(self, seconds: float):
+        """Move virtual time forward (no-op on wall clock)"""
+        if self._backend.virtual:
+            self._backend.advance(seconds)
+
+
+clock = Clock()
@@ -0,0 +1,491 @@
+"""
+Knowledge Base - SQLite store for world map, mobs, items and recipes
+
+Все пять JSON-файлов из world_map_viewer/data импортируются в одну
+локальную базу с индексами. Импорт инкрементальный: файл перечитывается,
+только если изменился его sha256. Экспорт возвращает данные в формат вьювера.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, Optional, List
+
+from .item_database import get_item_category
+from .world_map_index import parse_level_range, _file_signature
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = "world_map_viewer/data"
+KB_PATH = os.path.join(DATA_DIR, "knowledge.sqlite3")
+SCHEMA_VERSION = 1
+
+# Источник -> имя файла во вьювере
+SOURCES = {
+    'world_map': "complete_world_map.json",
+    'mobs': "mobs-database.json",
+    'items': "items-database.json",
+    'all_items': "all-items-database.json",
+    'recipes': "Rec.json",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS locations (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    position INTEGER
+);
+CREATE TABLE IF NOT EXISTS directions (
+    location TEXT,
+    direction TEXT,
+    name TEXT,
+    position INTEGER,
+    PRIMARY KEY (location, direction)
+);
+CREATE TABLE IF NOT EXISTS squares (
+    location TEXT,
+    direction TEXT,
+    square TEXT,
+    level_min INTEGER,
+    level_max INTEGER,
+    has_mobs INTEGER,
+    mob_count INTEGER,
+    inner_loco_id TEXT,
+    inner_loco_name TEXT,
+    position INTEGER,
+    raw TEXT,
+    PRIMARY KEY (location, direction, square)
+);
+CREATE INDEX IF NOT EXISTS squares_by_level ON squares (level_min, level_max);
+CREATE TABLE IF NOT EXISTS mobs (
+    id TEXT,
+    farm_id TEXT,
+    name TEXT,
+    position INTEGER,
+    raw TEXT,
+    PRIMARY KEY (id, farm_id)
+);
+CREATE INDEX IF NOT EXISTS mobs_by_name ON mobs (name);
+CREATE TABLE IF NOT EXISTS mob_locations (
+    mob_id TEXT,
+    farm_id TEXT,
+    location_name TEXT,
+    side TEXT
+);
+CREATE INDEX IF NOT EXISTS mob_locations_by_place ON mob_locations (location_name, side);
+CREATE INDEX IF NOT EXISTS mob_locations_by_mob ON mob_locations (mob_id, farm_id);
+CREATE TABLE IF NOT EXISTS mob_drops (
+    mob_id TEXT,
+    farm_id TEXT,
+    item_id TEXT,
+    type_element TEXT,
+    count INTEGER,
+    chance NUMERIC,
+    min_lvl_drop TEXT
+);
+CREATE INDEX IF NOT EXISTS mob_drops_by_item ON mob_drops (item_id);
+CREATE INDEX IF NOT EXISTS mob_drops_by_mob ON mob_drops (mob_id, farm_id);
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    type TEXT,
+    category TEXT,
+    is_recipe INTEGER,
+    in_items_db INTEGER DEFAULT 0,
+    in_all_items_db INTEGER DEFAULT 0,
+    items_position INTEGER,
+    all_items_position INTEGER,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS items_by_category ON items (category);
+CREATE INDEX IF NOT EXISTS items_by_name ON items (name);
+CREATE TABLE IF NOT EXISTS recipes (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    craft_elem TEXT,
+    craft_recipe_type TEXT,
+    craft_min_lvl INTEGER,
+    craft_chance NUMERIC,
+    position INTEGER,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS recipes_by_elem ON recipes (craft_elem);
+CREATE TABLE IF NOT EXISTS recipe_ingredients (
+    recipe_id TEXT,
+    item_id TEXT,
+    name TEXT,
+    count INTEGER,
+    position INTEGER
+);
+CREATE INDEX IF NOT EXISTS recipe_ingredients_by_recipe ON recipe_ingredients (recipe_id);
+CREATE INDEX IF NOT EXISTS recipe_ingredients_by_item ON recipe_ingredients (item_id);
+"""
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+class KnowledgeBase:
+    """Indexed SQLite store of the game data with a small query API"""
+
+    def __init__(self, db_path: str = KB_PATH, data_dir: str = DATA_DIR, auto_refresh: bool = True):
+        """
+        Args:
+            db_path: Path to SQLite file (":memory:" for tests and benchmarks)
+            data_dir: Directory with the viewer JSON files
+            auto_refresh: Import changed JSON files on open
+        """
+        self.db_path = db_path
+        self.data_dir = data_dir
+        self._lock = threading.Lock()
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._init_schema()
+        if auto_refresh:
+            self.refresh()
+
+    def close(self):
+        """Close database connection"""
+        self.conn.close()
+
+    def _init_schema(self):
+        with self._lock, self.conn:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                # Старая схема - база только кэш JSON-файлов, пересоздаем
+                for (table,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall():
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    # --- Импорт ---
+
+    def _get_meta(self, key: str) -> Optional[Any]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row['value']) if row else None
+
+    def _set_meta(self, key: str, value: Any):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, _dumps(value)))
+
+    def source_path(self, source: str) -> str:
+        return os.path.join(self.data_dir, SOURCES[source])
+
+    def refresh(self, force: bool = False) -> List[str]:
+        """
+        Import JSON sources whose content changed
+
+        Args:
+            force: Re-import all sources
+
+        Returns:
+            Names of imported sources
+        """
+        imported = []
+        with self._lock:
+            for source in SOURCES:
+                path = self.source_path(source)
+                previous = self._get_meta(f"sig:{source}") or {}
+                if previous.get('stat'):
+                    previous['stat'] = tuple(previous['stat'])
+                signature = _file_signature(path, previous)
+                if not signature:
+                    continue
+                if not force and signature.get('sha256') == previous.get('sha256'):
+                    if signature is not previous:
+                        with self.conn:
+                            self._set_meta(f"sig:{source}", signature)  # Изменился только mtime
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                with self.conn:
+                    getattr(self, f"_import_{source}")(data)
+                    self._set_meta(f"sig:{source}", signature)
+                imported.append(source)
+        if imported:
+            logger.info(f"Knowledge base imported: {imported}")
+        return imported
+
+    def _import_world_map(self, data: Dict[str, Any]):
+        self.conn.execute("DELETE FROM locations")
+        self.conn.execute("DELETE FROM directions")
+        self.conn.execute("DELETE FROM squares")
+        self._set_meta('world_map_metadata', data.get('metadata', {}))
+        locations, directions, squares = [], [], []
+        for loc_pos, (location, location_data) in enumerate(data.get('world_map', {}).items()):
+            locations.append((location, location_data.get('name', location), loc_pos))
+            for dir_pos, (direction, direction_data) in enumerate(location_data.get('directions', {}).items()):
+                directions.append((location, direction, direction_data.get('name', direction), dir_pos))
+                for sq_pos, (square, square_data) in enumerate(direction_data.get('squares', {}).items()):
+                    mob_level = square_data.get('mob_level')
+                    level_range = parse_level_range(mob_level) or (None, None)
+                    inner_id = square_data.get('loco_id')
+                    inner_name = square_data.get('loco_name')
+                    mob_count = square_data.get('mob_count')
+                    if isinstance(mob_level, dict):
+                        inner_id = inner_id or mob_level.get('locoId')
+                        inner_name = inner_name or mob_level.get('locoName')
+                        mob_count = mob_count or mob_level.get('mobCount')
+                    squares.append((location, direction, square, level_range[0], level_range[1],
+                                    int(bool(square_data.get('has_mobs'))), mob_count,
+                                    inner_id, inner_name, sq_pos, _dumps(square_data)))
+        self.conn.executemany("INSERT INTO locations VALUES (?, ?, ?)", locations)
+        self.conn.executemany("INSERT INTO directions VALUES (?, ?, ?, ?)", directions)
+        self.conn.executemany("INSERT INTO squares VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", squares)
+
+    def _import_mobs(self, data: List[Dict[str, Any]]):
+        self.conn.execute("DELETE FROM mobs")
+        self.conn.execute("DELETE FROM mob_locations")
+        self.conn.execute("DELETE FROM mob_drops")
+        mobs, places, drops = [], [], []
+        for position, mob in enumerate(data):
+            key = (mob.get('id', ''), mob.get('farmId', ''))
+            mobs.append(key + (mob.get('name'), position, _dumps(mob)))
+            for place in mob.get('locations', []):
+                places.append(key + (place.get('location'), place.get('side')))
+            for drop in mob.get('drop', []):
+                if not isinstance(drop, dict):
+                    continue
+                min_lvl = drop.get('minLvlDrop')
+                drops.append(key + (drop.get('id'), drop.get('typeElement'), drop.get('count'),
+                                    drop.get('chance'), None if min_lvl is None else str(min_lvl)))
+        self.conn.executemany("INSERT OR REPLACE INTO mobs VALUES (?, ?, ?, ?, ?)", mobs)
+        self.conn.executemany("INSERT INTO mob_locations VALUES (?, ?, ?, ?)", places)
+        self.conn.executemany("INSERT INTO mob_drops VALUES (?, ?, ?, ?, ?, ?, ?)", drops)
+
+    def _import_item_list(self, data: List[Dict[str, Any]], flag: str, position_column: str):
+        self.conn.execute(f"UPDATE items SET {flag} = 0, {position_column} = NULL")
+        for position, item in enumerate(data):
+            item_id = item.get('id')
+            if not item_id:
+                continue
+            self.conn.execute(
+                f"""INSERT INTO items (id, name, type, category, is_recipe, {flag}, {position_column}, raw)
+                    VALUES (?, ?, ?, ?, ?, 1, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET name = excluded.name, type = excluded.type,
+                        category = excluded.category, is_recipe = excluded.is_recipe,
+                        {flag} = 1, {position_column} = excluded.{position_column}, raw = excluded.raw""",
+                (item_id, item.get('name'), item.get('type') or item.get('typeElement'),
+                 get_item_category(item_id), int(bool(item.get('isRecipe'))), position, _dumps(item))
+            )
+        self.conn.execute("DELETE FROM items WHERE in_items_db = 0 AND in_all_items_db = 0")
+
+    def _import_items(self, data: List[Dict[str, Any]]):
+        self._import_item_list(data, 'in_items_db', 'items_position')
+
+    def _import_all_items(self, data: List[Dict[str, Any]]):
+        self._import_item_list(data, 'in_all_items_db', 'all_items_position')
+
+    def _import_recipes(self, data: Dict[str, Any]):
+        self.conn.execute("DELETE FROM recipes")
+        self.conn.execute("DELETE FROM recipe_ingredients")
+        recipe_list = data.get('list', []) if isinstance(data, dict) else data
+        self._set_meta('recipes_envelope', {key: value for key, value in data.items() if key != 'list'}
+                       if isinstance(data, dict) else None)
+        recipes, ingredients = [], []
+        for position, recipe in enumerate(recipe_list):
+            recipes.append((recipe.get('id'), recipe.get('name'), recipe.get('craftElem'),
+                            recipe.get('craftRecipeType'), recipe.get('craftMinLvl'),
+                            recipe.get('craftChance'), position, _dumps(recipe)))
+            for ing_pos, ingredient in enumerate(recipe.get('craftItems', [])):
+                ingredients.append((recipe.get('id'), ingredient.get('id'), ingredient.get('name'),
+                                    ingredient.get('count'), ing_pos))
+        self.conn.executemany("INSERT OR REPLACE INTO recipes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", recipes)
+        self.conn.executemany("INSERT INTO recipe_ingredients VALUES (?, ?, ?, ?, ?)", ingredients)
+
+    # --- Запросы ---
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def squares_by_level(self, level_min: int, level_max: int, include_inner: bool = False) -> List[Dict[str, Any]]:
+        """
+        Squares whose mob level range intersects [level_min, level_max]
+
+        Returns:
+            Rows ordered by min mob level
+        """
+        sql = """SELECT location, direction, square, level_min, level_max, has_mobs, mob_count,
+                        inner_loco_id, inner_loco_name
+                 FROM squares WHERE level_min <= ? AND level_max >= ?"""
+        if not include_inner:
+            sql += " AND inner_loco_id IS NULL AND inner_loco_name IS NULL"
+        return self._query(sql + " ORDER BY level_min, location, direction, position", (level_max, level_min))
+
+    def squares(self, location: str, direction: str) -> List[Dict[str, Any]]:
+        """All squares of location side in map order"""
+        return self._query(
+            """SELECT location, direction, square, level_min, level_max, has_mobs, mob_count,
+                      inner_loco_id, inner_loco_name
+               FROM squares WHERE location = ? AND direction = ? ORDER BY position""",
+            (location, direction))
+
+    def location_name(self, location: str) -> Optional[str]:
+        """Location name by id"""
+        rows = self._query("SELECT name FROM locations WHERE id = ?", (location,))
+        return rows[0]['name'] if rows else None
+
+    def mobs_by_drop(self, item_id: str) -> List[Dict[str, Any]]:
+        """
+        Mobs that drop item
+
+        Returns:
+            Rows with mob id, farmId, name, count, chance and minLvlDrop; best chance first
+        """
+        return self._query(
+            """SELECT m.id AS mob_id, m.farm_id, m.name, d.count, d.chance, d.min_lvl_drop
+               FROM mob_drops d JOIN mobs m ON m.id = d.mob_id AND m.farm_id = d.farm_id
+               WHERE d.item_id = ? ORDER BY d.chance DESC""",
+            (item_id,))
+
+    def mobs_at(self, location_name: str, side: str) -> List[Dict[str, Any]]:
+        """Mobs recorded at location side (names in Russian, as in mobs-database.json)"""
+        return self._query(
+            """SELECT DISTINCT m.id AS mob_id, m.farm_id, m.name
+               FROM mob_locations l JOIN mobs m ON m.id = l.mob_id AND m.farm_id = l.farm_id
+               WHERE l.location_name = ? AND l.side = ? ORDER BY m.position""",
+            (location_name, side))
+
+    def mob_locations(self, mob_name: str) -> List[Dict[str, Any]]:
+        """Places where mob was recorded"""
+        return self._query(
+            """SELECT DISTINCT l.location_name, l.side
+               FROM mobs m JOIN mob_locations l ON m.id = l.mob_id AND m.farm_id = l.farm_id
+               WHERE m.name = ?""",
+            (mob_name,))
+
+    def mob_drops(self, mob_id: str) -> List[Dict[str, Any]]:
+        """Drop table of mob"""
+        return self._query(
+            """SELECT item_id, type_element, count, chance, min_lvl_drop
+               FROM mob_drops WHERE mob_id = ? ORDER BY chance DESC""",
+            (mob_id,))
+
+    def item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Full item JSON by id"""
+        rows = self._query("SELECT raw FROM items WHERE id = ?", (item_id,))
+        return json.loads(rows[0]['raw']) if rows else None
+
+    def items_by_category(self, category: str) -> List[Dict[str, Any]]:
+        """
+        Items of category
+
+        Args:
+            category: Category from item_database.get_item_category ("Ресурсы", "Оружие", ...)
+        """
+        return self._query(
+            "SELECT id, name, type, is_recipe FROM items WHERE category = ? ORDER BY id",
+            (category,))
+
+    def recipe_ingredients(self, recipe_id: str) -> List[Dict[str, Any]]:
+        """Ingredients of recipe in recipe order"""
+        return self._query(
+            "SELECT item_id, name, count FROM recipe_ingredients WHERE recipe_id = ? ORDER BY position",
+            (recipe_id,))
+
+    def recipes_for_item(self, craft_elem: str) -> List[Dict[str, Any]]:
+        """Recipes that craft item"""
+        return self._query(
+            """SELECT id, name, craft_recipe_type, craft_min_lvl, craft_chance
+               FROM recipes WHERE craft_elem = ? ORDER BY craft_chance DESC""",
+            (craft_elem,))
+
+    def recipes_using(self, item_id: str) -> List[Dict[str, Any]]:
+        """Recipes that need item as ingredient"""
+        return self._query(
+            """SELECT r.id, r.name, r.craft_elem, i.count
+               FROM recipe_ingredients i JOIN recipes r ON r.id = i.recipe_id
+               WHERE i.item_id = ? ORDER BY r.position""",
+            (item_id,))
+
+    # --- Экспорт в формат вьювера ---
+
+    def export_world_map(self) -> Dict[str, Any]:
+        """complete_world_map.json structure"""
+        world_map: Dict[str, Any] = {}
+        with self._lock:
+            for row in self.conn.execute("SELECT id, name FROM locations ORDER BY position"):
+                world_map[row['id']] = {'name': row['name'], 'directions': {}}
+            for row in self.conn.execute("SELECT location, direction, name FROM directions ORDER BY location, position"):
+                world_map[row['location']]['directions'][row['direction']] = {'name': row['name'], 'squares': {}}
+            for row in self.conn.execute(
+                    """SELECT s.location, s.direction, s.square, s.raw FROM squares s
+                       JOIN directions d ON d.location = s.location AND d.direction = s.direction
+                       ORDER BY s.location, d.position, s.position"""):
+                squares = world_map[row['location']]['directions'][row['direction']]['squares']
+                squares[row['square']] = json.loads(row['raw'])
+            metadata = self._get_meta('world_map_metadata') or {}
+        # Порядок локаций - как в исходном файле
+        return {'metadata': metadata, 'world_map': world_map}
+
+    def export_mobs(self) -> List[Dict[str, Any]]:
+        """mobs-database.json structure"""
+        return [json.loads(row['raw']) for row in self._query("SELECT raw FROM mobs ORDER BY position")]
+
+    def export_items(self, all_items: bool = False) -> List[Dict[str, Any]]:
+        """items-database.json (or all-items-database.json) structure"""
+        flag, position = ('in_all_items_db', 'all_items_position') if all_items else ('in_items_db', 'items_position')
+        return [json.loads(row['raw']) for row in self._query(f"SELECT raw FROM items WHERE {flag} = 1 ORDER BY {position}")]
+
+    def export_recipes(self) -> Any:
+        """Rec.json structure"""
+        recipes = [json.loads(row['raw']) for row in self._query("SELECT raw FROM recipes ORDER BY position")]
+        with self._lock:
+            envelope = self._get_meta('recipes_envelope')
+        if envelope is None:
+            return recipes
+        return dict(envelope, list=recipes)
+
+    def export_json(self, data_dir: Optional[str] = None) -> List[str]:
+        """
+        Write all viewer JSON files
+
+        Args:
+            data_dir: Target directory (defaults to source data directory)
+
+        Returns:
+            Written file paths
+        """
+        data_dir = data_dir or self.data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        exports = {
+            'world_map': (self.export_world_map(), 2),
+            'mobs': (self.export_mobs(), 2),
+            'items': (self.export_items(), 2),
+            'all_items': (self.export_items(all_items=True), 2),
+            'recipes': (self.export_recipes(), 4),  # Rec.json сохранен с отступом 4
+        }
+        written = []
+        for source, (data, indent) in exports.items():
+            path = os.path.join(data_dir, SOURCES[source])
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=indent)
+            os.replace(tmp_path, path)
+            written.append(path)
+        if os.path.abspath(data_dir) == os.path.abspath(self.data_dir):
+            # Файлы записаны нами - не импортировать их заново
+            self.refresh()
+        return written
+
+
+_knowledge_base: Optional[KnowledgeBase] = None
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    """Get shared knowledge base of the process (JSON changes are imported on each call)"""
+    global _knowledge_base
+    if _knowledge_base is None:
+        _knowledge_base = KnowledgeBase()
+    else:
+        _knowledge_base.refresh()
+    return _knowledge_base
@@ -0,0 +1,318 @@
+"""
+Mob Journal - append-only log of mob observations for mobs-database.json
+
+Горячий путь (каждый найденный моб) пишет одну короткую JSON-строку в журнал.
+Компактор в простое (отдых, выход из бота) сворачивает журнал в
+mobs-database.json одной атомарной перезаписью и очищает журнал.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List, Tuple
+
+try:
+    import fcntl  # Блокировка между процессами (Linux/macOS)
+except ImportError:
+    fcntl = None
+
+from .world_map_index import MOBS_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ['id', 'name', 'photo', 'desc', 'farmId', 'locations']
+COMPACT_INTERVAL = 300  # seconds between idle-time compactions
+COMPACT_MAX_ENTRIES = 500  # compact earlier when journal grows this long
+
+
+def _drop_key(drop: Dict[str, Any]) -> Tuple[str, str]:
+    return drop.get('id', ''), drop.get('typeElement', '')
+
+
+def make_observation(mob_data: Dict[str, Any], location_name: str, side_name: str) -> Dict[str, Any]:
+    """
+    Build compact journal record from mob data of explore/attack response
+
+    Args:
+        mob_data: Mob dict from API response
+        location_name: Location name in Russian
+        side_name: Side name in Russian
+
+    Returns:
+        Observation with only the fields mobs-database.json keeps
+    """
+    drops = []
+    for item in mob_data.get('drop', []):
+        if not isinstance(item, dict):
+            logger.warning(f"[DROP DEBUG] Unexpected drop item type in mob journal: {type(item)}, value: {item}")
+            continue
+        drops.append({
+            'id': item.get('id', ''),
+            'typeElement': item.get('typeElement', ''),
+            'count': item.get('count', 1),
+            'chance': item.get('chance', None),
+            'minLvlDrop': item.get('minLvlDrop', ""),
+        })
+    return {
+        'id': mob_data.get('id', ''),
+        'farmId': mob_data.get('farmId', ''),
+        'name': mob_data.get('name', ''),
+        'photo': mob_data.get('photo', None),
+        'desc': mob_data.get('desc', None),
+        'location': {"location": location_name, "side": side_name},
+        'drop': drops,
+        'ts': round(time.time(), 3),
+    }
+
+
+class MobIndex:
+    """In-memory mobs database indexed by (id, farmId) and by drop id"""
+
+    def __init__(self, db: Optional[List[Dict[str, Any]]] = None):
+        self.entries: List[Dict[str, Any]] = []
+        self.by_key: Dict[Tuple[str, str], int] = {}
+        # Первое известное minLvlDrop для (id, typeElement) предмета
+        self.min_lvl_by_drop: Dict[Tuple[str, str], Any] = {}
+        for entry in db or []:
+            self.by_key.setdefault((entry.get('id'), entry.get('farmId')), len(self.entries))
+            self.entries.append(entry)
+            for drop in entry.get('drop', []):
+                if 'minLvlDrop' in drop:
+                    self.min_lvl_by_drop.setdefault(_drop_key(drop), drop['minLvlDrop'])
+
+    def merge(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build updated entry for observation without changing the index
+
+        Returns:
+            New mob entry (same rules as the former update_mob_database)
+        """
+        key = (observation['id'], observation['farmId'])
+        old = self.entries[self.by_key[key]] if key in self.by_key else None
+        if old is not None:
+            locations = list(old.get('locations', []))
+            if observation['location'] not in locations:
+                locations.append(observation['location'])
+            entry = {
+                'id': old.get('id'),
+                'name': observation['name'] or old.get('name', ''),
+                'photo': observation['photo'] if observation['photo'] is not None else old.get('photo'),
+                'desc': observation['desc'] if observation['desc'] is not None else old.get('desc'),
+                'farmId': old.get('farmId'),
+                'locations': locations,
+            }
+        else:
+            entry = {
+                'id': observation['id'],
+                'name': observation['name'],
+                'photo': observation['photo'],
+                'desc': observation['desc'],
+                'farmId': observation['farmId'],
+                'locations': [observation['location']],
+            }
+
+        # minLvlDrop пишем только если для предмета его еще не было
+        drops = []
+        for drop in observation['drop']:
+            drop = dict(drop)
+            known = self.min_lvl_by_drop.get(_drop_key(drop))
+            if _drop_key(drop) in self.min_lvl_by_drop:
+                drop['minLvlDrop'] = known
+            elif drop.get('minLvlDrop') is None:
+                drop['minLvlDrop'] = ""
+            drops.append(drop)
+        entry['drop'] = drops
+        return entry
+
+    def commit(self, entry: Dict[str, Any]):
+        """Put merged entry into the index"""
+        key = (entry['id'], entry['farmId'])
+        if key in self.by_key:
+            self.entries[self.by_key[key]] = entry
+        else:
+            self.by_key[key] = len(self.entries)
+            self.entries.append(entry)
+        for drop in entry['drop']:
+            self.min_lvl_by_drop.setdefault(_drop_key(drop), drop['minLvlDrop'])
+
+    def apply(self, observation: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Merge and commit observation if the resulting entry is valid
+
+        Returns:
+            (written, entry)
+        """
+        entry = self.merge(observation)
+        missing_fields = [field for field in REQUIRED_FIELDS if not entry.get(field)]
+        if missing_fields:
+            logger.error(f"[MOB DB] Не записываю моба {entry.get('name', '')}: отсутствуют обязательные поля: {missing_fields}")
+            return False, entry
+        self.commit(entry)
+        return True, entry
+
+
+class MobJournal:
+    """Append-only observation journal with compaction into mobs-database.json"""
+
+    def __init__(self, db_path: str = MOBS_DB_PATH, journal_path: Optional[str] = None):
+        """
+        Args:
+            db_path: Path to mobs-database.json
+            journal_path: Path to journal (defaults to <db_path without .json>.journal.jsonl)
+        """
+        self.db_path = db_path
+        self.journal_path = journal_path or f"{os.path.splitext(db_path)[0]}.journal.jsonl"
+        self.lock_path = f"{self.journal_path}.lock"
+        self._lock = threading.Lock()
+        self._index: Optional[MobIndex] = None
+        self.pending = 0  # Записей в журнале с момента последней компакции
+        self.last_compact = time.time()
+
+    # --- Межпроцессная блокировка ---
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Shared lock for appends, exclusive for compaction (no-op without fcntl)"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # --- Загрузка ---
+
+    def _load_db(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.db_path):
+            return []
+        with open(self.db_path, 'r', encoding='utf-8') as f:
+            try:
+                return json.load(f)
+            except ValueError:
+                logger.error(f"[MOB DB] {self.db_path} is corrupted, starting from empty database")
+                return []
+
+    def _read_journal(self) -> List[Dict[str, Any]]:
+        observations = []
+        if not os.path.exists(self.journal_path):
+            return observations
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    observations.append(json.loads(line))
+                except ValueError:
+                    # Недописанная строка после аварийного завершения
+                    logger.warning(f"[MOB DB] Skipping broken journal line {line_number}")
+        return observations
+
+    def _build_index(self) -> MobIndex:
+        """Database from disk plus not yet compacted journal"""
+        index = MobIndex(self._load_db())
+        observations = self._read_journal()
+        for observation in observations:
+            index.apply(observation)
+        self.pending = len(observations)
+        return index
+
+    @property
+    def index(self) -> MobIndex:
+        """In-memory database (loaded once per process)"""
+        if self._index is None:
+            with self._file_lock(exclusive=False):
+                self._index = self._build_index()
+        return self._index
+
+    # --- Горячий путь ---
+
+    def record(self, mob_data: Dict[str, Any], location_name: str, side_name: str) -> bool:
+        """
+        Record one mob observation: O(1) in-memory update and one small append
+
+        Args:
+            mob_data: Mob dict from API response
+            location_name: Location name in Russian
+            side_name: Side name in Russian
+
+        Returns:
+            True if mob was recorded
+        """
+        observation = make_observation(mob_data, location_name, side_name)
+        line = json.dumps(observation, ensure_ascii=False, separators=(',', ':')) + "\n"
+        with self._lock:
+            written, entry = self.index.apply(observation)
+            if not written:
+                return False
+            with self._file_lock(exclusive=False):
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            self.pending += 1
+        logger.debug(f"[MOB DB] Итоговая запись mob_entry: {entry}")
+        return True
+
+    # --- Компакция ---
+
+    def compact_due(self) -> bool:
+        """True if there is something to compact and it is time to do it"""
+        if not self.pending:
+            return False
+        return self.pending >= COMPACT_MAX_ENTRIES or time.time() - self.last_compact >= COMPACT_INTERVAL
+
+    def compact_if_due(self) -> bool:
+        """Compact at idle time if due"""
+        if not self.compact_due():
+            return False
+        return self.compact()
+
+    def compact(self) -> bool:
+        """
+        Fold journal into mobs-database.json and truncate it
+
+        База перечитывается с диска: журнал могли дописывать другие процессы.
+
+        Returns:
+            True if database was rewritten
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            observations = self._read_journal()
+            self.last_compact = time.time()
+            if not observations:
+                self.pending = 0
+                return False
+            index = MobIndex(self._load_db())
+            for observation in observations:
+                index.apply(observation)
+
+            tmp_path = f"{self.db_path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(index.entries, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.db_path)
+            except OSError as e:
+                logger.error(f"[MOB DB] Compaction failed, journal kept: {e}")
+                return False
+            # База записана - журнал больше не нужен
+            open(self.journal_path, 'w').close()
+            self._index = index
+            self.pending = 0
+        logger.info(f"[MOB DB] Journal compacted: {len(observations)} observations, {len(index.entries)} mobs")
+        return True
+
+
+_journals: Dict[str, MobJournal] = {}
+
+
+def get_mob_journal(db_path: str = MOBS_DB_PATH) -> MobJournal:
+    """Get shared journal of the process for database path"""
+    key = os.path.abspath(db_path)
+    if key not in _journals:
+        _journals[key] = MobJournal(db_path)
+    return _journals[key]
@@ -0,0 +1,454 @@
+"""
+World Map Index - compiled lookup tables over complete_world_map.json
+
+Карта мира (и привязка мобов к сторонам из mobs-database.json) компилируется
+один раз в компактный вид и кэшируется на диске. Кэш сбрасывается, когда
+у исходного файла меняются mtime/размер и sha256 содержимого.
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from typing import Dict, Any, Optional, List, Tuple, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+WORLD_MAP_PATH = "world_map_viewer/data/complete_world_map.json"
+MOBS_DB_PATH = "world_map_viewer/data/mobs-database.json"
+CACHE_DIR = "world_map_viewer/data/.cache"
+INDEX_FORMAT_VERSION = 1
+
+SIDE_NAMES = {'north': 'Север', 'south': 'Юг', 'west': 'Запад', 'east': 'Восток', 'center': 'Центр'}
+
+
+def parse_level_range(mob_level) -> Optional[Tuple[int, int]]:
+    """
+    Parse square mob level into integer range
+
+    Args:
+        mob_level: 12, "82-84", {"mobLvl": ...} or None
+
+    Returns:
+        (min_level, max_level) or None if level is unknown
+    """
+    if isinstance(mob_level, dict):
+        mob_level = mob_level.get('mobLvl')
+    if mob_level is None or isinstance(mob_level, bool):
+        return None
+    if isinstance(mob_level, int):
+        return mob_level, mob_level
+    if isinstance(mob_level, str):
+        parts = mob_level.split('-', 1)
+        try:
+            low = int(parts[0])
+            high = int(parts[1]) if len(parts) > 1 else low
+        except ValueError:
+            return None
+        return low, max(low, high)
+    return None
+
+
+class SquareInfo(NamedTuple):
+    """Compiled data of one square"""
+    location: str
+    direction: str
+    square: str
+    level_min: Optional[int]
+    level_max: Optional[int]
+    has_mobs: bool
+    mob_count: Optional[int]
+    inner_loco_id: Optional[str]  # Вход во внутреннюю локацию (данж и т.п.)
+    inner_loco_name: Optional[str]
+
+    @property
+    def is_inner(self) -> bool:
+        return bool(self.inner_loco_id or self.inner_loco_name)
+
+
+def _file_signature(path: str, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get signature of source file; hash is recomputed only if mtime/size changed
+
+    Returns:
+        {"stat": (mtime_ns, size), "sha256": hex} or empty dict if file is missing
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {}
+    stat_key = (stat.st_mtime_ns, stat.st_size)
+    if previous and previous.get('stat') == stat_key:
+        return previous
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return {'stat': stat_key, 'sha256': digest}
+
+
+def _same_source(cached: Dict[str, Any], current: Dict[str, Any]) -> bool:
+    return cached.get('sha256') == current.get('sha256')
+
+
+def _compile_map(world_map_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Compile world map JSON into plain tuples (picklable regardless of import path)"""
+    locations = []
+    squares = []
+    for location, location_data in world_map_data.get('world_map', {}).items():
+        locations.append((location, location_data.get('name', location)))
+        for direction, direction_data in location_data.get('directions', {}).items():
+            for square, square_data in direction_data.get('squares', {}).items():
+                mob_level = square_data.get('mob_level')
+                level_range = parse_level_range(mob_level)
+                inner_id = square_data.get('loco_id')
+                inner_name = square_data.get('loco_name')
+                if isinstance(mob_level, dict):
+                    inner_id = inner_id or mob_level.get('locoId')
+                    inner_name = inner_name or mob_level.get('locoName')
+                    mob_count = square_data.get('mob_count') or mob_level.get('mobCount')
+                else:
+                    mob_count = square_data.get('mob_count')
+                squares.append((
+                    location, direction, square,
+                    level_range[0] if level_range else None,
+                    level_range[1] if level_range else None,
+                    bool(square_data.get('has_mobs')),
+                    mob_count,
+                    inner_id,
+                    inner_name,
+                ))
+    return {'locations': tuple(locations), 'squares': tuple(squares)}
+
+
+def _compile_mobs(mobs_db: List[Dict[str, Any]], locations: Tuple[Tuple[str, str], ...]) -> Tuple:
+    """Compile mobs database into (mob_name, location_id, direction) tuples"""
+    location_ids = {name: location for location, name in locations}
+    side_keys = {name: key for key, name in SIDE_NAMES.items()}
+    placements = []
+    for mob in mobs_db:
+        name = mob.get('name')
+        if not name:
+            continue
+        for place in mob.get('locations', []):
+            location = location_ids.get(place.get('location'))
+            direction = side_keys.get(place.get('side'))
+            if location and direction:
+                placements.append((name, location, direction))
+    return tuple(placements)
+
+
+class WorldMapIndex:
+    """Read-only lookup tables over the world map and mob placements"""
+
+    def __init__(self, map_path: str = WORLD_MAP_PATH, mobs_path: str = MOBS_DB_PATH,
+                 cache_dir: Optional[str] = CACHE_DIR):
+        """
+        Args:
+            map_path: Path to complete_world_map.json
+            mobs_path: Path to mobs-database.json
+            cache_dir: Directory of compiled cache (None disables disk cache)
+        """
+        self.map_path = map_path
+        self.mobs_path = mobs_path
+        self.cache_path = os.path.join(cache_dir, 'world_map_index.pickle') if cache_dir else None
+        self._lock = threading.Lock()
+        self._map_sig: Dict[str, Any] = {}
+        self._mobs_sig: Dict[str, Any] = {}
+        self._compiled: Dict[str, Any] = {}
+        self._mob_tables_ready = False
+        self.compilations = 0  # Сколько раз пришлось разбирать JSON (для статистики)
+        self.refresh()
+
+    # --- Загрузка и инвалидация ---
+
+    def refresh(self) -> bool:
+        """
+        Reload map tables if the world map file changed
+
+        Returns:
+            True if index was rebuilt or loaded from disk cache
+        """
+        with self._lock:
+            map_sig = _file_signature(self.map_path, self._map_sig)
+            if self._compiled and (map_sig is self._map_sig or _same_source(self._map_sig, map_sig)):
+                self._map_sig = map_sig  # Файл не меняли (или только mtime) - ничего не разбираем
+                return False
+
+            compiled = self._load_cache(map_sig)
+            if compiled is None:
+                compiled = self._compile(map_sig)
+                self._save_cache(compiled)
+            self._map_sig = map_sig
+            self._build_tables(compiled)
+            return True
+
+    def _refresh_mobs(self):
+        """
+        Reload mob placements if mobs database changed
+
+        База мобов пишется во время фарма, поэтому она проверяется отдельно
+        и только при запросах по мобам - маршрутам и квадратам она не нужна.
+        """
+        with self._lock:
+            mobs_sig = _file_signature(self.mobs_path, self._mobs_sig)
+            if self._mob_tables_ready and (mobs_sig is self._mobs_sig or _same_source(self._mobs_sig, mobs_sig)):
+                self._mobs_sig = mobs_sig
+                return
+            if _same_source(self._compiled.get('mobs_sig', {}), mobs_sig) and 'mobs' in self._compiled:
+                placements = self._compiled['mobs']
+            else:
+                placements = self._compile_mobs_file(self._compiled['map']['locations'])
+                self.compilations += 1
+                self._compiled['mobs'] = placements
+                self._compiled['mobs_sig'] = mobs_sig
+                self._save_cache(self._compiled)
+            self._mobs_sig = mobs_sig
+            self._build_mob_tables(placements)
+
+    def _load_cache(self, map_sig: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Load compiled tables from disk cache if the world map is unchanged"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cached = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"World map index cache is unreadable, rebuilding: {e}")
+            return None
+        if cached.get('version') != INDEX_FORMAT_VERSION or cached.get('map_path') != os.path.abspath(self.map_path):
+            return None
+        if not _same_source(cached.get('map_sig', {}), map_sig):
+            return None
+        if cached.get('mobs_path') != os.path.abspath(self.mobs_path):
+            cached.pop('mobs', None)
+            cached.pop('mobs_sig', None)
+        cached['map_sig'] = map_sig
+        return cached
+
+    def _compile(self, map_sig: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse world map JSON"""
+        try:
+            with open(self.map_path, 'r', encoding='utf-8') as f:
+                compiled_map = _compile_map(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load world map {self.map_path}: {e}")
+            compiled_map = {'locations': (), 'squares': ()}
+        self.compilations += 1
+        logger.info(f"World map compiled: {len(compiled_map['squares'])} squares")
+        return {
+            'version': INDEX_FORMAT_VERSION,
+            'map_path': os.path.abspath(self.map_path),
+            'mobs_path': os.path.abspath(self.mobs_path),
+            'map_sig': map_sig,
+            'map': compiled_map,
+        }
+
+    def _compile_mobs_file(self, locations) -> Tuple:
+        """Parse mobs database JSON"""
+        if not os.path.exists(self.mobs_path):
+            return ()
+        try:
+            with open(self.mobs_path, 'r', encoding='utf-8') as f:
+                return _compile_mobs(json.load(f), locations)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load mobs database {self.mobs_path}: {e}")
+            return ()
+
+    def _save_cache(self, compiled: Dict[str, Any]):
+        """Write compiled tables atomically"""
+        if not self.cache_path or not compiled['map']['squares']:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to save world map index cache: {e}")
+
+    def _build_tables(self, compiled: Dict[str, Any]):
+        """Build lookup tables from compiled tuples"""
+        self._compiled = compiled
+        self._location_names = dict(compiled['map']['locations'])
+        self._location_ids = {name: location for location, name in compiled['map']['locations']}
+
+        self._squares = [SquareInfo(*row) for row in compiled['map']['squares']]
+        self._by_direction: Dict[Tuple[str, str], List[SquareInfo]] = {}
+        self._by_square: Dict[Tuple[str, str, str], SquareInfo] = {}
+        self._directions: Dict[str, List[str]] = {}
+        for info in self._squares:
+            if (info.location, info.direction) not in self._by_direction:
+                self._directions.setdefault(info.location, []).append(info.direction)
+            self._by_direction.setdefault((info.location, info.direction), []).append(info)
+            self._by_square[(info.location, info.direction, info.square)] = info
+
+        # Квадраты с известным уровнем, отсортированные по min уровню (для bisect)
+        leveled = sorted((info for info in self._squares if info.level_min is not None),
+                         key=lambda info: info.level_min)
+        self._by_level = leveled
+        self._level_keys = [info.level_min for info in leveled]
+        self._max_level_span = max((info.level_max - info.level_min for info in leveled), default=0)
+
+        # Привязка мобов строится лениво (см. _refresh_mobs)
+        self._mob_tables_ready = False
+        self._mobs_sig = {}
+
+    def _build_mob_tables(self, placements: Tuple):
+        """Build mob lookup tables from (mob_name, location, direction) tuples"""
+        self._by_mob: Dict[str, List[Tuple[str, str]]] = {}
+        self._mobs_at: Dict[Tuple[str, str], List[str]] = {}
+        for name, location, direction in placements:
+            places = self._by_mob.setdefault(name, [])
+            if (location, direction) not in places:
+                places.append((location, direction))
+            mobs = self._mobs_at.setdefault((location, direction), [])
+            if name not in mobs:
+                mobs.append(name)
+        self._mob_tables_ready = True
+
+    # --- Запросы ---
+
+    def locations(self) -> List[str]:
+        """Location ids in map order"""
+        return list(self._location_names)
+
+    def directions(self, location: str) -> List[str]:
+        """Directions of location in map order"""
+        return list(self._directions.get(location, ()))
+
+    def location_name(self, location: str, default: Optional[str] = None) -> str:
+        """Human-readable location name ("loco_1" -> "Таинственный лес")"""
+        return self._location_names.get(location, default if default is not None else location)
+
+    def location_id(self, name: str) -> Optional[str]:
+        """Location id by its name"""
+        return self._location_ids.get(name)
+
+    @staticmethod
+    def direction_name(direction: str) -> str:
+        """Russian direction name ("north" -> "Север")"""
+        return SIDE_NAMES.get(direction, direction)
+
+    def squares(self, location: str, direction: str) -> List[SquareInfo]:
+        """All squares of location side in map order"""
+        return list(self._by_direction.get((location, direction), ()))
+
+    def square(self, location: str, direction: str, square: str) -> Optional[SquareInfo]:
+        """One square or None"""
+        return self._by_square.get((location, direction, square))
+
+    def squares_for_level(self, level_min: int, level_max: int, include_inner: bool = False) -> List[SquareInfo]:
+        """
+        Squares whose mob level range intersects [level_min, level_max]
+
+        Args:
+            level_min: Lowest acceptable mob level
+            level_max: Highest acceptable mob level
+            include_inner: Include entrances to inner locations
+
+        Returns:
+            Squares ordered by min mob level
+        """
+        start = bisect.bisect_left(self._level_keys, level_min - self._max_level_span)
+        end = bisect.bisect_right(self._level_keys, level_max)
+        return [info for info in self._by_level[start:end]
+                if info.level_max >= level_min and (include_inner or not info.is_inner)]
+
+    @property
+    def max_level(self) -> int:
+        """Highest mob level on the map"""
+        return max((info.level_max for info in self._by_level), default=1)
+
+    def route_table(self, window: int, level_cap: Optional[int] = None) -> Tuple[Tuple[SquareInfo, ...], ...]:
+        """
+        Farm square of every side for every player level 1..max_level + window
+
+        На каждой стороне берется квадрат с наименьшим уровнем мобов в окне
+        [level - window, level], а если в окне пусто - с наибольшим ниже окна.
+        Таблица считается одним проходом по отсортированным квадратам сторон
+        и хранится в дисковом кэше вместе с картой.
+
+        Args:
+            window: Levels below player level still worth farming
+            level_cap: Squares with higher mob level are never picked
+
+        Returns:
+            Tuple indexed by player level (index 0 unused, higher levels use the last row)
+            of squares in map order
+        """
+        key = (window, level_cap)
+        with self._lock:
+            cached = self._compiled.get('routes', {}).get(key)
+            if cached is None:
+                cached = self._compile_route_table(window, level_cap)
+                self._compiled.setdefault('routes', {})[key] = cached
+                self._save_cache(self._compiled)
+        squares = self._squares
+        return tuple(tuple(squares[i] for i in row) for row in cached)
+
+    def _compile_route_table(self, window: int, level_cap: Optional[int]) -> Tuple[Tuple[int, ...], ...]:
+        """Route table as square positions in self._squares (picklable)"""
+        # Подходящие квадраты каждой стороны: (min уровень, позиция); стороны - в порядке карты
+        sides: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        for position, info in enumerate(self._squares):
+            if info.is_inner or info.level_min is None or (level_cap is not None and info.level_min > level_cap):
+                continue
+            sides.setdefault((info.location, info.direction), []).append((info.level_min, position))
+
+        top = self.max_level + window  # Выше этого окно пусто на всех сторонах - строки не меняются
+        rows: List[List[int]] = [[] for _ in range(top + 1)]
+        for side in sides.values():
+            side.sort()  # При равном уровне - первый по карте
+            keys = [level for level, _ in side]
+            for level in range(1, top + 1):
+                i = bisect.bisect_left(keys, max(1, level - window))
+                if i < len(keys) and keys[i] <= level:
+                    rows[level].append(side[i][1])
+                elif i > 0:
+                    # В окне пусто - самый высокий уровень ниже окна
+                    rows[level].append(side[bisect.bisect_left(keys, keys[i - 1])][1])
+        return tuple(tuple(row) for row in rows)
+
+    def mob_locations(self, mob_name: str) -> List[Tuple[str, str]]:
+        """(location, direction) pairs where mob was recorded"""
+        self._refresh_mobs()
+        return list(self._by_mob.get(mob_name, ()))
+
+    def mobs_at(self, location: str, direction: str) -> List[str]:
+        """Mob names recorded at location side"""
+        self._refresh_mobs()
+        return list(self._mobs_at.get((location, direction), ()))
+
+    def __contains__(self, location: str) -> bool:
+        return location in self._location_names
+
+    def __len__(self) -> int:
+        return len(self._squares)
+
+
+_indexes: Dict[Tuple[str, str], WorldMapIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_world_map_index(map_path: str = WORLD_MAP_PATH, mobs_path: str = MOBS_DB_PATH) -> WorldMapIndex:
+    """
+    Get shared index of the process (reloaded if source files changed)
+
+    Args:
+        map_path: Path to complete_world_map.json
+        mobs_path: Path to mobs-database.json
+
+    Returns:
+        WorldMapIndex shared by all consumers
+    """
+    key = (os.path.abspath(map_path), os.path.abspath(mobs_path))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = WorldMapIndex(map_path, mobs_path)
+            return index
+    index.refresh()
+    return index
@@ -0,0 +1,17 @@
+"""
+Benchmarks for Ruby King Bot
+Throughput of both game engines measured in the simulated world
+and per-function cost of the response-parsing hot path
+"""
+
+from .e2e import run_benchmark, compare_with_baseline, BenchmarkError
+from .micro import Corpus, run_micro, compare_micro
+
+__all__ = [
+    'run_benchmark',
+    'compare_with_baseline',
+    'BenchmarkError',
+    'Corpus',
+    'run_micro',
+    'compare_micro'
+]
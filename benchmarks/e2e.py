@@ -0,0 +1,374 @@
+"""
+E2E Benchmark - farming throughput of both game engines in the simulated world
+
+Каждый движок (ruby_king_bot и Found_bot) запускается как в main.py
+(initialize + run) против детерминированного SimulatedWorld на
+виртуальных часах: сутки фарма проходят за секунды. Движок работает в
+песочнице - временной копии world_map_viewer/data с logs/, поэтому
+запуски не трогают базы мобов и состояние маршрута в репозитории.
+
+Запуск:
+    python benchmarks/e2e.py                       # оба движка, 24 часа
+    python benchmarks/e2e.py --engine ruby --hours 6
+    python benchmarks/e2e.py --save-baseline       # записать эталон
+Код возврата 1 - регрессия относительно эталона.
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Any, Optional, List, Callable
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FOUND_BOT_DIR = os.path.join(REPO_ROOT, "Found_bot")
+# Found_bot импортирует свои модули как api.*, logic.*, utils.*
+for path in (REPO_ROOT, FOUND_BOT_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from ruby_king_bot.sim.world import SimulatedWorld, WorldConfig
+from ruby_king_bot.sim.mock_server import LatencyModel
+from ruby_king_bot.utils.clock import clock, VirtualClock
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(REPO_ROOT, "world_map_viewer", "data")
+DEFAULT_BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baselines", "e2e.json")
+VIRTUAL_START = 1_750_000_000.0  # Фиксированное начало - одинаковые даты в каждом запуске
+ENGINES = ("ruby", "found")
+
+# Метрики, сравниваемые с эталоном: True - больше значит лучше
+TRACKED_METRICS = {
+    'kills_per_hour': True,
+    'exp_per_hour': True,
+    'gold_per_hour': True,
+    'calls_per_kill': False,
+    'potions_per_kill': False,
+    'idle_seconds': False,
+    'cpu_ms_per_kill': False,
+    'lost_drops': False,
+}
+# Процессорное время зависит от машины, остальное - детерминировано
+NOISY_METRICS = ('cpu_ms_per_kill',)
+
+
+class BenchmarkError(RuntimeError):
+    """Benchmark run could not be completed"""
+
+
+@contextlib.contextmanager
+def sandbox():
+    """Run inside temporary copy of world data with logs/ directory"""
+    previous_cwd = os.getcwd()
+    root = tempfile.mkdtemp(prefix="rk-bench-")
+    try:
+        shutil.copytree(DATA_DIR, os.path.join(root, "world_map_viewer", "data"),
+                        ignore=shutil.ignore_patterns('.cache'))
+        os.makedirs(os.path.join(root, "logs"))
+        os.chdir(root)
+        yield root
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def virtual_clocks(start: float = VIRTUAL_START):
+    """
+    Put both bots on one fresh virtual clock
+
+    Yields:
+        Installed virtual clock
+    """
+    from Found_bot.utils.clock import clock as found_clock
+    virtual = VirtualClock(start)
+    previous = (clock.backend, found_clock.backend)
+    clock.use(virtual)
+    found_clock.use(virtual)
+    try:
+        yield virtual
+    finally:
+        clock.use(previous[0])
+        found_clock.use(previous[1])
+
+
+def _build_ruby_engine(world: SimulatedWorld, latency: LatencyModel):
+    from ruby_king_bot.api.client import APIClient
+    from ruby_king_bot.logic.game_engine import GameEngine
+    from ruby_king_bot.sim.transport import SimTransport
+    from ruby_king_bot.ui.display import GameDisplay
+
+    client = APIClient(transport=SimTransport(world, latency=latency))
+    engine = GameEngine(api_client=client, display=GameDisplay(headless=True))
+    return engine, client.close
+
+
+def _build_found_engine(world: SimulatedWorld, latency: LatencyModel):
+    from api.client import APIClient
+    from logic.game_engine import GameEngine
+    from ruby_king_bot.sim.transport import BlockingSimTransport
+    from ui.display import GameDisplay
+
+    client = APIClient(transport=BlockingSimTransport(world, latency=latency))
+    engine = GameEngine(api_client=client, display=GameDisplay(headless=True))
+    return engine, None
+
+
+ENGINE_BUILDERS: Dict[str, Callable] = {
+    'ruby': _build_ruby_engine,
+    'found': _build_found_engine,
+}
+
+
+def _run_engine(engine, wall_timeout: float) -> bool:
+    """
+    Run engine like main.py does, in a worker thread
+
+    Returns:
+        True if engine finished by itself, False if wall timeout stopped it
+    """
+    errors: List[BaseException] = []
+
+    def target():
+        try:
+            engine.initialize()
+            engine.run()
+        except BaseException as e:
+            errors.append(e)
+
+    worker = threading.Thread(target=target, name="bench-engine", daemon=True)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        worker.start()
+        worker.join(wall_timeout)
+        finished = not worker.is_alive()
+        if not finished:
+            # Движок не доходит до виртуального дедлайна (завис без сна)
+            engine.stop()
+            worker.join(5)
+    if errors:
+        raise BenchmarkError(f"Engine crashed: {errors[0]!r}") from errors[0]
+    return finished
+
+
+def run_benchmark(engine_name: str, hours: float = 24.0, seed: Any = 0, level: int = 20,
+                  latency: float = 0.0, wall_timeout: float = 600.0) -> Dict[str, Any]:
+    """
+    Run one engine for fixed virtual duration
+
+    Args:
+        engine_name: 'ruby' or 'found'
+        hours: Virtual duration of the session
+        seed: Seed of the simulated world
+        level: Start level of the character
+        latency: Response latency of every request, virtual seconds
+        wall_timeout: Real seconds after which a stuck run is aborted
+
+    Returns:
+        Metrics of the run
+    """
+    duration = hours * 3600
+    with sandbox(), virtual_clocks() as virtual:
+        world = SimulatedWorld(WorldConfig(start_level=level, start_geo='farm'), seed=seed)
+        engine, close = ENGINE_BUILDERS[engine_name](world, LatencyModel(latency, seed=seed))
+        started = virtual.time()
+        virtual.call_at(started + duration, engine.stop)
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            finished = _run_engine(engine, wall_timeout)
+        finally:
+            if close:
+                close()
+        cpu = time.process_time() - cpu_started
+        wall = time.perf_counter() - wall_started
+        elapsed = virtual.time() - started
+        character = world.metrics()['characters'].get('char_1')
+        if character is None:
+            raise BenchmarkError(f"{engine_name}: engine made no requests")
+        return collect_metrics(character, elapsed, engine.scheduler.idle_time, cpu, wall, not finished)
+
+
+def collect_metrics(character: Dict[str, Any], elapsed: float, idle: float,
+                    cpu: float, wall: float, timed_out: bool) -> Dict[str, Any]:
+    """
+    Build benchmark metrics from simulated world metrics of the character
+
+    Args:
+        character: SimulatedWorld.character_metrics of the character
+        elapsed: Virtual seconds the session lasted
+        idle: Virtual seconds the main loop slept waiting for deadlines
+        cpu: Process CPU seconds (engine and API client threads)
+        wall: Real seconds of the run
+        timed_out: Run was aborted by wall timeout
+    """
+    hours = max(elapsed / 3600, 1e-9)
+    kills = character['kills']
+    potions = sum(character['potions_used'].values())
+
+    def per_kill(value: float) -> Optional[float]:
+        return round(value / kills, 4) if kills else None
+
+    return {
+        'virtual_hours': round(hours, 4),
+        'kills': kills,
+        'exp': character['exp'],
+        'gold': character['gold'],
+        'api_calls': character['api_calls'],
+        'potions': potions,
+        'too_fast': character['too_fast'],
+        'deaths': character['deaths'],
+        'lost_drops': character['lost_drops'],
+        'kills_per_hour': round(kills / hours, 2),
+        'exp_per_hour': round(character['exp'] / hours, 2),
+        'gold_per_hour': round(character['gold'] / hours, 2),
+        'calls_per_kill': per_kill(character['api_calls']),
+        'potions_per_kill': per_kill(potions),
+        'idle_seconds': round(idle, 2),
+        'cpu_ms_per_kill': per_kill(cpu * 1000),
+        'wall_seconds': round(wall, 3),
+        'timed_out': timed_out,
+    }
+
+
+def compare_with_baseline(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any],
+                          tolerance: float, cpu_tolerance: float) -> List[str]:
+    """
+    Find regressions against baseline
+
+    Args:
+        results: Metrics by engine name
+        baseline: Saved baseline (config and metrics by engine name)
+        tolerance: Allowed relative worsening of deterministic metrics
+        cpu_tolerance: Allowed relative worsening of CPU metrics
+
+    Returns:
+        Human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+    for engine_name, metrics in results.items():
+        if metrics['timed_out']:
+            regressions.append(f"{engine_name}: run did not reach virtual deadline (stuck engine)")
+        expected = baseline.get('engines', {}).get(engine_name)
+        if expected is None:
+            continue
+        for metric, higher_is_better in TRACKED_METRICS.items():
+            old, new = expected.get(metric), metrics.get(metric)
+            if old is None or new is None:
+                if old is not None:
+                    regressions.append(f"{engine_name}.{metric}: {old} -> no value")
+                continue
+            allowed = cpu_tolerance if metric in NOISY_METRICS else tolerance
+            if higher_is_better:
+                worse = new < old * (1 - allowed)
+            else:
+                worse = new > old * (1 + allowed) and new - old > 1e-9
+            if worse:
+                change = (new - old) / old * 100 if old else float('inf')
+                regressions.append(f"{engine_name}.{metric}: {old} -> {new} ({change:+.1f}%)")
+    return regressions
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    """Load baseline JSON (None if there is none)"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, config: Dict[str, Any], results: Dict[str, Dict[str, Any]]):
+    """Write baseline JSON, keeping engines that were not run"""
+    baseline = load_baseline(path) or {}
+    if baseline.get('config') != config:
+        baseline = {}
+    engines = baseline.get('engines', {})
+    engines.update(results)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'config': config, 'engines': engines}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def print_report(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]]):
+    """Print metrics table with baseline values"""
+    expected_engines = (baseline or {}).get('engines', {})
+    rows = ['kills_per_hour', 'exp_per_hour', 'gold_per_hour', 'calls_per_kill', 'potions_per_kill',
+            'idle_seconds', 'cpu_ms_per_kill', 'kills', 'api_calls', 'too_fast', 'deaths',
+            'lost_drops', 'virtual_hours', 'wall_seconds']
+    for engine_name, metrics in results.items():
+        expected = expected_engines.get(engine_name, {})
+        print(f"\n== {engine_name} ==")
+        for metric in rows:
+            line = f"  {metric:<18} {metrics.get(metric)!s:>12}"
+            if metric in expected:
+                line += f"   (baseline {expected[metric]})"
+            print(line)
+
+
+def main():
+    """Benchmark entry point"""
+    parser = argparse.ArgumentParser(description="Ruby King Bot - E2E бенчмарк фарма в симуляторе")
+    parser.add_argument('--engine', choices=ENGINES + ('all',), default='all')
+    parser.add_argument('--hours', type=float, default=24.0, help="Virtual duration of the session")
+    parser.add_argument('--seed', default="0", help="Seed of the simulated world")
+    parser.add_argument('--level', type=int, default=20, help="Start level of the character")
+    parser.add_argument('--latency', type=float, default=0.0, help="Response latency, virtual seconds")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help="Baseline JSON path")
+    parser.add_argument('--save-baseline', action='store_true', help="Write results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.02,
+                        help="Allowed relative worsening of deterministic metrics")
+    parser.add_argument('--cpu-tolerance', type=float, default=1.0,
+                        help="Allowed relative worsening of CPU time per kill")
+    parser.add_argument('--wall-timeout', type=float, default=600.0, help="Real seconds per engine run")
+    parser.add_argument('--json', dest='json_path', help="Also write results to this JSON file")
+    parser.add_argument('--log-file', help="Write engine logs (WARNING and above) to this file")
+    args = parser.parse_args()
+
+    handler = logging.FileHandler(os.path.abspath(args.log_file)) if args.log_file else logging.NullHandler()
+    logging.basicConfig(level=logging.WARNING, handlers=[handler],
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    config = {'hours': args.hours, 'seed': args.seed, 'level': args.level, 'latency': args.latency}
+    engines = ENGINES if args.engine == 'all' else (args.engine,)
+    results = {}
+    for engine_name in engines:
+        print(f"Running {engine_name} engine for {args.hours:g} virtual hours...", flush=True)
+        results[engine_name] = run_benchmark(engine_name, args.hours, args.seed, args.level,
+                                             args.latency, args.wall_timeout)
+
+    baseline = load_baseline(args.baseline)
+    if baseline is not None and baseline.get('config') != config:
+        print(f"Baseline {args.baseline} was recorded with {baseline.get('config')}, not comparing")
+        baseline = None
+    print_report(results, baseline)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'engines': results}, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, config, results)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    regressions = compare_with_baseline(results, baseline or {}, args.tolerance, args.cpu_tolerance)
+    if regressions:
+        print("\n" + "!" * 60)
+        print("REGRESSION against baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        print("!" * 60)
+        sys.exit(1)
+    if baseline is not None:
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+"""
+Micro Benchmark - per-function cost of the response-parsing hot path
+
+Каждая функция, которую движок вызывает на каждый ответ API, гоняется
+по корпусу записанных ответов (capture от RecordingTransport): разбор
+моба и итогов боя, обновление игрока и группы мобов, подсчет урона,
+а также построение маршрута и отрисовка экрана. Для каждой функции
+меряются микросекунды на вызов и выделенная память на вызов.
+
+Без --corpus корпус записывается заново: короткая сессия ruby-движка
+в детерминированном симуляторе, поэтому набор ответов одинаков
+от запуска к запуску.
+
+Запуск:
+    python benchmarks/micro.py
+    python benchmarks/micro.py --corpus logs/capture.jsonl.gz --filter found.
+    python benchmarks/micro.py --save-baseline
+Код возврата 1 - регрессия относительно эталона.
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, Any, Optional, List, Callable, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.e2e import (
+    sandbox, virtual_clocks, load_baseline, BenchmarkError, FOUND_BOT_DIR
+)
+from ruby_king_bot.api.endpoints import Endpoints
+from ruby_king_bot.api.async_client import normalize_response
+from ruby_king_bot.api.transport import read_capture
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baselines", "micro.json")
+MIN_TIME = 0.5  # Секунд замера на функцию
+REPEATS = 5  # Повторов замера, берется лучший
+
+# Метрики, сравниваемые с эталоном (меньше - лучше)
+TRACKED_METRICS = ('us_per_op', 'alloc_bytes_per_op')
+# Время зависит от машины, память - почти нет
+NOISY_METRICS = ('us_per_op',)
+
+
+class MicroCase:
+    """One measured function and the inputs it is called with"""
+
+    def __init__(self, name: str, func: Callable[[Any], Any], items: List[Any]):
+        """
+        Args:
+            name: Case name, '<fork>.<Class>.<method>'
+            func: Function called once per item
+            items: Inputs (prepared outside of measurement)
+        """
+        self.name = name
+        self.func = func
+        self.items = items
+
+
+class Corpus:
+    """Recorded response bodies grouped by what the engine does with them"""
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.explore: List[Dict[str, Any]] = []
+        self.attack: List[Dict[str, Any]] = []
+        self.user: List[Dict[str, Any]] = []
+        # Ответ атаки вместе с ответом исследования, с которого начался бой
+        self.battles: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        last_explore = None
+        for record in records:
+            if 'body' not in record:
+                continue  # Сетевая ошибка - ответа нет
+            body = normalize_response(record['body'])
+            endpoint = record.get('endpoint')
+            if endpoint == Endpoints.EXPLORE_TERRITORY and body.get('mob'):
+                self.explore.append(body)
+                last_explore = body
+            elif endpoint == Endpoints.ATTACK_MOB and body.get('status') == 'success':
+                self.attack.append(body)
+                if last_explore is not None:
+                    self.battles.append((last_explore, body))
+            elif endpoint in (Endpoints.USER_INFO, Endpoints.USER_CITY) and body.get('user'):
+                self.user.append(body)
+        # Игрок обновляется и из ответов атаки, и из информации о персонаже
+        self.player_updates = self.attack + self.user
+
+    @classmethod
+    def load(cls, path: str) -> 'Corpus':
+        """Read capture file"""
+        return cls(list(read_capture(path)))
+
+    def summary(self) -> str:
+        return f"{len(self.explore)} explore, {len(self.attack)} attack, {len(self.user)} user info"
+
+
+def record_corpus(path: str, hours: float = 1.0, seed: Any = 0, level: int = 20):
+    """
+    Record deterministic corpus from a simulated ruby engine session
+
+    Args:
+        path: Capture path to write
+        hours: Virtual duration of the session
+        seed: Seed of the simulated world
+        level: Start level of the character
+    """
+    from benchmarks.e2e import _run_engine
+    from ruby_king_bot.api.client import APIClient
+    from ruby_king_bot.api.transport import RecordingTransport
+    from ruby_king_bot.logic.game_engine import GameEngine
+    from ruby_king_bot.sim.transport import SimTransport
+    from ruby_king_bot.sim.world import SimulatedWorld, WorldConfig
+    from ruby_king_bot.ui.display import GameDisplay
+
+    path = os.path.abspath(path)  # Песочница меняет текущую директорию
+    with sandbox(), virtual_clocks() as virtual:
+        world = SimulatedWorld(WorldConfig(start_level=level, start_geo='farm'), seed=seed)
+        transport = RecordingTransport(SimTransport(world), path)
+        client = APIClient(transport=transport)
+        engine = GameEngine(api_client=client, display=GameDisplay(headless=True))
+        virtual.call_at(virtual.time() + hours * 3600, engine.stop)
+        try:
+            _run_engine(engine, wall_timeout=120.0)
+        finally:
+            client.close()
+            transport.close()
+    if not transport.records:
+        raise BenchmarkError("Corpus session made no requests")
+
+
+def _mob_data(mob) -> Optional[Dict[str, Any]]:
+    if mob is None:
+        return None
+    return {'name': mob.name, 'hp': mob.hp, 'max_hp': mob.max_hp, 'level': mob.level}
+
+
+def _fork_cases(prefix: str, corpus: Corpus, modules: Dict[str, Any]) -> List[MicroCase]:
+    """Cases shared by both forks (same classes, fork-specific code)"""
+    DataExtractor = modules['DataExtractor']
+    Player = modules['Player']
+    MobGroup = modules['MobGroup']
+    CombatHandler = modules['CombatHandler']
+    GameDisplay = modules['GameDisplay']
+    decode_attack = modules['decode_attack']
+
+    extractor = DataExtractor()
+    player = Player()
+    # Обработчик боя без клиента и со своим игроком: замеряется только разбор результата
+    combat_handler = CombatHandler(None, Player(), GameDisplay(headless=True))
+
+    # Ответ атаки разбирается один раз, обработчики получают готовую запись
+    attack_records = [decode_attack(body) for body in corpus.attack]
+    user_records = [record.user for record in attack_records if record.user]
+    # Полученный урон считается от HP игрока до ответа - HP из предыдущего ответа
+    hits = []
+    previous_hp = None
+    for record in attack_records:
+        if previous_hp is not None:
+            hits.append((previous_hp, record))
+        if record.user and record.user.hp is not None:
+            previous_hp = record.user.hp
+
+    parser = combat_handler.log_parser
+    parse_logs = [record.logs for record in attack_records]
+    hits = [(previous_hp, record, parser.parse(record.logs)) for previous_hp, record in hits]
+
+    def damage_received(hit):
+        combat_handler.player.hp = hit[0]
+        return combat_handler._damage_received(hit[1], hit[2])
+
+    # Группа мобов из ответа исследования того же боя. Повторное применение
+    # ответа атаки дает то же состояние, поэтому группы живут между проходами
+    battles = []
+    for explore_body, attack_body in corpus.battles:
+        mobs = extractor.extract_mob_data(explore_body)
+        if mobs:
+            battles.append((MobGroup(mobs), decode_attack(attack_body)))
+
+    def update_group(battle):
+        group, record = battle
+        group.update_from_attack(record)
+
+    cases = [
+        MicroCase(f"{prefix}.records.decode_attack", decode_attack, corpus.attack),
+        MicroCase(f"{prefix}.DataExtractor.extract_mob_data", extractor.extract_mob_data, corpus.explore),
+        MicroCase(f"{prefix}.DataExtractor.extract_combat_results",
+                  extractor.extract_combat_results, attack_records),
+        MicroCase(f"{prefix}.Player.update_from_api_response",
+                  player.update_from_api_response, corpus.player_updates),
+        MicroCase(f"{prefix}.Player.apply_user", player.apply_user, user_records),
+        MicroCase(f"{prefix}.MobGroup.update_from_attack", update_group, battles),
+        MicroCase(f"{prefix}.CombatLogParser.parse", parser.parse, parse_logs),
+        MicroCase(f"{prefix}.CombatHandler._damage_received", damage_received, hits),
+    ]
+
+    # Экран отрисовывается в layout без вывода в терминал (Live не запущен)
+    display = GameDisplay()
+    frames = []
+    for group, record in battles:
+        if record.user:
+            player.apply_user(record.user)
+        group_data = group.get_all_mobs_with_status() if len(group.get_all_mobs()) > 1 else None
+        frame = {
+            'current_state': "combat",
+            'player_data': player.get_stats_summary(),
+            'mob_data': _mob_data(group.get_current_target()),
+            'mob_group_data': group_data,
+            'attack_cooldown': 1.5,
+            'skill_cooldown': 3.0,
+            'player_name': "Player",
+        }
+        frame.update(modules['frame_extra'])
+        frames.append(frame)
+    cases.append(MicroCase(f"{prefix}.GameDisplay.update_display",
+                           lambda frame: display.update_display(**frame), frames))
+    return cases
+
+
+def ruby_cases(corpus: Corpus) -> List[MicroCase]:
+    """Cases of ruby_king_bot"""
+    from ruby_king_bot.api.records import decode_attack
+    from ruby_king_bot.core.mob import MobGroup
+    from ruby_king_bot.core.player import Player
+    from ruby_king_bot.logic.combat_handler import CombatHandler
+    from ruby_king_bot.logic.data_extractor import DataExtractor
+    from ruby_king_bot.ui.display import GameDisplay
+
+    modules = {
+        'DataExtractor': DataExtractor, 'Player': Player, 'MobGroup': MobGroup,
+        'CombatHandler': CombatHandler, 'GameDisplay': GameDisplay, 'decode_attack': decode_attack,
+        'frame_extra': {'location': "loco_1", 'direction': "north", 'square': "C3",
+                        'current_route': [], 'current_route_index': 0,
+                        'mobs_killed_on_current_square': 3},
+    }
+    return _fork_cases("ruby", corpus, modules)
+
+
+def found_cases(corpus: Corpus) -> List[MicroCase]:
+    """Cases of Found_bot (RouteManager exists only there)"""
+    if FOUND_BOT_DIR not in sys.path:
+        sys.path.insert(0, FOUND_BOT_DIR)
+    from api.records import decode_attack
+    from core.mob import MobGroup
+    from core.player import Player
+    from logic.combat_handler import CombatHandler
+    from logic.data_extractor import DataExtractor
+    from logic.route_manager import RouteManager
+    from ui.display import GameDisplay
+
+    route_manager = RouteManager(player_level=20)
+    modules = {
+        'DataExtractor': DataExtractor, 'Player': Player, 'MobGroup': MobGroup,
+        'CombatHandler': CombatHandler, 'GameDisplay': GameDisplay, 'decode_attack': decode_attack,
+        'frame_extra': {'route_data': route_manager.get_route_display_data()},
+    }
+    cases = _fork_cases("found", corpus, modules)
+
+    def build_route(level: int):
+        route_manager.player_level = level
+        route_manager._build_route()
+
+    cases.append(MicroCase("found.RouteManager._build_route", build_route, list(range(1, 31))))
+    return cases
+
+
+def measure(case: MicroCase, min_time: float = MIN_TIME) -> Dict[str, Any]:
+    """
+    Measure time and allocations per call
+
+    Args:
+        case: Measured case
+        min_time: Minimum seconds of timed passes over the items (all repeats)
+
+    Returns:
+        Metrics of the case
+    """
+    func, items = case.func, case.items
+    if not items:
+        return {'ops': 0, 'us_per_op': None, 'alloc_bytes_per_op': None}
+
+    # Прогрев: первые вызовы заполняют кеши модулей
+    for item in items:
+        func(item)
+
+    # Время: лучший из повторов (как timeit), сборщик мусора выключен
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        ops = 0
+        best = None
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            elapsed = 0.0
+            repeat_ops = 0
+            while elapsed < min_time / REPEATS:
+                for item in items:
+                    func(item)
+                repeat_ops += len(items)
+                elapsed = time.perf_counter() - started
+            ops += repeat_ops
+            per_op = elapsed / repeat_ops
+            best = per_op if best is None else min(best, per_op)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # Память: пик выделенного за вызов (включая временные объекты)
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        for item in items:
+            tracemalloc.reset_peak()
+            current_before = tracemalloc.get_traced_memory()[0]
+            func(item)
+            peak_total += tracemalloc.get_traced_memory()[1] - current_before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'ops': ops,
+        'us_per_op': round(best * 1e6, 3),
+        'alloc_bytes_per_op': round(peak_total / len(items), 1),
+    }
+
+
+def build_cases(corpus: Corpus) -> List[MicroCase]:
+    """Cases of both forks"""
+    return ruby_cases(corpus) + found_cases(corpus)
+
+
+def run_micro(corpus: Corpus, name_filter: str = "", min_time: float = MIN_TIME) -> Dict[str, Dict[str, Any]]:
+    """
+    Measure every case over the corpus
+
+    Args:
+        corpus: Recorded responses
+        name_filter: Only cases whose name contains this substring
+        min_time: Minimum timed seconds per case
+
+    Returns:
+        Metrics by case name
+    """
+    results = {}
+    for case in build_cases(corpus):
+        if name_filter and name_filter not in case.name:
+            continue
+        results[case.name] = measure(case, min_time)
+    return results
+
+
+def compare_micro(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any],
+                  tolerance: float, alloc_tolerance: float) -> List[str]:
+    """
+    Find regressions against baseline
+
+    Args:
+        results: Metrics by case name
+        baseline: Saved baseline (config and metrics by case name)
+        tolerance: Allowed relative slowdown of time per call
+        alloc_tolerance: Allowed relative growth of allocations per call
+
+    Returns:
+        Human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+    for name, metrics in results.items():
+        expected = baseline.get('cases', {}).get(name)
+        if expected is None:
+            continue
+        for metric in TRACKED_METRICS:
+            old, new = expected.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            allowed = tolerance if metric in NOISY_METRICS else alloc_tolerance
+            if new > old * (1 + allowed):
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({(new - old) / old * 100:+.1f}%)")
+    return regressions
+
+
+def save_micro_baseline(path: str, config: Dict[str, Any], results: Dict[str, Dict[str, Any]]):
+    """Write baseline JSON, keeping cases that were not run"""
+    baseline = load_baseline(path) or {}
+    if baseline.get('config') != config:
+        baseline = {}
+    cases = baseline.get('cases', {})
+    cases.update(results)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'config': config, 'cases': cases}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def print_micro_report(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]]):
+    """Print per-function table with baseline values"""
+    expected_cases = (baseline or {}).get('cases', {})
+    print(f"\n{'case':<56} {'us/op':>10} {'bytes/op':>10} {'ops':>9}")
+    for name, metrics in results.items():
+        line = f"{name:<56} {metrics['us_per_op']!s:>10} {metrics['alloc_bytes_per_op']!s:>10} {metrics['ops']:>9}"
+        expected = expected_cases.get(name)
+        if expected:
+            line += f"   (baseline {expected.get('us_per_op')} us, {expected.get('alloc_bytes_per_op')} B)"
+        print(line)
+
+
+def main():
+    """Micro benchmark entry point"""
+    parser = argparse.ArgumentParser(description="Ruby King Bot - микробенчмарк разбора ответов API")
+    parser.add_argument('--corpus', help="Capture JSONL (.gz) of recorded responses "
+                                         "(recorded from the simulator if omitted)")
+    parser.add_argument('--hours', type=float, default=1.0, help="Virtual hours of the recorded corpus")
+    parser.add_argument('--seed', default="0", help="Seed of the simulated world for the recorded corpus")
+    parser.add_argument('--filter', dest='name_filter', default="", help="Only cases containing this text")
+    parser.add_argument('--min-time', type=float, default=MIN_TIME, help="Timed seconds per case")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help="Baseline JSON path")
+    parser.add_argument('--save-baseline', action='store_true', help="Write results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=1.0,
+                        help="Allowed relative slowdown of time per call")
+    parser.add_argument('--alloc-tolerance', type=float, default=0.1,
+                        help="Allowed relative growth of allocated bytes per call")
+    parser.add_argument('--json', dest='json_path', help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, handlers=[logging.NullHandler()])
+
+    if args.corpus:
+        corpus = Corpus.load(args.corpus)
+        config = {'corpus': os.path.basename(args.corpus)}
+    else:
+        with tempfile.TemporaryDirectory(prefix="rk-micro-") as tmp:
+            path = os.path.join(tmp, "corpus.jsonl")
+            print(f"Recording corpus: {args.hours:g} virtual hours, seed {args.seed}...", flush=True)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                record_corpus(path, args.hours, args.seed)
+            corpus = Corpus.load(path)
+        config = {'corpus': 'sim', 'hours': args.hours, 'seed': args.seed}
+    print(f"Corpus: {corpus.summary()}")
+
+    results = run_micro(corpus, args.name_filter, args.min_time)
+
+    baseline = load_baseline(args.baseline)
+    if baseline is not None and baseline.get('config') != config:
+        print(f"Baseline {args.baseline} was recorded with {baseline.get('config')}, not comparing")
+        baseline = None
+    print_micro_report(results, baseline)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'cases': results}, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        save_micro_baseline(args.baseline, config, results)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    regressions = compare_micro(results, baseline or {}, args.tolerance, args.alloc_tolerance)
+    if regressions:
+        print("\n" + "!" * 60)
+        print("REGRESSION against baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        print("!" * 60)
+        sys.exit(1)
+    if baseline is not None:
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
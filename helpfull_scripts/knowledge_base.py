@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Скрипт для работы с базой знаний (SQLite)
+Использование:
+    python3 knowledge_base.py build                 # импорт изменившихся JSON
+    python3 knowledge_base.py export [--out DIR]    # экспорт в JSON вьювера
+    python3 knowledge_base.py squares 18 25         # квадраты по уровню мобов
+    python3 knowledge_base.py drop m_0_2            # мобы, с которых падает предмет
+    python3 knowledge_base.py category Оружие       # предметы по категории
+    python3 knowledge_base.py recipe recipe_63      # ингредиенты рецепта
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from Found_bot.utils.knowledge_base import KnowledgeBase
+
+def main():
+    parser = argparse.ArgumentParser(description="База знаний Ruby King")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build')
+    build.add_argument('--force', action='store_true', help="Импортировать все файлы заново")
+    export = sub.add_parser('export')
+    export.add_argument('--out', help="Каталог для JSON (по умолчанию world_map_viewer/data)")
+    squares = sub.add_parser('squares')
+    squares.add_argument('level_min', type=int)
+    squares.add_argument('level_max', type=int)
+    sub.add_parser('drop').add_argument('item_id')
+    sub.add_parser('category').add_argument('category')
+    sub.add_parser('recipe').add_argument('recipe_id')
+    args = parser.parse_args()
+
+    kb = KnowledgeBase(auto_refresh=False)
+    if args.command == 'build':
+        imported = kb.refresh(force=args.force)
+        print(f"Импортировано: {', '.join(imported) if imported else 'нет изменений'}")
+        return
+    kb.refresh()
+    if args.command == 'export':
+        for path in kb.export_json(args.out):
+            print(f"Записан {path}")
+        return
+    if args.command == 'squares':
+        rows = kb.squares_by_level(args.level_min, args.level_max)
+    elif args.command == 'drop':
+        rows = kb.mobs_by_drop(args.item_id)
+    elif args.command == 'category':
+        rows = kb.items_by_category(args.category)
+    else:
+        rows = kb.recipe_ingredients(args.recipe_id)
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,24 @@
-import json
 import os
+import sys
+import json
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from Found_bot.utils.knowledge_base import KnowledgeBase
 
 # Пути к файлам
 BASE = "world_map_viewer/data"
-REC_PATH = os.path.join(BASE, "Rec.json")
-MOBS_PATH = os.path.join(BASE, "mobs-database.json")
 ITEMS_PATH = os.path.join(BASE, "items-database.json")
+ALL_ITEMS_PATH = os.path.join(BASE, "all-items-database.json")
 
-# Загрузка данных
-with open(REC_PATH, encoding='utf-8') as f:
-    rec_data = json.load(f)
-with open(MOBS_PATH, encoding='utf-8') as f:
-    mobs_data = json.load(f)
-with open(ITEMS_PATH, encoding='utf-8') as f:
-    items_data = json.load(f)
+# Загрузка данных: база знаний импортирует только изменившиеся JSON-файлы
+kb = KnowledgeBase(data_dir=BASE)
 
 # Индексируем предметы по id
-items_by_id = {item['id']: item for item in items_data}
+items_by_id = {item['id']: item for item in kb.export_items()}
 
 # Индексируем рецепты по id
+rec_data = kb.export_recipes()
 if isinstance(rec_data, dict) and 'list' in rec_data:
     rec_items = rec_data['list']
 else:
@@ -29,23 +29,6 @@ rec_by_id = {item['id']: item for item in rec_items}
 # Собираем все уникальные id предметов
 all_item_ids = set(items_by_id) | set(rec_by_id)
 
-# Собираем инфу о дропах
-drops_map = {}
-for mob in mobs_data:
-    for drop in mob.get('drop', []):
-        drop_id = drop.get('id')
-        if not drop_id:
-            continue
-        if drop_id not in drops_map:
-            drops_map[drop_id] = []
-        drops_map[drop_id].append({
-            "mobId": mob.get('id'),
-            "mobName": mob.get('name'),
-            "location": mob.get('location'),
-            "chance": drop.get('chance'),
-            "count": drop.get('count')
-        })
-
 # Формируем итоговый список предметов
 result = []
 for item_id in all_item_ids:
@@ -55,9 +38,16 @@ for item_id in all_item_ids:
     # Тип
     if 'type' not in item:
         item['type'] = item.get('typeElement', 'resources')
-    # Дропы
-    if item_id in drops_map:
-        item['dropsFrom'] = drops_map[item_id]
+    # Дропы - индексный запрос вместо обхода всех мобов
+    drops = kb.mobs_by_drop(item_id)
+    if drops:
+        item['dropsFrom'] = [{
+            "mobId": drop['mob_id'],
+            "mobName": drop['name'],
+            "location": None,  # В mobs-database.json есть только массив locations
+            "chance": drop['chance'],
+            "count": drop['count']
+        } for drop in drops]
     result.append(item)
 
 # Сохраняем
@@ -65,8 +55,8 @@ with open(ITEMS_PATH, 'w', encoding='utf-8') as f:
     json.dump(result, f, ensure_ascii=False, indent=2)
 
 # Также сохраняем в all-items-database.json
-ALL_ITEMS_PATH = os.path.join(BASE, "all-items-database.json")
 with open(ALL_ITEMS_PATH, 'w', encoding='utf-8') as f:
     json.dump(result, f, ensure_ascii=False, indent=2)
 
-print('items-database.json и all-items-database.json обновлены!') 
\ No newline at end of file
+kb.refresh()
+print('items-database.json и all-items-database.json обновлены!')
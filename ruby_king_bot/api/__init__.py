@@ -1,3 +1,9 @@
 # API package
 from .client import APIClient
-from .endpoints import Endpoints 
\ No newline at end of file
+from .async_client import AsyncAPIClient
+from .endpoints import Endpoints
+from .pacer import ActionPacer
+from .calibration import CooldownCalibrator 
+from .user_cache import UserInfoCache
+from .transport import AiohttpTransport, RecordingTransport, ReplayTransport, CaptureExhausted
+from .records import UserRecord, MobRecord, MobState, ExploreRecord, AttackRecord, decode_user, decode_explore, decode_attack
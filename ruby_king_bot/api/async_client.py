@@ -0,0 +1,435 @@
+"""
+Async API client for Ruby King game
+"""
+
+import asyncio
+import logging
+from typing import Dict, Any, Optional, List
+import aiohttp
+
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.config.token import GAME_TOKEN
+from ruby_king_bot.api.endpoints import Endpoints
+from ruby_king_bot.api.pacer import ActionPacer
+from ruby_king_bot.api.calibration import CooldownCalibrator
+from ruby_king_bot.api.transport import AiohttpTransport, RecordingTransport, ReplayTransport
+from ruby_king_bot.api.user_cache import UserInfoCache
+from ruby_king_bot.utils.clock import clock
+
+logger = logging.getLogger(__name__)
+
+# Атаку и скилл бот планирует сам по КД - отказ "слишком быстро" возвращается ему без повтора
+CALLER_TIMED_ACTIONS = ('attack', 'skill')
+
+
+def normalize_response(result: Any) -> Dict[str, Any]:
+    """
+    Normalize raw API response to a dictionary
+
+    Args:
+        result: Decoded JSON response
+
+    Returns:
+        Response data as dictionary (first element for list responses)
+    """
+    if isinstance(result, list):
+        # If response is a list, convert to dict with first item
+        return result[0] if len(result) > 0 else {}
+    if not isinstance(result, dict):
+        # If response is not dict or list, create empty dict
+        logger.warning(f"Unexpected response type: {type(result)}")
+        return {}
+    return result
+
+
+class AsyncAPIClient:
+    """Asyncio HTTP client for making requests to Ruby King API"""
+
+    def __init__(self, token: Optional[str] = None,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 pacer: Optional[ActionPacer] = None,
+                 calibrator: Optional[CooldownCalibrator] = None,
+                 transport=None,
+                 user_cache: Optional[UserInfoCache] = None):
+        """
+        Args:
+            token: Game token (defaults to GAME_TOKEN)
+            session: Shared aiohttp session (created lazily if not given)
+            pacer: Request pacer (one per character)
+            calibrator: Cooldown calibrator (one per character)
+            transport: Request transport (defaults to live HTTP, recorded to
+                Settings.API_RECORD_PATH or replayed from Settings.API_REPLAY_PATH)
+            user_cache: User info cache (one per character)
+        """
+        self.token = token or GAME_TOKEN
+        self.pacer = pacer or ActionPacer()
+        self.calibrator = calibrator or CooldownCalibrator()
+        self.user_cache = user_cache or UserInfoCache()
+        # Время отправки последнего запроса каждого действия с КД (часы клиента)
+        self.last_sent: Dict[str, float] = {}
+        self._session = session
+        self._owns_session = session is None
+        self._owns_transport = transport is None
+        self.transport = transport or self._default_transport()
+
+    def _default_transport(self):
+        """Live, recording or replay transport by settings"""
+        if Settings.API_REPLAY_PATH:
+            if Settings.VIRTUAL_CLOCK is not False and not clock.virtual:
+                clock.use_virtual()  # Запись проигрывается без реальных ожиданий
+            return ReplayTransport(Settings.API_REPLAY_PATH)
+        transport = AiohttpTransport(self._get_session)
+        if Settings.API_RECORD_PATH:
+            return RecordingTransport(transport, Settings.API_RECORD_PATH)
+        return transport
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get pooled session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=Settings.CONNECTION_POOL_SIZE,
+                keepalive_timeout=Settings.CONNECTION_KEEPALIVE
+            )
+            self._session = aiohttp.ClientSession(
+                headers=Settings.DEFAULT_HEADERS,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=Settings.REQUEST_TIMEOUT)
+            )
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        """Close the underlying session if it belongs to this client"""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._owns_transport and isinstance(self.transport, RecordingTransport):
+            self.transport.close()
+
+    async def __aenter__(self) -> 'AsyncAPIClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                            retries: int = None, timeout: Optional[float] = None,
+                            cooldown_action: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Make HTTP request with retry logic
+
+        Cancellation of the calling task is propagated immediately,
+        including during the backoff pause. Requests are spaced by the
+        pacer; "too fast" rejections widen the interval of the cooldown
+        action (or endpoint class) and are retried after pacing, except
+        attack and skill which are returned to the caller. Timing of
+        every answered request is passed to the cooldown calibrator; only
+        the first attempt, timed by the bot, teaches it cooldowns.
+
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            endpoint: API endpoint
+            data: Request data for POST requests
+            retries: Number of retries (defaults to Settings.MAX_RETRIES)
+            timeout: Per-attempt timeout in seconds (defaults to Settings.REQUEST_TIMEOUT)
+            cooldown_action: Cooldown of the action (attack, skill, heal, mana)
+
+        Returns:
+            Response data as dictionary
+
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError: If all retries fail
+        """
+        if retries is None:
+            retries = Settings.MAX_RETRIES
+        if timeout is None:
+            timeout = Settings.REQUEST_TIMEOUT
+
+        url = Endpoints.get_url_with_token(endpoint, self.token)
+        endpoint_class = self.pacer.endpoint_class(endpoint)
+        pace_key = cooldown_action or endpoint_class
+        too_fast_retries = Settings.PACER_TOO_FAST_RETRIES
+        attempt = 0
+        retried = False
+
+        while True:
+            await self.pacer.acquire(endpoint_class, cooldown_action)
+            try:
+                logger.debug(f"Making {method} request to {endpoint} (attempt {attempt + 1})")
+
+                sent_at = clock.time()
+                if cooldown_action:
+                    self.last_sent[cooldown_action] = sent_at
+                response = await self.transport.send(method, endpoint, url, data, timeout)
+                received_at = clock.time()
+                result = normalize_response(response.body)
+                server_date = response.headers.get('Date')
+
+                logger.debug(f"API Response: {result}")
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Request failed (attempt {attempt + 1}): {e!r}")
+
+                if attempt == retries:
+                    logger.error(f"All retries failed for {endpoint}")
+                    raise
+
+                # Exponential backoff
+                delay = Settings.RETRY_DELAY * (2 ** attempt)
+                attempt += 1
+                retried = True
+                logger.info(f"Retrying in {delay} seconds...")
+                await clock.sleep_async(delay)
+                continue
+
+            too_fast = self.pacer.is_too_fast(result)
+            # Повторы клиента отправлены по таймингу пейсера, а не бота - по ним границы КД не сужаем
+            self.calibrator.observe(cooldown_action, sent_at, received_at, not too_fast, server_date,
+                                    timed=not retried)
+
+            # Отказ сервера "Очень быстро совершаете действия" - действие не выполнено,
+            # расширяем интервал и повторяем запрос (атаку и скилл повторяет бот)
+            if too_fast:
+                self.pacer.report_too_fast(pace_key)
+                if too_fast_retries > 0 and cooldown_action not in CALLER_TIMED_ACTIONS:
+                    too_fast_retries -= 1
+                    retried = True
+                    logger.info(f"Too fast for {endpoint}, retrying after pacing")
+                    continue
+                return result
+
+            self.pacer.report_success(pace_key)
+            self.user_cache.observe(endpoint, result)
+            logger.debug(f"Request successful: {endpoint}")
+            return result
+
+    async def explore_territory(self, loco: str = "loco_0", direction: str = "north",
+                                timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Explore territory to find mobs or events
+
+        CRITICAL: This automatically puts the player in combat if a mob is found
+
+        Args:
+            loco: Location parameter
+            direction: Direction to explore
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            Response data containing mob information if found
+        """
+        data = {
+            "loco": loco,
+            "direction": direction
+        }
+
+        logger.info("Exploring territory...")
+        result = await self._make_request("POST", Endpoints.EXPLORE_TERRITORY, data, timeout=timeout)
+
+        # CRITICAL: Log if mob was found (player is now in combat)
+        if "mob" in result:
+            mob_data = result['mob']
+            if isinstance(mob_data, list) and len(mob_data) > 0:
+                mob_name = mob_data[0].get('name', 'Unknown')
+            elif isinstance(mob_data, dict):
+                mob_name = mob_data.get('name', 'Unknown')
+            else:
+                mob_name = 'Unknown'
+            logger.info(f"Found mob: {mob_name}")
+        else:
+            logger.info("No mob found, exploring event or empty area")
+
+        return result
+
+    async def attack_mob(self, mob_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Attack a mob
+
+        Args:
+            mob_id: ID of the mob to attack
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            Response data with combat results
+        """
+        data = {"mobId": mob_id}
+        logger.info(f"Attacking mob: {mob_id}")
+        return await self._make_request("POST", Endpoints.ATTACK_MOB, data, timeout=timeout,
+                                        cooldown_action='attack')
+
+    async def use_healing_potion(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Use healing potion to restore HP
+
+        Args:
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            Response data with healing results
+        """
+        data = {"elemId": "m_1"}
+        logger.info("Using healing potion...")
+        return await self._make_request("POST", Endpoints.USE_HEALING_POTION, data, timeout=timeout,
+                                        cooldown_action='heal')
+
+    async def start_rest(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Start resting at campfire
+
+        Args:
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            Response data with rest start information
+        """
+        logger.info("Starting rest at campfire...")
+        return await self._make_request("POST", Endpoints.START_REST, {}, timeout=timeout)
+
+    async def end_rest(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        End resting at campfire
+
+        Args:
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            Response data with rest end information
+        """
+        logger.info("Ending rest at campfire...")
+        return await self._make_request("POST", Endpoints.END_REST, {}, timeout=timeout)
+
+    async def use_mana_potion(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Use mana potion to restore MP
+        """
+        data = {"elemId": "m_3"}
+        logger.info("Using mana potion...")
+        return await self._make_request("POST", Endpoints.USE_MANA_POTION, data, timeout=timeout,
+                                        cooldown_action='mana')
+
+    async def use_skill(self, mob_id: str, skill_id: str = "skill_0_1",
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Use skill on mob
+        """
+        data = {"mobId": mob_id, "skillId": skill_id}
+        logger.info(f"Using skill {skill_id} on mob: {mob_id}")
+        return await self._make_request("POST", Endpoints.USE_SKILL, data, timeout=timeout,
+                                        cooldown_action='skill')
+
+    async def _get_cached(self, endpoint: str, fresh: bool, timeout: Optional[float]) -> Dict[str, Any]:
+        """Cached user info response or a new request"""
+        if not fresh:
+            cached = self.user_cache.get(endpoint)
+            if cached is not None:
+                logger.debug(f"User info from cache: {endpoint}")
+                return cached
+        return await self._make_request("GET", endpoint, timeout=timeout)
+
+    async def get_user_info(self, timeout: Optional[float] = None, fresh: bool = False) -> Dict[str, Any]:
+        """
+        Get user information
+
+        Args:
+            timeout: Per-call timeout in seconds
+            fresh: Skip user info cache
+
+        Returns:
+            Response data with user information
+        """
+        logger.info("Getting user info...")
+        return await self._get_cached(Endpoints.USER_INFO, fresh, timeout)
+
+    async def get_user_city_info(self, timeout: Optional[float] = None, fresh: bool = False) -> Dict[str, Any]:
+        """
+        Get user information from city (for initialization)
+
+        Args:
+            timeout: Per-call timeout in seconds
+            fresh: Skip user info cache
+
+        Returns:
+            Response data with user information from city
+        """
+        logger.info("Getting user city info...")
+        return await self._get_cached(Endpoints.USER_CITY, fresh, timeout)
+
+    async def sell_items(self, items: List[dict], timeout: Optional[float] = None) -> dict:
+        """
+        Sell items (оружие, броня, бижутерия)
+        Args:
+            items: List of dicts {"id": uniqueId, "count": 1}
+        Returns:
+            Response data
+        """
+        data = {"items": items}
+        logger.info(f"Selling items: {items}")
+        result = await self._make_request("POST", Endpoints.SELL_ITEMS, data, timeout=timeout)
+        logger.info(f"Sell items response: {result}")
+        return result
+
+    async def buy_items(self, elem_id: str, name_collection: str, count: int,
+                        timeout: Optional[float] = None) -> dict:
+        """
+        Buy items (зелья и др.)
+        Args:
+            elem_id: id предмета (например, m_1)
+            name_collection: коллекция (обычно 'resources')
+            count: сколько купить
+        Returns:
+            Response data
+        """
+        data = {"elemId": elem_id, "nameCollection": name_collection, "count": count}
+        logger.info(f"Buying {count} of {elem_id} from {name_collection}")
+        result = await self._make_request("POST", Endpoints.BUY_ITEMS, data, timeout=timeout)
+        logger.info(f"Buy items response: {result}")
+        return result
+
+    async def change_main_geo(self, position: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Change main geographical position (city/farm)
+
+        Args:
+            position: Position to change to ("city" or "farm")
+
+        Returns:
+            Response data with position change results
+        """
+        data = {"position": position}
+        logger.info(f"Changing main geo to: {position}")
+        return await self._make_request("POST", Endpoints.CHANGE_MAIN_GEO, data, timeout=timeout)
+
+    async def change_geo(self, loco: str, direction: str, type_action: str = "change",
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Change geographical location within farm
+
+        Args:
+            loco: Location name (e.g., "loco_3")
+            direction: Direction (e.g., "south", "north")
+            type_action: Action type (default: "change")
+
+        Returns:
+            Response data with location change results
+        """
+        data = {
+            "loco": loco,
+            "direction": direction,
+            "typeAction": type_action
+        }
+        logger.info(f"Changing geo to {loco} {direction}")
+        return await self._make_request("POST", Endpoints.CHANGE_GEO, data, timeout=timeout)
+
+    async def change_square(self, square: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Change square within current location
+
+        Args:
+            square: Square position (e.g., "G4", "G3")
+
+        Returns:
+            Response data with square change results
+        """
+        data = {"square": square}
+        logger.info(f"Changing square to: {square}")
+        return await self._make_request("POST", Endpoints.CHANGE_SQUARE, data, timeout=timeout)
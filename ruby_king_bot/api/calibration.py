@@ -0,0 +1,205 @@
+"""
+Cooldown calibration - learns server-side cooldowns and clock offset
+"""
+
+import logging
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, List
+
+from ruby_king_bot.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Действия с серверным КД и атрибуты Player, в которые пишется результат
+COOLDOWN_ACTIONS = {
+    'attack': 'GLOBAL_COOLDOWN',  # ГКД между атакой и скиллом
+    'skill': 'SKILL_COOLDOWN',
+    'heal': 'HEAL_COOLDOWN',
+    'mana': 'MANA_COOLDOWN',
+}
+
+
+class CooldownBounds:
+    """Interval of possible server cooldown values for one action"""
+
+    def __init__(self, default: float):
+        self.default = default
+        # Ниже lower сервер отказывал, на upper и выше - принимал
+        self.lower = default * (1 - Settings.CALIBRATION_PROBE_RANGE)
+        self.upper = default
+        self.accepted = 0
+        self.rejected = 0
+
+    def accept(self, interval: float):
+        """Server accepted the action after interval seconds"""
+        self.accepted += 1
+        if interval < self.lower:
+            # КД короче, чем предполагали - расширяем область поиска вниз
+            self.lower = interval * (1 - Settings.CALIBRATION_PROBE_RANGE)
+        if interval < self.upper:
+            self.upper = interval
+
+    def reject(self, interval: float):
+        """Server rejected the action after interval seconds"""
+        self.rejected += 1
+        if interval > self.lower:
+            self.lower = interval
+            if self.lower >= self.upper:
+                # Сервер ужесточил КД - расширяем верхнюю границу
+                self.upper = self.lower + Settings.CALIBRATION_RESOLUTION
+
+    def target(self) -> float:
+        """Next interval to use: bisect while bounds are wide, then stay on upper"""
+        # Не пробуем укороченный КД, пока сервер ни разу не принял действие
+        if self.accepted and self.upper - self.lower > Settings.CALIBRATION_RESOLUTION:
+            return (self.lower + self.upper) / 2
+        return self.upper
+
+
+class CooldownCalibrator:
+    """Learns GCD, skill, heal and mana cooldowns and client/server clock offset"""
+
+    def __init__(self, defaults: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            defaults: Starting cooldowns by action (defaults to Settings values)
+        """
+        start = {
+            'attack': Settings.ATTACK_COOLDOWN,
+            'skill': Settings.SKILL_COOLDOWN,
+            'heal': Settings.HEAL_COOLDOWN,
+            'mana': Settings.MANA_COOLDOWN,
+        }
+        if defaults:
+            start.update(defaults)
+        self.bounds = {action: CooldownBounds(value) for action, value in start.items()}
+
+        # Оценка времени получения запроса сервером (по часам клиента)
+        self._last_accepted: Dict[str, float] = {}
+        self._latencies = deque(maxlen=Settings.CALIBRATION_LATENCY_WINDOW)
+
+        # Смещение часов сервера относительно клиента (по заголовку Date)
+        self._offset_low: Optional[float] = None
+        self._offset_high: Optional[float] = None
+
+        self._players: List[Any] = []
+
+    def bind(self, player):
+        """Feed calibrated cooldowns into player's cooldown attributes"""
+        self._players.append(player)
+        self._apply(player)
+
+    @property
+    def clock_offset(self) -> Optional[float]:
+        """Estimated server time minus client time in seconds"""
+        if self._offset_low is None:
+            return None
+        return (self._offset_low + self._offset_high) / 2
+
+    def to_server_time(self, client_time: float) -> float:
+        """Convert client timestamp to estimated server timestamp"""
+        return client_time + (self.clock_offset or 0.0)
+
+    def latency_jitter(self) -> float:
+        """Spread of one-way latency estimates (10th to 90th percentile)"""
+        if len(self._latencies) < 2:
+            return 0.0
+        samples = sorted(self._latencies)
+        last = len(samples) - 1
+        return samples[int(last * 0.9)] - samples[int(last * 0.1)]
+
+    def safe_cooldown(self, action: str) -> float:
+        """
+        Get client-side cooldown that the server will accept
+
+        Args:
+            action: attack, skill, heal or mana
+
+        Returns:
+            Cooldown in seconds including latency jitter and safety margin
+        """
+        target = self.bounds[action].target()
+        return target + self.latency_jitter() + Settings.CALIBRATION_SAFETY_MARGIN
+
+    def observe(self, action: Optional[str], sent_at: float, received_at: float,
+                accepted: bool, server_date: Optional[str] = None, timed: bool = True):
+        """
+        Record one request of an action
+
+        Args:
+            action: attack, skill, heal, mana or None for actions without cooldown
+            sent_at: Client time when request was sent
+            received_at: Client time when response arrived
+            accepted: False if server answered "too fast"
+            server_date: Value of HTTP Date header
+            timed: False for client retries - they only move the cooldown start,
+                the interval was not chosen by the bot
+        """
+        rtt = max(0.0, received_at - sent_at)
+        one_way = rtt / 2
+        self._latencies.append(one_way)
+        if server_date:
+            self._observe_clock(sent_at, received_at, server_date)
+
+        if action not in self.bounds:
+            return
+        server_received = sent_at + one_way
+
+        # ГКД: интервал от последнего принятого боевого действия (атака или скилл)
+        groups = [action]
+        if action == 'skill':
+            groups.append('attack')
+        for group in groups:
+            last = self._last_accepted.get(group)
+            if last is None or not timed:
+                continue
+            interval = server_received - last
+            if accepted:
+                self.bounds[group].accept(interval)
+            elif group == action and not self._ambiguous_rejection(action, server_received):
+                self.bounds[group].reject(interval)
+
+        if accepted:
+            for group in groups:
+                self._last_accepted[group] = server_received
+
+        for player in self._players:
+            self._apply(player)
+
+    def _ambiguous_rejection(self, action: str, server_received: float) -> bool:
+        """Skill rejection may be caused by GCD - don't learn skill cooldown from it"""
+        if action != 'skill':
+            return False
+        last_combat = self._last_accepted.get('attack')
+        return last_combat is not None and server_received - last_combat < self.bounds['attack'].upper
+
+    def _observe_clock(self, sent_at: float, received_at: float, server_date: str):
+        """Narrow clock offset interval from second-resolution Date header"""
+        try:
+            server_time = parsedate_to_datetime(server_date).timestamp()
+        except (TypeError, ValueError):
+            return
+        # Сервер ставит Date между отправкой и получением, с точностью до секунды
+        low = server_time - received_at
+        high = server_time + 1 - sent_at
+        if self._offset_low is None or low > self._offset_high or high < self._offset_low:
+            # Первое измерение или часы разошлись - начинаем заново
+            self._offset_low, self._offset_high = low, high
+            return
+        self._offset_low = max(self._offset_low, low)
+        self._offset_high = min(self._offset_high, high)
+
+    def _apply(self, player):
+        """Write calibrated cooldowns to player"""
+        for action, attribute in COOLDOWN_ACTIONS.items():
+            setattr(player, attribute, self.safe_cooldown(action))
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Get calibration state for logging and display"""
+        return {
+            'cooldowns': {action: round(self.safe_cooldown(action), 3) for action in self.bounds},
+            'bounds': {action: (round(b.lower, 3), round(b.upper, 3)) for action, b in self.bounds.items()},
+            'clock_offset': self.clock_offset,
+            'latency_jitter': round(self.latency_jitter(), 3),
+        }
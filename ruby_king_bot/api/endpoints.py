@@ -30,6 +30,34 @@ class Endpoints:
     CHANGE_GEO = "/farm/change-geo"
     CHANGE_SQUARE = "/farm/change-square"
     
+    # Endpoint classes for request pacing
+    CLASS_COMBAT = "combat"
+    CLASS_TRAVEL = "travel"
+    CLASS_TRADE = "trade"
+    CLASS_INFO = "info"
+    
+    ENDPOINT_CLASSES = {
+        EXPLORE_TERRITORY: CLASS_COMBAT,
+        ATTACK_MOB: CLASS_COMBAT,  # также USE_SKILL
+        USE_HEALING_POTION: CLASS_COMBAT,  # также USE_MANA_POTION
+        START_REST: CLASS_COMBAT,
+        END_REST: CLASS_COMBAT,
+        STOP_REST: CLASS_COMBAT,
+        SELL_ITEMS: CLASS_TRADE,
+        BUY_ITEMS: CLASS_TRADE,
+        CHANGE_MAIN_GEO: CLASS_TRAVEL,
+        CHANGE_GEO: CLASS_TRAVEL,
+        CHANGE_SQUARE: CLASS_TRAVEL,
+        USER_INFO: CLASS_INFO,
+        USER_CITY: CLASS_INFO,
+        USER_STATS: CLASS_INFO,
+    }
+    
+    @classmethod
+    def get_endpoint_class(cls, endpoint: str) -> str:
+        """Get pacing class for endpoint (info for unknown endpoints)"""
+        return cls.ENDPOINT_CLASSES.get(endpoint, cls.CLASS_INFO)
+    
     @classmethod
     def get_full_url(cls, endpoint: str) -> str:
         """Get full URL for endpoint"""
@@ -0,0 +1,108 @@
+"""
+Action pacer - central request pacing for Ruby King API
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.api.endpoints import Endpoints
+from ruby_king_bot.utils.clock import clock
+
+logger = logging.getLogger(__name__)
+
+class ActionPacer:
+    """Keeps minimum intervals between requests of each endpoint class and cooldown action"""
+
+    def __init__(self, intervals: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            intervals: Base minimum intervals by endpoint class or cooldown action
+                (defaults to Settings.PACER_MIN_INTERVALS)
+        """
+        self.base_intervals = dict(Settings.PACER_MIN_INTERVALS)
+        if intervals:
+            self.base_intervals.update(intervals)
+        self.intervals = dict(self.base_intervals)
+        self._last_request: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.too_fast_count = 0
+        self.total_wait = 0.0
+
+    def now(self) -> float:
+        """Current pacer time"""
+        return clock.monotonic()
+
+    def delay_for(self, key: str) -> float:
+        """
+        Get time left until the next request of the class or action is allowed
+
+        Args:
+            key: Endpoint class (combat, travel, trade, info) or cooldown action
+
+        Returns:
+            Seconds to wait (0 if request can be sent now)
+        """
+        last = self._last_request.get(key)
+        if last is None:
+            return 0.0
+        interval = self.intervals.get(key, self.base_intervals.get(key, 0.0))
+        return max(0.0, last + interval - self.now())
+
+    async def acquire(self, endpoint_class: str, action: Optional[str] = None):
+        """
+        Wait until a request of the class is allowed and reserve the slot
+
+        Args:
+            endpoint_class: Endpoint class (combat, travel, trade, info)
+            action: Cooldown action of the request (attack, skill, heal, mana)
+        """
+        lock = self._locks.get(endpoint_class)
+        if lock is None:
+            lock = self._locks[endpoint_class] = asyncio.Lock()
+
+        async with lock:
+            delay = self.delay_for(endpoint_class)
+            if action:
+                delay = max(delay, self.delay_for(action))
+            if delay > 0:
+                logger.debug(f"Pacer: waiting {delay:.2f}s before {action or endpoint_class} request")
+                self.total_wait += delay
+                await clock.sleep_async(delay)
+            now = self.now()
+            self._last_request[endpoint_class] = now
+            if action:
+                self._last_request[action] = now
+
+    def report_too_fast(self, key: str):
+        """
+        Widen interval after server "too fast" rejection
+
+        Args:
+            key: Cooldown action of the rejected request, or its endpoint class
+                for requests without cooldown
+        """
+        self.too_fast_count += 1
+        base = self.base_intervals.get(key, 0.0)
+        current = max(self.intervals.get(key, base), base, 0.5)
+        self.intervals[key] = min(Settings.PACER_MAX_INTERVAL, current * Settings.PACER_BACKOFF_FACTOR)
+        logger.warning(f"Pacer: too fast for {key}, interval -> {self.intervals[key]:.2f}s")
+
+    def report_success(self, key: str):
+        """Move interval of the action or class back towards its base after accepted request"""
+        base = self.base_intervals.get(key, 0.0)
+        current = self.intervals.get(key, base)
+        if current > base:
+            self.intervals[key] = max(base, current - (current - base) * Settings.PACER_RECOVERY_RATE)
+
+    @staticmethod
+    def is_too_fast(result: Dict) -> bool:
+        """Check if response is a "too fast" rejection"""
+        return (result.get('status') == 'fail' and
+                Settings.TOO_FAST_MESSAGE in str(result.get('message', '')))
+
+    @staticmethod
+    def endpoint_class(endpoint: str) -> str:
+        """Get endpoint class used for pacing"""
+        return Endpoints.get_endpoint_class(endpoint)
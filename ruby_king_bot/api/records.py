@@ -0,0 +1,196 @@
+"""
+Response Records - typed records decoded from API responses
+
+Ответ каждого эндпоинта разбирается один раз: форма полей приводится
+к одному виду здесь ([hp, 0] -> hp, 'mob' списком или объектом -> список,
+'mobs' -> словарь по farmId), а обработчики получают готовые записи
+вместо того, чтобы каждый заново проверять структуру JSON.
+"""
+
+from typing import Dict, Any, Optional, List
+
+# Начальное HP моба, если ответ его не содержит: 50 + 25 за уровень
+_DEFAULT_MOB_HP_BASE = 50
+_DEFAULT_MOB_HP_PER_LEVEL = 25
+
+
+def _first(value: Any) -> Optional[Any]:
+    """Value of a stat field: [current, 0] lists give their first element"""
+    if isinstance(value, list):
+        return value[0] if value else None
+    if isinstance(value, (int, float)):
+        return value
+    return None
+
+
+def _stat(stats: Dict[str, Any], key: str, data: Dict[str, Any], fallback_key: str) -> Optional[Any]:
+    """Stat from stats block, falling back to plain field of the object"""
+    value = _first(stats.get(key)) if stats else None
+    if value is None:
+        value = data.get(fallback_key)
+    return value
+
+
+class UserRecord:
+    """Character state from 'user' (or legacy 'player') block. None - field was not sent"""
+
+    __slots__ = ('name', 'hp', 'max_hp', 'mp', 'max_mp', 'stamina', 'max_stamina', 'gold', 'level',
+                 'experience', 'experience_to_next', 'morale', 'max_inventory_weight',
+                 'inventory', 'geo', 'raw')
+
+    def __init__(self, data: Dict[str, Any], stats: Dict[str, Any]):
+        self.name = data.get('name')
+        self.hp = _stat(stats, 'userCurrentHP', data, 'hp')
+        self.max_hp = _stat(stats, 'userMaxHP', data, 'maxHp')
+        self.mp = _stat(stats, 'userCurrentMP', data, 'mp')
+        self.max_mp = _stat(stats, 'userMaxMP', data, 'maxMp')
+        self.stamina = _stat(stats, 'userStamina', data, 'stamina')
+        self.max_stamina = _stat(stats, 'userMaxStamina', data, 'maxStamina')
+        self.gold = data.get('gold')
+        self.level = data.get('lvl')
+        self.experience = data.get('userCurrentXP')
+        self.experience_to_next = data.get('userNextXP')
+        self.morale = data.get('morale')
+        # inventoryWeight - максимальный вес рюкзака (текущий вес API не отдает)
+        self.max_inventory_weight = data.get('inventoryWeight')
+        self.inventory = data.get('inventory')
+        self.geo = data.get('geo')
+        self.raw = data
+
+
+class MobRecord:
+    """Mob as listed in explore response"""
+
+    __slots__ = ('id', 'farm_id', 'name', 'hp', 'max_hp', 'level', 'drops', 'raw')
+
+    def __init__(self, data: Dict[str, Any]):
+        self.id = data.get('id', "")
+        self.farm_id = data.get('farmId', "")  # farmId для атаки
+        self.name = data.get('name', "Unknown")
+        self.level = data.get('lvl', data.get('level', 1))
+        # В ответе исследования HP лежит в stats.userCurrentHP как [текущее, 0]
+        stats = data.get('stats') or {}
+        hp = _first(stats.get('userCurrentHP')) if 'userCurrentHP' in stats else None
+        if hp is not None:
+            self.hp = hp
+            self.max_hp = hp  # При появлении моб всегда с полным HP
+        elif 'hp' in data:
+            self.hp = data['hp']
+            self.max_hp = data.get('maxHp', data['hp'])
+        else:
+            self.hp = _DEFAULT_MOB_HP_BASE + self.level * _DEFAULT_MOB_HP_PER_LEVEL
+            self.max_hp = self.hp
+        self.drops = data.get('drop') or data.get('drops') or []
+        self.raw = data
+
+
+class MobState:
+    """Mob HP as reported in attack response ('mob' or an element of 'mobs')"""
+
+    __slots__ = ('farm_id', 'name', 'hp', 'max_hp')
+
+    def __init__(self, data: Dict[str, Any]):
+        self.farm_id = data.get('farmId')
+        self.name = data.get('name')
+        stats = data.get('stats') or {}
+        hp = _first(stats.get('userCurrentHP'))
+        self.hp = hp if hp is not None else data.get('hp')
+        self.max_hp = data.get('maxHp')
+
+
+class ExploreRecord:
+    """Explore response (/farm/farm-mob-one)"""
+
+    __slots__ = ('status', 'message', 'mobs', 'raw')
+
+    def __init__(self, response: Dict[str, Any]):
+        self.status = response.get('status')
+        self.message = response.get('message', '')
+        self.mobs: List[MobRecord] = []
+        self._add_mobs(response.get('mob'))
+        farm = response.get('farm')
+        if isinstance(farm, list):
+            for farm_item in farm:
+                if isinstance(farm_item, dict):
+                    self._add_mobs(farm_item.get('mob'))
+        self.raw = response
+
+    def _add_mobs(self, mob_data: Any):
+        if isinstance(mob_data, list):
+            self.mobs.extend(MobRecord(mob) for mob in mob_data if isinstance(mob, dict))
+        elif isinstance(mob_data, dict):
+            self.mobs.append(MobRecord(mob_data))
+
+
+class AttackRecord:
+    """Attack or skill response (/battle/user-attack)"""
+
+    __slots__ = ('status', 'message', 'status_battle', 'user', 'target_hp', 'mob', 'mobs',
+                 'logs', 'exp_gained', 'drops', 'raw')
+
+    def __init__(self, response: Dict[str, Any]):
+        self.status = response.get('status')
+        self.message = response.get('message', '')
+        self.status_battle = response.get('statusBattle')
+        self.user = decode_user(response)
+
+        # mobTargetHP - HP текущей цели, самый точный источник
+        self.target_hp: Optional[Any] = None
+        target = response.get('mobTargetHP')
+        if isinstance(target, dict) and target.get('id') and target.get('hp') is not None:
+            self.target_hp = target['hp']
+
+        mob = response.get('mob')
+        self.mob = MobState(mob) if isinstance(mob, dict) and mob else None
+
+        # Состояние всех мобов боя, индекс по farmId (поиск без перебора)
+        self.mobs: Dict[Any, MobState] = {}
+        mobs = response.get('mobs')
+        if isinstance(mobs, list):
+            for mob_info in mobs:
+                if isinstance(mob_info, dict):
+                    state = MobState(mob_info)
+                    self.mobs.setdefault(state.farm_id, state)
+
+        logs = response.get('arrLogs')
+        self.logs: List[Dict[str, Any]] = logs if isinstance(logs, list) else []
+
+        win = response.get('dataWin') or {}
+        self.exp_gained = win.get('expWin', 0)
+        self.drops = win.get('drop') or []
+        self.raw = response
+
+    @property
+    def is_win(self) -> bool:
+        return self.status_battle == 'win'
+
+
+def decode_user(response: Dict[str, Any]) -> Optional[UserRecord]:
+    """
+    Decode character state from any response carrying it
+
+    Args:
+        response: API response data
+
+    Returns:
+        User record or None if response has no character data
+    """
+    user = response.get('user')
+    if user and isinstance(user, dict):
+        return UserRecord(user, user.get('stats') or {})
+    # Старый формат: 'player' и 'stats' в корне ответа
+    player = response.get('player')
+    stats = response.get('stats')
+    if (player and isinstance(player, dict)) or (stats and isinstance(stats, dict)):
+        return UserRecord(player if isinstance(player, dict) else {}, stats if isinstance(stats, dict) else {})
+    return None
+
+
+def decode_explore(response: Dict[str, Any]) -> ExploreRecord:
+    """Decode explore response"""
+    return ExploreRecord(response)
+
+
+def decode_attack(response: Dict[str, Any]) -> AttackRecord:
+    """Decode attack or skill response"""
+    return AttackRecord(response)
@@ -0,0 +1,210 @@
+"""
+API transports - live HTTP, capture recording and offline replay (asyncio)
+
+Формат записи (JSONL, .gz - со сжатием), одна строка на запрос:
+    {"t": 12.345, "dt": 0.210, "method": "POST", "endpoint": "/battle/user-attack",
+     "data": {...}, "status": 200, "date": "...", "body": {...}}
+Неудавшийся запрос пишется с "error" вместо "status"/"body".
+Токен (в URL, query-строке и заголовках) в запись не попадает.
+Формат совпадает с Found_bot.api.transport: записи взаимозаменяемы.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Deque, Tuple, Callable, Awaitable
+import aiohttp
+
+from ruby_king_bot.utils.clock import clock
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PARAM = re.compile(r'name=[^&\s\'"]+')
+
+
+class CaptureExhausted(RuntimeError):
+    """Replay capture has no recorded response for the request"""
+
+
+class TransportResponse:
+    """Decoded response of one request"""
+
+    def __init__(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+def capture_endpoint(endpoint: str) -> str:
+    """Endpoint as stored in capture (query string with token is dropped)"""
+    return endpoint.split('?', 1)[0]
+
+
+def open_capture(path: str, mode: str):
+    """Open capture file as text, gzip-compressed if path ends with .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def read_capture(path: str):
+    """Iterate over capture records"""
+    with open_capture(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class AiohttpTransport:
+    """Live HTTP transport over pooled aiohttp session"""
+
+    def __init__(self, get_session: Callable[[], Awaitable[aiohttp.ClientSession]]):
+        """
+        Args:
+            get_session: Coroutine function returning the pooled session
+        """
+        self.get_session = get_session
+
+    async def send(self, method: str, endpoint: str, url: str, data: Optional[Dict] = None,
+                   timeout: Optional[float] = None) -> TransportResponse:
+        """
+        Send request
+
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError: On network or HTTP error
+        """
+        session = await self.get_session()
+        request_timeout = aiohttp.ClientTimeout(total=timeout)
+        if method.upper() == "POST":
+            request = session.post(url, json=data, timeout=request_timeout)
+        else:
+            request = session.get(url, timeout=request_timeout)
+        async with request as response:
+            response.raise_for_status()
+            body = await response.json(content_type=None)
+            return TransportResponse(response.status, body, dict(response.headers))
+
+
+class RecordingTransport:
+    """Wraps a transport and writes every request/response pair to a capture"""
+
+    def __init__(self, inner, capture_path: str):
+        """
+        Args:
+            inner: Transport that performs requests
+            capture_path: JSONL capture path (.gz for compression)
+        """
+        self.inner = inner
+        self.capture_path = capture_path
+        self._file = open_capture(capture_path, 'a')
+        # Клиенты разных персонажей могут писать в одну запись из разных потоков
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.records = 0
+
+    async def send(self, method: str, endpoint: str, url: str, data: Optional[Dict] = None,
+                   timeout: Optional[float] = None) -> TransportResponse:
+        started = time.monotonic()
+        record = {
+            't': round(started - self._started, 4),
+            'method': method.upper(),
+            'endpoint': capture_endpoint(endpoint),
+            'data': data,
+        }
+        try:
+            response = await self.inner.send(method, endpoint, url, data, timeout)
+        except asyncio.CancelledError:
+            raise  # Отмененный запрос не записываем: ответа не было
+        except Exception as e:
+            record['dt'] = round(time.monotonic() - started, 4)
+            # В тексте ошибки бывает полный URL с токеном
+            record['error'] = _TOKEN_PARAM.sub('name=***', f"{type(e).__name__}: {e}")
+            self._write(record)
+            raise
+        record['dt'] = round(time.monotonic() - started, 4)
+        record['status'] = response.status
+        record['date'] = response.headers.get('Date')
+        record['body'] = response.body
+        self._write(record)
+        return response
+
+    def _write(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ReplayTransport:
+    """Serves recorded responses without network, deterministically"""
+
+    def __init__(self, capture_path: str, realtime: bool = False, strict: bool = False):
+        """
+        Args:
+            capture_path: Capture written by RecordingTransport
+            realtime: Sleep recorded request duration before answering
+            strict: Require requests in exactly the recorded order. Otherwise the
+                next recorded response of the same method and endpoint is used.
+        """
+        self.capture_path = capture_path
+        self.realtime = realtime
+        self.strict = strict
+        self._records = list(read_capture(capture_path))
+        self._position = 0
+        self._by_request: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = {}
+        for record in self._records:
+            self._by_request.setdefault((record['method'], record['endpoint']), deque()).append(record)
+        self._lock = threading.Lock()
+        self.served = 0
+        logger.info(f"Replay capture loaded: {len(self._records)} records from {capture_path}")
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _next_record(self, method: str, endpoint: str) -> Dict[str, Any]:
+        with self._lock:
+            if self.strict:
+                if self._position >= len(self._records):
+                    raise CaptureExhausted(f"Capture ended before {method} {endpoint}")
+                record = self._records[self._position]
+                if (record['method'], record['endpoint']) != (method, endpoint):
+                    raise CaptureExhausted(
+                        f"Request #{self._position} is {method} {endpoint}, "
+                        f"capture has {record['method']} {record['endpoint']}"
+                    )
+                self._position += 1
+            else:
+                queue = self._by_request.get((method, endpoint))
+                if not queue:
+                    raise CaptureExhausted(f"No recorded responses left for {method} {endpoint}")
+                record = queue.popleft()
+            self.served += 1
+            return record
+
+    async def send(self, method: str, endpoint: str, url: str, data: Optional[Dict] = None,
+                   timeout: Optional[float] = None) -> TransportResponse:
+        """
+        Answer with next recorded response
+
+        Raises:
+            CaptureExhausted: No recorded response for request
+            aiohttp.ClientConnectionError: Request failed when it was recorded
+        """
+        record = self._next_record(method.upper(), capture_endpoint(endpoint))
+        if self.realtime and record.get('dt'):
+            await clock.sleep_async(record['dt'])
+        if 'error' in record:
+            raise aiohttp.ClientConnectionError(f"Replayed failure: {record['error']}")
+        headers = {'Date': record['date']} if record.get('date') else {}
+        return TransportResponse(record.get('status', 200), record.get('body'), headers)
@@ -0,0 +1,114 @@
+"""
+User Cache - short-lived cache of user info responses
+
+Информация о пользователе запрашивается по нескольку раз за одну поездку
+в город или переход по маршруту. Ответ /user/info и /user/city хранится
+USER_INFO_CACHE_TTL секунд и сбрасывается любым действием, которое меняет
+состояние персонажа. Ответы атаки и исследования, в которых уже есть
+блок user, обновляют кэш на месте вместо сброса.
+"""
+
+import copy
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.api.endpoints import Endpoints
+from ruby_king_bot.utils.clock import clock
+
+logger = logging.getLogger(__name__)
+
+# Эндпоинты, ответы которых кэшируются
+CACHED_ENDPOINTS = (Endpoints.USER_INFO, Endpoints.USER_CITY)
+
+# Перемещения меняют geo и список квадратов - кэш сбрасывается всегда
+MOVE_ENDPOINTS = (Endpoints.CHANGE_MAIN_GEO, Endpoints.CHANGE_GEO, Endpoints.CHANGE_SQUARE)
+
+# Бой не меняет позицию; без дропа не меняет и инвентарь
+COMBAT_ENDPOINTS = (Endpoints.EXPLORE_TERRITORY, Endpoints.ATTACK_MOB)
+
+
+class UserInfoCache:
+    """TTL cache of user info responses with invalidation by mutating calls"""
+
+    def __init__(self, ttl: Optional[float] = None):
+        """
+        Args:
+            ttl: Seconds a response is reused (defaults to Settings.USER_INFO_CACHE_TTL)
+        """
+        self.ttl = Settings.USER_INFO_CACHE_TTL if ttl is None else ttl
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, endpoint: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached response of endpoint
+
+        Args:
+            endpoint: USER_INFO or USER_CITY
+
+        Returns:
+            Copy of cached response (callers may modify it) or None if missing or expired
+        """
+        entry = self._entries.get(endpoint)
+        if entry is not None and clock.monotonic() - entry[0] < self.ttl:
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+        self.misses += 1
+        return None
+
+    def invalidate(self):
+        """Drop all cached responses"""
+        if self._entries:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def observe(self, endpoint: str, response: Dict[str, Any]):
+        """
+        Update cache from response of any request
+
+        Args:
+            endpoint: Requested endpoint
+            response: Normalized response data
+        """
+        if endpoint in CACHED_ENDPOINTS:
+            if response.get('status') == 'success':
+                # Копия: сам ответ возвращается вызывающему коду
+                self._entries[endpoint] = (clock.monotonic(), copy.deepcopy(response))
+            return
+        if not self._entries:
+            return
+        if endpoint in MOVE_ENDPOINTS:
+            self.invalidate()
+            return
+        if response.get('status') == 'fail':
+            return  # Действие отклонено сервером - состояние не изменилось
+
+        user = response.get('user')
+        has_user = isinstance(user, dict) and bool(user)
+        if has_user and 'inventory' in user:
+            self._patch_user(user)  # Полный блок user (торговец, бой)
+            return
+        win = response.get('dataWin') or {}
+        if endpoint in COMBAT_ENDPOINTS and not win.get('drop'):
+            # HP/MP/мораль из ответа; разница морали без блока user ограничена TTL
+            if has_user:
+                self._patch_user(user)
+            return
+        # Зелья, отдых, события и дроп без инвентаря в ответе
+        self.invalidate()
+
+    def _patch_user(self, user: Dict[str, Any]):
+        """Merge fresh user block into cached responses (expiry time is kept)"""
+        for endpoint, (stored_at, response) in list(self._entries.items()):
+            cached_user = response.get('user')
+            if not isinstance(cached_user, dict):
+                continue
+            merged = dict(cached_user)
+            merged.update(copy.deepcopy(user))
+            # Новый объект ответа: вызывающий код мог сохранить ссылку на прежний
+            patched = dict(response)
+            patched['user'] = merged
+            self._entries[endpoint] = (stored_at, patched)
@@ -0,0 +1,30 @@
+"""
+Game constants - locations, directions and farming limits
+"""
+
+# Стороны света в порядке обхода
+DIRECTIONS = ["north", "south", "east", "west"]
+
+# Названия сторон света
+DIRECTION_NAMES = {
+    "north": "Север",
+    "south": "Юг",
+    "east": "Восток",
+    "west": "Запад",
+}
+
+# Названия локаций (совпадают с world_map_viewer/data/complete_world_map.json)
+LOCATION_NAMES = {
+    "loco_0": "Окрестности поселения",
+    "loco_1": "Таинственный лес",
+    "loco_2": "Болото",
+    "loco_3": "Огненный кратер",
+    "loco_4": "Пустыня",
+    "loco_5": "Пещера пауков",
+    "loco_6": "Логово драконов",
+    "loco_7": "Развалины",
+    "loco_8": "Пустырь",
+}
+
+# Сколько мобов убивать в одном направлении перед переходом к следующему
+MOBS_PER_DIRECTION = 10
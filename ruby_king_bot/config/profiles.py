@@ -0,0 +1,39 @@
+"""
+Character profiles for multi-character mode
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+from .token import GAME_TOKEN
+
+PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles.json')
+
+
+def load_profiles(path: Optional[str] = None) -> List[Dict[str, str]]:
+    """
+    Load character profiles
+
+    Args:
+        path: Path to profiles JSON (list of {"name": ..., "token": ...})
+
+    Returns:
+        List of profiles; single profile with GAME_TOKEN if file does not exist
+    """
+    path = path or PROFILES_PATH
+    if not os.path.exists(path):
+        return [{'name': 'main', 'token': GAME_TOKEN}]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        profiles = json.load(f)
+
+    result = []
+    for index, profile in enumerate(profiles):
+        if not profile.get('token'):
+            raise ValueError(f"Profile #{index} in {path} has no token")
+        result.append({
+            'name': profile.get('name') or f"char_{index}",
+            'token': profile['token'],
+        })
+    return result
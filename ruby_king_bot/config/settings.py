@@ -12,9 +12,37 @@ class Settings:
     REQUEST_TIMEOUT = 30
     MAX_RETRIES = 3
     RETRY_DELAY = 2  # Base delay for exponential backoff
+    API_RECORD_PATH = None  # write request/response capture here (.jsonl or .jsonl.gz)
+    API_REPLAY_PATH = None  # serve responses from this capture instead of the server
+    VIRTUAL_CLOCK = None  # True/False to force; None - virtual clock only when replaying
+    CONNECTION_POOL_SIZE = 20  # Max pooled connections per async session
+    CONNECTION_KEEPALIVE = 30  # seconds to keep idle connections open
+    
+    # Request Pacing (minimum seconds between requests of one endpoint class;
+    # "too fast" backoff widens the interval of the rejected cooldown action - attack, skill, heal, mana)
+    PACER_MIN_INTERVALS = {
+        "combat": 1.0,
+        "travel": 2.0,
+        "trade": 1.1,
+        "info": 0.5,
+    }
+    PACER_MAX_INTERVAL = 30.0  # upper bound for adaptive interval
+    PACER_BACKOFF_FACTOR = 1.5  # interval multiplier after "too fast" rejection
+    PACER_RECOVERY_RATE = 0.1  # share of the excess over base removed per accepted request
+    PACER_TOO_FAST_RETRIES = 3  # automatic retries of a rejected request (attack and skill go back to the bot)
+    TOO_FAST_MESSAGE = "Очень быстро совершаете действия"
+    
+    # User Info Cache
+    USER_INFO_CACHE_TTL = 10.0  # seconds a user info response is reused (mutating calls reset it)
+    
+    # Cooldown Calibration
+    CALIBRATION_PROBE_RANGE = 0.15  # share below configured cooldown to probe
+    CALIBRATION_RESOLUTION = 0.05  # seconds, stop bisecting below this bound width
+    CALIBRATION_SAFETY_MARGIN = 0.05  # seconds added to calibrated cooldowns
+    CALIBRATION_LATENCY_WINDOW = 50  # latency samples kept for jitter estimate
     
     # Game Mechanics
-    ATTACK_COOLDOWN = 5.1  # seconds between attacks
+    ATTACK_COOLDOWN = 5.3  # seconds between attacks (global cooldown, starting value for calibration)
     SKILL_COOLDOWN = 11.0  # seconds between skills
     HEAL_COOLDOWN = 5.5  # seconds between healing potions
     MANA_COOLDOWN = 5.5  # seconds between mana potions
@@ -29,8 +57,78 @@ class Settings:
     FORCE_END_COMBAT = True  # Force end combat if stuck
     COMBAT_RETRY_LIMIT = 10  # Maximum retries in combat
     
+    # Route Configuration
+    ROUTE_LEVEL_WINDOW = 9  # farm squares with mobs up to N levels below player
+    ROUTE_MOB_LEVEL_CAP = None  # squares with higher min mob level are never farmed (None - no cap; Found_bot keeps its old cap of 20)
+    ROUTE_COST_MAIN_GEO = 2.0  # seconds to leave a location for another (change_main_geo round trip)
+    ROUTE_COST_GEO = None  # seconds of change_geo to another side (None - one paced travel request)
+    ROUTE_COST_SQUARE = None  # seconds of change_square (None - one paced travel request)
+    ROUTE_KILL_SECONDS = 20.0  # farming seconds per kill assumed when sizing squares
+    ROUTE_TRAVEL_SHARE = 0.05  # max share of farming time spent moving to the next point
+    ROUTE_MIN_KILLS_PER_SQUARE = 10
+    ROUTE_MAX_KILLS_PER_SQUARE = 100
+    
+    # Square Bandit Configuration
+    SQUARE_BANDIT_PATH = "logs/square_stats_{name}.json"  # per-character square yield stats (None - keep in memory)
+    SQUARE_BANDIT_GOLD_WEIGHT = 0.5  # exp worth of one gold in square reward
+    SQUARE_BANDIT_POTION_GOLD = 10  # gold cost of one potion in square reward
+    SQUARE_BANDIT_DECAY = 0.8  # weight kept by older visits of a square on each new visit
+    SQUARE_BANDIT_EXPLORATION = 1.0  # UCB width in reward standard deviations
+    
+    # Target Search Configuration
+    TARGET_SEARCH_PATH = "logs/mob_sightings_{name}.json"  # mobs met per square (None - keep in memory)
+    TARGET_SEARCH_OFF_SIDE_PRIOR = 0.002  # chance to meet target on a side mobs database does not list
+    TARGET_SEARCH_PRIOR_STRENGTH = 10  # encounters the database prior is worth
+    TARGET_SEARCH_FIND_SECONDS = 600.0  # worth of finding target square in farming seconds
+    TARGET_SEARCH_SAVE_EVERY = 20  # encounters between sightings file writes
+    
+    # Leveling Planner Configuration
+    LEVELING_PLAN_PATH = "logs/leveling_plan.json"  # farm squares per level from the planner (route table without it)
+    PLANNER_MAX_LEVELS_ABOVE = 0  # squares with min mob level above player level + N are not planned
+    PLANNER_GRAY_LEVELS = 10  # mobs more than N levels below player give reduced exp
+    PLANNER_GRAY_FACTOR = 0.33  # exp share of such mobs
+    PLANNER_EXP_PER_MOB_LEVEL = 8.0  # exp per kill per mob level until stats are recorded
+    PLANNER_SECONDS_POWER = 0.5  # seconds per kill ~ (mob level / player level) ** N until fitted
+    PLANNER_PRIOR_KILLS = 20  # kills before square's own seconds per kill outweigh the model
+    PLANNER_ROUTE_SIZE = 12  # max points of a planned route
+    PLANNER_MIN_ROUTE_SIZE = 4  # planned route keeps at least N sides for the square bandit
+    PLANNER_RATE_TOLERANCE = 0.8  # route keeps sides yielding at least this share of the best one
+    
+    # City Trip Configuration
+    CITY_TRIP_POTION_TARGET = 300  # potions of each kind to have after a city trip
+    CITY_TRIP_HISTORY = 20  # trip reports kept for timing
+    
+    # Potion Forecast Configuration
+    POTION_FORECAST_MIN_KILLS = 20  # kills before consumption rates are trusted (square rates, else overall)
+    POTION_FORECAST_MIN_STOCK = 3  # refill when either potion kind drops to this count
+    POTION_FORECAST_SAFETY_KILLS = 15  # refill when stock lasts fewer kills than this
+    POTION_FORECAST_ALIGN_KILLS = 150  # refill early at a rest if stock lasts fewer kills than this
+    POTION_FORECAST_MIN_RATE = 0.01  # potions per kill assumed for an unused kind
+    POTION_STOCK_CAP = 1000  # max potions of each kind after a trip
+    POTION_GOLD_RESERVE = 500  # gold left unspent by potion purchases
+    
+    # Inventory Policy Configuration
+    INVENTORY_ITEMS_DB_PATH = "world_map_viewer/data/items-database.json"  # item prices and weights
+    INVENTORY_FORECAST_MIN_KILLS = 20  # kills before drop weight per kill is trusted
+    INVENTORY_SAFETY_KILLS = 10  # go selling when backpack fills in fewer kills than this
+    INVENTORY_ALIGN_KILLS = 100  # sell early with another trip if backpack fills in fewer kills than this
+    INVENTORY_SELL_HORIZON_KILLS = 500  # max kills of drop to free backpack room for
+    INVENTORY_EQUIPMENT_WEIGHT = 5  # weight of equipment unknown to inventory data and items database
+    INVENTORY_KEEP_PREFIXES = ("recipe_", "res_w_")  # recipes and crafting pieces are never sold (with recipe ingredients)
+    
+    # Main loop Configuration
+    LOOP_IDLE_SLEEP = 0.1  # seconds to idle when no action was possible
+    
+    # Multi-character Configuration
+    ORCHESTRATOR_START_STAGGER = 2.0  # seconds between character starts
+    SUPERVISOR_REPORT_INTERVAL = 5.0  # seconds between worker metric reports
+    SUPERVISOR_MAX_RESTARTS = 5  # restarts of one crashed worker before giving up
+    SUPERVISOR_RESTART_BACKOFF = 5.0  # seconds before first restart (doubles each time)
+    SUPERVISOR_STOP_TIMEOUT = 30.0  # seconds to wait for workers on shutdown
+    
     # UI Configuration
     UI_REFRESH_RATE = 1  # seconds between UI updates
+    REST_UI_REFRESH_RATE = 5  # seconds between UI updates while resting
     PROGRESS_BAR_WIDTH = 50
     
     # Logging Configuration
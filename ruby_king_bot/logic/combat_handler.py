@@ -2,17 +2,21 @@
 Combat Handler - Manages combat actions, skills, and potion usage
 """
 
-import time
 import logging
-import re
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, Literal, Tuple
 from ruby_king_bot.core.mob import Mob, MobGroup
 from ruby_king_bot.core.player import Player
 from ruby_king_bot.api.client import APIClient
+from ruby_king_bot.api.pacer import ActionPacer
+from ruby_king_bot.api.records import AttackRecord, decode_attack
 from ruby_king_bot.ui.display import GameDisplay
 from ruby_king_bot.config.settings import Settings
 from ruby_king_bot.logic.data_extractor import DataExtractor
 from ruby_king_bot.logic.low_damage_handler import LowDamageHandler
+from ruby_king_bot.logic.combat_log import CombatLog, CombatLogParser
+from ruby_king_bot.logic.potion_forecast import PotionForecaster, HEAL, MANA
+from ruby_king_bot.logic.inventory_policy import InventoryPolicy
+from ruby_king_bot.utils.clock import clock
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +28,14 @@ class CombatHandler:
         self.player = player
         self.display = display
         self.data_extractor = DataExtractor()
-        self.low_damage_handler = LowDamageHandler(api_client, player, display)
+        # Расход зелий по квадратам: когда ехать в город и сколько покупать
+        self.potion_forecaster = PotionForecaster()
+        # Вес дропа: когда рюкзак переполнится и что продать
+        self.inventory_policy = InventoryPolicy()
+        self.low_damage_handler = LowDamageHandler(api_client, player, display, self.potion_forecaster,
+                                                   self.inventory_policy)
+        # Свой персонаж в логе боя - по имени из информации о пользователе (player.name)
+        self.log_parser = CombatLogParser()
         
         # Combat state
         self.skill_used = False  # Flag to track if skill was used in current round
@@ -35,8 +46,10 @@ class CombatHandler:
         self.combat_paused = False  # Flag to pause combat
         self.low_damage_handled = False  # Flag to track if low damage was handled
         self.situation_type = "low_damage"  # Type of situation: "low_damage" or "low_potions"
+        self.pending_recovery = None  # Situation type of city trip to run after the fight
+        self.last_victory: Optional[Tuple[int, int, int]] = None  # (убито мобов, опыт, золото) последнего боя
     
-    def handle_combat_round(self, current_target: Mob, current_time: float, mob_group: MobGroup) -> Literal['victory', 'continue', 'failure', 'recover']:
+    def handle_combat_round(self, current_target: Mob, current_time: float, mob_group: MobGroup) -> Literal['victory', 'continue', 'failure']:
         """
         Handle one round of combat
         
@@ -49,14 +62,16 @@ class CombatHandler:
             'victory' if combat ended with victory
             'continue' if combat continues
             'failure' if combat ended with failure
-            'recover' if combat ended with recovery
+            
+        Need of recovery (low damage, few potions) is kept in pending_recovery
+        and handled by the engine after the fight.
         """
         self.skill_used = False  # Reset flag at start of round
         self.need_recover = False
         
         # Check if combat is paused due to low damage
         if self.combat_paused:
-            time.sleep(1)
+            clock.sleep(1)
             return 'continue'
         
         # Check if potions are running low
@@ -69,9 +84,10 @@ class CombatHandler:
                 if not self.low_damage_handled:
                     self.need_recover = True
         
-        if self.need_recover or self.low_damage_handled:
-            self.display.print_message("🚨 Переход к восстановлению!", "warning")
-            return 'recover'
+        if (self.need_recover or self.low_damage_handled) and self.pending_recovery is None:
+            # Посреди боя локацию не сменить - поездка в город начнется после победы
+            self.display.print_message("🚨 Восстановление после боя!", "warning")
+            self.pending_recovery = self.situation_type
         
         # 1. Check and use healing potion
         if self._should_use_heal_potion(current_time):
@@ -134,7 +150,7 @@ class CombatHandler:
         try:
             heal_result = self.api_client.use_healing_potion()
             self._log_api_response(heal_result, "use_healing_potion")
-            self.player.record_heal(current_time)
+            self.player.record_heal(self._sent_time('heal'))
             
             # Update player data from response
             if "user" in heal_result:
@@ -142,12 +158,13 @@ class CombatHandler:
             
             self.display.print_message("❤️ Использовал зелье лечения!", "success")
             self.display.update_stats(hp_potions_used=1)
+            self.potion_forecaster.record_potion(HEAL)
             
             return 'success'
             
         except Exception as e:
             self.display.print_message(f"Network error: {e}. Waiting 60 seconds before retry...", "error")
-            time.sleep(60)
+            clock.sleep(60)
             return 'failure'
     
     def _use_mana_potion(self, current_time: float) -> Literal['success', 'failure']:
@@ -155,7 +172,7 @@ class CombatHandler:
         try:
             mana_result = self.api_client.use_mana_potion()
             self._log_api_response(mana_result, "use_mana_potion")
-            self.player.record_mana(current_time)
+            self.player.record_mana(self._sent_time('mana'))
             
             # Update player data from response
             if "user" in mana_result:
@@ -163,12 +180,13 @@ class CombatHandler:
             
             self.display.print_message("🔵 Использовал зелье маны!", "success")
             self.display.update_stats(mp_potions_used=1)
+            self.potion_forecaster.record_potion(MANA)
             
             return 'success'
             
         except Exception as e:
             self.display.print_message(f"Network error: {e}. Waiting 60 seconds before retry...", "error")
-            time.sleep(60)
+            clock.sleep(60)
             return 'failure'
     
     def _use_skill(self, current_target: Mob, current_time: float, mob_group: MobGroup) -> Literal['victory', 'continue', 'failure']:
@@ -178,26 +196,29 @@ class CombatHandler:
         try:
             skill_result = self.api_client.use_skill(current_target.farm_id)
             self._log_api_response(skill_result, "use_skill")
-            self.player.record_skill(current_time)
-            
-            # Update player data from response
-            self.player.update_from_api_response(skill_result)
+            if ActionPacer.is_too_fast(skill_result):
+                return self._handle_too_fast("skill")
+            self.player.record_skill(self._sent_time('skill'))
             
             if isinstance(skill_result, dict):
+                record = decode_attack(skill_result)
+                # Update player data from response
+                if record.user:
+                    self.player.apply_user(record.user)
                 # Check if battle is already closed
-                if skill_result.get('status') == 'close':
+                if record.status == 'close':
                     # Battle is already finished, treat as victory
-                    return self._handle_victory(skill_result, mob_group)
-                elif skill_result.get('status') == 'fail':
-                    return self._handle_combat_failure(skill_result, "skill")
-                elif skill_result.get('status') == 'success':
-                    return self._handle_combat_success(skill_result, current_target, mob_group, "skill")
+                    return self._handle_victory(record, mob_group)
+                elif record.status == 'fail':
+                    return self._handle_combat_failure(record, "skill")
+                elif record.status == 'success':
+                    return self._handle_combat_success(record, current_target, mob_group, "skill")
             
             return 'continue'
             
         except Exception as e:
             self.display.print_message(f"Network error: {e}. Waiting 60 seconds before retry...", "error")
-            time.sleep(60)
+            clock.sleep(60)
             return 'failure'
     
     def _use_attack(self, current_target: Mob, current_time: float, mob_group: MobGroup) -> Literal['victory', 'continue', 'failure']:
@@ -207,28 +228,41 @@ class CombatHandler:
         try:
             attack_result = self.api_client.attack_mob(current_target.farm_id)
             self._log_api_response(attack_result, "attack_mob")
-            self.player.record_attack(current_time)
+            if ActionPacer.is_too_fast(attack_result):
+                return self._handle_too_fast("attack")
+            self.player.record_attack(self._sent_time('attack'))
             
             if isinstance(attack_result, dict):
+                record = decode_attack(attack_result)
                 # Check if battle is already closed
-                if attack_result.get('status') == 'close':
+                if record.status == 'close':
                     # Battle is already finished, treat as victory
-                    return self._handle_victory(attack_result, mob_group)
-                elif attack_result.get('status') == 'fail':
-                    return self._handle_combat_failure(attack_result, "attack")
-                elif attack_result.get('status') == 'success':
-                    return self._handle_combat_success(attack_result, current_target, mob_group, "attack")
+                    return self._handle_victory(record, mob_group)
+                elif record.status == 'fail':
+                    return self._handle_combat_failure(record, "attack")
+                elif record.status == 'success':
+                    return self._handle_combat_success(record, current_target, mob_group, "attack")
             
             return 'continue'
             
         except Exception as e:
             self.display.print_message(f"Network error: {e}. Waiting 60 seconds before retry...", "error")
-            time.sleep(60)
+            clock.sleep(60)
             return 'failure'
     
-    def _handle_combat_failure(self, result: Dict[str, Any], action_type: str) -> Literal['failure']:
+    def _sent_time(self, action: str) -> float:
+        """Client time when the last request of the cooldown action was sent"""
+        return self.api_client.last_sent.get(action, clock.time())
+
+    def _handle_too_fast(self, action_type: str) -> Literal['continue']:
+        """Action rejected as too fast - cooldown was not started, retry on next tick"""
+        # Калибратор уже учел отказ, пейсер расширил интервал действия
+        self.display.print_message(f"⏱️ {action_type.title()} too fast, retrying after cooldown", "warning")
+        return 'continue'
+
+    def _handle_combat_failure(self, record: AttackRecord, action_type: str) -> Literal['failure']:
         """Handle combat action failure"""
-        message = result.get('message', '')
+        message = record.message
         
         if 'Монстр не найден' in message or 'эта цель уже была мертва' in message:
             self.display.print_message(f"{action_type.title()} failed: mob not found", "info")
@@ -237,23 +271,26 @@ class CombatHandler:
             self.display.print_message(f"{action_type.title()} failed: {message}", "error")
             return 'failure'
     
-    def _handle_combat_success(self, result: Dict[str, Any], current_target: Mob, mob_group: MobGroup, action_type: str) -> Literal['victory', 'continue']:
+    def _handle_combat_success(self, record: AttackRecord, current_target: Mob, mob_group: MobGroup, action_type: str) -> Literal['victory', 'continue']:
         """Handle successful combat action"""
-        # Get damage from arrLogs first
-        damage_dealt = self._extract_damage_dealt(result)
-        damage_received = self._extract_damage_received(result)
+        # Лог боя разбирается один раз: урон, криты, промахи, убийства
+        combat_log = self.log_parser.parse(record.logs, self.player.name)
+        damage_dealt = combat_log.damage_dealt
+        damage_received = self._damage_received(record, combat_log)
         
         # Update player data from response (for accurate HP tracking)
-        if "user" in result:
-            self.player.update_from_api_response(result)
+        if record.user:
+            self.player.apply_user(record.user)
         
         # Update mob HP from response
-        if "mob" in result:
-            mob_data = result["mob"]
-            if current_target and current_target.farm_id == mob_data.get("farmId"):
+        if record.mob is not None:
+            mob_state = record.mob
+            if current_target and current_target.farm_id == mob_state.farm_id:
                 old_hp = current_target.hp
-                current_target.hp = mob_data.get("hp", current_target.hp)
-                current_target.max_hp = mob_data.get("maxHp", current_target.max_hp)
+                if mob_state.hp is not None:
+                    current_target.hp = mob_state.hp
+                if mob_state.max_hp is not None:
+                    current_target.max_hp = mob_state.max_hp
                 
                 # If we couldn't get damage from arrLogs, calculate from HP difference
                 if damage_dealt == 0 and old_hp > current_target.hp:
@@ -269,12 +306,17 @@ class CombatHandler:
                 # No current target, but we have damage - display basic info
                 self._display_basic_combat_results(action_type, damage_dealt, damage_received)
         
+        # Statistics and low damage detection only for regular attacks
+        if action_type == "attack":
+            self.display.update_damage_stats(damage_dealt, crits=combat_log.crits, misses=combat_log.misses)
+            self._check_low_damage_pattern(damage_dealt, combat_log)
+        
         # Check for victory
-        if result.get('statusBattle') == 'win':
-            return self._handle_victory(result, mob_group)
+        if record.is_win:
+            return self._handle_victory(record, mob_group, combat_log)
         
         # Update mob group from response
-        mob_group.update_from_combat_response(result)
+        mob_group.update_from_attack(record)
         
         # Check if current target died
         if current_target and current_target.hp <= 0:
@@ -289,79 +331,23 @@ class CombatHandler:
                 self.display.print_message(f"🎯 Переключился на: {next_target.name} (HP: {next_target.hp})", "info")
             else:
                 # All mobs dead but statusBattle not 'win' - treat as victory
-                return self._handle_victory(result, mob_group)
+                return self._handle_victory(record, mob_group, combat_log)
         
         return 'continue'
     
-    def _extract_damage_received(self, result: Dict[str, Any]) -> int:
-        """Extract damage received from combat logs"""
-        damage_received = 0
-        
-        # First try to get damage from user data (most accurate)
-        if "user" in result:
-            user_data = result["user"]
-            old_hp = self.player.hp
-            new_hp = user_data.get("hp", old_hp)
-            if old_hp > new_hp:
-                damage_received = old_hp - new_hp
-        
-        # If no damage from user data, try arrLogs
-        if damage_received == 0:
-            arr_logs = result.get('arrLogs', [])
-            for log_entry in arr_logs:
-                # Ищем урон, нанесенный мобом игроку (isMob: true, defname: "Piulok")
-                if log_entry.get('isMob') == True and log_entry.get('defname') == 'Piulok':
-                    damage_received = log_entry.get('damage', 0)
-                    break
-                # Также проверяем messages на случай если структура другая
-                messages = log_entry.get('messages', [])
-                for message in messages:
-                    # Ищем сообщения типа "моб наносит X урон игроку"
-                    if 'наносит' in message and 'урон' in message and 'вам' in message:
-                        damage_match = re.search(r'наносит (\d+) урон', message)
-                        if damage_match:
-                            damage_received = int(damage_match.group(1))
-                            break
-                    # Альтернативный поиск - урон от моба
-                    elif 'наносит' in message and 'урон' in message and not 'вы' in message:
-                        damage_match = re.search(r'наносит (\d+) урон', message)
-                        if damage_match:
-                            damage_received = int(damage_match.group(1))
-                            break
-        
-        return damage_received
-    
-    def _extract_damage_dealt(self, result: Dict[str, Any]) -> int:
-        """Extract damage dealt from combat logs"""
-        damage_dealt = 0
-        arr_logs = result.get('arrLogs', [])
-        for log_entry in arr_logs:
-            # Проверяем поле damage в log_entry
-            if 'damage' in log_entry:
-                damage_dealt = log_entry.get('damage', 0)
-                break
-            # Также проверяем messages на случай если damage нет
-            messages = log_entry.get('messages', [])
-            for message in messages:
-                if 'наносит' in message and 'урон' in message:
-                    damage_match = re.search(r'наносит (\d+) урон', message)
-                    if damage_match:
-                        damage_dealt = int(damage_match.group(1))
-                        break
-        return damage_dealt
+    def _damage_received(self, record: AttackRecord, combat_log: CombatLog) -> int:
+        """Damage received: mob hits from combat log, HP drop if log has none"""
+        if combat_log.mob_hits:
+            return combat_log.damage_received
+        if record.user is not None and record.user.hp is not None and self.player.hp > record.user.hp:
+            return self.player.hp - record.user.hp
+        return 0
     
     def _display_combat_results(self, action_type: str, damage_dealt: int, damage_received: int, current_target: Mob):
         """Display combat results"""
         action_icon = "⚡" if action_type == "skill" else "⚔️"
         action_name = "[yellow]Усиленный удар[/yellow]" if action_type == "skill" else "[cyan]Атака[/cyan]"
         
-        # Update damage statistics only for regular attacks
-        if action_type == "attack":
-            self.display.update_damage_stats(damage_dealt)
-            
-            # Check for low damage pattern
-            self._check_low_damage_pattern(damage_dealt)
-        
         # Формируем сообщение с уроном в одной строке
         if damage_dealt > 0:
             if damage_received > 0:
@@ -378,10 +364,17 @@ class CombatHandler:
         level = "success" if damage_dealt > 0 else "warning"
         self.display.print_message(message, level)
     
-    def _check_low_damage_pattern(self, damage_dealt: int):
+    def _check_low_damage_pattern(self, damage_dealt: int, combat_log: Optional[CombatLog] = None):
         """Check if damage is consistently low and handle low damage situation"""
-        if damage_dealt > 0:  # Only check actual hits
-            self.last_attack_damages.append(damage_dealt)
+        # Криты и промахи не показывают обычный урон - берем только обычные попадания
+        if combat_log is not None and combat_log.player_hits:
+            damages = combat_log.normal_damages()
+        else:
+            damages = [damage_dealt]
+        for hit_damage in damages:
+            if hit_damage <= 0:  # Only check actual hits
+                continue
+            self.last_attack_damages.append(hit_damage)
             
             # Keep only last 3 attacks
             if len(self.last_attack_damages) > 3:
@@ -405,7 +398,7 @@ class CombatHandler:
                         self.last_attack_damages = []
     
     def _check_low_potions(self) -> bool:
-        """Check if potions are running low (10 or less)"""
+        """Check if potions run out soon (by consumption forecast)"""
         # Don't check if player data is not initialized yet
         if not hasattr(self.player, 'inventory') or not self.player.inventory:
             return False
@@ -413,18 +406,39 @@ class CombatHandler:
         hp_potions = self.player.get_heal_potions_count()
         mp_potions = self.player.get_mana_potions_count()
         
-        if hp_potions <= 10 or mp_potions <= 10:
+        if self.potion_forecaster.should_trip(hp_potions, mp_potions):
             if not self.low_damage_handled:
                 self.low_damage_handled = True
                 self.situation_type = "low_potions"
+                forecast = self.potion_forecaster.forecast(hp_potions, mp_potions)
+                forecast_note = f" (хватит {forecast})" if forecast else ""
                 self.display.print_message(
-                    f"⚠️ Мало зелий! HP: {hp_potions}, MP: {mp_potions}. "
+                    f"⚠️ Мало зелий! HP: {hp_potions}, MP: {mp_potions}{forecast_note}. "
                     f"Запуск процедуры восстановления...", 
                     "warning"
                 )
                 return True
         return False
     
+    def _check_inventory_space(self) -> bool:
+        """Check if backpack overflows soon (sell early if potions are due soon too)"""
+        if not self.player.inventory or self.pending_recovery is not None:
+            return False
+        potions_due = self.potion_forecaster.should_trip(
+            self.player.get_heal_potions_count(), self.player.get_mana_potions_count(), other_need=True
+        ) is not None
+        reason = self.inventory_policy.should_trip(self.player.inventory, self.player.max_inventory_weight,
+                                                   other_need=potions_due)
+        if reason:
+            self.pending_recovery = "full_inventory"
+            kills_left = self.inventory_policy.kills_until_full(self.player.inventory,
+                                                                self.player.max_inventory_weight)
+            self.display.print_message(
+                f"🎒 Рюкзак заполнится через {kills_left:.0f} убийств - продажа после боя...", "warning"
+            )
+            return True
+        return False
+    
     def _reset_low_damage_tracking(self):
         """Reset low damage tracking when combat ends or pattern breaks"""
         self.low_damage_count = 0
@@ -433,23 +447,18 @@ class CombatHandler:
         self.low_damage_handled = False
         self.situation_type = "low_damage"
     
-    def _handle_victory(self, result: Dict[str, Any], mob_group: MobGroup) -> Literal['victory']:
+    def _handle_victory(self, record: AttackRecord, mob_group: MobGroup,
+                        combat_log: Optional[CombatLog] = None) -> Literal['victory']:
         """Handle combat victory"""
         # Reset low damage tracking
         self._reset_low_damage_tracking()
         
-        # Extract mob information from arrLogs
-        arr_logs = result.get('arrLogs', [])
+        # Killed mobs from combat log
+        if combat_log is None:
+            combat_log = self.log_parser.parse(record.logs, self.player.name)
         killed_mobs = {}
-        
-        for log_entry in arr_logs:
-            def_name = log_entry.get('defname', '')
-            if def_name and log_entry.get('winAll', False):
-                # This mob was killed
-                if def_name in killed_mobs:
-                    killed_mobs[def_name] += 1
-                else:
-                    killed_mobs[def_name] = 1
+        for mob_name in combat_log.kills:
+            killed_mobs[mob_name] = killed_mobs.get(mob_name, 0) + 1
         
         # Update killed mobs statistics
         total_killed = 0
@@ -458,13 +467,16 @@ class CombatHandler:
             total_killed += count
         
         # Process drops
-        drop_data = result.get('dataWin', {}).get('drop', [])
+        drop_data = record.drops
         if drop_data:
             self.display.update_drops(drop_data)
+        self.inventory_policy.record_kill(drop_data)
+        self._check_inventory_space()
         
         # Calculate rewards
-        exp_gained = result.get('dataWin', {}).get('expWin', 0)
+        exp_gained = record.exp_gained
         gold_gained = sum(item.get('count', 0) for item in drop_data if item.get('id') == 'm_0_1')
+        self.last_victory = (total_killed, exp_gained, gold_gained)
         
         # Update statistics - добавляем каждого убитого моба отдельно
         for mob_name, count in killed_mobs.items():
@@ -532,7 +544,7 @@ class CombatHandler:
             skill_cooldown=skill_cooldown,
             mana_cooldown=mana_cooldown,
             rest_time=None,
-            player_name="Piulok",
+            player_name=self.player.name or "Player",
             last_attack_time=self.player.last_attack_time,
             last_skill_time=self.player.last_skill_time
         )
@@ -548,10 +560,6 @@ class CombatHandler:
         action_icon = "⚡" if action_type == "skill" else "⚔️"
         action_name = "[yellow]Усиленный удар[/yellow]" if action_type == "skill" else "[cyan]Атака[/cyan]"
         
-        # Update damage statistics only for regular attacks
-        if action_type == "attack":
-            self.display.update_damage_stats(damage_dealt)
-        
         # Формируем сообщение с уроном в одной строке
         if damage_dealt > 0:
             if damage_received > 0:
@@ -0,0 +1,136 @@
+"""
+Combat Log - compiled parser for arrLogs of attack responses
+
+Все записи лога боя разбираются за один проход: кто кого ударил,
+урон, криты, промахи и убийства. Свой персонаж определяется по имени
+из информации о пользователе (user.name), а не по зашитому имени;
+если имя еще неизвестно, направление удара берется из флага isMob.
+"""
+
+import re
+from typing import Dict, Any, Optional, List
+
+# Одно регулярное выражение на сообщение вместо цепочки проверок подстрок
+_MESSAGE_RE = re.compile(
+    r'наносит\s+(?P<damage>\d+)|(?P<crit>крит)|(?P<miss>промах|уклон)|(?P<death>погиб)',
+    re.IGNORECASE
+)
+
+
+class Hit:
+    """One arrLogs entry: attacker hits defender"""
+
+    __slots__ = ('attacker', 'defender', 'damage', 'is_crit', 'is_miss', 'by_mob', 'killed')
+
+    def __init__(self, attacker: str, defender: str, damage: int, is_crit: bool, is_miss: bool,
+                 by_mob: bool, killed: bool):
+        self.attacker = attacker
+        self.defender = defender
+        self.damage = damage
+        self.is_crit = is_crit
+        self.is_miss = is_miss
+        self.by_mob = by_mob
+        self.killed = killed
+
+    def __repr__(self) -> str:
+        return f"Hit({self.attacker} -> {self.defender}: {self.damage})"
+
+
+class CombatLog:
+    """Parsed arrLogs of one attack response"""
+
+    __slots__ = ('hits', 'damage_dealt', 'damage_received', 'crits', 'misses', 'kills',
+                 'damage_by_mob', 'player_died')
+
+    def __init__(self):
+        self.hits: List[Hit] = []
+        self.damage_dealt = 0  # Урон персонажа по мобам
+        self.damage_received = 0  # Урон мобов по персонажу
+        self.crits = 0  # Криты персонажа
+        self.misses = 0  # Промахи персонажа
+        self.kills: List[str] = []  # Имена убитых мобов (по одному на убийство)
+        self.damage_by_mob: Dict[str, int] = {}  # Урон по персонажу от каждого моба
+        self.player_died = False
+
+    @property
+    def player_hits(self) -> List[Hit]:
+        """Hits made by the character"""
+        return [hit for hit in self.hits if not hit.by_mob]
+
+    @property
+    def mob_hits(self) -> List[Hit]:
+        """Hits made by mobs"""
+        return [hit for hit in self.hits if hit.by_mob]
+
+    def normal_damages(self) -> List[int]:
+        """Damage of character's hits that were neither crits nor misses"""
+        return [hit.damage for hit in self.hits if not hit.by_mob and not hit.is_crit and not hit.is_miss]
+
+
+class CombatLogParser:
+    """Parses arrLogs keyed by the character name"""
+
+    def __init__(self, character_name: Optional[str] = None):
+        """
+        Args:
+            character_name: Name of own character (user.name from user info)
+        """
+        self.character_name = character_name
+
+    def parse(self, logs: List[Dict[str, Any]], character_name: Optional[str] = None) -> CombatLog:
+        """
+        Parse arrLogs of an attack response
+
+        Args:
+            logs: arrLogs entries
+            character_name: Name of own character (parser default if not given)
+
+        Returns:
+            Parsed combat log
+        """
+        name = character_name or self.character_name
+        result = CombatLog()
+        for entry in logs:
+            if not isinstance(entry, dict):
+                continue
+            attacker = entry.get('attname', '')
+            defender = entry.get('defname', '')
+            if name and (attacker == name or defender == name):
+                by_mob = attacker != name
+            else:
+                by_mob = bool(entry.get('isMob'))
+
+            damage = entry.get('damage')
+            is_crit = bool(entry.get('isCrit') or entry.get('crit'))
+            is_miss = False
+            killed = bool(entry.get('winAll'))
+            for message in entry.get('messages') or ():
+                for match in _MESSAGE_RE.finditer(message):
+                    kind = match.lastgroup
+                    if kind == 'damage':
+                        if damage is None:
+                            damage = int(match.group('damage'))
+                    elif kind == 'crit':
+                        is_crit = True
+                    elif kind == 'miss':
+                        is_miss = True
+                    else:
+                        killed = True
+            damage = damage if isinstance(damage, int) else 0
+            if damage == 0:
+                is_miss = True
+
+            hit = Hit(attacker, defender, damage, is_crit, is_miss, by_mob, killed)
+            result.hits.append(hit)
+            if by_mob:
+                result.damage_received += damage
+                result.damage_by_mob[attacker] = result.damage_by_mob.get(attacker, 0) + damage
+                if killed:
+                    result.player_died = True
+            else:
+                result.damage_dealt += damage
+                result.crits += is_crit
+                result.misses += is_miss
+                if killed and defender:
+                    result.kills.append(defender)
+        return result
@@ -5,55 +5,27 @@ Data Extractor - Extracts and formats data from API responses
 import logging
 from typing import Optional, List, Dict, Any
 
+from ruby_king_bot.api.records import MobRecord, AttackRecord, decode_explore
+from ruby_king_bot.logic.combat_log import CombatLogParser
+
 logger = logging.getLogger(__name__)
 
 class DataExtractor:
     """Extracts and formats data from API responses"""
     
-    def extract_mob_data(self, response_data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    def extract_mob_data(self, response_data: Dict[str, Any]) -> Optional[List[MobRecord]]:
         """
-        Extract mob data from API response
+        Extract mobs from explore response ('mob' list or object, 'farm' items)
         
         Args:
             response_data: API response data
             
         Returns:
-            List of mob data dictionaries or None
+            List of decoded mobs or None
         """
-        logger.debug(f"🔍 DEBUG: extract_mob_data called with response keys: {list(response_data.keys()) if isinstance(response_data, dict) else 'Not a dict'}")
-        
-        mobs_found = []
-        
-        # Try different possible locations for mob data
-        if isinstance(response_data, dict):
-            # Direct mob data
-            if 'mob' in response_data:
-                mob_list = response_data['mob']
-                logger.debug(f"🔍 DEBUG: Found 'mob' field: {type(mob_list)}")
-                if isinstance(mob_list, list) and len(mob_list) > 0:
-                    logger.debug(f"🔍 DEBUG: mob_list is list with {len(mob_list)} items")
-                    mobs_found.extend(mob_list)
-                elif isinstance(mob_list, dict):
-                    logger.debug("🔍 DEBUG: mob_list is dict")
-                    mobs_found.append(mob_list)
-            
-            # Check if response contains farm data
-            if 'farm' in response_data and isinstance(response_data['farm'], list):
-                logger.debug("🔍 DEBUG: Found 'farm' field")
-                for farm_item in response_data['farm']:
-                    if isinstance(farm_item, dict) and 'mob' in farm_item:
-                        mob_data = farm_item['mob']
-                        if isinstance(mob_data, list) and len(mob_data) > 0:
-                            mobs_found.extend(mob_data)
-                        elif isinstance(mob_data, dict):
-                            mobs_found.append(mob_data)
-        
-        logger.debug(f"🔍 DEBUG: extract_mob_data returning {len(mobs_found)} mobs: {mobs_found}")
-        
-        if mobs_found:
-            return mobs_found
-        
-        return None
+        mobs = decode_explore(response_data).mobs
+        logger.debug(f"extract_mob_data returning {len(mobs)} mobs")
+        return mobs or None
     
     def extract_mob_group_data(self, response_data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
         """
@@ -65,28 +37,20 @@ class DataExtractor:
         Returns:
             List of mob data dictionaries formatted for display or None
         """
-        logger = logging.getLogger(__name__)
-        
-        mobs_found = self.extract_mob_data(response_data)
-        
-        if not mobs_found:
+        mobs = self.extract_mob_data(response_data)
+        if not mobs:
             return None
         
-        # Format mobs for display
-        formatted_mobs = []
-        for i, mob in enumerate(mobs_found):
-            if isinstance(mob, dict):
-                formatted_mob = {
-                    'name': mob.get('name', 'Неизвестно'),
-                    'hp': f"{mob.get('hp', 0)}/{mob.get('maxHp', 1)}",
-                    'level': mob.get('level', 1),
-                    'is_current_target': i == 0,  # First mob is current target
-                    'is_dead': mob.get('hp', 1) <= 0
-                }
-                formatted_mobs.append(formatted_mob)
-        
-        logger.debug(f"🔍 DEBUG: extract_mob_group_data returning {len(formatted_mobs)} formatted mobs")
-        return formatted_mobs
+        return [
+            {
+                'name': mob.name,
+                'hp': f"{mob.hp}/{mob.max_hp}",
+                'level': mob.level,
+                'is_current_target': i == 0,  # First mob is current target
+                'is_dead': mob.hp <= 0
+            }
+            for i, mob in enumerate(mobs)
+        ]
     
     def extract_player_data(self, response_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -110,50 +74,29 @@ class DataExtractor:
         
         return None
     
-    def extract_combat_results(self, response_data: Dict[str, Any]) -> Dict[str, Any]:
+    def extract_combat_results(self, record: AttackRecord,
+                               character_name: Optional[str] = None) -> Dict[str, Any]:
         """
-        Extract combat results from API response
+        Extract combat results from decoded attack response
         
         Args:
-            response_data: API response data
+            record: Attack record
+            character_name: Own character name (user.name) to tell own hits from mob hits
             
         Returns:
             Dictionary with combat results
         """
-        results = {
-            'damage_dealt': 0,
-            'damage_received': 0,
-            'exp_gained': 0,
-            'gold_gained': 0,
-            'drops': [],
-            'killed_mobs': []
-        }
-        
-        if not isinstance(response_data, dict):
-            return results
-        
-        # Extract experience and gold from victory data
-        if 'dataWin' in response_data:
-            win_data = response_data['dataWin']
-            results['exp_gained'] = win_data.get('expWin', 0)
-            
-            # Extract gold from drops
-            drop_data = win_data.get('drop', [])
-            results['drops'] = drop_data
-            results['gold_gained'] = sum(
-                item.get('count', 0) for item in drop_data 
-                if item.get('id') == 'm_0_1'
-            )
-        
-        # Extract killed mobs from logs
-        if 'arrLogs' in response_data:
-            arr_logs = response_data['arrLogs']
-            for log_entry in arr_logs:
-                messages = log_entry.get('messages', [])
-                for message in messages:
-                    if 'погиб' in message or 'погибла' in message:
-                        mob_name = log_entry.get('defname', 'Unknown')
-                        if mob_name not in results['killed_mobs']:
-                            results['killed_mobs'].append(mob_name)
-        
-        return results 
\ No newline at end of file
+        combat_log = CombatLogParser(character_name).parse(record.logs)
+        killed_mobs = []
+        for mob_name in combat_log.kills:
+            if mob_name not in killed_mobs:
+                killed_mobs.append(mob_name)
+        
+        return {
+            'damage_dealt': combat_log.damage_dealt,
+            'damage_received': combat_log.damage_received,
+            'exp_gained': record.exp_gained,
+            'gold_gained': sum(item.get('count', 0) for item in record.drops if item.get('id') == 'm_0_1'),
+            'drops': record.drops,
+            'killed_mobs': killed_mobs
+        } 
\ No newline at end of file
@@ -2,11 +2,11 @@
 Exploration Handler - Manages territory exploration
 """
 
-import time
 import logging
 from typing import Optional, Dict, Any
 from ruby_king_bot.api.client import APIClient
 from ruby_king_bot.ui.display import GameDisplay
+from ruby_king_bot.utils.clock import clock
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +34,7 @@ class ExplorationHandler:
             
         except Exception as e:
             self.display.print_message(f"Network error: {e}. Waiting 60 seconds before retry...", "error")
-            time.sleep(60)
+            clock.sleep(60)
             return None
     
     def _log_api_response(self, response: Dict[str, Any], context: str = ""):
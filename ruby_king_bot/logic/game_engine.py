@@ -2,9 +2,8 @@
 Game Engine - Main game loop and state management
 """
 
-import time
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Tuple
 from rich.console import Console
 from rich.table import Table
 
@@ -19,15 +18,20 @@ from ruby_king_bot.logic.exploration_handler import ExplorationHandler
 from ruby_king_bot.logic.rest_handler import RestHandler
 from ruby_king_bot.logic.data_extractor import DataExtractor
 from ruby_king_bot.logic.low_damage_handler import LowDamageHandler
-from ruby_king_bot.config.constants import DIRECTIONS, LOCATION_NAMES, MOBS_PER_DIRECTION, DIRECTION_NAMES
+from ruby_king_bot.logic.city_trip import ReturnPoint
+from ruby_king_bot.logic.scheduler import EventScheduler
+from ruby_king_bot.config.constants import LOCATION_NAMES, MOBS_PER_DIRECTION, DIRECTION_NAMES
 from ruby_king_bot.logic.mob_mapper import MobMapper
 from ruby_king_bot.logic.world_map_router import WorldMapRouter, RoutePoint
+from ruby_king_bot.logic.square_bandit import SquareBandit, square_key
+from ruby_king_bot.logic.target_search import TargetSearch
+from ruby_king_bot.utils.clock import clock
 from ruby_king_bot.ui.display import GameDisplay
 
 logger = logging.getLogger(__name__)
 console = Console()
 
-# Конфигурация локаций для фарма кусков лука по уровням
+# Конфигурация локаций для фарма кусков лука по уровням (когда нет плана прокачки)
 BOW_FARMING_LOCATIONS = {
     # D ранг (21-40) - Лук "Кровавый ворон"
     "D": {
@@ -58,11 +62,24 @@ BOW_FARMING_LOCATIONS = {
 class GameEngine:
     """Main game engine that manages the game loop and state transitions"""
     
-    def __init__(self):
-        """Initialize the game engine"""
-        self.api_client = APIClient()
+    def __init__(self, api_client: Optional[APIClient] = None, display: Optional[GameDisplay] = None,
+                 world_router: Optional[WorldMapRouter] = None, character_name: Optional[str] = None):
+        """
+        Initialize the game engine
+        
+        Args:
+            api_client: API client of the character (defaults to client with GAME_TOKEN)
+            display: Display to render to (orchestrator passes a headless one)
+            world_router: Shared world map router (read-only between characters)
+            character_name: Profile name used in logs
+        """
+        self.api_client = api_client or APIClient()
+        self.character_name = character_name or "main"
+        self.running = False
+        self.fatal_error: Optional[Exception] = None  # Причина аварийной остановки run() (для оркестратора)
         self.player = Player()
-        self.display = GameDisplay()
+        self.api_client.calibrator.bind(self.player)  # Калиброванные КД сервера
+        self.display = display or GameDisplay()
         self.state_manager = GameStateManager()
         self.combat_handler = CombatHandler(self.api_client, self.player, self.display)
         self.exploration_handler = ExplorationHandler(self.api_client, self.display)
@@ -75,39 +92,46 @@ class GameEngine:
         self.explore_done = False
         self.rest_end_time = None
         self.last_display_update = 0  # Track last display update time
+        self.next_display_update = 0  # Next scheduled display refresh
+        self.scheduler = EventScheduler(idle_sleep=Settings.LOOP_IDLE_SLEEP)
         
         # Statistics
         self.session_stats = {
             'mobs_killed': 0,
             'total_exp': 0,
             'session_gold': 0,
-            'session_start': time.time(),
+            'session_start': clock.time(),
             'squares_visited': 0,  # Количество посещенных квадратов
             'directions_visited': 0,  # Количество посещенных направлений
             'locations_visited': 0   # Количество посещенных локаций
         }
         
         # Direction rotation tracking
-        self.current_direction_index = 0  # Индекс текущего направления
         self.mobs_killed_in_current_direction = 0  # Количество убитых мобов в текущем направлении
         self.target_mob_found = False  # Найден ли целевой моб
         self.current_farming_config = None  # Текущая конфигурация фарма
         
         # Новый роутер для работы с картой мира
-        self.world_router = WorldMapRouter()
+        self.world_router = world_router or WorldMapRouter()
         self.current_route: List[RoutePoint] = []
         self.current_route_index = 0
         self.mobs_killed_on_current_square = 0
-        self.target_mobs_per_square = 10
-        
-        # UI
-        self.display = GameDisplay()
+        self.route_level: Optional[int] = None  # Уровень, под который построен маршрут
+        # Доход квадратов: куда идти после блока убийств и оставаться ли
+        bandit_path = Settings.SQUARE_BANDIT_PATH.format(name=self.character_name) if Settings.SQUARE_BANDIT_PATH else None
+        self.square_bandit = SquareBandit(bandit_path)
+        # Кого встречали на квадратах: поиск целевого моба
+        sightings_path = Settings.TARGET_SEARCH_PATH.format(name=self.character_name) if Settings.TARGET_SEARCH_PATH else None
+        self.target_search = TargetSearch(self.world_router.world_map, sightings_path, self.world_router.optimizer.cost_model)
+        self.target_search_visited: Set[Tuple[str, str]] = set()  # Квадраты текущего цикла поиска
+        self.visit_potions_start = 0  # Зелий потрачено к началу блока на квадрате
         
         # Статистика сессии
         self.session_stats = {
+            'mobs_killed': 0,
             'total_exp': 0,
             'session_gold': 0,
-            'session_start': time.time(),
+            'session_start': clock.time(),
             'events_found': 0,
             'total_damage_dealt': 0,
             'total_attacks': 0,
@@ -120,6 +144,9 @@ class GameEngine:
             'directions_visited': 0,
             'locations_visited': 0
         }
+        
+        # Снимок состояния после перезапуска воркера (см. restore_snapshot)
+        self.resume_snapshot: Optional[Dict[str, Any]] = None
     
     def initialize(self):
         """Initialize the game engine"""
@@ -152,44 +179,27 @@ class GameEngine:
             console.print("[blue]Setting up route-based farming...[/blue]")
             if not self.setup_route_based_farming():
                 console.print("[red]Failed to setup route-based farming![/red]")
+                self.fatal_error = RuntimeError("Failed to setup route-based farming")
                 return
             
             console.print("[bold green]Route-based farming ready, starting main loop[/bold green]")
             
             # Main game loop with live display
+            # Цикл просыпается по таймер-куче: ровно к ближайшему дедлайну
+            # (КД атаки/скилла/зелий, конец отдыха, обновление дисплея)
+            self.running = True
             with self.display.get_live_display() as live:
-                while True:
+                while self.running:
                     try:
-                        current_time = time.time()
+                        current_time = clock.time()
                         current_state = self.state_manager.get_current_state()
                         
                         # Update display with current route info
-                        if self.current_route and self.current_route_index < len(self.current_route):
-                            current_point = self.current_route[self.current_route_index]
-                            route_progress = f"Маршрут: {self.current_route_index + 1}/{len(self.current_route)} - {current_point.location_name} | {current_point.direction_name} | {current_point.square}"
-                            
-                            # Update display with current game state
-                            player_data = self.player.get_stats_summary()
-                            self.display.update_display(
-                                current_state=current_state.value,
-                                player_data=player_data,
-                                mob_data=None,
-                                mob_group_data=None,
-                                attack_cooldown=0,
-                                heal_cooldown=0,
-                                skill_cooldown=0,
-                                mana_cooldown=0,
-                                rest_time=None,
-                                player_name="Piulok",
-                                last_attack_time=self.player.last_attack_time,
-                                last_skill_time=self.player.last_skill_time,
-                                location=self.player.current_location,
-                                direction=self.player.current_direction,
-                                square=self.player.current_square,
-                                current_route=self.current_route,
-                                current_route_index=self.current_route_index,
-                                mobs_killed_on_current_square=self.mobs_killed_on_current_square
-                            )
+                        if current_time >= self.next_display_update:
+                            self._refresh_route_display(current_state)
+                            self.next_display_update = current_time + self._display_refresh_rate(current_state)
+                        
+                        progress_before = self._progress_signature()
                         
                         # Handle different states
                         if current_state == GameState.CITY:
@@ -203,8 +213,10 @@ class GameEngine:
                         elif current_state == GameState.HEALING:
                             self._handle_healing_state()
                         
-                        # Small delay to prevent excessive API calls
-                        time.sleep(1)
+                        # Sleep until the next action becomes legal
+                        self._schedule_wakeups()
+                        stalled = self._progress_signature() == progress_before
+                        self.scheduler.sleep_until_next(stalled=stalled)
                         
                     except KeyboardInterrupt:
                         console.print("\n[yellow]Bot stopped by user[/yellow]")
@@ -212,11 +224,78 @@ class GameEngine:
                     except Exception as e:
                         logger.error(f"Error in main loop: {e}")
                         console.print(f"[red]Error in main loop: {e}[/red]")
-                        time.sleep(5)  # Wait before retrying
+                        clock.sleep(5)  # Wait before retrying
                         
         except Exception as e:
             logger.error(f"Fatal error in game engine: {e}")
             console.print(f"[red]Fatal error: {e}[/red]")
+            self.fatal_error = e
+    
+    def stop(self):
+        """Ask the main loop to finish after the current iteration"""
+        self.running = False
+    
+    def _refresh_route_display(self, current_state: GameState):
+        """Update display with current route point and player state"""
+        if not (self.current_route and self.current_route_index < len(self.current_route)):
+            return
+        player_data = self.player.get_stats_summary()
+        self.display.update_display(
+            current_state=current_state.value,
+            player_data=player_data,
+            mob_data=None,
+            mob_group_data=None,
+            attack_cooldown=0,
+            heal_cooldown=0,
+            skill_cooldown=0,
+            mana_cooldown=0,
+            rest_time=None,
+            player_name=self.player.name or self.character_name,
+            last_attack_time=self.player.last_attack_time,
+            last_skill_time=self.player.last_skill_time,
+            location=self.player.current_location,
+            direction=self.player.current_direction,
+            square=self.player.current_square,
+            current_route=self.current_route,
+            current_route_index=self.current_route_index,
+            mobs_killed_on_current_square=self.mobs_killed_on_current_square
+        )
+    
+    def _display_refresh_rate(self, current_state: GameState) -> float:
+        """Get display refresh interval for state (slower while resting)"""
+        if current_state == GameState.RESTING:
+            return Settings.REST_UI_REFRESH_RATE
+        return Settings.UI_REFRESH_RATE
+    
+    def _progress_signature(self) -> tuple:
+        """Snapshot of values that change when the loop performs an action"""
+        return (
+            self.state_manager.get_current_state(),
+            self.player.last_attack_time,
+            self.player.last_skill_time,
+            self.player.last_heal_time,
+            self.player.last_mana_time,
+            id(self.current_mob_group),
+            self.explore_done
+        )
+    
+    def _schedule_wakeups(self):
+        """Put the next deadlines of the current state into the scheduler"""
+        self.scheduler.clear()
+        self.scheduler.schedule('display', self.next_display_update)
+        current_state = self.state_manager.get_current_state()
+        
+        if current_state == GameState.COMBAT:
+            self.scheduler.schedule('attack', self.player.attack_ready_at())
+            if self.player.needs_healing():
+                self.scheduler.schedule('heal', self.player.heal_ready_at())
+            if self.player.get_mp_percentage() < Settings.MANA_THRESHOLD:
+                self.scheduler.schedule('mana', self.player.mana_ready_at())
+        elif current_state == GameState.RESTING and self.rest_end_time:
+            self.scheduler.schedule('rest_end', self.rest_end_time)
+        else:
+            # Исследование и переходы - сразу, интервалы выдерживает пейсер API
+            self.scheduler.schedule('action', clock.time())
     
     def _update_display(self, **kwargs):
         """Update display with current information"""
@@ -275,31 +354,22 @@ class GameEngine:
                 self._handle_exploration_failure(result)
                 return
             
-            # Extract mob data from response
-            mob_data = self.data_extractor.extract_mob_data(result)
-            mob_group_data = self.data_extractor.extract_mob_group_data(result)
+            # Decode mobs once, display data comes from the created group
+            mob_records = self.data_extractor.extract_mob_data(result)
             
-            if mob_data and mob_group_data:
-                # Create MobGroup from raw data
-                self.current_mob_group = MobGroup(mob_data)
+            if mob_records:
+                self.current_mob_group = MobGroup(mob_records)
                 current_target = self.current_mob_group.get_current_target()
-                
-                # Update display data from created group
-                if current_target:
-                    mob_data = {
-                        'name': current_target.name,
-                        'hp': current_target.hp,
-                        'max_hp': current_target.max_hp,
-                        'level': current_target.level
-                    }
-                    mob_group_data = self.current_mob_group.get_all_mobs_with_status()
+                mob_group_data = self.current_mob_group.get_all_mobs_with_status()
                 
                 # Message about found mobs
                 mob_names = [mob['name'] for mob in mob_group_data]
                 self.display.print_message(f"🔍 Найдены враги: {', '.join(mob_names)}", "info")
+                self.target_search.record_encounter(self.player.current_location, self.player.current_direction,
+                                                    self.player.current_square, mob_names)
                 
                 # Check and use skill immediately after exploration if conditions are met
-                current_time = time.time()
+                current_time = clock.time()
                 if current_target and self._should_use_skill_after_exploration(current_target, current_time):
                     self.display.print_message("⚡ Проверяем возможность использования усиленного удара...", "info")
                     skill_result = self.combat_handler._use_skill(current_target, current_time, self.current_mob_group)
@@ -313,7 +383,9 @@ class GameEngine:
                 
                 self.state_manager.change_state(GameState.COMBAT, "Mobs found")
                 self.explore_done = True  # Set flag only for mobs found
+                self.square_bandit.record_explore(found_mobs=True)
             else:
+                self.square_bandit.record_explore(found_mobs=False)
                 # No mobs found - this means an event was found
                 self.display.print_message("🎯 Найдено событие или пустая область", "info")
                 # Update events counter
@@ -332,34 +404,35 @@ class GameEngine:
         
         if 'иссяк боевой дух' in message:
             self.display.print_message("😴 Morale depleted, starting rest...", "warning")
+            self._trip_before_rest()
             rest_result = self.rest_handler.start_rest()
             if rest_result:
                 self.state_manager.change_state(GameState.RESTING, "Starting rest due to low morale")
-                self.rest_end_time = time.time() + (20 * 60)  # 20 minutes
+                self.rest_end_time = clock.time() + (20 * 60)  # 20 minutes
         elif 'Очень быстро совершаете действия' in message:
-            self.display.print_message("⏱️ Actions too fast, waiting 5 seconds...", "warning")
-            time.sleep(5)
+            # Пауза уже выдержана пейсером API клиента
+            self.display.print_message("⏱️ Actions too fast, pacer interval increased", "warning")
             # Reset exploration flag to try again
             self.explore_done = False
         elif 'Неверное местонахождения' in message:
             self.display.print_message("📍 Location error, waiting 10 seconds...", "warning")
-            time.sleep(10)
+            clock.sleep(10)
         else:
             self.display.print_message(f"Exploration failed: {message}", "error")
     
     def _handle_combat_state(self):
         """Handle combat state"""
         try:
-            current_time = time.time()
+            current_time = clock.time()
             
             # Check if we need to heal
-            if self.player.should_use_healing_potion(current_time):
-                self._use_healing_potion()
+            if self.combat_handler._should_use_heal_potion(current_time):
+                self.combat_handler._use_healing_potion(current_time)
                 return
             
             # Check if we need to use mana potion
-            if self.player.should_use_mana_potion(current_time):
-                self._use_mana_potion()
+            if self.combat_handler._should_use_mana_potion(current_time):
+                self.combat_handler._use_mana_potion(current_time)
                 return
             
             # Get current target
@@ -415,8 +488,8 @@ class GameEngine:
             if self.current_mob_group:
                 current_target = self.current_mob_group.get_current_target()
                 if current_target:
-                    exp_gained = current_target.exp_reward or 0
-                    gold_gained = current_target.gold_reward or 0
+                    exp_gained = getattr(current_target, 'exp_reward', 0) or 0
+                    gold_gained = getattr(current_target, 'gold_reward', 0) or 0
                     
                     # Записываем в MobMapper
                     self.mob_mapper.record_mob_kill(
@@ -425,37 +498,94 @@ class GameEngine:
                         current_target.hp,
                         current_target.max_hp
                     )
+                    
+                    # Расход зелий за бой относим к квадрату и уровню моба
+                    square = None
+                    if self.current_route and self.current_route_index < len(self.current_route):
+                        square = self.current_route[self.current_route_index].square
+                    self.combat_handler.potion_forecaster.record_kill(square, current_target.level)
+            
+            # Доход квадрата - по итогам боя из ответа сервера
+            victory, self.combat_handler.last_victory = self.combat_handler.last_victory, None
+            if victory:
+                killed, exp, gold = victory
+                self.square_bandit.record_kill(max(killed, 1), exp, gold, level=self.player.level)
             
             # Обновляем статистику
+            self.session_stats['mobs_killed'] += mobs_killed
             self.session_stats['total_exp'] += exp_gained
             self.session_stats['session_gold'] += gold_gained
             
             # Увеличиваем счетчик убитых мобов на текущем квадрате
             self.mobs_killed_on_current_square += mobs_killed
             
+            # Новый уровень - сразу маршрут под него
+            if self.current_route and self.route_level is not None and self.player.level != self.route_level:
+                self._replan_route()
+            
             # Показываем сообщение о победе
             if current_target:
                 self.display.print_victory(current_target.name, exp_gained, [])
             
             # Проверяем, нужно ли переходить к следующему квадрату
-            if self.mobs_killed_on_current_square >= self.target_mobs_per_square:
+            # Сколько убить на квадрате, задает оптимизатор маршрута по стоимости перехода
+            target_kills = Settings.ROUTE_MIN_KILLS_PER_SQUARE
+            if self.current_route and self.current_route_index < len(self.current_route):
+                target_kills = self.current_route[self.current_route_index].target_kills
+            if self.mobs_killed_on_current_square >= target_kills:
                 console.print(f"[green]✅ Квадрат завершен! Убито {self.mobs_killed_on_current_square} мобов[/green]")
                 self._move_to_next_route_point()
             else:
                 # Показываем прогресс на текущем квадрате
                 if self.current_route and self.current_route_index < len(self.current_route):
                     current_point = self.current_route[self.current_route_index]
-                    console.print(f"[blue]📊 Прогресс: {self.mobs_killed_on_current_square}/{self.target_mobs_per_square} мобов на квадрате {current_point.square}[/blue]")
+                    console.print(f"[blue]📊 Прогресс: {self.mobs_killed_on_current_square}/{target_kills} мобов на квадрате {current_point.square}[/blue]")
             
             # Переходим в состояние города для следующего исследования
             self.state_manager.change_state(GameState.CITY, "Combat victory")
             self.current_mob_group = None
             self.explore_done = False
+            
+            if self.combat_handler.pending_recovery:
+                self._run_city_trip()
                 
         except Exception as e:
             logger.error(f"Ошибка обработки победы в бою: {e}")
             console.print(f"[red]Ошибка обработки победы: {e}[/red]")
     
+    def _run_city_trip(self):
+        """Поездка в город после боя и возвращение на текущую точку маршрута"""
+        situation_type = self.combat_handler.pending_recovery
+        self.combat_handler.pending_recovery = None
+        return_point = None
+        if self.current_route and self.current_route_index < len(self.current_route):
+            return_point = ReturnPoint.from_route_point(self.current_route[self.current_route_index])
+        handled = self.combat_handler.low_damage_handler.handle_low_damage_situation(
+            None, None, clock.time(), situation_type, return_point
+        )
+        if handled and return_point:
+            self.player.set_location(return_point.location, return_point.direction)
+        self.combat_handler._reset_low_damage_tracking()
+        self.combat_handler.potion_forecaster.pause()
+        self.square_bandit.pause()
+    
+    def _trip_before_rest(self):
+        """Поездка в город перед отдыхом, если за зельями или с продажей все равно скоро ехать"""
+        forecaster = self.combat_handler.potion_forecaster
+        inventory_policy = self.combat_handler.inventory_policy
+        if forecaster.should_trip(self.player.get_heal_potions_count(), self.player.get_mana_potions_count(),
+                                  other_need=True):
+            self.display.print_message("🛒 Зелий хватит ненадолго - пополняем перед отдыхом", "info")
+            self.combat_handler.pending_recovery = "low_potions"
+            self._run_city_trip()
+        elif inventory_policy.should_trip(self.player.inventory or {}, self.player.max_inventory_weight,
+                                          other_need=True):
+            self.display.print_message("🎒 Рюкзак скоро заполнится - продаем перед отдыхом", "info")
+            self.combat_handler.pending_recovery = "full_inventory"
+            self._run_city_trip()
+        forecaster.pause()
+        self.square_bandit.pause()
+    
     def _handle_combat_failure(self):
         """Handle combat failure"""
         self.state_manager.change_state(GameState.CITY, "Combat ended - failure")
@@ -465,7 +595,7 @@ class GameEngine:
     
     def _handle_resting_state(self):
         """Handle resting state"""
-        current_time = time.time()
+        current_time = clock.time()
         if self.rest_end_time and current_time >= self.rest_end_time:
             self.display.print_rest_complete()
             self.state_manager.change_state(GameState.CITY, "Rest completed")
@@ -681,8 +811,6 @@ class GameEngine:
                 else:
                     console.print(f"[red]Failed to buy healing potions: {heal_result}[/red]")
                     logger.error(f"Failed to buy healing potions: {heal_result}")
-                
-                time.sleep(2)  # Пауза 2 секунды
             
             # Покупаем зелья маны если меньше 300
             if mana_potions < 300:
@@ -698,8 +826,6 @@ class GameEngine:
                 else:
                     console.print(f"[red]Failed to buy mana potions: {mana_result}[/red]")
                     logger.error(f"Failed to buy mana potions: {mana_result}")
-                
-                time.sleep(2)  # Пауза 2 секунды
             
             if potions_bought > 0:
                 console.print(f"[green]Total potions bought: {potions_bought}[/green]")
@@ -726,7 +852,6 @@ class GameEngine:
             if result.get("status") == "success":
                 console.print("[green]Successfully moved to farm zone[/green]")
                 logger.info("Successfully moved to farm zone")
-                time.sleep(2)  # Пауза 2 секунды
                 return True
             else:
                 console.print(f"[red]Failed to move to farm zone: {result.get('message', 'Unknown error')}[/red]")
@@ -757,7 +882,6 @@ class GameEngine:
                 logger.info("Successfully moved to first location")
                 # Увеличиваем статистику локаций
                 self.session_stats['locations_visited'] += 1
-                time.sleep(2)  # Задержка 2 секунды после перехода в локацию
                 return True
             else:
                 console.print(f"[red]Failed to move to first location: {result.get('message', 'Unknown error')}[/red]")
@@ -769,6 +893,27 @@ class GameEngine:
             logger.error(f"Error moving to first location: {e}")
             return False
     
+    def _get_planned_farming_location(self) -> Optional[Dict[str, Any]]:
+        """Farming location of player level from the leveling plan (bow farming locations without a plan)"""
+        player_level = self.player.level
+        plan = self.world_router.plan
+        points = plan.points(player_level) if plan else []
+        info = None
+        if points:
+            point = max(points, key=lambda p: p.rate)
+            info = self.world_router.world_map.square(point.location, point.direction, point.square)
+        if info is None:
+            logger.info(f"No planned farming location for level {player_level}, using bow farming locations")
+            return self._get_bow_farming_location()
+        console.print(f"[green]Selected planned farming location {point.location} for level {player_level}[/green]")
+        logger.info(f"Selected planned farming location {point.location}/{point.direction}/{point.square} "
+                    f"for level {player_level} ({plan.objective})")
+        return {
+            "location": point.location,
+            "target_mob": point.target_mob,
+            "mob_level_range": (info.level_min, info.level_max),
+        }
+
     def _get_bow_farming_location(self) -> Optional[Dict[str, Any]]:
         """Get the best bow farming location based on player level"""
         player_level = self.player.level
@@ -799,8 +944,8 @@ class GameEngine:
                 logger.error("No square information available")
                 return False
             
-            # Определяем подходящую локацию для фарма кусков лука
-            farming_config = self._get_bow_farming_location()
+            # Определяем подходящую локацию по плану прокачки
+            farming_config = self._get_planned_farming_location()
             
             if farming_config:
                 # Ищем квадрат с мобами нужного уровня для фарма кусков лука
@@ -987,108 +1132,54 @@ class GameEngine:
             return False
 
     def _search_target_mob_in_other_directions(self, farming_config: Dict[str, Any]) -> bool:
-        """Search for target mob in other directions if not found in current direction"""
+        """Move to the most promising unsearched square of the location (Bayesian target search)"""
         try:
-            console.print("[blue]Searching for target mob in other directions...[/blue]")
-            logger.info("Searching for target mob in other directions...")
-            
             location = farming_config["location"]
-            target_mob = farming_config["target_mob"]
-            mob_min_level, mob_max_level = farming_config["mob_level_range"]
-            
-            # Проверяем все направления кроме текущего
-            current_direction = self.player.current_direction
-            directions_to_check = [d for d in DIRECTIONS if d != current_direction]
-            
-            for direction in directions_to_check:
-                console.print(f"[blue]Checking direction: {direction} for {target_mob}[/blue]")
-                logger.info(f"Checking direction: {direction} for {target_mob}")
-                
-                # Переходим в направление
-                result = self.api_client.change_geo(location, direction)
-                if result.get("status") != "success":
-                    console.print(f"[red]Failed to move to {direction}: {result.get('message', 'Unknown error')}[/red]")
-                    logger.error(f"Failed to move to {direction}: {result}")
-                    continue
-                
-                time.sleep(20)  # Задержка 20 секунд между переходами направлений
-                self.player.set_location(location, direction)
-                # Увеличиваем статистику направлений
-                self.session_stats['directions_visited'] += 1
-                
-                # Получаем информацию о квадратах в этом направлении
-                user_info = self.api_client.get_user_info()
-                squares = user_info.get("squares", [])
-                
-                # Ищем квадрат с подходящими мобами
-                best_square = None
-                best_score = float('inf')
+            target_mob = farming_config.get("target_mob")
+            level_range = farming_config.get("mob_level_range")
+            
+            in_location = self.player.current_location == location
+            if in_location:
+                self.target_search_visited.add((self.player.current_direction, self.player.current_square))
+            
+            # Квадраты по убыванию ожидаемой пользы; неудачный переход - берем следующий
+            while True:
+                cell = self.target_search.next_square(
+                    target_mob, location,
+                    self.player.current_direction if in_location else None,
+                    self.player.current_square if in_location else None,
+                    self.target_search_visited, level_range
+                )
+                if cell is None:
+                    console.print("[yellow]Target mob not found: no square is worth the travel[/yellow]")
+                    logger.warning(f"Target search for {target_mob} in {location} stopped")
+                    self.target_search_visited.clear()  # Следующий цикл поиска - заново
+                    return False
+                self.target_search_visited.add(cell)
+                direction, square = cell
+                console.print(f"[blue]Searching {target_mob or 'mobs'} at {direction}/{square}[/blue]")
                 
-                for square in squares:
-                    position = square.get("position")
-                    lvl_mobs = square.get("lvlMobs")
-                    
-                    # Пропускаем квадраты с названием локации
-                    if lvl_mobs and "locoName" in lvl_mobs:
+                if not in_location or direction != self.player.current_direction:
+                    result = self.api_client.change_geo(location, direction)
+                    if result.get("status") != "success":
+                        logger.error(f"Failed to move to {direction}: {result}")
                         continue
-                    
-                    if lvl_mobs and "mobLvl" in lvl_mobs:
-                        try:
-                            mob_level_str = str(lvl_mobs["mobLvl"]).strip()
-                            
-                            # Обрабатываем диапазоны типа "26-27" или "20-23"
-                            if '-' in mob_level_str:
-                                level_parts = mob_level_str.split('-')
-                                if len(level_parts) == 2:
-                                    min_level = int(level_parts[0].strip())
-                                    max_level = int(level_parts[1].strip())
-                                    mob_level = (min_level + max_level) // 2
-                                else:
-                                    continue
-                            else:
-                                mob_level = int(mob_level_str)
-                            
-                            # Проверяем, что уровень мобов в нужном диапазоне
-                            if mob_min_level <= mob_level <= mob_max_level:
-                                # Вычисляем "идеальность" квадрата
-                                target_level = (mob_min_level + mob_max_level) // 2
-                                level_diff = abs(mob_level - target_level)
-                                
-                                # Бонус за безопасность
-                                safety_bonus = 0
-                                if mob_level <= self.player.level - 5:
-                                    safety_bonus = 10
-                                
-                                score = level_diff - safety_bonus
-                                
-                                if score < best_score:
-                                    best_score = score
-                                    best_square = position
-                                
-                        except (ValueError, TypeError) as e:
-                            logger.warning(f"Cannot process mob level in square {position}: {e}")
-                            continue
+                    self.player.set_location(location, direction)
+                    in_location = True
+                    # Увеличиваем статистику направлений
+                    self.session_stats['directions_visited'] += 1
                 
-                if best_square:
-                    console.print(f"[green]Found suitable square {best_square} in direction {direction}[/green]")
-                    logger.info(f"Found suitable square {best_square} in direction {direction}")
-                    
-                    # Переходим на лучший квадрат
-                    result = self.api_client.change_square(best_square)
-                    if result.get("status") == "success":
-                        self.player.set_square(best_square)
-                        # Увеличиваем статистику квадратов
-                        self.session_stats['squares_visited'] += 1
-                        console.print(f"[green]Successfully moved to {direction} square {best_square}[/green]")
-                        logger.info(f"Successfully moved to {direction} square {best_square}")
-                        return True
-                    else:
-                        console.print(f"[red]Failed to move to square {best_square}[/red]")
-                        logger.error(f"Failed to move to square {best_square}")
-            
-            console.print("[yellow]Target mob not found in any direction[/yellow]")
-            logger.warning("Target mob not found in any direction")
-            return False
+                result = self.api_client.change_square(square)
+                if result.get("status") != "success":
+                    logger.error(f"Failed to move to square {square}: {result}")
+                    continue
+                self.player.set_square(square)
+                self.mob_mapper.set_current_position(location, direction, square)
+                # Увеличиваем статистику квадратов
+                self.session_stats['squares_visited'] += 1
+                self.mobs_killed_in_current_direction = 0
+                logger.info(f"Moved to {direction} square {square} searching {target_mob}")
+                return True
                 
         except Exception as e:
             console.print(f"[red]Error searching for target mob: {e}[/red]")
@@ -1098,6 +1189,36 @@ class GameEngine:
     def get_session_stats(self) -> Dict[str, Any]:
         """Get current session statistics"""
         return self.session_stats.copy() 
+    
+    def get_snapshot(self) -> Dict[str, Any]:
+        """
+        Get picklable engine state for restarting the character elsewhere
+        
+        Returns:
+            Session stats, route progress and position
+        """
+        return {
+            'character_name': self.character_name,
+            'session_stats': self.session_stats.copy(),
+            'current_route_index': self.current_route_index,
+            'mobs_killed_on_current_square': self.mobs_killed_on_current_square,
+            'location': self.player.current_location,
+            'direction': self.player.current_direction,
+            'square': self.player.current_square,
+            'level': self.player.level,
+        }
+    
+    def restore_snapshot(self, snapshot: Dict[str, Any]):
+        """
+        Restore state saved by get_snapshot (before initialize/run)
+        
+        Args:
+            snapshot: Snapshot of the same character
+        """
+        self.session_stats.update(snapshot.get('session_stats', {}))
+        self.resume_snapshot = snapshot
+        logger.info(f"[{self.character_name}] Restored snapshot: route point {snapshot.get('current_route_index')}, "
+                    f"mobs killed {self.session_stats.get('mobs_killed')}")
 
     def _check_direction_rotation(self, killed_mob_name: str) -> bool:
         """Check if we need to rotate to next direction after killing a mob"""
@@ -1128,51 +1249,11 @@ class GameEngine:
         return False
     
     def _rotate_to_next_direction(self) -> bool:
-        """Rotate to next direction and find suitable square"""
+        """Move to next square of target search after the current one gave no target"""
         if not self.current_farming_config:
             return False
-            
-        location = self.current_farming_config["location"]
-        
-        # Переходим к следующему направлению
-        self.current_direction_index = (self.current_direction_index + 1) % len(DIRECTIONS)
-        new_direction = DIRECTIONS[self.current_direction_index]
-        
-        console.print(f"[blue]Переходим к направлению: {new_direction}[/blue]")
-        logger.info(f"Rotating to direction: {new_direction}")
-        
-        # Переходим в новое направление
-        result = self.api_client.change_geo(location, new_direction)
-        if result.get("status") != "success":
-            console.print(f"[red]Failed to move to {new_direction}: {result.get('message', 'Unknown error')}[/red]")
-            logger.error(f"Failed to move to {new_direction}: {result}")
-            return False
-        
-        time.sleep(20)  # Задержка 20 секунд между переходами направлений
-        self.player.set_location(location, new_direction)
-        # Увеличиваем статистику направлений
-        self.session_stats['directions_visited'] += 1
-        
-        # Получаем информацию о квадратах в новом направлении
-        user_info = self.api_client.get_user_info()
-        if not user_info or user_info.get('status') != 'success':
-            console.print("[red]Failed to get user info for new direction[/red]")
-            logger.error("Failed to get user info for new direction")
-            return False
-        
-        squares = user_info.get("squares", [])
-        
-        # Ищем подходящий квадрат в новом направлении
-        if self._find_bow_farming_square(squares, self.current_farming_config):
-            # Сбрасываем счетчик мобов для нового направления
-            self.mobs_killed_in_current_direction = 0
-            console.print(f"[green]Успешно перешли в направление {new_direction}[/green]")
-            logger.info(f"Successfully rotated to direction {new_direction}")
-            return True
-        else:
-            console.print(f"[red]Не удалось найти подходящий квадрат в направлении {new_direction}[/red]")
-            logger.error(f"Failed to find suitable square in direction {new_direction}")
-            return False 
+        # Следующий квадрат выбирает байесовский поиск по всем сторонам локации
+        return self._search_target_mob_in_other_directions(self.current_farming_config)
 
     def _move_to_square(self, square: str) -> bool:
         """Переместиться на указанный квадрат в текущей локации и направлении"""
@@ -1187,7 +1268,6 @@ class GameEngine:
                 )
                 # Увеличиваем статистику
                 self.session_stats['squares_visited'] += 1
-                time.sleep(2)  # Короткая задержка для стабильности
                 return True
             else:
                 logger.error(f"Failed to move to square {square}: {result}")
@@ -1228,7 +1308,6 @@ class GameEngine:
                 )
                 # Увеличиваем статистику
                 self.session_stats['directions_visited'] += 1
-                time.sleep(2)
                 return True
             else:
                 logger.error(f"Failed to move to direction {direction}: {result}")
@@ -1270,7 +1349,6 @@ class GameEngine:
                 )
                 # Увеличиваем статистику
                 self.session_stats['locations_visited'] += 1
-                time.sleep(2)
                 return True
             else:
                 logger.error(f"Failed to move to location {location}: {result}")
@@ -1283,18 +1361,25 @@ class GameEngine:
         # Получаем уровень игрока
         player_info = self.api_client.get_user_info()
         if player_info.get("status") == "success":
-            player_data = player_info.get("data", {})
-            player_level = player_data.get("level", 20)
-            self.player.set_level(player_level)
+            self.player.update_from_api_response(player_info)
+            player_level = self.player.level
         else:
             player_level = 20
-        self.current_route = self.world_router.build_optimal_route(player_level, self.target_mobs_per_square)
+        self.current_route = self.world_router.build_optimal_route(player_level)
+        self.route_level = player_level
         if not self.current_route:
             logger.error("[ROUTE] Не найдено подходящих квадратов для фарма!")
             return False
         self.current_route_index = 0
         self.mobs_killed_on_current_square = 0
-        first_point = self.current_route[0]
+        if self.resume_snapshot:
+            # Продолжаем маршрут с точки, на которой остановился упавший воркер
+            resume_index = self.resume_snapshot.get('current_route_index', 0)
+            if 0 <= resume_index < len(self.current_route):
+                self.current_route_index = resume_index
+                self.mobs_killed_on_current_square = self.resume_snapshot.get('mobs_killed_on_current_square', 0)
+            self.resume_snapshot = None
+        first_point = self.current_route[self.current_route_index]
         success = self._move_to_route_point(first_point)
         if not success:
             logger.error("[ROUTE] Не удалось перейти к первому квадрату!")
@@ -1304,15 +1389,18 @@ class GameEngine:
     def _move_to_route_point(self, route_point: RoutePoint) -> bool:
         """Переход к точке маршрута (без поиска альтернатив, только логирование)"""
         try:
-            # Переходим в локацию и направление
-            result = self.api_client.change_geo(route_point.location, route_point.direction)
-            logger.info(f"[ROUTE] change_geo: location={route_point.location}, direction={route_point.direction}, result={result}")
-            if result.get("status") != "success":
-                logger.error(f"[ROUTE] Ошибка перехода в {route_point.location_name} | {route_point.direction_name}: {result}")
-                return False
-            time.sleep(2)
-            self.player.set_location(route_point.location, route_point.direction)
-            self.session_stats['directions_visited'] += 1
+            # На той же стороне хватает change_square - так переход оценивает оптимизатор маршрута
+            same_side = (self.player.current_location == route_point.location and
+                         self.player.current_direction == route_point.direction)
+            if not same_side:
+                # Переходим в локацию и направление
+                result = self.api_client.change_geo(route_point.location, route_point.direction)
+                logger.info(f"[ROUTE] change_geo: location={route_point.location}, direction={route_point.direction}, result={result}")
+                if result.get("status") != "success":
+                    logger.error(f"[ROUTE] Ошибка перехода в {route_point.location_name} | {route_point.direction_name}: {result}")
+                    return False
+                self.player.set_location(route_point.location, route_point.direction)
+                self.session_stats['directions_visited'] += 1
 
             # Переходим на квадрат
             logger.info(f"[ROUTE] change_square: square={route_point.square}")
@@ -1320,13 +1408,17 @@ class GameEngine:
             logger.info(f"[ROUTE] change_square response: {result}")
             if result.get("status") != "success":
                 logger.error(f"[ROUTE] Ошибка перехода на квадрат {route_point.square}: {result}")
+                if same_side:
+                    # Позиция игрока могла устареть - повторяем с change_geo
+                    self.player.set_location(None)
+                    return self._move_to_route_point(route_point)
                 # Можно добавить отображение ошибки в rich-дисплей, если нужно
                 return False
-            time.sleep(2)
             self.player.set_square(route_point.square)
             self.session_stats['squares_visited'] += 1
             self.mob_mapper.set_position(route_point.location, route_point.direction, route_point.square)
             self.mob_mapper.set_player_level(self.player.level)
+            self._start_square_visit(route_point)
             return True
         except Exception as e:
             logger.error(f"Ошибка перехода к точке маршрута: {e}")
@@ -1352,35 +1444,67 @@ class GameEngine:
         else:
             return 999
 
+    def _replan_route(self):
+        """Swap route for current player level (routes by level are precomputed)"""
+        level = self.player.level
+        route = self.world_router.build_optimal_route(level)
+        console.print(f"[green]⬆️ Уровень {self.route_level} → {level}: маршрут из {len(route)} квадратов[/green]")
+        self.route_level = level
+        if not route:
+            return
+        current = self.current_route[self.current_route_index] if self.current_route_index < len(self.current_route) else route[0]
+        self.current_route = route
+        for index, point in enumerate(route):
+            if square_key(point) == square_key(current):
+                self.current_route_index = index  # Квадрат остался в маршруте - фармим дальше
+                return
+        
+        # Квадрат вышел из окна уровней - переходим на ближайшую точку нового маршрута
+        cost_model = self.world_router.optimizer.cost_model
+        index = min(range(len(route)), key=lambda i: cost_model.cost(current, route[i]))
+        self.square_bandit.end_visit(self._potions_spent() - self.visit_potions_start)
+        self.current_route_index = index
+        self.mobs_killed_on_current_square = 0
+        if not self._move_to_route_point(route[index]):
+            self._move_to_next_route_point()
+
+    def _potions_spent(self) -> int:
+        """Potions used over the session (attributed to kills)"""
+        total = self.combat_handler.potion_forecaster.total
+        return total.heal + total.mana
+
+    def _start_square_visit(self, route_point: RoutePoint):
+        """Начать замер блока убийств на точке маршрута"""
+        self.square_bandit.start_visit(route_point)
+        self.visit_potions_start = self._potions_spent()
+
     def _move_to_next_route_point(self):
-        """Переход к следующей точке маршрута"""
-        max_attempts = len(self.current_route)  # Максимальное количество попыток
-        attempts = 0
+        """Переход к следующей точке маршрута (точку выбирает бандит по доходу квадратов)"""
+        self.square_bandit.end_visit(self._potions_spent() - self.visit_potions_start)
+        chosen = self.square_bandit.choose(self.current_route, self.current_route_index,
+                                           self.world_router.optimizer.cost_model)
+        if chosen == self.current_route_index:
+            current_point = self.current_route[chosen]
+            console.print(f"[blue]Остаемся на квадрате {current_point.square}: здесь доход выше[/blue]")
+            self.mobs_killed_on_current_square = 0
+            self._start_square_visit(current_point)
+            return True
         
-        while attempts < max_attempts:
-            self.current_route_index += 1
-            
-            # Проверяем, не достигли ли конца маршрута
-            if self.current_route_index >= len(self.current_route):
-                console.print("[bold green]🎉 Маршрут завершен! Начинаем заново...[/bold green]")
-                self.current_route_index = 0
-                self.mobs_killed_on_current_square = 0
-            
-            # Переходим к следующей точке
-            next_point = self.current_route[self.current_route_index]
+        # Если выбранный квадрат недоступен - пробуем следующие по маршруту
+        for attempt in range(len(self.current_route)):
+            index = (chosen + attempt) % len(self.current_route)
+            next_point = self.current_route[index]
             console.print(f"[blue]Переходим к следующему квадрату: {next_point.location_name} | {next_point.direction_name} | {next_point.square}[/blue]")
             
             success = self._move_to_route_point(next_point)
             if success:
+                self.current_route_index = index
                 self.mobs_killed_on_current_square = 0
                 self.state_manager.change_state(GameState.CITY, "Moved to next route point")
                 self.current_mob_group = None
                 self.explore_done = False
                 return True
-            else:
-                console.print(f"[yellow]⚠️ Пропускаем недоступный квадрат {next_point.square}[/yellow]")
-                attempts += 1
-                continue
+            console.print(f"[yellow]⚠️ Пропускаем недоступный квадрат {next_point.square}[/yellow]")
         
         # Если все квадраты недоступны
         console.print("[red]❌ Все квадраты в маршруте недоступны![/red]")
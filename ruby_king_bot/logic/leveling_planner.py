@@ -0,0 +1,331 @@
+"""
+Leveling Planner - offline plan of farm squares for every player level
+
+План строится заранее по карте мира, базе мобов и накопленной статистике
+квадратов (square_stats_*.json бандита). Модель по статистике: опыт за
+убийство пропорционален уровню моба (у серых мобов - меньше), время
+убийства растет как степень отношения уровня моба к уровню персонажа,
+а у измеренных квадратов поправляется их собственным временем. Для каждого
+уровня берется лучший квадрат каждой стороны, а в маршрут - стороны с
+доходом не ниже PLANNER_RATE_TOLERANCE от лучшей. Целью может быть опыт
+в час или дроп нужного предмета в час. Движок загружает план из
+LEVELING_PLAN_PATH вместо таблицы маршрутов.
+"""
+
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional, List, Tuple
+
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.utils.world_map_index import WorldMapIndex, SquareInfo, MOBS_DB_PATH, get_world_map_index
+from ruby_king_bot.logic.route_optimizer import RouteOptimizer
+from ruby_king_bot.logic.square_bandit import SquareBandit, SquareStats, square_key
+
+logger = logging.getLogger(__name__)
+
+EXP_OBJECTIVE = "exp"
+
+
+@dataclass
+class PlanPoint:
+    """Planned farm square of one level"""
+    location: str
+    direction: str
+    square: str
+    mob_level: int
+    rate: float  # Опыт (или предметы) в час на квадрате без переходов
+    target_mob: Optional[str] = None  # Моб с лучшим дропом целевого предмета
+    target_kills: int = 10
+
+
+def mob_level(info: SquareInfo) -> float:
+    """Average mob level of square"""
+    return (info.level_min + info.level_max) / 2
+
+
+class KillModel:
+    """Expected exp and seconds per kill fitted to recorded square stats"""
+
+    def __init__(self, exp_per_level: Optional[float] = None, base_seconds: Optional[float] = None,
+                 power: Optional[float] = None, square_factors: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Args:
+            exp_per_level: Exp per kill per mob level (defaults to Settings.PLANNER_EXP_PER_MOB_LEVEL)
+            base_seconds: Seconds per kill of a mob of player level (defaults to Settings.ROUTE_KILL_SECONDS)
+            power: Exponent of seconds per kill over mob/player level ratio
+                (defaults to Settings.PLANNER_SECONDS_POWER)
+            square_factors: {square key: (measured / model seconds, kills)} of measured squares
+        """
+        self.exp_per_level = Settings.PLANNER_EXP_PER_MOB_LEVEL if exp_per_level is None else exp_per_level
+        self.base_seconds = Settings.ROUTE_KILL_SECONDS if base_seconds is None else base_seconds
+        self.power = Settings.PLANNER_SECONDS_POWER if power is None else power
+        self.square_factors = square_factors or {}
+
+    @staticmethod
+    def gray(level: float, player_level: float) -> float:
+        """Exp share of mob level for player level"""
+        return Settings.PLANNER_GRAY_FACTOR if level < player_level - Settings.PLANNER_GRAY_LEVELS else 1.0
+
+    def exp_per_kill(self, level: float, player_level: int) -> float:
+        return self.exp_per_level * level * self.gray(level, player_level)
+
+    def seconds_per_kill(self, key: str, level: float, player_level: int) -> float:
+        seconds = self.base_seconds * (level / max(player_level, 1)) ** self.power
+        factor, kills = self.square_factors.get(key, (1.0, 0.0))
+        # Свое время квадрата перевешивает модель по мере числа убийств
+        prior = Settings.PLANNER_PRIOR_KILLS
+        return seconds * (factor * kills + prior) / (kills + prior)
+
+    @classmethod
+    def fit(cls, stats: Dict[str, SquareStats], world_map: WorldMapIndex) -> 'KillModel':
+        """
+        Fit model to square stats recorded with player level
+
+        Args:
+            stats: Square stats by square key
+            world_map: Compiled world map (mob levels of squares)
+
+        Returns:
+            Fitted model (defaults where stats are missing)
+        """
+        samples = []  # (key, mob level, player level, kills, exp, seconds)
+        for key, square_stats in stats.items():
+            location, _, rest = key.partition('/')
+            direction, _, square = rest.partition('/')
+            info = world_map.square(location, direction, square)
+            if info is None or info.level_min is None or square_stats.player_level is None:
+                continue
+            if square_stats.kills > 0 and square_stats.seconds > 0:
+                samples.append((key, mob_level(info), square_stats.player_level, square_stats.kills,
+                                square_stats.exp, square_stats.seconds))
+        if not samples:
+            logger.info("No square stats with player level - planner uses default model")
+            return cls()
+
+        weighted_levels = sum(kills * level * cls.gray(level, player) for _, level, player, kills, _, _ in samples)
+        exp_per_level = sum(exp for *_, exp, _ in samples) / weighted_levels if weighted_levels > 0 else None
+
+        # log(сек/убийство) = log(base) + power * log(моб/персонаж): взвешенные наименьшие квадраты
+        points = [(math.log(level / player), math.log(seconds / kills), kills)
+                  for _, level, player, kills, _, seconds in samples]
+        total = sum(w for _, _, w in points)
+        mean_x = sum(x * w for x, _, w in points) / total
+        mean_y = sum(y * w for _, y, w in points) / total
+        var_x = sum(w * (x - mean_x) ** 2 for x, _, w in points) / total
+        if var_x > 1e-4:
+            power = max(0.0, sum(w * (x - mean_x) * (y - mean_y) for x, y, w in points) / total / var_x)
+        else:
+            power = Settings.PLANNER_SECONDS_POWER  # Все измерения на одном соотношении уровней
+        base_seconds = math.exp(mean_y - power * mean_x)
+
+        model = cls(exp_per_level, base_seconds, power)
+        model.square_factors = {
+            key: (seconds / kills / model.seconds_per_kill(key, level, player), kills)
+            for key, level, player, kills, _, seconds in samples
+        }
+        logger.info(f"Kill model: {model.exp_per_level:.2f} exp per mob level, {model.base_seconds:.1f}s per kill "
+                    f"x (mob/player level)^{model.power:.2f} over {len(samples)} squares")
+        return model
+
+
+class LevelingPlan:
+    """Farm squares per player level produced by the planner"""
+
+    def __init__(self, objective: str, levels: Dict[int, List[PlanPoint]],
+                 rates: Optional[Dict[int, float]] = None):
+        """
+        Args:
+            objective: "exp" or id of target item
+            levels: Planned points by player level
+            rates: Expected route yield per hour by level (travel included)
+        """
+        self.objective = objective
+        self.levels = levels
+        self.rates = rates or {}
+
+    def points(self, player_level: int) -> List[PlanPoint]:
+        """Planned points of level (nearest planned level below, else empty)"""
+        below = [level for level in self.levels if level <= player_level]
+        return list(self.levels[max(below)]) if below else []
+
+    def save(self, path: str):
+        """Write plan as JSON"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {
+            'objective': self.objective,
+            'levels': {str(level): {'rate': round(self.rates.get(level, 0.0), 1),
+                                    'points': [asdict(point) for point in points]}
+                       for level, points in sorted(self.levels.items())},
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> Optional['LevelingPlan']:
+        """
+        Load plan
+
+        Args:
+            path: Plan file (defaults to Settings.LEVELING_PLAN_PATH)
+
+        Returns:
+            Plan or None if there is no readable plan
+        """
+        path = path or Settings.LEVELING_PLAN_PATH
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            levels = {int(level): [PlanPoint(**point) for point in row['points']]
+                      for level, row in data['levels'].items()}
+            rates = {int(level): row.get('rate', 0.0) for level, row in data['levels'].items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Leveling plan {path} is not readable: {e}")
+            return None
+        logger.info(f"Leveling plan loaded: {data.get('objective')}, {len(levels)} levels from {path}")
+        return cls(data.get('objective', EXP_OBJECTIVE), levels, rates)
+
+
+class LevelingPlanner:
+    """Chooses farm squares of every level by expected yield per hour"""
+
+    def __init__(self, world_map: Optional[WorldMapIndex] = None, model: Optional[KillModel] = None,
+                 optimizer: Optional[RouteOptimizer] = None, mobs_path: str = MOBS_DB_PATH,
+                 max_mob_level: Optional[int] = None):
+        """
+        Args:
+            world_map: Compiled world map (defaults to the process-wide index)
+            model: Kill model (defaults to the default model)
+            optimizer: Route order and kills per square (travel of planned routes)
+            mobs_path: Mobs database with drops (target item plans)
+            max_mob_level: Squares with higher min mob level are never planned
+        """
+        self.world_map = world_map or get_world_map_index()
+        self.model = model or KillModel()
+        self.optimizer = optimizer or RouteOptimizer()
+        self.mobs_path = mobs_path
+        self.max_mob_level = max_mob_level
+        self._drops: Optional[Dict[str, List[Dict[str, Any]]]] = None
+
+    def _mob_drops(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Drop lists by mob name"""
+        if self._drops is None:
+            try:
+                with open(self.mobs_path, 'r', encoding='utf-8') as f:
+                    self._drops = {mob['name']: mob.get('drop', []) for mob in json.load(f) if mob.get('name')}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Mobs database {self.mobs_path} is not available: {e}")
+                self._drops = {}
+        return self._drops
+
+    def item_per_kill(self, location: str, direction: str, item_id: str,
+                      player_level: int) -> Tuple[float, Optional[str]]:
+        """
+        Expected target items per kill on location side
+
+        Мобы стороны считаются равновероятными.
+
+        Returns:
+            (items per kill, mob with the best drop)
+        """
+        mobs = self.world_map.mobs_at(location, direction)
+        best_mob, best_drop, total = None, 0.0, 0.0
+        for name in mobs:
+            drop = 0.0
+            for entry in self._mob_drops().get(name, []):
+                min_level = entry.get('minLvlDrop')
+                if entry.get('id') != item_id or (isinstance(min_level, int) and player_level < min_level):
+                    continue
+                drop += float(entry.get('chance') or 0) / 100 * entry.get('count', 1)
+            total += drop
+            if drop > best_drop:
+                best_mob, best_drop = name, drop
+        return (total / len(mobs) if mobs else 0.0), best_mob
+
+    def _candidates(self, player_level: int) -> List[SquareInfo]:
+        top = player_level + Settings.PLANNER_MAX_LEVELS_ABOVE
+        if self.max_mob_level is not None:
+            top = min(top, self.max_mob_level)
+        return [info for info in self.world_map.squares_for_level(1, self.world_map.max_level)
+                if info.level_min <= top]
+
+    def plan_level(self, player_level: int, item_id: Optional[str] = None) -> Tuple[List[PlanPoint], float]:
+        """
+        Best squares of one level
+
+        Args:
+            player_level: Player level
+            item_id: Target item (None - maximize exp)
+
+        Returns:
+            (route points in travel order, expected yield per hour with travel)
+        """
+        model = self.model
+        best: Dict[Tuple[str, str], Tuple[PlanPoint, float]] = {}
+        for info in self._candidates(player_level):
+            level = mob_level(info)
+            seconds = model.seconds_per_kill(square_key(info), level, player_level)
+            target_mob = None
+            if item_id:
+                per_kill, target_mob = self.item_per_kill(info.location, info.direction, item_id, player_level)
+            else:
+                per_kill = model.exp_per_kill(level, player_level)
+            rate = per_kill / seconds * 3600
+            side = (info.location, info.direction)
+            if rate > 0 and (side not in best or rate > best[side][0].rate):
+                best[side] = (PlanPoint(info.location, info.direction, info.square, info.level_min,
+                                        round(rate, 2), target_mob), seconds)
+        if not best:
+            return [], 0.0
+
+        ranked = sorted(best.values(), key=lambda item: -item[0].rate)
+        limit = ranked[0][0].rate * Settings.PLANNER_RATE_TOLERANCE
+        chosen = [item for i, item in enumerate(ranked[:Settings.PLANNER_ROUTE_SIZE])
+                  if item[0].rate >= limit or i < Settings.PLANNER_MIN_ROUTE_SIZE]
+        seconds = {square_key(point): value for point, value in chosen}
+        route = self.optimizer.order([point for point, _ in chosen])
+        self.optimizer.assign_kills(route)
+
+        # Доход маршрута: фарм всех точек плюс переходы по циклу
+        gained = sum(point.target_kills * point.rate * seconds[square_key(point)] / 3600 for point in route)
+        spent = sum(point.target_kills * seconds[square_key(point)] for point in route) + \
+            self.optimizer.cycle_cost(route)
+        return route, gained / spent * 3600
+
+    def plan(self, levels: range, item_id: Optional[str] = None) -> LevelingPlan:
+        """
+        Plan every level of the range
+
+        Args:
+            levels: Player levels
+            item_id: Target item (None - maximize exp)
+
+        Returns:
+            Leveling plan
+        """
+        plan = LevelingPlan(item_id or EXP_OBJECTIVE, {})
+        for level in levels:
+            points, rate = self.plan_level(level, item_id)
+            if points:
+                plan.levels[level] = points
+                plan.rates[level] = rate
+        logger.info(f"Leveling plan: {len(plan.levels)} levels, objective {plan.objective}")
+        return plan
+
+
+def load_stats(paths: List[str]) -> Dict[str, SquareStats]:
+    """Merge square stats of several characters"""
+    merged: Dict[str, SquareStats] = {}
+    for path in paths:
+        for key, stats in SquareBandit(path).stats.items():
+            total = merged.setdefault(key, SquareStats())
+            for field in SquareStats.FIELDS:
+                setattr(total, field, getattr(total, field) + getattr(stats, field))
+    return merged
+
@@ -0,0 +1,94 @@
+"""
+Mob Mapper - tracks current farming position and mobs killed on each square
+"""
+
+import logging
+from typing import Dict, Any, Optional, List
+
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.utils.world_map_index import parse_level_range
+
+logger = logging.getLogger(__name__)
+
+class MobMapper:
+    """Keeps kill statistics per square and the sequence of suitable squares in current direction"""
+
+    def __init__(self):
+        self.current_location: Optional[str] = None
+        self.current_direction: Optional[str] = None
+        self.current_square: Optional[str] = None
+        self.player_level = 1
+
+        # Подходящие квадраты текущего направления в порядке обхода
+        self.current_direction_squares: List[str] = []
+        self._sequence_index = 0
+
+        # (location, direction, square) -> {mob_name: {"kills": N, "level": L}}
+        self.kills: Dict[tuple, Dict[str, Dict[str, Any]]] = {}
+
+    def set_current_position(self, location: str, direction: str, square: Optional[str]):
+        """Set current farming position"""
+        self.current_location = location
+        self.current_direction = direction
+        self.current_square = square
+
+    def set_position(self, location: str, direction: str, square: Optional[str]):
+        """Alias of set_current_position used by route-based farming"""
+        self.set_current_position(location, direction, square)
+
+    def set_player_level(self, level: int):
+        """Set player level used to pick suitable squares"""
+        self.player_level = level
+
+    def record_mob_kill(self, mob_name: str, mob_level: Any, mob_hp: int = 0, mob_max_hp: int = 0):
+        """
+        Record killed mob on current square
+
+        Args:
+            mob_name: Mob name
+            mob_level: Mob level
+            mob_hp: HP left (0 for killed mob)
+            mob_max_hp: Max HP of mob
+        """
+        key = (self.current_location, self.current_direction, self.current_square)
+        square_kills = self.kills.setdefault(key, {})
+        stats = square_kills.setdefault(mob_name, {'kills': 0, 'level': mob_level, 'max_hp': mob_max_hp})
+        stats['kills'] += 1
+        stats['level'] = mob_level
+        stats['max_hp'] = mob_max_hp or stats['max_hp']
+        logger.debug(f"Mob kill recorded: {mob_name} (lvl {mob_level}) at {key}, total {stats['kills']}")
+
+    def update_direction_squares(self, squares_data: List[Dict[str, Any]]):
+        """
+        Pick suitable squares from change_geo response
+
+        Args:
+            squares_data: List of squares ({"position": ..., "lvlMobs": ...})
+        """
+        min_level = max(1, self.player_level - Settings.ROUTE_LEVEL_WINDOW)
+        suitable = []
+        for square in squares_data:
+            position = square.get('position')
+            level_data = square.get('lvlMobs')
+            if not position or (isinstance(level_data, dict) and (level_data.get('locoId') or level_data.get('locoName'))):
+                continue  # Внутренние локации не фармим
+            level_range = parse_level_range(level_data)
+            if level_range and min_level <= level_range[0] <= self.player_level:
+                suitable.append((level_range[0], position))
+        # Сначала квадраты с самыми сильными подходящими мобами
+        suitable.sort(key=lambda item: item[0], reverse=True)
+        self.current_direction_squares = [position for _, position in suitable]
+        self._sequence_index = 0
+        logger.info(f"Suitable squares for level {self.player_level}: {self.current_direction_squares}")
+
+    def get_next_suitable_square_in_sequence(self) -> Optional[str]:
+        """Get next suitable square of current direction (cycles through the list)"""
+        if not self.current_direction_squares:
+            return None
+        square = self.current_direction_squares[self._sequence_index % len(self.current_direction_squares)]
+        self._sequence_index += 1
+        return square
+
+    def get_square_kills(self, location: str, direction: str, square: str) -> Dict[str, Dict[str, Any]]:
+        """Get kill statistics of square"""
+        return dict(self.kills.get((location, direction, square), {}))
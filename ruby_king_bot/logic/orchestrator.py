@@ -0,0 +1,179 @@
+"""
+Orchestrator - runs many characters in one process
+"""
+
+import asyncio
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, List, Optional
+import aiohttp
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+
+from ruby_king_bot.api.client import APIClient
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.logic import game_engine
+from ruby_king_bot.logic.game_engine import GameEngine
+from ruby_king_bot.logic.world_map_router import WorldMapRouter
+from ruby_king_bot.ui.display import GameDisplay
+
+logger = logging.getLogger(__name__)
+console = Console()
+
+class CharacterOrchestrator:
+    """Runs one GameEngine per character on a shared event loop and thread pool"""
+
+    def __init__(self, profiles: List[Dict[str, str]], snapshots: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            profiles: Character profiles ({"name": ..., "token": ...})
+            snapshots: Engine snapshots by character name (after worker restart)
+        """
+        if not profiles:
+            raise ValueError("No character profiles given")
+        self.profiles = profiles
+        self.snapshots = snapshots or {}
+        self.engines: Dict[str, GameEngine] = {}
+        self.futures: Dict[str, Future] = {}
+
+        # Один event loop и один пул соединений на все аккаунты
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="orchestrator-loop", daemon=True)
+        self._loop_thread.start()
+        self._session = self._run(self._create_session())
+        self._executor = ThreadPoolExecutor(max_workers=len(profiles), thread_name_prefix="character")
+
+        # Общие данные только для чтения: карта мира загружается один раз
+        self.world_router = WorldMapRouter()
+
+        # Вывод движков в консоль отключаем - показываем общую таблицу
+        game_engine.console.quiet = True
+
+    def _run(self, coro) -> Any:
+        """Run coroutine on the shared loop and wait for result"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _create_session(self) -> aiohttp.ClientSession:
+        """Create pooled session shared by all characters"""
+        connector = aiohttp.TCPConnector(
+            limit=Settings.CONNECTION_POOL_SIZE * len(self.profiles),
+            keepalive_timeout=Settings.CONNECTION_KEEPALIVE
+        )
+        return aiohttp.ClientSession(
+            headers=Settings.DEFAULT_HEADERS,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=Settings.REQUEST_TIMEOUT)
+        )
+
+    def build_engines(self):
+        """Create engine per profile; each has its own API client and pacer (rate-limit budget)"""
+        for profile in self.profiles:
+            name = profile['name']
+            api_client = APIClient(profile['token'], loop=self._loop, session=self._session)
+            self.engines[name] = GameEngine(
+                api_client=api_client,
+                display=GameDisplay(headless=True),
+                world_router=self.world_router,
+                character_name=name
+            )
+            if name in self.snapshots:
+                self.engines[name].restore_snapshot(self.snapshots[name])
+            logger.info(f"Engine created for character {name}")
+
+    def _run_engine(self, name: str, engine: GameEngine, start_delay: float):
+        """Worker thread body: initialize and run one character"""
+        time.sleep(start_delay)
+        try:
+            engine.initialize()
+            engine.run()
+            if engine.fatal_error is not None:
+                # run() сам перехватывает ошибки - пробрасываем, чтобы персонаж считался упавшим
+                raise engine.fatal_error
+        except Exception as e:
+            logger.error(f"Character {name} stopped with error: {e}")
+            raise
+        finally:
+            logger.info(f"Character {name} finished")
+
+    def start(self):
+        """Start all characters in worker threads without blocking"""
+        if not self.engines:
+            self.build_engines()
+
+        for index, (name, engine) in enumerate(self.engines.items()):
+            start_delay = index * Settings.ORCHESTRATOR_START_STAGGER
+            self.futures[name] = self._executor.submit(self._run_engine, name, engine, start_delay)
+
+    def is_finished(self) -> bool:
+        """True when all characters have stopped"""
+        return all(future.done() for future in self.futures.values())
+
+    def failed_characters(self) -> List[str]:
+        """Names of characters whose engine stopped with an error"""
+        return [name for name, future in self.futures.items()
+                if future.done() and future.exception() is not None]
+
+    def get_snapshots(self) -> Dict[str, Dict[str, Any]]:
+        """Get engine snapshots of all characters"""
+        return {name: engine.get_snapshot() for name, engine in self.engines.items()}
+
+    def run(self):
+        """Run all characters until they finish or user interrupts"""
+        self.start()
+
+        console.print(f"[bold blue]Запущено персонажей: {len(self.engines)}[/bold blue]")
+        try:
+            with Live(self.create_summary_table(), refresh_per_second=1, console=console) as live:
+                while not self.is_finished():
+                    live.update(self.create_summary_table())
+                    time.sleep(Settings.UI_REFRESH_RATE)
+                live.update(self.create_summary_table())
+        except KeyboardInterrupt:
+            console.print("\n[yellow]Остановка всех персонажей...[/yellow]")
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Stop engines, wait for workers and close shared resources"""
+        for engine in self.engines.values():
+            engine.stop()
+        self._executor.shutdown(wait=True)
+        self._run(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join(timeout=5)
+
+    def get_summary(self) -> List[Dict[str, Any]]:
+        """Get per-character status rows"""
+        rows = []
+        for name, engine in self.engines.items():
+            future = self.futures.get(name)
+            if future is None:
+                status = "ожидание"
+            elif future.done():
+                status = "ошибка" if future.exception() else "остановлен"
+            else:
+                status = engine.state_manager.get_current_state().value
+            stats = engine.get_session_stats()
+            rows.append({
+                'name': name,
+                'status': status,
+                'level': engine.player.level,
+                'hp': f"{engine.player.hp}/{engine.player.max_hp}",
+                'exp': stats.get('total_exp', 0),
+                'gold': stats.get('session_gold', 0),
+                'square': engine.player.current_square or "-",
+            })
+        return rows
+
+    def create_summary_table(self) -> Table:
+        """Create summary table of all characters"""
+        table = Table(title="Ruby King Bot - персонажи")
+        for column in ("Персонаж", "Состояние", "Уровень", "HP", "Опыт", "Золото", "Квадрат"):
+            table.add_column(column)
+        for row in self.get_summary():
+            table.add_row(row['name'], row['status'], str(row['level']), row['hp'],
+                          str(row['exp']), str(row['gold']), row['square'])
+        return table
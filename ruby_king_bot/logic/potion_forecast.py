@@ -0,0 +1,231 @@
+"""
+Potion Forecast - potion consumption forecaster for city trips
+
+Расход зелий считается отдельно для каждого квадрата и уровня мобов:
+сколько зелий лечения и маны уходит на одно убийство и сколько убийств
+в час делает персонаж. По остатку в рюкзаке прогнозируется, на сколько
+убийств и часов хватит зелий. Поездка назначается до того, как зелья
+кончатся, а если фарм и так прерывается (отдых), пополнение делается
+заодно. Закупка рассчитывается так, чтобы оба вида зелий кончились
+одновременно и как можно позже в пределах золота и лимита запаса.
+"""
+
+import logging
+import math
+from typing import Dict, Optional, Tuple
+
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.utils.clock import clock
+
+logger = logging.getLogger(__name__)
+
+HEAL = 'heal'
+MANA = 'mana'
+POTION_IDS = {HEAL: 'm_1', MANA: 'm_3'}
+
+# (квадрат, уровень моба)
+UsageKey = Tuple[Optional[str], int]
+
+
+class UsageStats:
+    """Potions spent and farming time over kills of one square and mob level"""
+
+    __slots__ = ('kills', 'heal', 'mana', 'seconds')
+
+    def __init__(self):
+        self.kills = 0
+        self.heal = 0
+        self.mana = 0
+        self.seconds = 0.0  # Время фарма, за которое сделаны убийства с известным интервалом
+
+    def add(self, heal: int, mana: int, seconds: Optional[float]):
+        self.kills += 1
+        self.heal += heal
+        self.mana += mana
+        if seconds is not None:
+            self.seconds += seconds
+
+    def per_kill(self, kind: str) -> float:
+        return (self.heal if kind == HEAL else self.mana) / self.kills if self.kills else 0.0
+
+    @property
+    def kills_per_hour(self) -> Optional[float]:
+        return self.kills / self.seconds * 3600 if self.seconds > 0 else None
+
+
+class PotionForecast:
+    """How long the potion stock lasts at current consumption"""
+
+    __slots__ = ('heal_per_kill', 'mana_per_kill', 'kills_per_hour', 'kills_left', 'hours_left', 'limiting')
+
+    def __init__(self, heal_per_kill: float, mana_per_kill: float, kills_per_hour: Optional[float],
+                 kills_left: float, limiting: Optional[str]):
+        self.heal_per_kill = heal_per_kill
+        self.mana_per_kill = mana_per_kill
+        self.kills_per_hour = kills_per_hour
+        self.kills_left = kills_left  # inf - зелья не расходуются
+        self.hours_left = kills_left / kills_per_hour if kills_per_hour else None
+        self.limiting = limiting  # Вид зелий, который кончится первым
+
+    def __repr__(self) -> str:
+        if math.isinf(self.kills_left):
+            return "без расхода"
+        hours = f", ~{self.hours_left:.1f}ч" if self.hours_left is not None else ""
+        return f"на {self.kills_left:.0f} убийств{hours} ({self.limiting})"
+
+
+class PotionForecaster:
+    """Tracks potion consumption per square and mob level and plans refills"""
+
+    def __init__(self):
+        self.stats: Dict[UsageKey, UsageStats] = {}
+        self.total = UsageStats()
+        self.current_key: Optional[UsageKey] = None  # Где персонаж фармит сейчас
+        self.potion_price: Optional[float] = None  # Цена зелья, узнается по первой покупке
+        self._spent = {HEAL: 0, MANA: 0}  # Зелья с последнего убийства
+        self._last_kill: Optional[float] = None
+
+    def record_potion(self, kind: str):
+        """
+        Record potion used in a fight
+
+        Args:
+            kind: HEAL or MANA
+        """
+        self._spent[kind] += 1
+
+    def record_kill(self, square: Optional[str], mob_level: int, now: Optional[float] = None):
+        """
+        Attribute potions used since previous kill to square and mob level
+
+        Args:
+            square: Square of the fight
+            mob_level: Level of the killed mob
+            now: Kill time (clock time if not given)
+        """
+        now = clock.time() if now is None else now
+        seconds = now - self._last_kill if self._last_kill is not None else None
+        key = (square, mob_level)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = UsageStats()
+        stats.add(self._spent[HEAL], self._spent[MANA], seconds)
+        self.total.add(self._spent[HEAL], self._spent[MANA], seconds)
+        self._spent = {HEAL: 0, MANA: 0}
+        self._last_kill = now
+        self.current_key = key
+
+    def pause(self):
+        """Farming interrupted (trip, rest): time until next kill is not counted"""
+        self._last_kill = None
+
+    def _usage(self) -> Optional[UsageStats]:
+        """Stats of current square, overall stats until it has enough kills"""
+        stats = self.stats.get(self.current_key)
+        if stats is not None and stats.kills >= Settings.POTION_FORECAST_MIN_KILLS:
+            return stats
+        if self.total.kills >= Settings.POTION_FORECAST_MIN_KILLS:
+            return self.total
+        return None
+
+    def forecast(self, heal: int, mana: int) -> Optional[PotionForecast]:
+        """
+        Forecast how long stock lasts on current square
+
+        Args:
+            heal: Healing potions in stock
+            mana: Mana potions in stock
+
+        Returns:
+            Forecast or None while there are too few kills to tell
+        """
+        usage = self._usage()
+        if usage is None:
+            return None
+        kills_left = math.inf
+        limiting = None
+        for kind, count in ((HEAL, heal), (MANA, mana)):
+            rate = usage.per_kill(kind)
+            if rate > 0 and count / rate < kills_left:
+                kills_left = count / rate
+                limiting = kind
+        return PotionForecast(usage.per_kill(HEAL), usage.per_kill(MANA), usage.kills_per_hour,
+                              kills_left, limiting)
+
+    def should_trip(self, heal: int, mana: int, other_need: bool = False) -> Optional[str]:
+        """
+        Decide whether to refill potions now
+
+        Args:
+            heal: Healing potions in stock
+            mana: Mana potions in stock
+            other_need: Farming is interrupted anyway (rest) - refill early
+
+        Returns:
+            Reason of the trip or None if stock lasts
+        """
+        if min(heal, mana) <= Settings.POTION_FORECAST_MIN_STOCK:
+            return "stock"
+        forecast = self.forecast(heal, mana)
+        if forecast is None:
+            return None
+        if forecast.kills_left <= Settings.POTION_FORECAST_SAFETY_KILLS:
+            return "forecast"
+        if other_need and forecast.kills_left <= Settings.POTION_FORECAST_ALIGN_KILLS:
+            return "aligned"
+        return None
+
+    def purchase_targets(self, heal: int, mana: int, gold: int) -> Dict[str, int]:
+        """
+        Potions of each kind to have after the trip
+
+        Запас подбирается под расход: оба вида кончаются через одно и то же
+        число убийств, и это число максимально при имеющемся золоте.
+
+        Args:
+            heal: Healing potions in stock
+            mana: Mana potions in stock
+            gold: Gold available for potions
+
+        Returns:
+            Target count by potion id
+        """
+        usage = self._usage()
+        if usage is None or not self.potion_price:
+            # Пока расход или цена неизвестны - как раньше, фиксированный запас
+            return {potion_id: Settings.CITY_TRIP_POTION_TARGET for potion_id in POTION_IDS.values()}
+
+        have = {HEAL: heal, MANA: mana}
+        # Неиспользуемый вид все равно держим в небольшом запасе
+        rates = {kind: max(usage.per_kill(kind), Settings.POTION_FORECAST_MIN_RATE) for kind in have}
+        cap = Settings.POTION_STOCK_CAP
+        budget = gold - Settings.POTION_GOLD_RESERVE
+
+        def targets(kills: int) -> Dict[str, int]:
+            return {kind: max(have[kind], min(cap, math.ceil(kills * rates[kind]))) for kind in have}
+
+        def cost(kills: int) -> float:
+            return sum(count - have[kind] for kind, count in targets(kills).items()) * self.potion_price
+
+        # Бинарный поиск наибольшего числа убийств, на которое хватает золота
+        low, high = 0, math.ceil(cap / min(rates.values()))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if cost(middle) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        result = targets(low)
+        logger.info(f"Potion targets for {low} kills: {result} (gold {gold}, price {self.potion_price})")
+        return {POTION_IDS[kind]: count for kind, count in result.items()}
+
+    def observe_purchase(self, count: int, gold_spent: int):
+        """
+        Learn potion price from a purchase
+
+        Args:
+            count: Potions bought
+            gold_spent: Gold the purchase cost
+        """
+        if count > 0 and gold_spent > 0:
+            self.potion_price = gold_spent / count
@@ -0,0 +1,148 @@
+"""
+Route Optimizer - travel-cost-aware order of farming route points
+
+Переход между точками маршрута стоит разного времени: соседний квадрат
+той же стороны - один change_square, другая сторона - еще change_geo,
+другая локация - еще и выход на карту фарма (change_main_geo). Порядок
+точек подбирается как цикл наименьшей стоимости (ближайший сосед +
+2-opt), а число убийств на квадрате - так, чтобы переход к следующей
+точке занимал не больше ROUTE_TRAVEL_SHARE времени фарма на квадрате.
+"""
+
+import logging
+import math
+from typing import List, Optional, Sequence
+
+from ruby_king_bot.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class TravelCostModel:
+    """Estimated seconds to move between two farm points"""
+
+    def __init__(self, main_geo: Optional[float] = None, geo: Optional[float] = None,
+                 square: Optional[float] = None):
+        """
+        Args:
+            main_geo: Cost of leaving a location (defaults to Settings.ROUTE_COST_MAIN_GEO)
+            geo: Cost of change_geo (defaults to Settings.ROUTE_COST_GEO)
+            square: Cost of change_square (defaults to Settings.ROUTE_COST_SQUARE)
+
+        Без заданной стоимости переход стоит один запрос класса travel:
+        столько пейсер выдерживает между перемещениями.
+        """
+        travel = Settings.PACER_MIN_INTERVALS.get("travel", 0.0)
+        self.main_geo = Settings.ROUTE_COST_MAIN_GEO if main_geo is None else main_geo
+        self.geo = geo if geo is not None else (
+            travel if Settings.ROUTE_COST_GEO is None else Settings.ROUTE_COST_GEO)
+        self.square = square if square is not None else (
+            travel if Settings.ROUTE_COST_SQUARE is None else Settings.ROUTE_COST_SQUARE)
+
+    def cost(self, a, b) -> float:
+        """
+        Seconds to move from point a to point b
+
+        Args:
+            a, b: Route points (location, direction, square)
+
+        Returns:
+            Travel cost in seconds
+        """
+        if a.location == b.location and a.direction == b.direction:
+            return 0.0 if a.square == b.square else self.square
+        cost = self.geo + self.square
+        if a.location != b.location:
+            cost += self.main_geo
+        return cost
+
+
+class RouteOptimizer:
+    """Orders route points into the cheapest cycle and sets kills per square"""
+
+    def __init__(self, cost_model: Optional[TravelCostModel] = None):
+        """
+        Args:
+            cost_model: Travel cost model (defaults to Settings costs)
+        """
+        self.cost_model = cost_model or TravelCostModel()
+
+    def cycle_cost(self, points: Sequence) -> float:
+        """Travel seconds of one full pass over the cyclic route"""
+        if len(points) < 2:
+            return 0.0
+        return sum(self.cost_model.cost(points[i - 1], points[i]) for i in range(len(points)))
+
+    def order(self, points: Sequence) -> List:
+        """
+        Cheapest cycle over points (nearest neighbour, then 2-opt)
+
+        Первая точка остается первой: с нее маршрут начинается.
+
+        Args:
+            points: Route points
+
+        Returns:
+            Reordered route points
+        """
+        points = list(points)
+        count = len(points)
+        if count < 4:
+            return points
+        cost = [[self.cost_model.cost(a, b) for b in points] for a in points]
+
+        # Ближайший сосед; при равной стоимости - исходный порядок
+        tour = [0]
+        left = list(range(1, count))
+        while left:
+            last = tour[-1]
+            nearest = min(left, key=lambda j: cost[last][j])
+            left.remove(nearest)
+            tour.append(nearest)
+
+        # 2-opt: переворот отрезка tour[i..j], пока это сокращает цикл
+        improved = True
+        while improved:
+            improved = False
+            for i in range(1, count - 1):
+                for j in range(i + 1, count):
+                    a, b = tour[i - 1], tour[i]
+                    c, d = tour[j], tour[(j + 1) % count]
+                    delta = cost[a][c] + cost[b][d] - cost[a][b] - cost[c][d]
+                    if delta < -1e-9:
+                        tour[i:j + 1] = reversed(tour[i:j + 1])
+                        improved = True
+        return [points[i] for i in tour]
+
+    def assign_kills(self, points: Sequence):
+        """
+        Set target_kills of each point from the cost of leaving it
+
+        Args:
+            points: Ordered cyclic route
+        """
+        kill_seconds = Settings.ROUTE_KILL_SECONDS
+        for i, point in enumerate(points):
+            travel = self.cost_model.cost(point, points[(i + 1) % len(points)])
+            kills = math.ceil(travel / (Settings.ROUTE_TRAVEL_SHARE * kill_seconds))
+            point.target_kills = min(Settings.ROUTE_MAX_KILLS_PER_SQUARE,
+                                     max(Settings.ROUTE_MIN_KILLS_PER_SQUARE, kills))
+
+    def optimize(self, points: Sequence) -> List:
+        """
+        Order route and set kills per square
+
+        Args:
+            points: Route points (first one stays first)
+
+        Returns:
+            Optimized route
+        """
+        route = self.order(points)
+        if route:
+            self.assign_kills(route)
+        before, after = self.cycle_cost(points), self.cycle_cost(route)
+        kills = sum(point.target_kills for point in route)
+        logger.info(f"Route optimized: travel {before:.0f}s -> {after:.0f}s per cycle, "
+                    f"{kills} kills per cycle")
+        return route
@@ -0,0 +1,128 @@
+"""
+Event Scheduler - timer heap of deadlines for the main game loop
+"""
+
+import heapq
+import itertools
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from ruby_king_bot.utils.clock import clock
+
+logger = logging.getLogger(__name__)
+
+class EventScheduler:
+    """Timer heap of named deadlines that wakes the main loop exactly on time"""
+
+    def __init__(self, idle_sleep: float = 0.1):
+        """
+        Args:
+            idle_sleep: Sleep used when all deadlines have passed but the
+                last loop iteration made no progress (prevents spinning)
+        """
+        self.idle_sleep = idle_sleep
+        self._heap: List[Tuple[float, int, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._counter = itertools.count()
+
+        # Statistics
+        self.wakeups = 0
+        self.idle_time = 0.0
+
+    def schedule(self, name: str, deadline: float):
+        """
+        Schedule (or move) a named deadline
+
+        Args:
+            name: Event name (e.g. 'attack', 'rest_end', 'display')
+            deadline: Absolute time (clock.time() based)
+        """
+        if self._deadlines.get(name) == deadline:
+            return
+        self._deadlines[name] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._counter), name))
+
+    def cancel(self, name: str):
+        """Cancel a named deadline (stale heap entry is dropped lazily)"""
+        self._deadlines.pop(name, None)
+
+    def clear(self):
+        """Cancel all deadlines"""
+        self._heap.clear()
+        self._deadlines.clear()
+
+    def next_deadline(self) -> Optional[Tuple[float, str]]:
+        """
+        Get the earliest pending deadline
+
+        Returns:
+            (deadline, name) or None if nothing is scheduled
+        """
+        while self._heap:
+            deadline, _, name = self._heap[0]
+            if self._deadlines.get(name) != deadline:
+                heapq.heappop(self._heap)  # stale entry
+                continue
+            return deadline, name
+        return None
+
+    def pop_due(self, now: float) -> List[str]:
+        """
+        Remove and return all events whose deadline has passed
+
+        Args:
+            now: Current time
+
+        Returns:
+            Names of due events in deadline order
+        """
+        due = []
+        while True:
+            entry = self.next_deadline()
+            if entry is None or entry[0] > now:
+                break
+            heapq.heappop(self._heap)
+            self._deadlines.pop(entry[1], None)
+            due.append(entry[1])
+        return due
+
+    def time_until_next(self, now: float, stalled: bool = False) -> Optional[float]:
+        """
+        Get how long the loop may sleep
+
+        Args:
+            now: Current time
+            stalled: True if the last iteration made no progress
+
+        Returns:
+            Seconds to sleep, or None if nothing is scheduled
+        """
+        entry = self.next_deadline()
+        if entry is None:
+            return None
+        delay = entry[0] - now
+        if delay <= 0 and stalled:
+            return self.idle_sleep
+        return max(0.0, delay)
+
+    def sleep_until_next(self, stalled: bool = False, max_sleep: Optional[float] = None) -> List[str]:
+        """
+        Block until the next deadline and return the events that became due
+
+        Args:
+            stalled: True if the last iteration made no progress
+            max_sleep: Upper bound for one sleep
+
+        Returns:
+            Names of due events
+        """
+        delay = self.time_until_next(clock.time(), stalled)
+        if delay is None:
+            delay = self.idle_sleep
+        if max_sleep is not None:
+            delay = min(delay, max_sleep)
+        if delay > 0:
+            clock.sleep(delay)
+            self.idle_time += delay
+        self.wakeups += 1
+        return self.pop_due(clock.time())
@@ -0,0 +1,284 @@
+"""
+Square Bandit - online choice of farm square by observed yield
+
+Каждая точка маршрута - рука многорукого бандита. За визит (блок из
+target_kills убийств) копятся опыт, золото, время, расход зелий и доля
+исследований без мобов (события, пустые клетки). Награда визита - ценность
+фарма в минуту: опыт + золото с весом минус стоимость зелий. После каждого
+блока выбирается следующая точка по верхней доверительной границе (UCB)
+с учетом времени перехода; выбор той же точки означает остаться. Старые
+визиты весят меньше (SQUARE_BANDIT_DECAY), поэтому оценки следуют за
+уровнем персонажа. Статистика сохраняется между сессиями.
+"""
+
+import json
+import logging
+import math
+import os
+from typing import Dict, Optional, Sequence
+
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.utils.clock import clock
+
+logger = logging.getLogger(__name__)
+
+
+def square_key(point) -> str:
+    """Stats key of route point: 'loco/direction/square'"""
+    return f"{point.location}/{point.direction}/{point.square}"
+
+
+class SquareStats:
+    """Decayed yield statistics of one square"""
+
+    FIELDS = ('visits', 'reward_sum', 'reward_sq_sum', 'kills', 'seconds',
+              'exp', 'gold', 'potions', 'explores', 'events', 'level_sum', 'level_kills')
+
+    def __init__(self, data: Optional[Dict[str, float]] = None):
+        data = data or {}
+        for field in self.FIELDS:
+            setattr(self, field, float(data.get(field, 0.0)))
+
+    def to_dict(self) -> Dict[str, float]:
+        return {field: round(getattr(self, field), 4) for field in self.FIELDS}
+
+    def decay(self, factor: float):
+        for field in self.FIELDS:
+            setattr(self, field, getattr(self, field) * factor)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.reward_sum / self.visits if self.visits > 0 else None
+
+    @property
+    def variance(self) -> Optional[float]:
+        if self.visits < 1.5:
+            return None
+        return max(0.0, self.reward_sq_sum / self.visits - self.mean ** 2)
+
+    @property
+    def exp_per_min(self) -> float:
+        return self.exp / self.seconds * 60 if self.seconds > 0 else 0.0
+
+    @property
+    def gold_per_min(self) -> float:
+        return self.gold / self.seconds * 60 if self.seconds > 0 else 0.0
+
+    @property
+    def potions_per_kill(self) -> float:
+        return self.potions / self.kills if self.kills > 0 else 0.0
+
+    @property
+    def event_rate(self) -> float:
+        return self.events / self.explores if self.explores > 0 else 0.0
+
+    @property
+    def seconds_per_kill(self) -> Optional[float]:
+        return self.seconds / self.kills if self.kills > 0 and self.seconds > 0 else None
+
+    @property
+    def player_level(self) -> Optional[float]:
+        """Average player level of the kills (None - stats recorded without level)"""
+        return self.level_sum / self.level_kills if self.level_kills > 0 else None
+
+
+class Visit:
+    """Farming block on one square being measured"""
+
+    def __init__(self, key: str, now: float):
+        self.key = key
+        self.kills = 0
+        self.timed_kills = 0
+        self.seconds = 0.0  # Время фарма между убийствами (без отдыха и поездок)
+        self.exp = 0
+        self.gold = 0
+        self.explores = 0
+        self.events = 0
+        self.level_sum = 0  # Уровень персонажа по убийствам - для планировщика прокачки
+        self.level_kills = 0
+        self.last = now
+
+
+class SquareBandit:
+    """UCB bandit over farm squares with stats persisted between sessions"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Stats file (None - stats live only in memory)
+        """
+        self.path = path
+        self.stats: Dict[str, SquareStats] = {}
+        self.visit: Optional[Visit] = None
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.stats = {key: SquareStats(value) for key, value in data.get('squares', {}).items()}
+            logger.info(f"Square stats loaded: {len(self.stats)} squares from {self.path}")
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Square stats {self.path} are not readable, starting anew: {e}")
+
+    def save(self):
+        """Write stats atomically"""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'squares': {key: stats.to_dict() for key, stats in self.stats.items()}},
+                          f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to save square stats: {e}")
+
+    # --- Наблюдения ---
+
+    def start_visit(self, point, now: Optional[float] = None):
+        """Start measuring a farming block on route point"""
+        self.visit = Visit(square_key(point), clock.time() if now is None else now)
+
+    def record_explore(self, found_mobs: bool):
+        """Exploration result on current square (no mobs - event or empty)"""
+        if self.visit is not None:
+            self.visit.explores += 1
+            if not found_mobs:
+                self.visit.events += 1
+
+    def record_kill(self, kills: int, exp: int, gold: int, now: Optional[float] = None,
+                    level: Optional[int] = None):
+        """
+        Won fight on current square
+
+        Args:
+            kills: Mobs killed in the fight
+            exp: Experience gained
+            gold: Gold gained
+            now: Time of the victory
+            level: Player level in the fight
+        """
+        visit = self.visit
+        if visit is None:
+            return
+        now = clock.time() if now is None else now
+        visit.kills += kills
+        if level:
+            visit.level_sum += level * kills
+            visit.level_kills += kills
+        if visit.last is not None:
+            # Награда считается только по убийствам с известным временем
+            visit.seconds += now - visit.last
+            visit.timed_kills += kills
+            visit.exp += exp
+            visit.gold += gold
+        visit.last = now
+
+    def pause(self):
+        """Farming interrupted (rest, city trip): time until next kill is not counted"""
+        if self.visit is not None:
+            self.visit.last = None
+
+    def end_visit(self, potions: int = 0) -> Optional[float]:
+        """
+        Close current block and add it to square stats
+
+        Args:
+            potions: Potions used during the block
+
+        Returns:
+            Reward of the block (value per minute) or None if it was too short to measure
+        """
+        visit, self.visit = self.visit, None
+        if visit is None or visit.seconds <= 0 or visit.timed_kills == 0:
+            return None
+        minutes = visit.seconds / 60
+        potions_per_kill = potions / visit.kills if visit.kills else 0.0
+        value = (visit.exp + Settings.SQUARE_BANDIT_GOLD_WEIGHT *
+                 (visit.gold - potions_per_kill * visit.timed_kills * Settings.SQUARE_BANDIT_POTION_GOLD))
+        reward = value / minutes
+
+        stats = self.stats.get(visit.key)
+        if stats is None:
+            stats = self.stats[visit.key] = SquareStats()
+        stats.decay(Settings.SQUARE_BANDIT_DECAY)
+        stats.visits += 1
+        stats.reward_sum += reward
+        stats.reward_sq_sum += reward * reward
+        # Время и доход убийств без измеренного времени - по средним блока
+        scale = visit.kills / visit.timed_kills
+        stats.kills += visit.kills
+        stats.seconds += visit.seconds * scale
+        stats.exp += visit.exp * scale
+        stats.gold += visit.gold * scale
+        stats.potions += potions
+        stats.explores += visit.explores
+        stats.events += visit.events
+        stats.level_sum += visit.level_sum
+        stats.level_kills += visit.level_kills
+        logger.info(f"Square {visit.key}: reward {reward:.0f}/min (mean {stats.mean:.0f}), "
+                    f"exp {stats.exp_per_min:.0f}/min, gold {stats.gold_per_min:.0f}/min, "
+                    f"potions {stats.potions_per_kill:.2f}/kill, events {stats.event_rate:.0%}")
+        self.save()
+        return reward
+
+    # --- Выбор ---
+
+    def _spread(self) -> float:
+        """Reward standard deviation used for squares with one visit"""
+        variances = [stats.variance for stats in self.stats.values() if stats.variance is not None]
+        if variances:
+            return math.sqrt(sum(variances) / len(variances))
+        means = [stats.mean for stats in self.stats.values() if stats.mean is not None]
+        return abs(sum(means) / len(means)) * 0.5 if means else 1.0
+
+    def upper_bound(self, key: str, total_visits: float, spread: float) -> float:
+        """UCB of square reward (inf for a square never measured)"""
+        stats = self.stats.get(key)
+        if stats is None or stats.mean is None:
+            return math.inf
+        sd = math.sqrt(stats.variance) if stats.variance is not None else spread
+        return stats.mean + Settings.SQUARE_BANDIT_EXPLORATION * sd * math.sqrt(
+            math.log(max(total_visits, 2.0)) / stats.visits)
+
+    def choose(self, route: Sequence, current_index: int, cost_model) -> int:
+        """
+        Pick route point to farm next
+
+        Точка, которая еще не измерялась, берется первой по порядку маршрута
+        (переход к ней самый дешевый). Иначе UCB награды умножается на долю
+        времени фарма в блоке с учетом перехода; текущая точка перехода не требует.
+
+        Args:
+            route: Route points with target_kills
+            current_index: Index of current point
+            cost_model: Travel cost model of the route optimizer
+
+        Returns:
+            Index of chosen point (current_index - stay)
+        """
+        count = len(route)
+        current = route[current_index]
+        for step in range(1, count + 1):
+            index = (current_index + step) % count
+            stats = self.stats.get(square_key(route[index]))
+            if stats is None or stats.mean is None:
+                return index
+
+        total_visits = sum(self.stats[square_key(point)].visits for point in route)
+        spread = self._spread()
+        best_index, best_score = current_index, -math.inf
+        for index, point in enumerate(route):
+            stats = self.stats[square_key(point)]
+            farm_seconds = point.target_kills * (stats.seconds_per_kill or Settings.ROUTE_KILL_SECONDS)
+            travel = cost_model.cost(current, point) if index != current_index else 0.0
+            score = self.upper_bound(square_key(point), total_visits, spread) * farm_seconds / (farm_seconds + travel)
+            if score > best_score:
+                best_index, best_score = index, score
+        return best_index
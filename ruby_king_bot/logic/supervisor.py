@@ -0,0 +1,257 @@
+"""
+Supervisor - shards characters across worker processes
+"""
+
+import multiprocessing
+import os
+import queue
+import time
+import logging
+from typing import Dict, Any, List, Optional
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.api.endpoints import Endpoints
+
+logger = logging.getLogger(__name__)
+console = Console()
+
+# Процессы запускаются через spawn: воркер не наследует потоки и event loop родителя
+_mp = multiprocessing.get_context("spawn")
+
+
+def shard_profiles(profiles: List[Dict[str, str]], workers: int) -> List[List[Dict[str, str]]]:
+    """
+    Split profiles round-robin between workers
+
+    Args:
+        profiles: Character profiles
+        workers: Number of worker processes
+
+    Returns:
+        Non-empty shards (at most one per worker)
+    """
+    shards = [profiles[index::workers] for index in range(max(1, workers))]
+    return [shard for shard in shards if shard]
+
+
+def worker_main(worker_id: int, profiles: List[Dict[str, str]], snapshots: Dict[str, Dict[str, Any]],
+                metrics_queue, stop_event, api_url: Optional[str] = None):
+    """
+    Worker process body: run one shard of characters and report metrics
+
+    The worker exits with code 1 as soon as one of its characters crashes,
+    so the supervisor restarts the shard from the last snapshots.
+
+    Args:
+        worker_id: Index of the shard
+        profiles: Characters of the shard
+        snapshots: Engine snapshots to resume from (after restart)
+        metrics_queue: IPC queue to the supervisor
+        stop_event: Set by supervisor to stop the worker
+        api_url: API base URL of the supervisor (spawned process doesn't inherit it)
+    """
+    # Импорт здесь: тяжелые модули (rich, aiohttp, карта мира) грузятся только в воркерах
+    from ruby_king_bot.logic.orchestrator import CharacterOrchestrator
+    from ruby_king_bot.main import setup_logging
+
+    if api_url:
+        Endpoints.BASE_URL = api_url
+    setup_logging()
+    orchestrator = CharacterOrchestrator(profiles, snapshots=snapshots)
+    orchestrator.start()
+
+    def report():
+        metrics_queue.put({
+            'worker_id': worker_id,
+            'pid': os.getpid(),
+            'cpu_time': time.process_time(),
+            'characters': orchestrator.get_summary(),
+            'snapshots': orchestrator.get_snapshots(),
+        })
+
+    try:
+        while (not orchestrator.is_finished() and not orchestrator.failed_characters()
+               and not stop_event.is_set()):
+            report()
+            stop_event.wait(Settings.SUPERVISOR_REPORT_INTERVAL)
+    finally:
+        orchestrator.shutdown()
+        report()
+
+    if orchestrator.failed_characters() and not stop_event.is_set():
+        logger.error(f"Worker {worker_id}: characters failed: {orchestrator.failed_characters()}")
+        raise SystemExit(1)
+
+
+class WorkerHandle:
+    """Supervisor-side state of one worker process"""
+
+    def __init__(self, worker_id: int, profiles: List[Dict[str, str]]):
+        self.worker_id = worker_id
+        self.profiles = profiles
+        self.process = None
+        self.restarts = 0
+        self.restart_at: Optional[float] = None
+        self.last_report: Dict[str, Any] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return [profile['name'] for profile in self.profiles]
+
+
+class ProcessSupervisor:
+    """Runs character shards in worker processes and restarts crashed workers"""
+
+    def __init__(self, profiles: List[Dict[str, str]], workers: Optional[int] = None):
+        """
+        Args:
+            profiles: Character profiles
+            workers: Number of worker processes (defaults to CPU count)
+        """
+        # Переопределение адреса API (--api-url) передается воркерам явно
+        self.api_url = Endpoints.BASE_URL
+        workers = workers or os.cpu_count() or 1
+        self.workers = [WorkerHandle(index, shard)
+                        for index, shard in enumerate(shard_profiles(profiles, workers))]
+        self.metrics_queue = _mp.Queue()
+        self.stop_event = _mp.Event()
+        # Последний снимок каждого персонажа - передается воркеру при перезапуске
+        self.snapshots: Dict[str, Dict[str, Any]] = {}
+        self.started_at = time.time()
+
+    def _start_worker(self, worker: WorkerHandle):
+        """Start (or restart) worker process with saved snapshots of its characters"""
+        snapshots = {name: self.snapshots[name] for name in worker.names if name in self.snapshots}
+        worker.process = _mp.Process(
+            target=worker_main,
+            args=(worker.worker_id, worker.profiles, snapshots, self.metrics_queue, self.stop_event,
+                  self.api_url),
+            name=f"ruby-king-worker-{worker.worker_id}",
+            daemon=False
+        )
+        worker.process.start()
+        worker.restart_at = None
+        logger.info(f"Worker {worker.worker_id} started (pid {worker.process.pid}): {worker.names}")
+
+    def _drain_metrics(self, timeout: float):
+        """Collect worker reports from the IPC queue"""
+        deadline = time.time() + timeout
+        while True:
+            try:
+                report = self.metrics_queue.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                return
+            worker = self.workers[report['worker_id']]
+            worker.last_report = report
+            self.snapshots.update(report.get('snapshots', {}))
+
+    def _check_workers(self):
+        """Restart crashed workers with backoff"""
+        now = time.time()
+        for worker in self.workers:
+            process = worker.process
+            if process is None or process.is_alive():
+                continue
+            if process.exitcode == 0:
+                continue  # Все персонажи воркера завершились штатно
+            if worker.restarts >= Settings.SUPERVISOR_MAX_RESTARTS:
+                continue
+            if worker.restart_at is None:
+                delay = Settings.SUPERVISOR_RESTART_BACKOFF * (2 ** worker.restarts)
+                worker.restart_at = now + delay
+                logger.warning(f"Worker {worker.worker_id} crashed (exit code {process.exitcode}), "
+                               f"restart in {delay:.0f}s")
+            elif now >= worker.restart_at:
+                worker.restarts += 1
+                self._start_worker(worker)
+
+    def _is_finished(self) -> bool:
+        """True when no worker is running or waiting for restart"""
+        for worker in self.workers:
+            if worker.process.is_alive() or worker.restart_at is not None:
+                return False
+        return True
+
+    def get_totals(self) -> Dict[str, Any]:
+        """Aggregate metrics of all characters"""
+        hours = max((time.time() - self.started_at) / 3600, 1e-9)
+        kills = sum(snapshot['session_stats'].get('mobs_killed', 0) for snapshot in self.snapshots.values())
+        exp = sum(snapshot['session_stats'].get('total_exp', 0) for snapshot in self.snapshots.values())
+        gold = sum(snapshot['session_stats'].get('session_gold', 0) for snapshot in self.snapshots.values())
+        return {
+            'workers': len(self.workers),
+            'characters': sum(len(worker.profiles) for worker in self.workers),
+            'mobs_killed': kills,
+            'kills_per_hour': kills / hours,
+            'total_exp': exp,
+            'session_gold': gold,
+            'cpu_time': sum(worker.last_report.get('cpu_time', 0.0) for worker in self.workers),
+            'restarts': sum(worker.restarts for worker in self.workers),
+        }
+
+    def create_summary_table(self) -> Table:
+        """Create per-worker summary table"""
+        table = Table(title="Ruby King Bot - воркеры")
+        for column in ("Воркер", "PID", "Статус", "Персонажи", "Убито", "Опыт", "CPU, с", "Рестарты"):
+            table.add_column(column)
+        for worker in self.workers:
+            process = worker.process
+            if process.is_alive():
+                status = "работает"
+            elif worker.restart_at is not None:
+                status = "перезапуск"
+            else:
+                status = "остановлен" if process.exitcode == 0 else f"упал ({process.exitcode})"
+            snapshots = [self.snapshots[name] for name in worker.names if name in self.snapshots]
+            table.add_row(
+                str(worker.worker_id),
+                str(process.pid),
+                status,
+                ", ".join(worker.names),
+                str(sum(s['session_stats'].get('mobs_killed', 0) for s in snapshots)),
+                str(sum(s['session_stats'].get('total_exp', 0) for s in snapshots)),
+                f"{worker.last_report.get('cpu_time', 0.0):.1f}",
+                str(worker.restarts)
+            )
+        totals = self.get_totals()
+        table.caption = (f"Всего: {totals['characters']} персонажей, {totals['mobs_killed']} убито "
+                         f"({totals['kills_per_hour']:.0f}/ч), опыт {totals['total_exp']}, "
+                         f"золото {totals['session_gold']}")
+        return table
+
+    def run(self):
+        """Start all workers and supervise them until finished or interrupted"""
+        for worker in self.workers:
+            self._start_worker(worker)
+        console.print(f"[bold blue]Запущено воркеров: {len(self.workers)}[/bold blue]")
+
+        try:
+            with Live(self.create_summary_table(), refresh_per_second=1, console=console) as live:
+                while not self._is_finished():
+                    self._drain_metrics(Settings.SUPERVISOR_REPORT_INTERVAL)
+                    self._check_workers()
+                    live.update(self.create_summary_table())
+        except KeyboardInterrupt:
+            console.print("\n[yellow]Остановка воркеров...[/yellow]")
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Stop all workers and collect their last reports"""
+        self.stop_event.set()
+        deadline = time.time() + Settings.SUPERVISOR_STOP_TIMEOUT
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            # Забираем отчеты, пока ждем: иначе воркер может зависнуть на полной очереди
+            while worker.process.is_alive() and time.time() < deadline:
+                self._drain_metrics(0.5)
+            if worker.process.is_alive():
+                logger.warning(f"Worker {worker.worker_id} did not stop in time, terminating")
+                worker.process.terminate()
+            worker.process.join()
+        self._drain_metrics(0)
+        logger.info(f"Supervisor finished: {self.get_totals()}")
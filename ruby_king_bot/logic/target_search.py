@@ -0,0 +1,170 @@
+"""
+Target Search - Bayesian search of a target mob over squares of a location
+
+Для каждого квадрата (сторона, квадрат) хранится вероятность встретить
+целевого моба в одной схватке: Beta-распределение с априорным средним по
+mobs-database.json (моб записан на стороне - 1 / число мобов стороны,
+иначе TARGET_SEARCH_OFF_SIDE_PRIOR) и нашими наблюдениями (кого
+встретили на квадрате). Поиск идет на самый перспективный непосещенный
+квадрат: ожидаемая польза - вероятность встретить цель за
+MOBS_PER_DIRECTION схваток (столько квадрат обыскивается), умноженная
+на ценность находки в секундах. Поиск останавливается, когда польза
+меньше стоимости перехода.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Any, Optional, List, Tuple, Set
+
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.config.constants import MOBS_PER_DIRECTION
+from ruby_king_bot.utils.world_map_index import WorldMapIndex, get_world_map_index
+from ruby_king_bot.logic.route_optimizer import TravelCostModel
+
+logger = logging.getLogger(__name__)
+
+# (сторона, квадрат) внутри локации
+Cell = Tuple[str, str]
+
+
+class SearchPoint:
+    """Position for the travel cost model"""
+
+    __slots__ = ('location', 'direction', 'square')
+
+    def __init__(self, location: str, direction: Optional[str], square: Optional[str]):
+        self.location = location
+        self.direction = direction
+        self.square = square
+
+
+class TargetSearch:
+    """Sightings of mobs per square and the search order for a target mob"""
+
+    def __init__(self, world_map: Optional[WorldMapIndex] = None, path: Optional[str] = None,
+                 cost_model: Optional[TravelCostModel] = None):
+        """
+        Args:
+            world_map: Compiled world map with mob placements (defaults to the process-wide index)
+            path: Sightings file (None - sightings live only in memory)
+            cost_model: Travel cost between squares (defaults to Settings route costs)
+        """
+        self.world_map = world_map or get_world_map_index()
+        self.path = path
+        self.cost_model = cost_model or TravelCostModel()
+        # "loco/direction/square" -> {"encounters": N, "mobs": {имя: число схваток с ним}}
+        self.sightings: Dict[str, Dict[str, Any]] = {}
+        self._unsaved = 0
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.sightings = json.load(f).get('squares', {})
+            logger.info(f"Mob sightings loaded: {len(self.sightings)} squares from {self.path}")
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Mob sightings {self.path} are not readable, starting anew: {e}")
+
+    def save(self):
+        """Write sightings atomically"""
+        self._unsaved = 0
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'squares': self.sightings}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to save mob sightings: {e}")
+
+    def record_encounter(self, location: str, direction: str, square: str, mob_names: List[str]):
+        """
+        Mobs met in one exploration of a square
+
+        Args:
+            location: Location id
+            direction: Location side
+            square: Square
+            mob_names: Names of the mob group
+        """
+        if not (location and direction and square and mob_names):
+            return
+        entry = self.sightings.setdefault(f"{location}/{direction}/{square}", {'encounters': 0, 'mobs': {}})
+        entry['encounters'] += 1
+        for name in set(mob_names):
+            entry['mobs'][name] = entry['mobs'].get(name, 0) + 1
+        self._unsaved += 1
+        if self._unsaved >= Settings.TARGET_SEARCH_SAVE_EVERY:
+            self.save()
+
+    def prior(self, target_mob: str, location: str, direction: str) -> float:
+        """Chance to meet target in one encounter on side by mobs database"""
+        if (location, direction) in self.world_map.mob_locations(target_mob):
+            return 1.0 / max(1, len(self.world_map.mobs_at(location, direction)))
+        return Settings.TARGET_SEARCH_OFF_SIDE_PRIOR
+
+    def probability(self, target_mob: str, location: str, direction: str, square: str) -> float:
+        """Posterior mean chance to meet target in one encounter on square"""
+        prior = self.prior(target_mob, location, direction)
+        strength = Settings.TARGET_SEARCH_PRIOR_STRENGTH
+        entry = self.sightings.get(f"{location}/{direction}/{square}", {})
+        encounters = entry.get('encounters', 0)
+        seen = entry.get('mobs', {}).get(target_mob, 0)
+        return (prior * strength + seen) / (strength + encounters)
+
+    def cells(self, location: str, level_range: Optional[Tuple[int, int]] = None) -> List[Cell]:
+        """Farm squares of location (mob level range intersecting level_range)"""
+        cells = []
+        for direction in self.world_map.directions(location):
+            for info in self.world_map.squares(location, direction):
+                if info.is_inner or info.level_min is None:
+                    continue
+                if level_range and (info.level_max < level_range[0] or info.level_min > level_range[1]):
+                    continue
+                cells.append((direction, info.square))
+        return cells
+
+    def next_square(self, target_mob: Optional[str], location: str, direction: Optional[str],
+                    square: Optional[str], visited: Set[Cell],
+                    level_range: Optional[Tuple[int, int]] = None) -> Optional[Cell]:
+        """
+        Most promising unvisited square worth the travel
+
+        Args:
+            target_mob: Mob to find (None - any suitable square, nearest first)
+            location: Location searched
+            direction: Current side
+            square: Current square
+            visited: Squares already searched in this cycle
+            level_range: Mob level range of suitable squares
+
+        Returns:
+            (side, square) to go to or None if no square is worth the travel
+        """
+        here = SearchPoint(location, direction, square)
+        best, best_net = None, 0.0
+        for cell in self.cells(location, level_range):
+            if cell in visited or cell == (direction, square):
+                continue
+            if target_mob:
+                p = self.probability(target_mob, location, cell[0], cell[1])
+                gain = (1 - (1 - p) ** MOBS_PER_DIRECTION) * Settings.TARGET_SEARCH_FIND_SECONDS
+            else:
+                gain = Settings.TARGET_SEARCH_FIND_SECONDS
+            cost = self.cost_model.cost(here, SearchPoint(location, cell[0], cell[1]))
+            net = gain - cost
+            if net > best_net:
+                best, best_net = cell, net
+        if best is None:
+            logger.info(f"Target search for {target_mob} in {location}: no square is worth the travel")
+        else:
+            logger.info(f"Target search for {target_mob} in {location}: {best[0]}/{best[1]} "
+                        f"(expected gain - travel {best_net:.0f}s)")
+        return best
@@ -0,0 +1,88 @@
+"""
+World Map Router - builds farming routes over the compiled world map
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.config.constants import DIRECTION_NAMES
+from ruby_king_bot.utils.world_map_index import WorldMapIndex, get_world_map_index
+from ruby_king_bot.logic.route_optimizer import RouteOptimizer
+from ruby_king_bot.logic.leveling_planner import LevelingPlan
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RoutePoint:
+    """A point in the farming route"""
+    location: str
+    location_name: str
+    direction: str
+    direction_name: str
+    square: str
+    mob_level: int
+    mob_name: str = "unknown"
+    target_kills: int = 10
+
+class WorldMapRouter:
+    """Builds farming routes from the shared WorldMapIndex (read-only, shared between characters)"""
+
+    def __init__(self, world_map: Optional[WorldMapIndex] = None,
+                 optimizer: Optional[RouteOptimizer] = None, plan: Optional[LevelingPlan] = None):
+        """
+        Args:
+            world_map: Compiled world map (defaults to the process-wide index)
+            optimizer: Route order and kills per square (defaults to Settings travel costs)
+            plan: Leveling plan (defaults to Settings.LEVELING_PLAN_PATH if it exists)
+        """
+        self.world_map = world_map or get_world_map_index()
+        self.optimizer = optimizer or RouteOptimizer()
+        self.plan = plan or LevelingPlan.load()
+
+    def build_optimal_route(self, player_level: int, mobs_per_square: Optional[int] = None) -> List[RoutePoint]:
+        """
+        Build route with one square per location side
+
+        Квадраты берутся из плана прокачки (leveling_planner), а без него -
+        из таблицы маршрутов по уровням (считается один раз на карту и
+        хранится в кэше индекса), поэтому смена уровня дешевая.
+
+        Args:
+            player_level: Current player level
+            mobs_per_square: Kills on each square before moving on
+                (None - sized by travel cost to the next point)
+
+        Returns:
+            Route points in cheapest travel order
+        """
+        self.world_map.refresh()
+        # Квадраты плана, которых уже нет на карте, пропускаются
+        planned = [point for point in self.plan.points(player_level)
+                   if self.world_map.square(point.location, point.direction, point.square)] if self.plan else []
+        if planned:
+            squares = [(point.location, point.direction, point.square, point.mob_level,
+                        point.target_mob or "unknown") for point in planned]
+        else:
+            table = self.world_map.route_table(Settings.ROUTE_LEVEL_WINDOW, Settings.ROUTE_MOB_LEVEL_CAP)
+            squares = [(info.location, info.direction, info.square, info.level_min, "unknown")
+                       for info in table[min(max(player_level, 1), len(table) - 1)]]
+        route = [
+            RoutePoint(
+                location=location,
+                location_name=self.world_map.location_name(location),
+                direction=direction,
+                direction_name=DIRECTION_NAMES.get(direction, direction),
+                square=square,
+                mob_level=level,
+                mob_name=mob_name,
+                target_kills=mobs_per_square or Settings.ROUTE_MIN_KILLS_PER_SQUARE
+            )
+            for location, direction, square, level, mob_name in squares
+        ]
+        logger.info(f"Route for level {player_level}: {len(route)} squares "
+                    f"({'leveling plan' if planned else 'route table'})")
+        if mobs_per_square is None:
+            return self.optimizer.optimize(route)
+        return self.optimizer.order(route)
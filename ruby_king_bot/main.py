@@ -12,6 +12,8 @@ from rich.console import Console
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from ruby_king_bot.logic.game_engine import GameEngine
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.utils.clock import clock
 
 console = Console()
 
@@ -35,6 +37,9 @@ def main():
     # Setup logging first
     setup_logging()
     
+    if Settings.VIRTUAL_CLOCK:
+        clock.use_virtual()
+    
     # Create and run game engine
     engine = GameEngine()
     engine.initialize()
@@ -0,0 +1,38 @@
+"""
+Mock server entry point for Ruby King Bot
+Serves a simulated game world locally for integration and load testing
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ruby_king_bot.sim.world import SimulatedWorld, WorldConfig
+from ruby_king_bot.sim.mock_server import LatencyModel, run_mock_server
+from ruby_king_bot.main import setup_logging
+
+def main():
+    """Mock server entry point"""
+    parser = argparse.ArgumentParser(description="Ruby King Bot - локальный mock-сервер игры")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', default="0", help="Seed of the simulated world")
+    parser.add_argument('--level', type=int, default=WorldConfig.start_level, help="Start level of new characters")
+    parser.add_argument('--latency', type=float, default=0.0, help="Mean response latency, seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Latency standard deviation, seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of HTTP 502 responses")
+    args = parser.parse_args()
+
+    setup_logging()
+    world = SimulatedWorld(WorldConfig(start_level=args.level), seed=args.seed)
+    latency = LatencyModel(args.latency, args.jitter, args.error_rate, seed=args.seed)
+    print(f"Mock server: http://{args.host}:{args.port}/api (метрики: /_sim/metrics)")
+    print(f"Запуск бота против него: python ruby_king_bot/main_multi.py --api-url http://{args.host}:{args.port}/api")
+    run_mock_server(world, latency, args.host, args.port)
+
+if __name__ == "__main__":
+    main()
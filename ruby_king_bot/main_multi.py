@@ -0,0 +1,36 @@
+"""
+Multi-character entry point for Ruby King Bot
+Runs all characters from profiles.json in one process
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ruby_king_bot.api.endpoints import Endpoints
+from ruby_king_bot.config.profiles import load_profiles
+from ruby_king_bot.logic.orchestrator import CharacterOrchestrator
+from ruby_king_bot.main import setup_logging
+
+def main():
+    """Multi-character entry point"""
+    parser = argparse.ArgumentParser(description="Ruby King Bot - несколько персонажей")
+    parser.add_argument('--profiles', help="Path to profiles JSON (default: config/profiles.json)")
+    parser.add_argument('--api-url', help="API base URL (e.g. local mock server)")
+    args = parser.parse_args()
+
+    if args.api_url:
+        Endpoints.BASE_URL = args.api_url.rstrip('/')
+    setup_logging()
+    profiles = load_profiles(args.profiles)
+    logging.getLogger(__name__).info(f"Loaded {len(profiles)} character profiles")
+
+    orchestrator = CharacterOrchestrator(profiles)
+    orchestrator.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Leveling planner entry point for Ruby King Bot
+Writes farm squares of every player level to LEVELING_PLAN_PATH
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.utils.world_map_index import get_world_map_index
+from ruby_king_bot.logic.leveling_planner import KillModel, LevelingPlanner, load_stats
+
+def main():
+    """Planner entry point"""
+    parser = argparse.ArgumentParser(description="Ruby King Bot - план квадратов фарма по уровням")
+    parser.add_argument('--stats', nargs='*', help="Square stats files (default: stats of all characters)")
+    parser.add_argument('--item', help="Target item id: maximize its drop instead of exp")
+    parser.add_argument('--from-level', type=int, default=1)
+    parser.add_argument('--to-level', type=int, help="Last planned level (default: map max + route window)")
+    parser.add_argument('--max-mob-level', type=int, default=Settings.ROUTE_MOB_LEVEL_CAP,
+                        help="Never plan squares with higher mobs")
+    parser.add_argument('--out', default=Settings.LEVELING_PLAN_PATH, help="Plan JSON path")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    stats_paths = args.stats
+    if stats_paths is None:
+        stats_paths = glob.glob(Settings.SQUARE_BANDIT_PATH.format(name="*")) if Settings.SQUARE_BANDIT_PATH else []
+    world_map = get_world_map_index()
+    planner = LevelingPlanner(world_map, KillModel.fit(load_stats(stats_paths), world_map),
+                              max_mob_level=args.max_mob_level)
+    to_level = args.to_level or world_map.max_level + Settings.ROUTE_LEVEL_WINDOW
+    plan = planner.plan(range(args.from_level, to_level + 1), args.item)
+    plan.save(args.out)
+    for level, points in sorted(plan.levels.items()):
+        squares = ", ".join(f"{point.location}/{point.direction}/{point.square}" for point in points)
+        print(f"{level:3d}: {plan.rates[level]:9.1f}/ч  {squares}")
+    print(f"План сохранен: {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Supervisor entry point for Ruby King Bot
+Shards characters from profiles.json across worker processes
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ruby_king_bot.api.endpoints import Endpoints
+from ruby_king_bot.config.profiles import load_profiles
+from ruby_king_bot.logic.supervisor import ProcessSupervisor
+from ruby_king_bot.main import setup_logging
+
+def main():
+    """Supervisor entry point"""
+    parser = argparse.ArgumentParser(description="Ruby King Bot - персонажи в нескольких процессах")
+    parser.add_argument('--profiles', help="Path to profiles JSON (default: config/profiles.json)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument('--api-url', help="API base URL (e.g. local mock server)")
+    args = parser.parse_args()
+
+    if args.api_url:
+        Endpoints.BASE_URL = args.api_url.rstrip('/')
+    setup_logging()
+    profiles = load_profiles(args.profiles)
+    logging.getLogger(__name__).info(f"Sharding {len(profiles)} characters across {args.workers} workers")
+
+    supervisor = ProcessSupervisor(profiles, workers=args.workers)
+    supervisor.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""
+Simulation package for Ruby King Bot
+Contains simulated game world, in-process transports and local mock server for offline testing
+"""
+
+from .world import SimulatedWorld, WorldConfig
+from .mock_server import LatencyModel, create_app, run_mock_server
+from .transport import SimTransport, BlockingSimTransport
+
+__all__ = [
+    'SimulatedWorld',
+    'WorldConfig',
+    'LatencyModel',
+    'create_app',
+    'run_mock_server',
+    'SimTransport',
+    'BlockingSimTransport'
+]
@@ -0,0 +1,104 @@
+"""
+Mock Server - local HTTP stand-in for https://ruby-king.ru/api
+
+Отдает ответы SimulatedWorld по тем же путям, что и игровой API,
+с настраиваемой задержкой и долей сбоев сети. Метрики мира доступны
+по GET /_sim/metrics, сброс персонажей - POST /_sim/reset.
+"""
+
+import asyncio
+import json
+import logging
+import random
+from typing import Any, Optional
+from aiohttp import web
+
+from ruby_king_bot.sim.world import SimulatedWorld
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/api"
+
+
+class LatencyModel:
+    """Injected response latency and network failures"""
+
+    def __init__(self, mean: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: Any = None):
+        """
+        Args:
+            mean: Mean response latency in seconds
+            jitter: Standard deviation of latency in seconds
+            error_rate: Share of requests answered with HTTP 502
+            seed: Seed of latency rolls
+        """
+        self.mean = mean
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+    def sample(self) -> float:
+        """Latency of the next response"""
+        if self.jitter <= 0:
+            return max(0.0, self.mean)
+        return max(0.0, self.rng.gauss(self.mean, self.jitter))
+
+    def should_fail(self) -> bool:
+        """True if the next response must be a network failure"""
+        return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+
+def _json_response(body: Any, status: int = 200) -> web.Response:
+    return web.json_response(body, status=status, dumps=lambda obj: json.dumps(obj, ensure_ascii=False))
+
+
+def create_app(world: SimulatedWorld, latency: Optional[LatencyModel] = None) -> web.Application:
+    """
+    Build aiohttp application serving the simulated world
+
+    Args:
+        world: Simulated world
+        latency: Latency model (no latency by default)
+
+    Returns:
+        Application
+    """
+    latency = latency or LatencyModel()
+
+    async def handle_api(request: web.Request) -> web.Response:
+        token = request.query.get('name')
+        if not token:
+            return _json_response({'status': 'fail', 'message': "Не указан персонаж"}, status=401)
+        data = {}
+        if request.can_read_body:
+            try:
+                data = await request.json()
+            except ValueError:
+                return _json_response({'status': 'fail', 'message': "Некорректный JSON"}, status=400)
+        delay = latency.sample()
+        if delay:
+            await asyncio.sleep(delay)
+        if latency.should_fail():
+            return web.Response(status=502, text="Bad Gateway")
+        endpoint = "/" + request.match_info['path']
+        status, body = world.handle(token, request.method, endpoint, data if isinstance(data, dict) else {})
+        return _json_response(body, status=status)
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return _json_response(world.metrics())
+
+    async def handle_reset(request: web.Request) -> web.Response:
+        world.reset()
+        return _json_response({'status': 'success'})
+
+    app = web.Application()
+    app.router.add_get('/_sim/metrics', handle_metrics)
+    app.router.add_post('/_sim/reset', handle_reset)
+    app.router.add_route('*', API_PREFIX + '/{path:.*}', handle_api)
+    return app
+
+
+def run_mock_server(world: SimulatedWorld, latency: Optional[LatencyModel] = None,
+                    host: str = "127.0.0.1", port: int = 8765):
+    """Serve the simulated world until interrupted"""
+    logger.info(f"[SIM] Mock server on http://{host}:{port}{API_PREFIX}")
+    web.run_app(create_app(world, latency), host=host, port=port, print=None)
@@ -0,0 +1,87 @@
+"""
+Sim Transport - in-process API transports answering from SimulatedWorld
+
+Без HTTP и event loop сервера: клиент вызывает мир напрямую, а задержка
+ответа тратится через clock, поэтому с виртуальными часами сутки фарма
+проходят за секунды. SimTransport - для AsyncAPIClient (ruby_king_bot),
+BlockingSimTransport - для синхронного APIClient (Found_bot).
+"""
+
+import logging
+from typing import Dict, Any, Optional, Tuple
+import aiohttp
+import requests
+
+from ruby_king_bot.api.transport import TransportResponse, capture_endpoint
+from ruby_king_bot.sim.world import SimulatedWorld
+from ruby_king_bot.sim.mock_server import LatencyModel
+from ruby_king_bot.utils.clock import clock
+
+logger = logging.getLogger(__name__)
+
+
+class _SimTransportBase:
+    """World access and latency shared by both transports"""
+
+    def __init__(self, world: SimulatedWorld, character: str = "sim",
+                 latency: Optional[LatencyModel] = None):
+        """
+        Args:
+            world: Simulated world
+            character: Character key in the world (client token is not used,
+                so results do not depend on the real token)
+            latency: Latency model (no latency by default)
+        """
+        self.world = world
+        self.character = character
+        self.latency = latency or LatencyModel()
+        self.requests = 0
+
+    def _answer(self, method: str, endpoint: str, data: Optional[Dict]) -> Tuple[int, Any]:
+        self.requests += 1
+        return self.world.handle(self.character, method, capture_endpoint(endpoint), data)
+
+
+class SimTransport(_SimTransportBase):
+    """Async transport for AsyncAPIClient"""
+
+    async def send(self, method: str, endpoint: str, url: str, data: Optional[Dict] = None,
+                   timeout: Optional[float] = None) -> TransportResponse:
+        """
+        Answer request from the world
+
+        Raises:
+            aiohttp.ClientError: Injected network failure or HTTP error status
+        """
+        delay = self.latency.sample()
+        if delay:
+            await clock.sleep_async(delay)
+        if self.latency.should_fail():
+            raise aiohttp.ClientConnectionError("Simulated network failure")
+        status, body = self._answer(method, endpoint, data)
+        if status >= 400:
+            raise aiohttp.ClientError(f"HTTP {status}: {body.get('message', '')}")
+        return TransportResponse(status, body, {})
+
+
+class BlockingSimTransport(_SimTransportBase):
+    """Blocking transport for requests-based APIClient"""
+
+    def send(self, method: str, endpoint: str, url: str, data: Optional[Dict] = None,
+             headers: Optional[dict] = None, timeout: Optional[float] = None,
+             check_status: bool = True) -> TransportResponse:
+        """
+        Answer request from the world
+
+        Raises:
+            requests.RequestException: Injected network failure or HTTP error status
+        """
+        delay = self.latency.sample()
+        if delay:
+            clock.sleep(delay)
+        if self.latency.should_fail():
+            raise requests.ConnectionError("Simulated network failure")
+        status, body = self._answer(method, endpoint, data)
+        if check_status and status >= 400:
+            raise requests.HTTPError(f"HTTP {status}: {body.get('message', '')}")
+        return TransportResponse(status, body, {})
@@ -0,0 +1,725 @@
+"""
+Simulated World - in-memory stand-in for the Ruby King game server
+
+Мир строится из complete_world_map.json (квадраты и уровни мобов) и
+mobs-database.json (какие мобы где живут и что с них падает). Сервер
+проверяет КД так же, как настоящий: слишком ранний удар или зелье
+отклоняется сообщением "Очень быстро совершаете действия".
+Время берется из clock, поэтому мир работает и с виртуальными часами.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Tuple, Callable
+
+from ruby_king_bot.api.endpoints import Endpoints
+from ruby_king_bot.config.settings import Settings
+from ruby_king_bot.utils.world_map_index import WorldMapIndex, SquareInfo, MOBS_DB_PATH, get_world_map_index
+from ruby_king_bot.utils.clock import clock
+
+logger = logging.getLogger(__name__)
+
+ITEMS_DB_PATH = "world_map_viewer/data/all-items-database.json"
+
+HEAL_POTION_ID = "m_1"
+MANA_POTION_ID = "m_3"
+GOLD_ID = "m_0_1"
+EQUIPMENT_TYPES = ('weapons', 'armors', 'jewelry')
+
+# Сообщения сервера, на которые реагирует движок
+MSG_TOO_FAST = Settings.TOO_FAST_MESSAGE
+MSG_NO_MORALE = "У вас иссяк боевой дух, отдохните у костра"
+MSG_WRONG_PLACE = "Неверное местонахождения"
+MSG_MOB_NOT_FOUND = "Монстр не найден"
+MSG_MOB_DEAD = "эта цель уже была мертва"
+MSG_RESTING = "Вы отдыхаете у костра"
+MSG_IN_BATTLE = "Вы находитесь в бою"
+
+
+@dataclass
+class WorldConfig:
+    """Rules of the simulated world"""
+    start_level: int = 20
+    start_gold: int = 5000
+    start_potions: int = 300
+    player_name: Optional[str] = None  # None - имя персонажа в метриках (alias)
+    start_geo: str = "city"  # city или farm (бот запущен уже в фарм-зоне)
+    max_morale: int = 100
+    explore_morale_cost: int = 1
+    rest_duration: float = 1200.0  # Реальный сервер: 20 минут у костра
+    attack_cooldown: float = 5.0  # ГКД атаки и скилла
+    skill_cooldown: float = 10.0
+    potion_cooldown: float = 5.0
+    action_interval: float = 1.0  # Между исследованиями и переходами
+    skill_mana_cost: int = 10
+    skill_multiplier: float = 2.5
+    miss_chance: float = 0.05
+    empty_chance: float = 0.15  # Исследование без мобов
+    bats_chance: float = 0.03  # Событие SPEC_BATS (/user/vesna)
+    group_weights: Tuple[float, ...] = (0.7, 0.2, 0.1)  # Вероятность группы из 1, 2, 3 мобов
+    heal_potion_share: float = 0.4  # Доля max HP за зелье
+    mana_potion_share: float = 0.5
+    potion_price: int = 10
+    equipment_price: int = 50
+    inventory_weight: int = 500
+
+
+def player_max_hp(level: int) -> int:
+    return 200 + level * 40
+
+
+def player_max_mp(level: int) -> int:
+    return 100 + level * 10
+
+
+def player_damage(level: int) -> int:
+    return 15 + level * 4
+
+
+def mob_max_hp(level: int) -> int:
+    return 40 + level * 12
+
+
+def mob_damage(level: int) -> int:
+    return 5 + level * 2
+
+
+def mob_exp(mob_level: int, player_level: int) -> int:
+    exp = mob_level * 8
+    if mob_level < player_level - 10:
+        exp //= 3  # Серые мобы дают мало опыта
+    return exp
+
+
+def exp_to_next(level: int) -> int:
+    return 100 * level * level
+
+
+class SimMob:
+    """One mob of a battle"""
+
+    def __init__(self, template: Dict[str, Any], level: int, farm_id: str):
+        self.id = template['id']
+        self.name = template['name']
+        self.photo = template.get('photo')
+        self.desc = template.get('desc')
+        self.drop = template.get('drop', [])
+        self.level = level
+        self.farm_id = farm_id
+        self.max_hp = mob_max_hp(level)
+        self.hp = self.max_hp
+
+    def to_explore(self) -> Dict[str, Any]:
+        """Mob as in farm-mob-one response"""
+        return {
+            'id': self.id,
+            'farmId': self.farm_id,
+            'name': self.name,
+            'lvl': self.level,
+            'photo': self.photo,
+            'desc': self.desc,
+            'drop': self.drop,
+            'stats': {'userCurrentHP': [self.hp, 0]},
+        }
+
+    def to_battle(self) -> Dict[str, Any]:
+        """Mob as in user-attack response"""
+        return {
+            'id': self.id,
+            'farmId': self.farm_id,
+            'name': self.name,
+            'lvl': self.level,
+            'hp': self.hp,
+            'maxHp': self.max_hp,
+            'stats': {'userCurrentHP': [self.hp, 0]},
+        }
+
+
+class SimCharacter:
+    """Server-side state of one character"""
+
+    def __init__(self, token: str, alias: str, config: WorldConfig, seed: Any):
+        self.token = token
+        self.alias = alias  # Имя в метриках (токен туда не попадает)
+        self.name = config.player_name or alias
+        self.rng = random.Random(f"{seed}:{token}")
+        self.level = config.start_level
+        self.exp = 0
+        self.max_hp = player_max_hp(self.level)
+        self.hp = self.max_hp
+        self.max_mp = player_max_mp(self.level)
+        self.mp = self.max_mp
+        self.morale = config.max_morale
+        self.inventory: Dict[str, Dict[str, Any]] = {
+            GOLD_ID: {'id': GOLD_ID, 'typeElement': 'resources', 'count': config.start_gold},
+            HEAL_POTION_ID: {'id': HEAL_POTION_ID, 'typeElement': 'resources', 'count': config.start_potions},
+            MANA_POTION_ID: {'id': MANA_POTION_ID, 'typeElement': 'resources', 'count': config.start_potions},
+        }
+        self.geo = config.start_geo
+        self.location: Optional[str] = None
+        self.direction: Optional[str] = None
+        self.square: Optional[str] = None
+        self.battle: List[SimMob] = []
+        self.rest_until: Optional[float] = None
+        self.rest_started: Optional[float] = None
+        self.bats_pending = False
+        self.next_farm_id = 0
+        self.next_unique_id = 0
+        # Время последних действий (для КД)
+        self.last_combat = float('-inf')
+        self.last_skill = float('-inf')
+        self.last_potion = {HEAL_POTION_ID: float('-inf'), MANA_POTION_ID: float('-inf')}
+        self.last_action = float('-inf')
+        # Метрики
+        self.calls: Counter = Counter()
+        self.kills = 0
+        self.exp_gained = 0
+        self.gold_gained = 0
+        self.potions_used: Counter = Counter()
+        self.too_fast = 0
+        self.deaths = 0
+        self.lost_drops = 0  # Предметы дропа, не поместившиеся в рюкзак
+        self.first_request: Optional[float] = None
+        self.last_request: Optional[float] = None
+
+    @property
+    def gold(self) -> int:
+        return self.inventory[GOLD_ID]['count']
+
+    def add_item(self, item_id: str, type_element: str, count: int, weight: float):
+        """Put dropped or bought item into inventory"""
+        if type_element in EQUIPMENT_TYPES:
+            # Экипировка - отдельный предмет с uniqueId
+            for _ in range(count):
+                self.next_unique_id += 1
+                unique_id = f"{item_id}_{self.next_unique_id}"
+                self.inventory[unique_id] = {
+                    'id': item_id, 'uniqueId': unique_id, 'typeElement': type_element,
+                    'position': 'inventory', 'count': 1, 'weight': weight,
+                }
+            return
+        entry = self.inventory.setdefault(item_id, {'id': item_id, 'typeElement': type_element, 'count': 0})
+        entry['count'] += count
+        entry.setdefault('weight', weight)
+
+    def carried_weight(self) -> float:
+        return sum(item.get('weight', 0) * item.get('count', 1) for item in self.inventory.values())
+
+
+class SimulatedWorld:
+    """Game rules and state of all simulated characters"""
+
+    def __init__(self, config: Optional[WorldConfig] = None, seed: Any = 0,
+                 clock: Callable[[], float] = clock.time,
+                 world_index: Optional[WorldMapIndex] = None,
+                 mobs_path: str = MOBS_DB_PATH, items_path: str = ITEMS_DB_PATH):
+        """
+        Args:
+            config: World rules (defaults to WorldConfig())
+            seed: Seed of all random rolls (same seed - same session)
+            clock: Time source (process-wide clock by default)
+            world_index: Compiled world map (defaults to shared index)
+            mobs_path: Path to mobs-database.json
+            items_path: Path to items database (prices and weights)
+        """
+        self.config = config or WorldConfig()
+        self.seed = seed
+        self.clock = clock
+        self.index = world_index or get_world_map_index()
+        self.mobs_by_name: Dict[str, Dict[str, Any]] = {}
+        for mob in self._load_json(mobs_path, []):
+            self.mobs_by_name.setdefault(mob['name'], mob)
+        self.items: Dict[str, Dict[str, Any]] = {item['id']: item for item in self._load_json(items_path, [])}
+        self.characters: Dict[str, SimCharacter] = {}
+        self._lock = threading.Lock()
+        self._routes = {
+            ('POST', Endpoints.EXPLORE_TERRITORY): self._explore,
+            ('POST', Endpoints.ATTACK_MOB): self._attack,
+            ('POST', Endpoints.USE_HEALING_POTION): self._use_potion,
+            ('POST', Endpoints.START_REST): self._start_rest,
+            ('POST', Endpoints.END_REST): self._end_rest,
+            ('POST', Endpoints.SELL_ITEMS): self._sell,
+            ('POST', Endpoints.BUY_ITEMS): self._buy,
+            ('POST', Endpoints.CHANGE_MAIN_GEO): self._change_main_geo,
+            ('POST', Endpoints.CHANGE_GEO): self._change_geo,
+            ('POST', Endpoints.CHANGE_SQUARE): self._change_square,
+            ('GET', Endpoints.USER_INFO): self._user_info,
+            ('GET', Endpoints.USER_CITY): self._user_city,
+            ('POST', '/user/vesna'): self._vesna,
+        }
+
+    @staticmethod
+    def _load_json(path: str, default: Any) -> Any:
+        if not os.path.exists(path):
+            logger.warning(f"[SIM] {path} not found, using empty data")
+            return default
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    # --- Вход ---
+
+    def character(self, token: str) -> SimCharacter:
+        """Get character of token, creating it on first request"""
+        character = self.characters.get(token)
+        if character is None:
+            alias = f"char_{len(self.characters) + 1}"
+            character = self.characters[token] = SimCharacter(token, alias, self.config, self.seed)
+        return character
+
+    def handle(self, token: str, method: str, endpoint: str,
+               data: Optional[Dict[str, Any]] = None) -> Tuple[int, Dict[str, Any]]:
+        """
+        Handle one API request
+
+        Args:
+            token: Character token (name query parameter)
+            method: HTTP method
+            endpoint: API endpoint without base URL and query string
+            data: JSON body
+
+        Returns:
+            (HTTP status, response body)
+        """
+        handler = self._routes.get((method.upper(), endpoint))
+        if handler is None:
+            return 404, {'status': 'fail', 'message': f"Unknown endpoint {method} {endpoint}"}
+        with self._lock:
+            now = self.clock()
+            character = self.character(token)
+            character.calls[endpoint] += 1
+            if character.first_request is None:
+                character.first_request = now
+            character.last_request = now
+            self._update_rest(character, now)
+            return 200, handler(character, now, data or {})
+
+    # --- Общие проверки ---
+
+    def _fail(self, message: str) -> Dict[str, Any]:
+        return {'status': 'fail', 'message': message}
+
+    def _too_fast(self, character: SimCharacter) -> Dict[str, Any]:
+        character.too_fast += 1
+        return self._fail(MSG_TOO_FAST)
+
+    def _check_action_interval(self, character: SimCharacter, now: float) -> Optional[Dict[str, Any]]:
+        """Reject exploration/travel sent faster than action interval"""
+        if now - character.last_action < self.config.action_interval:
+            return self._too_fast(character)
+        character.last_action = now
+        return None
+
+    def _update_rest(self, character: SimCharacter, now: float):
+        """Finish rest whose time is over"""
+        if character.rest_until is not None and now >= character.rest_until:
+            self._finish_rest(character, 1.0)
+
+    def _finish_rest(self, character: SimCharacter, share: float):
+        character.morale = min(self.config.max_morale,
+                               character.morale + int(self.config.max_morale * share))
+        character.hp = min(character.max_hp, character.hp + int(character.max_hp * share))
+        character.mp = min(character.max_mp, character.mp + int(character.max_mp * share))
+        character.rest_until = None
+        character.rest_started = None
+
+    def _user_payload(self, character: SimCharacter) -> Dict[str, Any]:
+        """User object as in game responses"""
+        return {
+            'name': character.name,
+            'lvl': character.level,
+            'userCurrentXP': character.exp,
+            'userNextXP': exp_to_next(character.level),
+            'gold': character.gold,
+            'hp': character.hp,
+            'maxHp': character.max_hp,
+            'morale': character.morale,
+            'inventoryWeight': self.config.inventory_weight,
+            'inventory': {key: dict(item) for key, item in character.inventory.items()},
+            'stats': {
+                'userCurrentHP': [character.hp, 0],
+                'userMaxHP': [character.max_hp, 0],
+                'userCurrentMP': [character.mp, 0],
+                'userMaxMP': [character.max_mp, 0],
+                'userStamina': [character.morale, 0],
+                'userMaxStamina': [self.config.max_morale, 0],
+            },
+        }
+
+    def _squares_payload(self, location: str, direction: str) -> List[Dict[str, Any]]:
+        """Squares of direction in change-geo format"""
+        return [{'position': info.square, 'lvlMobs': self._lvl_mobs(info)}
+                for info in self.index.squares(location, direction)]
+
+    @staticmethod
+    def _lvl_mobs(info: SquareInfo) -> Optional[Dict[str, Any]]:
+        if info.is_inner:
+            return {'locoId': info.inner_loco_id, 'locoName': info.inner_loco_name}
+        if info.level_min is None:
+            return None
+        if info.level_min == info.level_max:
+            return {'mobLvl': info.level_min}
+        return {'mobLvl': f"{info.level_min}-{info.level_max}"}
+
+    # --- Исследование ---
+
+    def _mob_templates(self, location: str, direction: str) -> List[Dict[str, Any]]:
+        templates = [self.mobs_by_name[name] for name in self.index.mobs_at(location, direction)
+                     if name in self.mobs_by_name]
+        if templates:
+            return templates
+        # Сторона без известных мобов - безымянный обитатель с золотом
+        location_name = self.index.location_name(location, location)
+        return [{
+            'id': f"mob_sim_{location}_{direction}",
+            'name': f"Обитатель: {location_name}",
+            'drop': [{'id': GOLD_ID, 'typeElement': 'resources', 'count': 10, 'chance': 100}],
+        }]
+
+    def _explore(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        if character.battle:
+            # Незавершенный бой - сервер возвращает тех же мобов
+            return {'status': 'success', 'mob': [mob.to_explore() for mob in character.battle if mob.hp > 0]}
+        if character.rest_until is not None:
+            return self._fail(MSG_RESTING)
+        if character.geo != 'farm' or not (character.location and character.direction and character.square):
+            return self._fail(MSG_WRONG_PLACE)
+        rejected = self._check_action_interval(character, now)
+        if rejected:
+            return rejected
+        if character.morale < self.config.explore_morale_cost:
+            return self._fail(MSG_NO_MORALE)
+        character.morale -= self.config.explore_morale_cost
+
+        rng = character.rng
+        if rng.random() < self.config.bats_chance:
+            character.bats_pending = True
+            return {'status': 'success', 'action': 'SPEC_BATS', 'message': "Вас атаковали летучие мыши!"}
+        info = self.index.square(character.location, character.direction, character.square)
+        if info is None or info.is_inner or info.level_min is None or rng.random() < self.config.empty_chance:
+            return {'status': 'success', 'message': "Вы никого не встретили"}
+
+        templates = self._mob_templates(character.location, character.direction)
+        group_size = rng.choices(range(1, len(self.config.group_weights) + 1), self.config.group_weights)[0]
+        for _ in range(group_size):
+            character.next_farm_id += 1
+            template = rng.choice(templates)
+            level = rng.randint(info.level_min, info.level_max)
+            character.battle.append(SimMob(template, level, f"{character.next_farm_id}_{template['id']}"))
+        return {'status': 'success', 'mob': [mob.to_explore() for mob in character.battle]}
+
+    # --- Бой ---
+
+    def _roll_damage(self, rng: random.Random, base: int) -> int:
+        return max(1, int(base * rng.uniform(0.75, 1.25)))
+
+    def _attack(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        target = next((mob for mob in character.battle if mob.farm_id == data.get('mobId')), None)
+        if target is None:
+            return self._fail(MSG_MOB_NOT_FOUND)
+        if target.hp <= 0:
+            return self._fail(MSG_MOB_DEAD)
+        is_skill = bool(data.get('skillId'))
+        if now - character.last_combat < self.config.attack_cooldown:
+            return self._too_fast(character)
+        if is_skill:
+            if now - character.last_skill < self.config.skill_cooldown:
+                return self._too_fast(character)
+            if character.mp < self.config.skill_mana_cost:
+                return self._fail("Недостаточно маны")
+            character.mp -= self.config.skill_mana_cost
+            character.last_skill = now
+        character.last_combat = now
+
+        rng = character.rng
+        arr_logs = []
+        if rng.random() < self.config.miss_chance:
+            damage = 0
+            message = f"{character.name} промахивается по {target.name}"
+        else:
+            damage = self._roll_damage(rng, player_damage(character.level))
+            if is_skill:
+                damage = int(damage * self.config.skill_multiplier)
+            message = f"{character.name} наносит {damage} урона {target.name}"
+        target.hp = max(0, target.hp - damage)
+        arr_logs.append({'isMob': False, 'attname': character.name, 'defname': target.name,
+                         'damage': damage, 'winAll': target.hp <= 0, 'messages': [message]})
+
+        # Ответные удары живых мобов
+        for mob in character.battle:
+            if mob.hp <= 0:
+                continue
+            hit = self._roll_damage(rng, mob_damage(mob.level))
+            character.hp = max(0, character.hp - hit)
+            arr_logs.append({'isMob': True, 'attname': mob.name, 'defname': character.name,
+                             'damage': hit, 'messages': [f"{mob.name} наносит {hit} урона вам"]})
+            if character.hp <= 0:
+                break
+
+        response = {
+            'status': 'success',
+            'arrLogs': arr_logs,
+            'mob': target.to_battle(),
+            'mobTargetHP': {'id': target.farm_id, 'hp': target.hp},
+            'mobs': [mob.to_battle() for mob in character.battle],
+        }
+        if character.hp <= 0:
+            self._lose(character)
+            response['statusBattle'] = 'lose'
+            response['message'] = "Вы погибли"
+        elif all(mob.hp <= 0 for mob in character.battle):
+            response['statusBattle'] = 'win'
+            response['dataWin'] = self._win(character)
+        response['user'] = self._user_payload(character)
+        return response
+
+    def _win(self, character: SimCharacter) -> Dict[str, Any]:
+        """Rewards for finished battle"""
+        rng = character.rng
+        exp = 0
+        drops: Counter = Counter()
+        types: Dict[str, str] = {}
+        for mob in character.battle:
+            exp += mob_exp(mob.level, character.level)
+            for drop in mob.drop:
+                chance = drop.get('chance') or 0
+                min_level = drop.get('minLvlDrop')
+                if isinstance(min_level, int) and character.level < min_level:
+                    continue
+                if rng.random() * 100 < float(chance):
+                    drops[drop['id']] += drop.get('count', 1)
+                    types[drop['id']] = drop.get('typeElement', 'resources')
+        character.kills += len(character.battle)
+        character.battle = []
+
+        free_weight = self.config.inventory_weight - character.carried_weight()
+        for item_id, count in list(drops.items()):
+            weight = self.items.get(item_id, {}).get('weight') or (5 if types[item_id] in EQUIPMENT_TYPES else 0)
+            if weight:
+                # Что не помещается в рюкзак, пропадает
+                fits = min(count, max(0, int(free_weight // weight)))
+                character.lost_drops += count - fits
+                free_weight -= fits * weight
+                count = drops[item_id] = fits
+                if not count:
+                    del drops[item_id]
+                    continue
+            character.add_item(item_id, types[item_id], count, weight)
+        character.gold_gained += drops.get(GOLD_ID, 0)
+        self._add_exp(character, exp)
+        return {
+            'expWin': exp,
+            'drop': [{'id': item_id, 'typeElement': types[item_id], 'count': count}
+                     for item_id, count in drops.items()],
+        }
+
+    def _add_exp(self, character: SimCharacter, exp: int):
+        character.exp += exp
+        character.exp_gained += exp
+        while character.exp >= exp_to_next(character.level):
+            character.exp -= exp_to_next(character.level)
+            character.level += 1
+            character.max_hp = player_max_hp(character.level)
+            character.max_mp = player_max_mp(character.level)
+            logger.info(f"[SIM] {character.name} reached level {character.level}")
+
+    def _lose(self, character: SimCharacter):
+        """Player died: battle lost, respawn in city"""
+        character.deaths += 1
+        character.battle = []
+        character.hp = 1
+        character.geo = 'city'
+        character.location = character.direction = character.square = None
+
+    def _use_potion(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        potion_id = data.get('elemId')
+        if potion_id not in character.last_potion:
+            return self._fail("Предмет не найден")
+        if now - character.last_potion[potion_id] < self.config.potion_cooldown:
+            return self._too_fast(character)
+        item = character.inventory.get(potion_id)
+        if not item or item['count'] <= 0:
+            return self._fail("Недостаточно зелий")
+        item['count'] -= 1
+        character.last_potion[potion_id] = now
+        character.potions_used[potion_id] += 1
+        if potion_id == HEAL_POTION_ID:
+            character.hp = min(character.max_hp, character.hp + int(character.max_hp * self.config.heal_potion_share))
+        else:
+            character.mp = min(character.max_mp, character.mp + int(character.max_mp * self.config.mana_potion_share))
+        return {'status': 'success', 'user': self._user_payload(character)}
+
+    # --- Отдых ---
+
+    def _start_rest(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        if character.battle:
+            return self._fail(MSG_IN_BATTLE)
+        if character.rest_until is not None:
+            return self._fail(MSG_RESTING)
+        character.rest_started = now
+        character.rest_until = now + self.config.rest_duration
+        return {'status': 'success', 'timeEnd': int(character.rest_until * 1000)}
+
+    def _end_rest(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        if character.rest_until is None:
+            return self._fail("Вы не отдыхаете")
+        self._finish_rest(character, (now - character.rest_started) / self.config.rest_duration)
+        return {'status': 'success', 'user': self._user_payload(character)}
+
+    # --- Торговец ---
+
+    def _item_price(self, item: Dict[str, Any]) -> int:
+        if item.get('typeElement') in EQUIPMENT_TYPES:
+            return self.config.equipment_price
+        return self.items.get(item['id'], {}).get('price') or 1
+
+    def _buy(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        if character.geo != 'city':
+            return self._fail(MSG_WRONG_PLACE)
+        count = int(data.get('count', 0))
+        cost = count * self.config.potion_price
+        if count <= 0 or data.get('elemId') not in (HEAL_POTION_ID, MANA_POTION_ID):
+            return self._fail("Предмет не продается")
+        if cost > character.gold:
+            return self._fail("Недостаточно золота")
+        character.inventory[GOLD_ID]['count'] -= cost
+        character.add_item(data['elemId'], 'resources', count, 0)
+        return {'status': 'success', 'user': self._user_payload(character)}
+
+    def _sell(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        if character.geo != 'city':
+            return self._fail(MSG_WRONG_PLACE)
+        gold_earned = 0
+        for entry in data.get('items', []):
+            item = character.inventory.get(entry.get('id'))
+            if not item or item.get('position', 'inventory') != 'inventory' or entry.get('id') == GOLD_ID:
+                continue
+            count = min(int(entry.get('count', 1)), item.get('count', 1))
+            gold_earned += self._item_price(item) * count
+            item['count'] = item.get('count', 1) - count
+            if item['count'] <= 0:
+                del character.inventory[entry['id']]
+        character.inventory[GOLD_ID]['count'] += gold_earned
+        character.gold_gained += gold_earned
+        return {'status': 'success', 'goldEarned': gold_earned, 'user': self._user_payload(character)}
+
+    # --- Перемещение ---
+
+    def _change_main_geo(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        position = data.get('position')
+        if position not in ('city', 'farm'):
+            return self._fail("Неизвестная позиция")
+        if character.battle:
+            return self._fail(MSG_IN_BATTLE)
+        rejected = self._check_action_interval(character, now)
+        if rejected:
+            return rejected
+        character.geo = position
+        return {'status': 'success', 'geo': position}
+
+    def _change_geo(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        if character.geo != 'farm':
+            return self._fail(MSG_WRONG_PLACE)
+        if character.battle:
+            return self._fail(MSG_IN_BATTLE)
+        rejected = self._check_action_interval(character, now)
+        if rejected:
+            return rejected
+        if data.get('typeAction') == 'reset':
+            character.location = character.direction = character.square = None
+            return {'status': 'success'}
+        location, direction = data.get('loco'), data.get('direction')
+        if location not in self.index or direction not in self.index.directions(location):
+            return self._fail("Локация не найдена")
+        character.location, character.direction, character.square = location, direction, None
+        return {'status': 'success', 'squares': self._squares_payload(location, direction)}
+
+    def _change_square(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        if character.geo != 'farm' or not character.location:
+            return self._fail(MSG_WRONG_PLACE)
+        if character.battle:
+            return self._fail(MSG_IN_BATTLE)
+        rejected = self._check_action_interval(character, now)
+        if rejected:
+            return rejected
+        square = data.get('square')
+        if self.index.square(character.location, character.direction, square) is None:
+            return self._fail("Квадрат не найден")
+        character.square = square
+        return {'status': 'success', 'square': square}
+
+    # --- Информация и события ---
+
+    def _user_info(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        response = {
+            'status': 'success',
+            'geo': character.geo,
+            'loco': character.location,
+            'direction': character.direction,
+            'square': character.square,
+            'user': self._user_payload(character),
+        }
+        if character.geo == 'farm' and character.location and character.direction:
+            response['squares'] = self._squares_payload(character.location, character.direction)
+        return response
+
+    def _user_city(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {'status': 'success', 'user': self._user_payload(character)}
+
+    def _vesna(self, character: SimCharacter, now: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        if not character.bats_pending:
+            return self._fail("Событие не найдено")
+        character.bats_pending = False
+        return {'status': 'success', 'message': "Летучие мыши разогнаны"}
+
+    # --- Метрики ---
+
+    def character_metrics(self, character: SimCharacter) -> Dict[str, Any]:
+        """Throughput metrics of one character"""
+        elapsed = (character.last_request - character.first_request) if character.first_request is not None else 0.0
+        hours = max(elapsed / 3600, 1e-9)
+        calls = sum(character.calls.values())
+        return {
+            'level': character.level,
+            'elapsed': elapsed,
+            'api_calls': calls,
+            'calls_by_endpoint': dict(character.calls),
+            'kills': character.kills,
+            'exp': character.exp_gained,
+            'gold': character.gold_gained,
+            'potions_used': dict(character.potions_used),
+            'too_fast': character.too_fast,
+            'deaths': character.deaths,
+            'lost_drops': character.lost_drops,
+            'kills_per_hour': character.kills / hours if elapsed else 0.0,
+            'calls_per_kill': calls / character.kills if character.kills else None,
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        """Metrics of all characters and totals"""
+        with self._lock:
+            per_character = {character.alias: self.character_metrics(character)
+                             for character in self.characters.values()}
+        kills = sum(m['kills'] for m in per_character.values())
+        calls = sum(m['api_calls'] for m in per_character.values())
+        return {
+            'characters': per_character,
+            'totals': {
+                'characters': len(per_character),
+                'kills': kills,
+                'api_calls': calls,
+                'kills_per_hour': sum(m['kills_per_hour'] for m in per_character.values()),
+                'calls_per_kill': calls / kills if kills else None,
+                'too_fast': sum(m['too_fast'] for m in per_character.values()),
+                'deaths': sum(m['deaths'] for m in per_character.values()),
+            },
+        }
+
+    def reset(self):
+        """Forget all characters"""
+        with self._lock:
+            self.characters.clear()